@@ -12,10 +12,27 @@ to remove obsolete imports.
 from .config_loader import load_config_from_py
 from .parameter_manager import ParameterManager
 from .scenario_definitions import get_scenarios
+from .scenario_specs import TabulatedLoadProfile, compile_scenario, load_scenario_specs, save_scenario_specs
 from .scenario_executor import ScenarioExecutor
-from .metrics_engine import MetricsEngine
+from .metrics_engine import MetricsEngine, stack_trajectories
+from .metric_registry import METRIC_REGISTRY, register_metric
 from .visualization_engine import VisualizationEngine
+from .plot_downsampling import downsample_frame, lttb_indices, minmax_indices
 from .report_generator import ReportGenerator
+from .latency_profiler import LatencyHistogram, StepLatencyProfiler
+from .realtime_pacer import RealTimePacer
+from .parallel_executor import run_scenario_matrix
+from .trajectory_recorder import TrajectoryRecorder
+from .trajectory_decimator import EnvelopeDecimator
+from .streaming_metrics import StreamingMetrics
+from .result_cache import SimulationResultCache
+from .multi_seed import SeedComparison, run_multi_seed
+from .scenario_families import ScenarioFamily, SCENARIO_FAMILIES, get_family
+from .parameter_sweep import run_sweep, sweep_heatmap
+from .sensitivity import SENSITIVITY_PARAMETERS, run_sobol_analysis
+from .rare_event import estimate_failure_probability, subset_simulation
+from .falsification import falsify, write_falsified_scenarios
+from .failure_minimization import minimize_failure, write_minimal_scenario
 
 # Explicitly declare the public API of the 'analysis' package
 # This removes the obsolete 'calculate_settling_time' function.
@@ -23,8 +40,41 @@ __all__ = [
     'load_config_from_py',
     'ParameterManager',
     'get_scenarios',
+    'TabulatedLoadProfile',
+    'compile_scenario',
+    'load_scenario_specs',
+    'save_scenario_specs',
     'ScenarioExecutor',
     'MetricsEngine',
+    'stack_trajectories',
+    'METRIC_REGISTRY',
+    'register_metric',
     'VisualizationEngine',
-    'ReportGenerator'
+    'downsample_frame',
+    'lttb_indices',
+    'minmax_indices',
+    'ReportGenerator',
+    'LatencyHistogram',
+    'StepLatencyProfiler',
+    'RealTimePacer',
+    'run_scenario_matrix',
+    'TrajectoryRecorder',
+    'EnvelopeDecimator',
+    'StreamingMetrics',
+    'SimulationResultCache',
+    'SeedComparison',
+    'run_multi_seed',
+    'ScenarioFamily',
+    'SCENARIO_FAMILIES',
+    'get_family',
+    'run_sweep',
+    'sweep_heatmap',
+    'SENSITIVITY_PARAMETERS',
+    'run_sobol_analysis',
+    'estimate_failure_probability',
+    'subset_simulation',
+    'falsify',
+    'write_falsified_scenarios',
+    'minimize_failure',
+    'write_minimal_scenario'
 ]
@@ -0,0 +1,291 @@
+# analysis/failure_minimization.py
+
+"""
+================================================================================
+          Minimization of Failing Scenarios to the Shortest Reproducing Window
+================================================================================
+When a controller fails a long scenario (terminates on a safety limit at
+t = 340 s of a 500 s run), every debugging attempt re-runs the whole scenario.
+`minimize_failure` shrinks a failing (scenario, controller) pair to a compact
+scenario that still reproduces the failure, typically a few seconds long:
+
+  1. Reference run: the scenario is run once, snapshotting the plant state
+     (PWRGymEnvUnified.get_state) every `snapshot_interval_s`, and the failure
+     time and violated limits are recorded.
+  2. Start time: a candidate scenario starts from the snapshot at step s -- the
+     'initial_state' reset option restores it, the load profile is shifted by
+     s steps and the run ends `tail_s` after the original failure. The
+     controller starts from reset, so early snapshots reproduce the failure and
+     late ones may not; the latest reproducing snapshot is found by bisection.
+  3. Load profile: the window's per-step loads are replaced by a constant if
+     that still fails, else simplified to the fewest linear segments
+     (Ramer-Douglas-Peucker) whose tolerance, bisected, keeps the failure.
+
+A candidate reproduces the failure when its run ends on a violation of one of
+the limits violated originally. Domain-randomized grid inertia and damping are
+fixed at their realized values (physics_overrides), so the compact scenario
+does not depend on its name's seed. The result is a plain scenario spec,
+written with scenario_specs.save_scenario_specs.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+import numpy as np
+
+from analysis.parameter_manager import ParameterManager
+from analysis.scenario_executor import ScenarioExecutor
+from analysis.scenario_specs import compile_scenario, save_scenario_specs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MINIMIZATION_SETTINGS = {'snapshot_interval_s': 0.2, 'tail_s': 1.0, 'tolerance_iterations': 8}
+
+# Time-based keys of env_modifications entries, shifted with the window start
+_EVENT_TIME_KEYS = ('start_time', 'end_time', 'time', 'time_s')
+
+
+def violated_limits(info: Dict[str, Any], core_config: Dict[str, Any]) -> List[str]:
+    """The safety limits violated in a step's info, as checked by the environment's termination."""
+    limits = core_config.get('safety_limits', {})
+    values = [info.get('T_fuel', np.nan), info.get('speed_rpm', np.nan), info.get('grid_frequency_hz', np.nan)]
+    if not np.all(np.isfinite(values)):
+        return ['non_finite']
+    violated = []
+    if info['T_fuel'] > limits.get('max_fuel_temp_c', 2800.0):
+        violated.append('fuel_temperature')
+    if info['speed_rpm'] > limits.get('max_speed_rpm', 2250.0):
+        violated.append('speed')
+    if not limits.get('min_frequency_hz', 59.0) < info['grid_frequency_hz'] < limits.get('max_frequency_hz', 61.0):
+        violated.append('frequency')
+    return violated
+
+
+def simplify_polyline(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Indices of the Ramer-Douglas-Peucker simplification of (x, y): max vertical error <= tolerance."""
+    keep = np.zeros(len(x), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(x) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        inner = np.arange(first + 1, last)
+        line = y[first] + (y[last] - y[first]) * (x[inner] - x[first]) / (x[last] - x[first])
+        errors = np.abs(y[inner] - line)
+        worst = int(np.argmax(errors))
+        if errors[worst] > tolerance:
+            split = int(inner[worst])
+            keep[split] = True
+            stack.extend([(first, split), (split, last)])
+    return np.flatnonzero(keep)
+
+
+class _FailureRunner:
+    """Runs compact candidate scenarios of one failing (scenario, controller) pair."""
+
+    def __init__(self, executor: ScenarioExecutor, controller_name: str, controller: Any, core_config: Dict[str, Any],
+                 candidate_name: str):
+        self.executor = executor
+        self.controller_name = controller_name
+        self.controller = controller
+        self.core_config = core_config
+        self.candidate_name = candidate_name
+        self.n_runs = 0
+
+    def run(self, scenario_name: str, scenario: Dict[str, Any],
+            on_step: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> Tuple[int, Dict[str, Any]]:
+        """Runs a scenario; returns (number of steps taken, info of the last step)."""
+        self.controller.reset()
+        self.n_runs += 1
+        steps, last = 0, {}
+        for info in self.executor.execute_and_yield(scenario_name, scenario, self.controller_name, self.controller):
+            if 'error' in info:
+                raise RuntimeError(f"Scenario '{scenario_name}' could not be run: {info['error']}")
+            last = info
+            if info['step'] >= 0:
+                steps = info['step'] + 1
+            if on_step is not None:
+                on_step(info['step'], info)
+        return steps, last
+
+    def reproduces(self, spec: Dict[str, Any], limits: List[str]) -> Tuple[bool, int]:
+        """Whether a candidate spec ends on one of `limits` before its last step, and its step count."""
+        scenario = compile_scenario(self.candidate_name, spec, self.core_config)
+        steps, last = self.run(self.candidate_name, scenario)
+        failed = steps < scenario['max_steps'] and bool(set(violated_limits(last, self.core_config)) & set(limits))
+        return failed, steps
+
+
+def _window_spec(base: Dict[str, Any], description: str, snapshot: Dict[str, Any], start_step: int, end_step: int,
+                 times_s: np.ndarray, loads_mw: np.ndarray, dt: float) -> Dict[str, Any]:
+    """A compact scenario spec: the window [start_step, end_step) of the original run."""
+    spec: Dict[str, Any] = {
+        'description': description,
+        'max_steps': int(end_step - start_step),
+        'load_profile': {'type': 'tabulated', 'units': 'mw', 'times': [float(t) for t in times_s],
+                         'loads': [float(load) for load in loads_mw]},
+        'reset_options': {'initial_power_level': float(snapshot['reactor']['power_level']), 'initial_state': snapshot},
+    }
+    t0 = start_step * dt
+    modifications = []
+    for modification in base.get('env_modifications') or []:
+        shifted = {key: (value - t0 if key in _EVENT_TIME_KEYS and isinstance(value, (int, float)) else value)
+                   for key, value in modification.items()}
+        if shifted.get('end_time', np.inf) >= 0.0:
+            modifications.append(shifted)
+    if modifications:
+        spec['env_modifications'] = modifications
+    # Faults in effect at the window start start with it, marked 'ongoing' since the snapshot already holds
+    # their one-shot effects (held sensor readings restart from the snapshot's values); those over before it are dropped
+    faults = []
+    for event in base.get('fault_events') or []:
+        end = np.inf if event.get('duration') is None else event['start_time'] + event['duration']
+        if end < t0 or (event['start_time'] < t0 and event.get('duration') is None and event['type'] == 'controller_restart'):
+            continue
+        start = max(event['start_time'] - t0, 0.0)
+        carried = {'ongoing': True} if event['start_time'] < t0 else {}
+        faults.append({**event, 'start_time': start, **carried, **({} if end == np.inf else {'duration': end - t0 - start})})
+    if faults:
+        spec['fault_events'] = faults
+    for key in ('adversarial_noise', 'physics_overrides', 'flags'):
+        if base.get(key):
+            spec[key] = base[key]
+    return spec
+
+
+def minimize_failure(config_path: str,
+                     scenario_name: str,
+                     controller: str,
+                     scenario: Optional[Dict[str, Any]] = None,
+                     settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Shrinks a failing (scenario, controller) pair to the shortest reproducing compact scenario.
+
+    Args:
+        config_path (str): Configuration file.
+        scenario_name (str): The failing scenario, from get_scenarios() unless `scenario` is given.
+        controller (str): Controller name or model path for `load_controller`.
+        scenario (Optional[Dict]): A compiled scenario config to use instead of the library's.
+        settings (Optional[Dict]): Overrides of CORE_PARAMETERS['simulation']['failure_minimization'] /
+            DEFAULT_MINIMIZATION_SETTINGS.
+
+    Returns:
+        {'name', 'spec' (the compact scenario spec), 'violated_limits', 'failure_time_s' (original run),
+         'start_time_s' (window start in the original run), 'duration_s', 'original_duration_s',
+         'breakpoints' (load profile points), 'reproduced' (the final spec was verified), 'n_runs'}
+
+    Raises:
+        ValueError: If the scenario does not fail for the controller.
+    """
+    from analysis.scenario_definitions import get_scenarios
+    from controllers import load_controller
+
+    full_config = ParameterManager(config_filepath=config_path).get_all_parameters()
+    core_config = full_config['CORE_PARAMETERS']
+    settings = {**DEFAULT_MINIMIZATION_SETTINGS, **core_config.get('simulation', {}).get('failure_minimization', {}),
+                **(settings or {})}
+    dt = core_config.get('simulation', {}).get('dt', 0.02)
+    scenario = scenario if scenario is not None else get_scenarios(core_config)[scenario_name]
+    instance, report_name = load_controller(controller, full_config, dt)
+    if instance is None:
+        raise RuntimeError(f"Could not load controller: {controller}")
+    executor = ScenarioExecutor(full_config, profile_latency=False, realtime={}, trajectory_store={}, recording={})
+    minimal_name = f"minimal_{scenario_name}_{report_name}"
+    runner = _FailureRunner(executor, report_name, instance, core_config, minimal_name)
+
+    # 1. Reference run with periodic state snapshots (step -1 is the reset state)
+    interval = max(int(round(settings['snapshot_interval_s'] / dt)), 1)
+    snapshots: Dict[int, Dict[str, Any]] = {}
+    realized_grid: Dict[str, float] = {}
+
+    def snapshot(step: int, info: Dict[str, Any]):
+        if (step + 1) % interval == 0:
+            env = executor.running_envs[(scenario_name, report_name)]
+            snapshots[step + 1] = env.get_state()
+            if not realized_grid:
+                realized_grid.update({'H': float(env.grid.H), 'D': float(env.grid.D)})
+
+    steps, last = runner.run(scenario_name, scenario, on_step=snapshot)
+    limits = violated_limits(last, core_config)
+    max_steps = scenario.get('max_steps') or core_config.get('simulation', {}).get('max_steps', 5000)
+    if steps >= min(max_steps, core_config.get('simulation', {}).get('max_steps', 5000)) or not limits:
+        raise ValueError(f"'{scenario_name}' does not fail for {report_name} ({steps} steps, no safety limit violated).")
+    failure_time = steps * dt
+    logger.info(f"'{scenario_name}' / {report_name} fails at t = {failure_time:.2f} s on {limits}; "
+                f"{len(snapshots)} snapshots taken.")
+
+    # The load of every env step of the window: the env evaluates the profile at step k >= 1 with time k * dt
+    end_step = steps + max(int(round(settings['tail_s'] / dt)), 1)
+    profile = scenario.get('load_profile_func')
+    all_steps = np.arange(end_step + 1)
+    if profile is not None:
+        loads = np.array([profile(k * dt, int(k)) for k in all_steps], dtype=float)
+    else:
+        loads = np.full(len(all_steps), float(snapshots[0]['grid']['current_demand']))
+
+    base = {'physics_overrides': {**(scenario.get('physics_overrides') or {}),
+                                  'grid': {**(scenario.get('physics_overrides') or {}).get('grid', {}), **realized_grid}},
+            'env_modifications': scenario.get('env_modifications'), 'adversarial_noise': scenario.get('adversarial_noise'),
+            'fault_events': scenario.get('fault_events'),
+            'flags': {key: value for key, value in scenario.items()
+                      if key.startswith('is_') and isinstance(value, bool) and key != 'is_domain_randomization_drill'}}
+    description = (f"Minimal reproduction of {report_name} failing '{scenario_name}' on {', '.join(limits)} "
+                   f"(originally at t = {failure_time:.2f} s).")
+
+    def window(start_step: int, tolerance: Optional[float]) -> Dict[str, Any]:
+        window_steps = all_steps[start_step:]
+        window_loads = loads[start_step:]
+        times = (window_steps - start_step) * dt
+        if tolerance is None:  # constant load
+            kept = np.array([0, len(times) - 1])
+            return _window_spec(base, description, snapshots[start_step], start_step, end_step, times[kept],
+                                np.full(2, window_loads[min(1, len(window_loads) - 1)]), dt)
+        kept = simplify_polyline(times, window_loads, tolerance)
+        return _window_spec(base, description, snapshots[start_step], start_step, end_step, times[kept],
+                            window_loads[kept], dt)
+
+    # 2. Latest reproducing start, by bisection over the snapshots before the failure
+    starts = sorted(step for step in snapshots if step < steps)
+    low, high = 0, len(starts) - 1
+    if not runner.reproduces(window(starts[0], 0.0), limits)[0]:
+        raise RuntimeError(f"The failure of '{scenario_name}' / {report_name} does not reproduce from its initial state.")
+    while low < high:
+        middle = (low + high + 1) // 2
+        if runner.reproduces(window(starts[middle], 0.0), limits)[0]:
+            low = middle
+        else:
+            high = middle - 1
+    start_step = starts[low]
+    logger.info(f"Failure reproduces from t = {start_step * dt:.2f} s ({runner.n_runs} runs so far).")
+
+    # 3. Simplest reproducing load profile: constant, else the largest bisected RDP tolerance
+    if runner.reproduces(window(start_step, None), limits)[0]:
+        spec = window(start_step, None)
+    else:
+        window_loads = loads[start_step:]
+        good, bad = 0.0, float(np.ptp(window_loads))
+        for _ in range(int(settings['tolerance_iterations'])):
+            middle = 0.5 * (good + bad)
+            if runner.reproduces(window(start_step, middle), limits)[0]:
+                good = middle
+            else:
+                bad = middle
+        spec = window(start_step, good)
+
+    reproduced, compact_steps = runner.reproduces(spec, limits)
+    if not reproduced:
+        logger.warning(f"The compact scenario of '{scenario_name}' / {report_name} did not reproduce the failure on verification.")
+    result = {'name': minimal_name, 'spec': spec, 'violated_limits': limits, 'failure_time_s': failure_time,
+              'start_time_s': start_step * dt, 'duration_s': spec['max_steps'] * dt, 'original_duration_s': max_steps * dt,
+              'breakpoints': len(spec['load_profile']['times']), 'reproduced': reproduced, 'n_runs': runner.n_runs}
+    logger.info(f"Minimal scenario '{minimal_name}': {result['duration_s']:.2f} s from t = {result['start_time_s']:.2f} s, "
+                f"{result['breakpoints']} load points, fails after {compact_steps * dt:.2f} s ({runner.n_runs} runs).")
+    return result
+
+
+def write_minimal_scenario(result: Dict[str, Any], path: str):
+    """Writes a minimize_failure result as a YAML scenario spec file."""
+    header = (f"{result['spec']['description']}\nWindow of {result['duration_s']:.2f} s starting at "
+              f"t = {result['start_time_s']:.2f} s of the original run, from a snapshot of its plant state.")
+    save_scenario_specs({result['name']: result['spec']}, path, header=header)
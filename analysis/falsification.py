@@ -0,0 +1,165 @@
+# analysis/falsification.py
+
+"""
+================================================================================
+          Falsification: Worst-Case Load Profiles per Controller
+================================================================================
+The adversarial scenarios of the library are hand-written. The falsifier
+searches a scenario family (scenario_families.py) -- step sizes, timings, ramp
+rates, initial power and grid inertia within their operational ranges -- for
+the disturbances that bring a controller closest to, or over, a safety limit.
+
+Objective: the limit margin of rare_event.py (smallest normalized distance to
+the fuel temperature, frequency and speed limits over the run; <= 0 is a
+violation), minimized with SciPy's differential evolution (derivative-free,
+as in the PID/FLC optimizers). The objective is vectorized: each generation's
+population is run as one batch, on the worker pool when `max_workers` > 1
+(parameter_sweep.open_evaluator, metrics-only, per-run result cache). With
+'stop_on_violation' the search ends with the first generation that contains
+a violation, the initial population included.
+
+The `n_worst` most severe distinct points are returned, and written by
+`write_falsified_scenarios` as a YAML scenario spec file, flagged as
+adversarial drills; listing it in CORE_PARAMETERS['simulation']
+['scenario_spec_paths'] adds them to the scenario library.
+"""
+
+import logging
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import differential_evolution
+
+from analysis.parameter_manager import ParameterManager
+from analysis.parameter_sweep import open_evaluator
+from analysis.rare_event import PERFORMANCE_FUNCTIONS
+from analysis.scenario_families import ScenarioFamily
+from analysis.scenario_specs import save_scenario_specs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FALSIFICATION_SETTINGS = {
+    'popsize': 5, 'max_generations': 30, 'stop_on_violation': True, 'n_worst': 3,
+    'performance': 'limit_margin', 'seed': 0,
+}
+
+
+class _ViolationFound(Exception):
+    """Ends the search from within the objective, as soon as a generation contains a violation."""
+
+
+def falsify(config_path: str,
+            family: ScenarioFamily,
+            controller: str,
+            parameters: Optional[List[str]] = None,
+            ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+            settings: Optional[Dict[str, Any]] = None,
+            max_workers: Optional[int] = None,
+            use_cache: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Searches `family` for the points minimizing the safety margin of `controller`.
+
+    Args:
+        config_path (str): Configuration file.
+        family (ScenarioFamily): The search space.
+        controller (str): Controller name or model path for `load_controller`.
+        parameters (Optional[List[str]]): Searched parameters; all ranged ones except 'duration_s' by default.
+            The others keep the family defaults.
+        ranges (Optional[Dict]): Overrides of the family's ranges (the operational bounds).
+        settings (Optional[Dict]): Overrides of CORE_PARAMETERS['simulation']['falsification'] / DEFAULT_FALSIFICATION_SETTINGS;
+            'popsize' is the population size per searched parameter.
+        max_workers (Optional[int]): Worker processes; default CORE_PARAMETERS['simulation']['max_workers'].
+        use_cache (Optional[bool]): Overrides CORE_PARAMETERS['simulation']['result_cache']['enabled'].
+
+    Returns:
+        {'violation_found', 'worst_margin', 'worst_point', 'n_runs', 'generations',
+         'history' (DataFrame of every evaluated point, its 'margin' and 'generation', most severe first),
+         'worst_cases' (list of (point, margin), most severe first, distinct points)}
+    """
+    core_config = ParameterManager(config_filepath=config_path).get_all_parameters()['CORE_PARAMETERS']
+    settings = {**DEFAULT_FALSIFICATION_SETTINGS, **core_config.get('simulation', {}).get('falsification', {}), **(settings or {})}
+    performance, metrics = PERFORMANCE_FUNCTIONS[settings['performance']]
+    ranges = {**family.ranges, **(ranges or {})}
+    parameters = list(parameters or [name for name in family.ranges if name != 'duration_s'])
+    unknown = [name for name in parameters if name not in ranges]
+    if unknown:
+        raise KeyError(f"Parameters {unknown} have no range in scenario family '{family.name}'.")
+    bounds = [tuple(float(v) for v in ranges[name]) for name in parameters]
+
+    history: List[Dict[str, Any]] = []
+    generations = [0]
+
+    with open_evaluator(config_path, [controller], max_workers, metrics, use_cache) as evaluate_batch:
+        def objective(population: np.ndarray) -> np.ndarray:
+            # Vectorized: population is (n_parameters, n_members), one batch per generation
+            points = [dict(zip(parameters, (float(v) for v in member))) for member in population.T]
+            batch = [(name, scenario) for name, _, scenario in family.scenarios(points, core_config)]
+            results = evaluate_batch(batch)
+            if not results:
+                raise RuntimeError(f"No results for controller '{controller}'; it could not be loaded.")
+            margins = np.full(len(points), -np.inf)  # a run without metrics ended at once: a violation
+            for position, _, run_metrics in results:
+                value = performance(run_metrics, core_config) if run_metrics else np.nan
+                margins[position] = value if np.isfinite(value) else -np.inf
+            history.extend({**point, 'margin': margin, 'generation': generations[0]} for point, margin in zip(points, margins))
+            generations[0] += 1
+            logger.info(f"Falsification of {controller} on '{family.name}', generation {generations[0]}: "
+                        f"best margin {min(item['margin'] for item in history):.4g}.")
+            if settings['stop_on_violation'] and margins.min() <= 0.0:
+                raise _ViolationFound()
+            return margins
+
+        try:
+            differential_evolution(objective, bounds, popsize=settings['popsize'], maxiter=settings['max_generations'],
+                                   seed=settings['seed'], vectorized=True, updating='deferred', polish=False, init='sobol')
+        except _ViolationFound:
+            pass
+
+    table = pd.DataFrame(history).sort_values('margin', kind='stable')
+    worst_cases: List[Tuple[Dict[str, float], float]] = []
+    seen = set()
+    for _, row in table.iterrows():
+        key = tuple(np.round([row[name] for name in parameters], 3))
+        if key in seen:
+            continue
+        seen.add(key)
+        worst_cases.append(({name: float(row[name]) for name in parameters}, float(row['margin'])))
+        if len(worst_cases) == settings['n_worst']:
+            break
+
+    worst_point, worst_margin = worst_cases[0]
+    if worst_margin <= 0.0:
+        logger.warning(f"Falsified: {controller} violates a safety limit on {family.point_name(worst_point)} "
+                       f"(margin {worst_margin:.4g}).")
+    else:
+        logger.info(f"No violation found for {controller}; smallest margin {worst_margin:.4g} on {family.point_name(worst_point)}.")
+    return {'violation_found': worst_margin <= 0.0, 'worst_margin': worst_margin, 'worst_point': worst_point,
+            'n_runs': len(history), 'generations': generations[0], 'history': table.reset_index(drop=True),
+            'worst_cases': worst_cases}
+
+
+def falsified_scenario_specs(family: ScenarioFamily, controller: str, worst_cases: List[Tuple[Dict[str, float], float]],
+                             core_config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Scenario specs of falsification worst cases, named falsified_<family>_<controller>_<rank>."""
+    label = re.sub(r'[^A-Za-z0-9]+', '_', controller.rsplit('/', 1)[-1].rsplit('.', 1)[0]).strip('_')
+    specs = {}
+    for rank, (point, margin) in enumerate(worst_cases, start=1):
+        spec = family.spec(core_config, **point)
+        spec['description'] = (f"Falsified for {controller} (safety margin {margin:.3g}): " + spec.get('description', '')).strip()
+        spec['flags'] = {**spec.get('flags', {}), 'is_adversarial_drill': True}
+        specs[f"falsified_{family.name}_{label}_{rank}"] = spec
+    return specs
+
+
+def write_falsified_scenarios(config_path: str, family: ScenarioFamily, controller: str, result: Dict[str, Any],
+                              path: str) -> Dict[str, Dict[str, Any]]:
+    """Writes the worst cases of a `falsify` result as a YAML scenario spec file and returns the specs."""
+    core_config = ParameterManager(config_filepath=config_path).get_all_parameters()['CORE_PARAMETERS']
+    specs = falsified_scenario_specs(family, controller, result['worst_cases'], core_config)
+    header = (f"Worst cases found by falsification of {controller} over the '{family.name}' scenario family\n"
+              f"({result['n_runs']} runs, {result['generations']} generations). Add this file to\n"
+              f"CORE_PARAMETERS['simulation']['scenario_spec_paths'] to include them in the scenario library.")
+    save_scenario_specs(specs, path, header=header)
+    return specs
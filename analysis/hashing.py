@@ -0,0 +1,77 @@
+# analysis/hashing.py
+
+"""
+================================================================================
+          Stable Content Hashing of Configurations
+================================================================================
+`stable_hash` returns the same SHA-256 digest for equal configurations in any
+process, on any run -- unlike the built-in `hash()`, which is salted per
+process for strings.
+
+Values are first reduced to a canonical JSON-compatible form: dictionary keys
+are sorted, tuples become lists, NumPy arrays and scalars become lists and
+Python numbers (floats keep their exact repr), and sets are sorted. Functions
+such as a scenario's `load_profile_func` are identified by their qualified
+name, bytecode, defaults and closure values, so two `step_load_change(...)`
+profiles with different arguments hash differently. Objects that define their
+pickled state (`__getstate__`, e.g. a TabulatedLoadProfile) are hashed by it,
+other objects by their attributes.
+
+`file_digest` hashes a file's bytes, e.g. a model artifact.
+"""
+
+import hashlib
+import json
+import types
+from typing import Any
+
+import numpy as np
+
+
+def canonicalize(value: Any) -> Any:
+    """Reduces a value to a canonical, JSON-serializable structure."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return {'__float__': repr(value)}
+    if isinstance(value, np.generic):
+        return canonicalize(value.item())
+    if isinstance(value, np.ndarray):
+        return {'__ndarray__': str(value.dtype), 'shape': list(value.shape), 'data': canonicalize(value.tolist())}
+    if isinstance(value, dict):
+        return {'__dict__': sorted(([canonicalize(k), canonicalize(v)] for k, v in value.items()), key=lambda kv: json.dumps(kv[0], sort_keys=True))}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {'__set__': sorted((canonicalize(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))}
+    if isinstance(value, (types.FunctionType, types.MethodType)):
+        function = value.__func__ if isinstance(value, types.MethodType) else value
+        return {
+            '__callable__': f"{function.__module__}.{function.__qualname__}",
+            'code': hashlib.sha256(function.__code__.co_code).hexdigest(),
+            'consts': canonicalize([c for c in function.__code__.co_consts if not isinstance(c, types.CodeType)]),
+            'defaults': canonicalize(function.__defaults__),
+            'closure': canonicalize([cell.cell_contents for cell in function.__closure__ or ()]),
+        }
+    if callable(value) and hasattr(value, '__qualname__'):
+        return {'__callable__': f"{getattr(value, '__module__', '')}.{value.__qualname__}"}
+    if getattr(type(value), '__getstate__', None) not in (None, getattr(object, '__getstate__', None)):
+        return {'__object__': f"{type(value).__module__}.{type(value).__qualname__}", 'state': canonicalize(value.__getstate__())}
+    if hasattr(value, '__dict__'):
+        return {'__object__': f"{type(value).__module__}.{type(value).__qualname__}", 'state': canonicalize(vars(value))}
+    return {'__repr__': repr(value)}
+
+
+def stable_hash(value: Any) -> str:
+    """Returns the hex SHA-256 digest of the canonical form of `value`."""
+    payload = json.dumps(canonicalize(value), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Returns the hex SHA-256 digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,134 @@
+# analysis/latency_profiler.py
+
+"""
+================================================================================
+          Streaming Step-Latency Profiler
+================================================================================
+Measures the wall-clock cost of `controller.step()` and `env.step()` inside the
+ScenarioExecutor loop without storing per-step timestamps.
+
+Each duration (integer nanoseconds from `time.perf_counter_ns`) goes into a
+histogram with log-spaced bins, so memory is constant per (scenario,
+controller) run and percentiles carry a bounded relative error of
+10**(1/bins_per_decade) - 1 (about 4.7% with the default 50 bins per decade).
+The exact count, mean, min and max are tracked alongside.
+
+Summaries are attached to the executor's results as
+`results_df.attrs['latency']` and flattened into `latency_<stage>_<stat>_us`
+metrics by `latency_metrics`, which the MetricsEngine merges into its output.
+"""
+
+import math
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+# Summary statistics reported per stage, in microseconds
+LATENCY_STATS = ('p50', 'p95', 'p99', 'max')
+LATENCY_STAGES = ('controller', 'env')
+LATENCY_METRIC_KEYS = [f"latency_{stage}_{stat}_us" for stage in LATENCY_STAGES for stat in LATENCY_STATS]
+
+
+class LatencyHistogram:
+    """
+    A fixed-memory histogram of durations with log-spaced bins.
+
+    Args:
+        min_ns (int): Lower edge of the first bin; shorter samples land in it.
+        max_ns (int): Upper edge of the last bin; longer samples land in it.
+        bins_per_decade (int): Resolution of the histogram.
+    """
+
+    def __init__(self, min_ns: int = 10, max_ns: int = 100_000_000_000, bins_per_decade: int = 50):
+        self.min_ns = min_ns
+        self.bins_per_decade = bins_per_decade
+        self._log_min = math.log10(min_ns)
+        self._n_bins = int(math.ceil((math.log10(max_ns) - self._log_min) * bins_per_decade))
+        self.counts: List[int] = [0] * self._n_bins
+        self.count = 0
+        self.total_ns = 0
+        self.min_seen_ns: Optional[int] = None
+        self.max_seen_ns = 0
+
+    def record(self, duration_ns: int):
+        """Adds one duration sample."""
+        if duration_ns > self.min_ns:
+            index = min(int((math.log10(duration_ns) - self._log_min) * self.bins_per_decade), self._n_bins - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_seen_ns:
+            self.max_seen_ns = duration_ns
+        if self.min_seen_ns is None or duration_ns < self.min_seen_ns:
+            self.min_seen_ns = duration_ns
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Adds the samples of another histogram with the same binning."""
+        if (other.min_ns, other.bins_per_decade, other._n_bins) != (self.min_ns, self.bins_per_decade, self._n_bins):
+            raise ValueError("Cannot merge latency histograms with different binning.")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_seen_ns = max(self.max_seen_ns, other.max_seen_ns)
+        if other.min_seen_ns is not None:
+            self.min_seen_ns = other.min_seen_ns if self.min_seen_ns is None else min(self.min_seen_ns, other.min_seen_ns)
+
+    def percentile(self, q: float) -> float:
+        """
+        Returns the q-th percentile (0-100) in nanoseconds, interpolated
+        log-linearly within its bin and clamped to the observed min/max.
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q / 100.0 * self.count
+        cumulative = 0
+        for index, bin_count in enumerate(self.counts):
+            if bin_count and cumulative + bin_count >= rank:
+                fraction = (rank - cumulative) / bin_count
+                value = 10.0 ** (self._log_min + (index + fraction) / self.bins_per_decade)
+                return float(min(max(value, self.min_seen_ns), self.max_seen_ns))
+            cumulative += bin_count
+        return float(self.max_seen_ns)
+
+    def summary(self) -> Dict[str, float]:
+        """Returns count, mean, min, p50, p95, p99 and max; durations in microseconds."""
+        if self.count == 0:
+            return {'count': 0, **{key: math.nan for key in ('mean_us', 'min_us', 'p50_us', 'p95_us', 'p99_us', 'max_us')}}
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1e3,
+            'min_us': self.min_seen_ns / 1e3,
+            'p50_us': self.percentile(50) / 1e3,
+            'p95_us': self.percentile(95) / 1e3,
+            'p99_us': self.percentile(99) / 1e3,
+            'max_us': self.max_seen_ns / 1e3,
+        }
+
+
+class StepLatencyProfiler:
+    """Holds one LatencyHistogram per stage of the simulation step ('controller', 'env')."""
+
+    def __init__(self, **histogram_kwargs: Any):
+        self.histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram(**histogram_kwargs) for stage in LATENCY_STAGES}
+
+    def record(self, stage: str, duration_ns: int):
+        self.histograms[stage].record(duration_ns)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns the per-stage summaries, e.g. {'controller': {'p50_us': ...}, 'env': {...}}."""
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+
+def latency_metrics(results_df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Flattens the latency summary attached to an executor results DataFrame into
+    `latency_<stage>_<stat>_us` metrics. Returns an empty dict when the run was
+    not profiled.
+    """
+    summary = results_df.attrs.get('latency') if results_df is not None else None
+    if not summary:
+        return {}
+    return {f"latency_{stage}_{stat}_us": summary.get(stage, {}).get(f"{stat}_us", math.nan)
+            for stage in LATENCY_STAGES for stat in LATENCY_STATS}
@@ -0,0 +1,271 @@
+# analysis/metric_registry.py
+
+"""
+================================================================================
+          Metric Registry with Input Columns and Dependencies
+================================================================================
+Declares every MetricsEngine metric as a function of one run, together with
+the trajectory columns it reads and the other metrics it is derived from,
+e.g. transient_severity_score from max_freq_deviation_hz and max_speed_rpm.
+
+A caller that only needs some metrics (an optimizer objective, a curriculum
+threshold check) passes their names; `resolve_metrics` adds the dependencies
+in evaluation order and `required_columns` tells which recorded columns are
+read, so nothing else is computed. Metric functions take a MetricContext and
+return NaN when the metric does not apply to the run (e.g. agility outside
+sudden-load scenarios, or a missing optional column).
+"""
+
+from typing import Dict, Any, List, Callable, Iterable
+
+import numpy as np
+import pandas as pd
+from scipy.integrate import simpson as simps
+from scipy.stats import entropy
+
+# name -> {'func': metric function, 'columns': columns read, 'depends': metrics used}
+METRIC_REGISTRY: Dict[str, Dict[str, Any]] = {}
+
+
+def register_metric(name: str, columns: Iterable[str] = (), depends: Iterable[str] = ()) -> Callable:
+    """Registers the decorated function as metric `name`."""
+    def decorator(func: Callable[['MetricContext'], float]) -> Callable[['MetricContext'], float]:
+        METRIC_REGISTRY[name] = {'func': func, 'columns': list(columns), 'depends': list(depends)}
+        return func
+    return decorator
+
+
+def resolve_metrics(names: Iterable[str]) -> List[str]:
+    """Returns `names` plus the metrics they depend on, each after its dependencies."""
+    order: List[str] = []
+    visiting: set = set()
+
+    def visit(name: str):
+        if name in order:
+            return
+        if name not in METRIC_REGISTRY:
+            raise KeyError(f"Unknown metric '{name}'. Registered metrics: {sorted(METRIC_REGISTRY)}")
+        if name in visiting:
+            raise ValueError(f"Metric '{name}' depends on itself.")
+        visiting.add(name)
+        for dependency in METRIC_REGISTRY[name]['depends']:
+            visit(dependency)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def required_columns(names: Iterable[str]) -> List[str]:
+    """Returns the trajectory columns read to compute `names` and their dependencies."""
+    columns = ['time_s']
+    for name in resolve_metrics(names):
+        columns.extend(column for column in METRIC_REGISTRY[name]['columns'] if column not in columns)
+    return columns
+
+
+class MetricContext:
+    """
+    The inputs shared by the metric functions of one run, and the metrics computed so far.
+
+    Args:
+        results_df (pd.DataFrame): The executor results of the run.
+        scenario_config (Dict[str, Any]): The scenario definition.
+        core_config (Dict[str, Any]): The 'CORE_PARAMETERS' dictionary.
+    """
+
+    def __init__(self, results_df: pd.DataFrame, scenario_config: Dict[str, Any], core_config: Dict[str, Any]):
+        self.df = results_df
+        self.scenario_config = scenario_config
+        self.safety_limits = core_config.get('safety_limits', {})
+        self.time = results_df['time_s'].values
+        self.dt = self.time[1] - self.time[0] if len(self.time) > 1 else 0.02
+        self.f_nominal = core_config.get('grid', {}).get('f_nominal', 60.0)
+        self.target_speed_rpm = core_config.get('turbine', {}).get('omega_nominal_rpm', 1800.0)
+        self.metrics: Dict[str, float] = {}
+
+
+# --- ADVANCED METRICS ---
+
+@register_metric('grid_load_following_index', columns=['load_demand_mw', 'mechanical_power_mw'])
+def grid_load_following_index(ctx: MetricContext) -> float:
+    """How well mechanical power tracks load demand. Higher is better."""
+    power_error = ctx.df['load_demand_mw'] - ctx.df['mechanical_power_mw']
+    return 1000 / (1 + np.mean(np.square(power_error)))
+
+
+@register_metric('agility_response_time_index', columns=['load_demand_mw', 'mechanical_power_mw'])
+def agility_response_time_index(ctx: MetricContext) -> float:
+    """How quickly the turbine responds to a large, sudden load change. Lower is better."""
+    if 'sudden' not in ctx.scenario_config.get('description', '').lower():
+        return np.nan
+    results_df = ctx.df
+    load_diff = results_df['load_demand_mw'].diff().abs()
+    if load_diff.dropna().empty:
+        return np.nan
+    step_idx = load_diff.idxmax()
+    t_step = results_df.loc[step_idx, 'time_s']
+    p_initial = results_df.loc[step_idx - 1, 'mechanical_power_mw']
+    p_final_demand = results_df.loc[step_idx, 'load_demand_mw']
+    p_change_req = p_final_demand - p_initial
+    response_threshold = ctx.safety_limits.get('arti_response_threshold', 0.9)
+    p_response_target = p_initial + (p_change_req * response_threshold)
+    response_df = results_df[results_df['time_s'] >= t_step]
+    sign = np.sign(p_change_req)
+    response_indices = response_df.index[(response_df['mechanical_power_mw'] * sign >= p_response_target * sign)]
+    if response_indices.empty:
+        return np.nan
+    return response_df.loc[response_indices[0], 'time_s'] - t_step
+
+
+@register_metric('integrated_thermal_margin_violation_c_s', columns=['T_fuel'])
+def integrated_thermal_margin_violation(ctx: MetricContext) -> float:
+    """Integrated violation of the thermal warning margin. Lower is better."""
+    t_warn = ctx.safety_limits.get('max_fuel_temp_c', 2800.0) * ctx.safety_limits.get('fuel_temp_warning_fraction', 0.95)
+    thermal_excursion = (ctx.df['T_fuel'] - t_warn).clip(lower=0)
+    return simps(thermal_excursion, ctx.time)
+
+
+@register_metric('thermal_transient_burden', columns=['T_moderator'])
+def thermal_transient_burden(ctx: MetricContext) -> float:
+    """Cumulative rate of change of moderator temperature. Lower is better."""
+    if 'T_moderator' not in ctx.df.columns or ctx.df['T_moderator'].isnull().all():
+        return np.nan
+    dT_mod_dt = np.diff(ctx.df['T_moderator'].values) / ctx.dt
+    return simps(np.abs(dT_mod_dt), ctx.time[1:])
+
+
+@register_metric('core_power_oscillation_index', columns=['reactor_power_mw'])
+def core_power_oscillation_index(ctx: MetricContext) -> float:
+    """Steady-state power stability over the second half of the run. Lower is better."""
+    final_power_segment = ctx.df['reactor_power_mw'].iloc[int(len(ctx.df) * 0.5):]
+    return final_power_segment.std()
+
+
+@register_metric('max_rotor_angle_deviation_rad', columns=['rotor_angle_rad'])
+def max_rotor_angle_deviation(ctx: MetricContext) -> float:
+    """Rotor angle stability. Lower is better."""
+    if 'rotor_angle_rad' not in ctx.df.columns or not ctx.df['rotor_angle_rad'].notna().any():
+        return np.nan
+    return ctx.df['rotor_angle_rad'].max() - ctx.df['rotor_angle_rad'].min()
+
+
+@register_metric('negative_damping_events', columns=['grid_frequency_hz', 'mechanical_power_mw', 'load_demand_mw'])
+def negative_damping_events(ctx: MetricContext) -> float:
+    """Steps where the controller might be fighting the system's natural damping. Lower is better."""
+    omega_pu = ctx.df['grid_frequency_hz'] / ctx.f_nominal
+    power_mismatch = ctx.df['mechanical_power_mw'] - ctx.df['load_demand_mw']
+    return ((power_mismatch > 1) & (omega_pu > 1.0001)).sum() + ((power_mismatch < -1) & (omega_pu < 0.9999)).sum()
+
+
+@register_metric('control_policy_entropy', columns=['v_pos_actual'])
+def control_policy_entropy(ctx: MetricContext) -> float:
+    """Unpredictability/randomness of the control policy."""
+    valve_pos = ctx.df['v_pos_actual'].dropna()
+    if len(valve_pos) <= 1:
+        return np.nan
+    hist, _ = np.histogram(valve_pos, bins=20, range=(0, 1), density=True)
+    return entropy(hist + 1e-9, base=2)
+
+
+# --- STANDARD & SAFETY METRICS ---
+
+@register_metric('max_freq_deviation_hz', columns=['grid_frequency_hz'])
+def max_freq_deviation(ctx: MetricContext) -> float:
+    return (ctx.df['grid_frequency_hz'] - ctx.f_nominal).abs().max()
+
+
+@register_metric('min_freq_nadir_hz', columns=['grid_frequency_hz'])
+def min_freq_nadir(ctx: MetricContext) -> float:
+    return ctx.df['grid_frequency_hz'].min()
+
+
+@register_metric('max_speed_rpm', columns=['speed_rpm'])
+def max_speed(ctx: MetricContext) -> float:
+    return ctx.df['speed_rpm'].max()
+
+
+@register_metric('max_fuel_temp_c', columns=['T_fuel'])
+def max_fuel_temp(ctx: MetricContext) -> float:
+    return ctx.df['T_fuel'].max()
+
+
+@register_metric('max_overshoot_speed_pct', columns=['speed_rpm'], depends=['max_speed_rpm'])
+def max_overshoot_speed(ctx: MetricContext) -> float:
+    if ctx.target_speed_rpm <= 1e-6:
+        return 0.0
+    final_speed = ctx.df['speed_rpm'].iloc[-1]
+    return max(0.0, (ctx.metrics['max_speed_rpm'] - final_speed) / ctx.target_speed_rpm * 100.0)
+
+
+@register_metric('max_undershoot_speed_pct', columns=['speed_rpm'])
+def max_undershoot_speed(ctx: MetricContext) -> float:
+    if ctx.target_speed_rpm <= 1e-6:
+        return 0.0
+    final_speed = ctx.df['speed_rpm'].iloc[-1]
+    nadir_speed = ctx.df['speed_rpm'].min()
+    return max(0.0, (final_speed - nadir_speed) / ctx.target_speed_rpm * 100.0)
+
+
+@register_metric('iae_freq_hz_s', columns=['grid_frequency_hz'])
+def iae_freq(ctx: MetricContext) -> float:
+    freq_error = ctx.df['grid_frequency_hz'] - ctx.f_nominal
+    return simps(freq_error.abs(), ctx.time)
+
+
+@register_metric('ise_freq_hz_s', columns=['grid_frequency_hz'])
+def ise_freq(ctx: MetricContext) -> float:
+    freq_error = ctx.df['grid_frequency_hz'] - ctx.f_nominal
+    return simps(np.square(freq_error), ctx.time)
+
+
+@register_metric('control_effort_valve_abs_sum', columns=['v_pos_actual'])
+def control_effort_valve_abs_sum(ctx: MetricContext) -> float:
+    return ctx.df['v_pos_actual'].diff().abs().sum()
+
+
+@register_metric('control_effort_valve_sq_sum', columns=['v_pos_actual'])
+def control_effort_valve_sq_sum(ctx: MetricContext) -> float:
+    return np.square(ctx.df['v_pos_actual'].diff()).sum()
+
+
+@register_metric('valve_reversals', columns=['v_pos_actual'])
+def valve_reversals(ctx: MetricContext) -> float:
+    valve_diff = ctx.df['v_pos_actual'].diff()
+    return (np.diff(np.sign(valve_diff.dropna())) != 0).sum()
+
+
+@register_metric('transient_severity_score', depends=['max_freq_deviation_hz', 'max_speed_rpm'])
+def transient_severity_score(ctx: MetricContext) -> float:
+    """Combined score for transient severity based on speed and frequency excursions. Lower is better."""
+    weights = ctx.safety_limits.get('transient_severity_weights', {})
+    freq_dev_limit = ctx.safety_limits.get('freq_deviation_limit_hz', 1.0)
+    speed_dev_limit = ctx.safety_limits.get('max_speed_rpm', 2250.0) - ctx.target_speed_rpm
+    max_speed_dev = ctx.metrics['max_speed_rpm'] - ctx.target_speed_rpm
+    freq_severity = (ctx.metrics['max_freq_deviation_hz'] / freq_dev_limit) if freq_dev_limit > 1e-6 else 0
+    speed_severity = max(0, max_speed_dev / speed_dev_limit if speed_dev_limit > 1e-6 else 0)
+    return (weights.get('w_freq_severity', 0.6) * freq_severity) + (weights.get('w_speed_severity', 0.4) * speed_severity)
+
+
+# --- CRITICAL SAFETY VIOLATION TIMES ---
+
+@register_metric('time_over_fuel_temp_limit_s', columns=['T_fuel'])
+def time_over_fuel_temp_limit(ctx: MetricContext) -> float:
+    return (ctx.df['T_fuel'] > ctx.safety_limits.get('max_fuel_temp_c', 9999)).sum() * ctx.dt
+
+
+@register_metric('time_over_speed_limit_s', columns=['speed_rpm'])
+def time_over_speed_limit(ctx: MetricContext) -> float:
+    return (ctx.df['speed_rpm'] > ctx.safety_limits.get('max_speed_rpm', 9999)).sum() * ctx.dt
+
+
+@register_metric('time_outside_freq_limit_s', columns=['grid_frequency_hz'])
+def time_outside_freq_limit(ctx: MetricContext) -> float:
+    frequency = ctx.df['grid_frequency_hz']
+    return ((frequency < ctx.safety_limits.get('min_frequency_hz', 0)) | (frequency > ctx.safety_limits.get('max_frequency_hz', 99))).sum() * ctx.dt
+
+
+@register_metric('total_time_unsafe_s', depends=['time_over_fuel_temp_limit_s', 'time_over_speed_limit_s', 'time_outside_freq_limit_s'])
+def total_time_unsafe(ctx: MetricContext) -> float:
+    return ctx.metrics['time_over_fuel_temp_limit_s'] + ctx.metrics['time_over_speed_limit_s'] + ctx.metrics['time_outside_freq_limit_s']
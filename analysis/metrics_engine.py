@@ -6,18 +6,30 @@
 ================================================================================
 This final version implements the full Advanced Metrics Suite, replacing settling
 time with more powerful, nuanced metrics. All calculations are hardened against
-potential data errors like empty or short DataFrames.
+potential data errors like empty or short DataFrames. The individual metrics are
+declared in metric_registry.py, so callers can request only the ones they need.
+
+`MetricsEngine.calculate_batch` computes the same metrics for many runs at once
+from trajectories stacked into (runs x time) arrays (see `stack_trajectories`).
 """
 
 import logging
+import warnings
 import numpy as np
 import pandas as pd
-from scipy.integrate import simpson as simps
 from scipy.stats import entropy
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Union
+
+from analysis.latency_profiler import latency_metrics
+from analysis.realtime_pacer import realtime_metrics
+from analysis.metric_registry import METRIC_REGISTRY, MetricContext, resolve_metrics
 
 logger = logging.getLogger(__name__)
 
+# Trajectory columns read by the metric calculations
+BATCH_COLUMNS = ['time_s', 'load_demand_mw', 'mechanical_power_mw', 'T_fuel', 'T_moderator', 'reactor_power_mw',
+                 'rotor_angle_rad', 'grid_frequency_hz', 'v_pos_actual', 'speed_rpm']
+
 class MetricsEngine:
     """Calculates performance metrics from a simulation results DataFrame. v3.1"""
 
@@ -46,116 +58,288 @@ class MetricsEngine:
 
     def calculate(self,
                   results_df: pd.DataFrame,
-                  scenario_config: Dict[str, Any]) -> Dict[str, float]:
+                  scenario_config: Dict[str, Any],
+                  metrics: Optional[List[str]] = None) -> Dict[str, float]:
         """
         Calculates a dictionary of all performance metrics. Hardened against bad data.
+        Step-latency and real-time pacing metrics attached by the ScenarioExecutor
+        are included as well. For decimated runs, the quality metrics accumulated over
+        every step during execution (`results_df.attrs['streaming_metrics']`) are used.
+
+        `metrics` restricts the result to the named metrics; only they and the metrics
+        they depend on are computed (see metric_registry.py).
         """
+        requested = list(metrics) if metrics is not None else self.METRIC_KEYS
+        order = resolve_metrics(requested)  # unknown metric names raise KeyError
         # Initialize all metrics to NaN. They will be overwritten if successfully calculated.
-        metrics: Dict[str, float] = {key: np.nan for key in self.METRIC_KEYS}
+        results: Dict[str, float] = {key: np.nan for key in requested}
+        # Controller compute cost is reported even when the run is too short for quality metrics
+        results.update(latency_metrics(results_df))
+        results.update(realtime_metrics(results_df))
+
+        # Decimated rows would lose peaks and integral detail; the executor streamed the exact values
+        streamed = results_df.attrs.get('streaming_metrics') if results_df is not None else None
+        if streamed:
+            results.update({key: streamed.get(key, np.nan) for key in requested})
+            return results
         
         # --- Robustness Check ---
         # If the simulation failed early, the DataFrame will be empty or too short.
         if results_df.empty or 'time_s' not in results_df.columns or len(results_df) < 20:
             logger.warning("Metrics calculation skipped: DataFrame is empty or too short.")
-            return metrics
+            return results
 
         try:
-            time = results_df['time_s'].values
-            dt = time[1] - time[0] if len(time) > 1 else 0.02
-            f_nominal = self.config.get('grid', {}).get('f_nominal', 60.0)
-            target_speed_rpm = self.config.get('turbine', {}).get('omega_nominal_rpm', 1800.0)
-            
-            # --- ADVANCED METRIC CALCULATIONS ---
-            
-            # Measures how well mechanical power tracks load demand. Higher is better.
-            power_error = results_df['load_demand_mw'] - results_df['mechanical_power_mw']
-            metrics['grid_load_following_index'] = 1000 / (1 + np.mean(np.square(power_error)))
-
-            # Measures how quickly the turbine responds to a large, sudden load change. Lower is better.
-            if 'sudden' in scenario_config.get('description', '').lower():
-                load_diff = results_df['load_demand_mw'].diff().abs()
-                if not load_diff.dropna().empty:
-                    step_idx = load_diff.idxmax()
-                    t_step = results_df.loc[step_idx, 'time_s']
-                    p_initial = results_df.loc[step_idx - 1, 'mechanical_power_mw']
-                    p_final_demand = results_df.loc[step_idx, 'load_demand_mw']
-                    p_change_req = p_final_demand - p_initial
-                    response_threshold = self.safety_limits.get('arti_response_threshold', 0.9)
-                    p_response_target = p_initial + (p_change_req * response_threshold)
-                    response_df = results_df[results_df['time_s'] >= t_step]
-                    sign = np.sign(p_change_req)
-                    response_indices = response_df.index[(response_df['mechanical_power_mw'] * sign >= p_response_target * sign)]
-                    if not response_indices.empty:
-                        metrics['agility_response_time_index'] = response_df.loc[response_indices[0], 'time_s'] - t_step
-
-            # Integrated violation of the thermal warning margin. Lower is better.
-            t_warn = self.safety_limits.get('max_fuel_temp_c', 2800.0) * self.safety_limits.get('fuel_temp_warning_fraction', 0.95)
-            thermal_excursion = (results_df['T_fuel'] - t_warn).clip(lower=0)
-            metrics['integrated_thermal_margin_violation_c_s'] = simps(thermal_excursion, time)
-
-            # Measures the cumulative rate of change of moderator temperature. Lower is better.
-            if 'T_moderator' in results_df.columns and not results_df['T_moderator'].isnull().all():
-                dT_mod_dt = np.diff(results_df['T_moderator'].values) / dt
-                metrics['thermal_transient_burden'] = simps(np.abs(dT_mod_dt), time[1:])
-
-            # Measures steady-state power stability. Lower is better.
-            final_power_segment = results_df['reactor_power_mw'].iloc[int(len(results_df) * 0.5):]
-            metrics['core_power_oscillation_index'] = final_power_segment.std()
-
-            # Measures rotor angle stability. Lower is better.
-            if 'rotor_angle_rad' in results_df.columns and results_df['rotor_angle_rad'].notna().any():
-                metrics['max_rotor_angle_deviation_rad'] = results_df['rotor_angle_rad'].max() - results_df['rotor_angle_rad'].min()
-
-            # Counts events where the controller might be fighting the system's natural damping. Lower is better.
-            omega_pu = results_df['grid_frequency_hz'] / f_nominal
-            power_mismatch = results_df['mechanical_power_mw'] - results_df['load_demand_mw']
-            metrics['negative_damping_events'] = ((power_mismatch > 1) & (omega_pu > 1.0001)).sum() + ((power_mismatch < -1) & (omega_pu < 0.9999)).sum()
-
-            # Measures the unpredictability/randomness of the control policy.
-            valve_pos = results_df['v_pos_actual'].dropna()
-            if len(valve_pos) > 1:
-                hist, _ = np.histogram(valve_pos, bins=20, range=(0, 1), density=True)
-                metrics['control_policy_entropy'] = entropy(hist + 1e-9, base=2)
-            
-            # --- Standard & Safety Metrics ---
-            metrics['max_freq_deviation_hz'] = (results_df['grid_frequency_hz'] - f_nominal).abs().max()
-            metrics['min_freq_nadir_hz'] = results_df['grid_frequency_hz'].min()
-            metrics['max_speed_rpm'] = results_df['speed_rpm'].max()
-            metrics['max_fuel_temp_c'] = results_df['T_fuel'].max()
-
-            final_speed = results_df['speed_rpm'].iloc[-1]
-            peak_speed = metrics['max_speed_rpm']
-            nadir_speed = results_df['speed_rpm'].min()
-            metrics['max_overshoot_speed_pct'] = max(0.0, (peak_speed - final_speed) / target_speed_rpm * 100.0) if target_speed_rpm > 1e-6 else 0.0
-            metrics['max_undershoot_speed_pct'] = max(0.0, (final_speed - nadir_speed) / target_speed_rpm * 100.0) if target_speed_rpm > 1e-6 else 0.0
-
-            freq_error = results_df['grid_frequency_hz'] - f_nominal
-            metrics['iae_freq_hz_s'] = simps(freq_error.abs(), time)
-            metrics['ise_freq_hz_s'] = simps(np.square(freq_error), time)
-
-            valve_diff = results_df['v_pos_actual'].diff()
-            metrics['control_effort_valve_abs_sum'] = valve_diff.abs().sum()
-            metrics['control_effort_valve_sq_sum'] = np.square(valve_diff).sum()
-            metrics['valve_reversals'] = (np.diff(np.sign(valve_diff.dropna())) != 0).sum()
-
-            # Combined score for transient severity based on speed and frequency excursions. Lower is better.
-            weights = self.safety_limits.get('transient_severity_weights', {})
-            freq_dev_limit = self.safety_limits.get('freq_deviation_limit_hz', 1.0)
-            speed_dev_limit = self.safety_limits.get('max_speed_rpm', 2250.0) - target_speed_rpm
-            max_speed_dev = metrics['max_speed_rpm'] - target_speed_rpm
-            freq_severity = (metrics['max_freq_deviation_hz'] / freq_dev_limit) if freq_dev_limit > 1e-6 else 0
-            speed_severity = max(0, max_speed_dev / speed_dev_limit if speed_dev_limit > 1e-6 else 0)
-            metrics['transient_severity_score'] = (weights.get('w_freq_severity', 0.6) * freq_severity) + (weights.get('w_speed_severity', 0.4) * speed_severity)
-            
-            # --- Critical Safety Violation Times ---
-            metrics['time_over_fuel_temp_limit_s'] = (results_df['T_fuel'] > self.safety_limits.get('max_fuel_temp_c', 9999)).sum() * dt
-            metrics['time_over_speed_limit_s'] = (results_df['speed_rpm'] > self.safety_limits.get('max_speed_rpm', 9999)).sum() * dt
-            metrics['time_outside_freq_limit_s'] = ((results_df['grid_frequency_hz'] < self.safety_limits.get('min_frequency_hz', 0)) | (results_df['grid_frequency_hz'] > self.safety_limits.get('max_frequency_hz', 99))).sum() * dt
-            metrics['total_time_unsafe_s'] = metrics['time_over_fuel_temp_limit_s'] + metrics['time_over_speed_limit_s'] + metrics['time_outside_freq_limit_s']
+            context = MetricContext(results_df, scenario_config, self.config)
+            for name in order:
+                context.metrics[name] = METRIC_REGISTRY[name]['func'](context)
+            results.update({key: context.metrics[key] for key in requested})
 
         except Exception as e:
             logger.error(f"CRITICAL ERROR during metric calculation: {e}", exc_info=True)
             # On any error, return the dictionary of NaNs
-            return {key: np.nan for key in self.METRIC_KEYS}
+            return {**{key: np.nan for key in requested}, **latency_metrics(results_df), **realtime_metrics(results_df)}
+
+        return results
+
+    def calculate_batch(self,
+                        trajectories: Dict[str, np.ndarray],
+                        lengths: Optional[np.ndarray] = None,
+                        scenario_configs: Union[Dict[str, Any], List[Dict[str, Any]], None] = None,
+                        index: Optional[List[Any]] = None) -> pd.DataFrame:
+        """
+        Calculates METRIC_KEYS for many runs at once from trajectories stacked as 2-D
+        arrays (runs x time), with vectorized reductions instead of one DataFrame per run.
+
+        Args:
+            trajectories (Dict[str, np.ndarray]): Column name -> array of shape (runs, max_len),
+                                                  e.g. from `stack_trajectories`. Cells past a
+                                                  run's length are ignored.
+            lengths (Optional[np.ndarray]): Rows of each run; all runs are full length if None.
+            scenario_configs: One scenario definition for all runs, or one per run
+                              (the description decides whether agility is measured).
+            index (Optional[List]): Row labels of the returned table.
+
+        Returns:
+            A DataFrame with one row per run and one column per metric. The values equal
+            `calculate` on each run, up to floating-point summation order. Runs shorter
+            than 20 rows get NaN. Decimated runs need their streamed metrics instead.
+        """
+        time = np.asarray(trajectories['time_s'], dtype=np.float64)
+        n_runs, max_len = time.shape
+        lengths = np.full(n_runs, max_len, dtype=np.int64) if lengths is None else np.asarray(lengths, dtype=np.int64)
+        if scenario_configs is None or isinstance(scenario_configs, dict):
+            scenario_configs = [scenario_configs or {}] * n_runs
+        metrics = {key: np.full(n_runs, np.nan) for key in self.METRIC_KEYS}
+
+        long_enough = lengths >= 20
+        if not long_enough.any():
+            logger.warning("Batch metrics calculation skipped: all runs are empty or too short.")
+        else:
+            try:
+                # All-NaN runs and divisions by zero give NaN, as in `calculate`
+                with np.errstate(all='ignore'), warnings.catch_warnings():
+                    warnings.simplefilter('ignore', category=RuntimeWarning)
+                    self._calculate_batch(trajectories, time, lengths, scenario_configs, metrics)
+                for key in self.METRIC_KEYS:
+                    metrics[key] = np.where(long_enough, metrics[key], np.nan)
+            except Exception as e:
+                logger.error(f"CRITICAL ERROR during batch metric calculation: {e}", exc_info=True)
+                metrics = {key: np.full(n_runs, np.nan) for key in self.METRIC_KEYS}
+        return pd.DataFrame(metrics, index=index, columns=self.METRIC_KEYS)
+
+    def _calculate_batch(self, trajectories: Dict[str, np.ndarray], time: np.ndarray, lengths: np.ndarray,
+                         scenario_configs: List[Dict[str, Any]], metrics: Dict[str, np.ndarray]):
+        n_runs, max_len = time.shape
+        runs = np.arange(n_runs)
+        columns = np.arange(max_len)
+        valid = columns[None, :] < lengths[:, None]
+        last = np.maximum(lengths - 1, 0)
+        # Cells past each run's length are NaN, so NaN-skipping reductions ignore them
+        column = lambda name: np.where(valid, trajectories[name], np.nan).astype(np.asarray(trajectories[name]).dtype, copy=False)
+        dt = time[:, 1] - time[:, 0] if max_len > 1 else np.full(n_runs, 0.02)
+        f_nominal = self.config.get('grid', {}).get('f_nominal', 60.0)
+        target_speed_rpm = self.config.get('turbine', {}).get('omega_nominal_rpm', 1800.0)
+
+        load = column('load_demand_mw')
+        mech = column('mechanical_power_mw')
+        power_error = load - mech
+        metrics['grid_load_following_index'] = 1000 / (1 + np.nanmean(np.square(power_error), axis=1))
+
+        sudden = np.array(['sudden' in (config or {}).get('description', '').lower() for config in scenario_configs])
+        if sudden.any() and max_len > 1:
+            load_diff = np.abs(np.diff(load, axis=1))
+            has_diff = ~np.isnan(load_diff).all(axis=1)
+            # First occurrence of the largest load change, as idxmax
+            step_idx = np.argmax(np.where(np.isnan(load_diff), -np.inf, load_diff), axis=1) + 1
+            t_step = time[runs, step_idx]
+            p_initial = mech[runs, step_idx - 1]
+            p_change_req = load[runs, step_idx] - p_initial
+            response_threshold = self.safety_limits.get('arti_response_threshold', 0.9)
+            p_response_target = p_initial + (p_change_req * response_threshold)
+            sign = np.sign(p_change_req)
+            responded = valid & (time >= t_step[:, None]) & (mech * sign[:, None] >= (p_response_target * sign)[:, None])
+            first = np.argmax(responded, axis=1)
+            found = sudden & has_diff & responded.any(axis=1)
+            metrics['agility_response_time_index'] = np.where(found, time[runs, first] - t_step, np.nan)
+
+        t_fuel = column('T_fuel')
+        t_warn = self.safety_limits.get('max_fuel_temp_c', 2800.0) * self.safety_limits.get('fuel_temp_warning_fraction', 0.95)
+        thermal_excursion = np.clip(t_fuel - t_warn, 0, None)
+        metrics['integrated_thermal_margin_violation_c_s'] = _batch_simpson(thermal_excursion, time, lengths)
+
+        if 'T_moderator' in trajectories:
+            moderator = column('T_moderator')
+            has_moderator = (~np.isnan(moderator)).any(axis=1)
+            dT_mod_dt = np.diff(moderator, axis=1) / dt[:, None]
+            burden = _batch_simpson(np.abs(dT_mod_dt), time[:, 1:], lengths - 1)
+            metrics['thermal_transient_burden'] = np.where(has_moderator, burden, np.nan)
+
+        # Standard deviation of the second half, computed like pandas' std (two passes, ddof=1)
+        power = column('reactor_power_mw')
+        in_half = valid & (columns[None, :] >= (lengths * 0.5).astype(np.int64)[:, None]) & ~np.isnan(power)
+        count = in_half.sum(axis=1)
+        mean = np.where(in_half, power, 0).sum(axis=1, dtype=np.float64) / count
+        variance = np.where(in_half, (mean[:, None] - power) ** 2, 0).sum(axis=1, dtype=np.float64) / (count - 1)
+        variance = np.where(count > 1, variance, np.nan)
+        metrics['core_power_oscillation_index'] = np.sqrt(variance.astype(power.dtype if power.dtype.kind == 'f' else np.float64))
+
+        if 'rotor_angle_rad' in trajectories:
+            rotor_angle = column('rotor_angle_rad')
+            metrics['max_rotor_angle_deviation_rad'] = np.nanmax(rotor_angle, axis=1) - np.nanmin(rotor_angle, axis=1)
+
+        frequency = column('grid_frequency_hz')
+        omega_pu = frequency / f_nominal
+        power_mismatch = mech - load
+        metrics['negative_damping_events'] = ((power_mismatch > 1) & (omega_pu > 1.0001)).sum(axis=1) + ((power_mismatch < -1) & (omega_pu < 0.9999)).sum(axis=1)
+
+        valve = column('v_pos_actual')
+        has_valve = ~np.isnan(valve)
+        # Bins assigned as np.histogram(bins=20, range=(0, 1)) does: edges[i] <= v < edges[i+1], last bin closed
+        edges = np.histogram_bin_edges(np.empty(0, dtype=valve.dtype), bins=20, range=(0, 1))
+        in_range = has_valve & (valve >= edges[0]) & (valve <= edges[-1])
+        bins = np.minimum(np.searchsorted(edges, valve[in_range], side='right') - 1, 19)
+        counts = np.bincount(np.nonzero(in_range)[0] * 20 + bins, minlength=n_runs * 20).reshape(n_runs, 20)
+        hist = counts / np.array(np.diff(edges), float) / counts.sum(axis=1, keepdims=True)
+        metrics['control_policy_entropy'] = np.where(has_valve.sum(axis=1) > 1, entropy(hist + 1e-9, base=2, axis=1), np.nan)
+
+        freq_error = frequency - f_nominal
+        metrics['max_freq_deviation_hz'] = np.nanmax(np.abs(freq_error), axis=1)
+        metrics['min_freq_nadir_hz'] = np.nanmin(frequency, axis=1)
+        speed = column('speed_rpm')
+        metrics['max_speed_rpm'] = np.nanmax(speed, axis=1)
+        metrics['max_fuel_temp_c'] = np.nanmax(t_fuel, axis=1)
+
+        final_speed = speed[runs, last]
+        peak_speed = metrics['max_speed_rpm']
+        nadir_speed = np.nanmin(speed, axis=1)
+        if target_speed_rpm > 1e-6:
+            # Scalar arithmetic in `calculate` leaves float32 once divided by a Python float;
+            # max(0.0, x) keeps 0.0 when x is NaN
+            overshoot = (peak_speed - final_speed).astype(np.float64) / target_speed_rpm * 100.0
+            undershoot = (final_speed - nadir_speed).astype(np.float64) / target_speed_rpm * 100.0
+            metrics['max_overshoot_speed_pct'] = np.where(overshoot > 0.0, overshoot, 0.0)
+            metrics['max_undershoot_speed_pct'] = np.where(undershoot > 0.0, undershoot, 0.0)
+        else:
+            metrics['max_overshoot_speed_pct'] = np.zeros(n_runs)
+            metrics['max_undershoot_speed_pct'] = np.zeros(n_runs)
+
+        metrics['iae_freq_hz_s'] = _batch_simpson(np.abs(freq_error), time, lengths)
+        metrics['ise_freq_hz_s'] = _batch_simpson(np.square(freq_error), time, lengths)
+
+        valve_diff = np.diff(valve, axis=1)
+        metrics['control_effort_valve_abs_sum'] = np.nansum(np.abs(valve_diff), axis=1, dtype=np.float64).astype(valve_diff.dtype)
+        metrics['control_effort_valve_sq_sum'] = np.nansum(np.square(valve_diff), axis=1, dtype=np.float64).astype(valve_diff.dtype)
+        # Sign changes between consecutive non-NaN valve increments
+        has_diff = ~np.isnan(valve_diff)
+        signs = np.sign(valve_diff)
+        diff_columns = np.arange(valve_diff.shape[1])
+        seen = np.maximum.accumulate(np.where(has_diff, diff_columns[None, :], -1), axis=1)
+        previous = np.concatenate((np.full((n_runs, 1), -1), seen[:, :-1]), axis=1)
+        previous_sign = np.take_along_axis(signs, np.maximum(previous, 0), axis=1)
+        metrics['valve_reversals'] = (has_diff & (previous >= 0) & (signs != previous_sign)).sum(axis=1)
+
+        weights = self.safety_limits.get('transient_severity_weights', {})
+        freq_dev_limit = self.safety_limits.get('freq_deviation_limit_hz', 1.0)
+        speed_dev_limit = self.safety_limits.get('max_speed_rpm', 2250.0) - target_speed_rpm
+        max_speed_dev = metrics['max_speed_rpm'].astype(np.float64) - target_speed_rpm
+        freq_severity = (metrics['max_freq_deviation_hz'].astype(np.float64) / freq_dev_limit) if freq_dev_limit > 1e-6 else np.zeros(n_runs)
+        speed_severity = max_speed_dev / speed_dev_limit if speed_dev_limit > 1e-6 else np.zeros(n_runs)
+        # max(0, x) keeps 0 when x is NaN
+        speed_severity = np.where(speed_severity > 0, speed_severity, 0)
+        metrics['transient_severity_score'] = (weights.get('w_freq_severity', 0.6) * freq_severity) + (weights.get('w_speed_severity', 0.4) * speed_severity)
+
+        metrics['time_over_fuel_temp_limit_s'] = (t_fuel > self.safety_limits.get('max_fuel_temp_c', 9999)).sum(axis=1) * dt
+        metrics['time_over_speed_limit_s'] = (speed > self.safety_limits.get('max_speed_rpm', 9999)).sum(axis=1) * dt
+        metrics['time_outside_freq_limit_s'] = ((frequency < self.safety_limits.get('min_frequency_hz', 0)) | (frequency > self.safety_limits.get('max_frequency_hz', 99))).sum(axis=1) * dt
+        metrics['total_time_unsafe_s'] = metrics['time_over_fuel_temp_limit_s'] + metrics['time_over_speed_limit_s'] + metrics['time_outside_freq_limit_s']
+
+
+def _batch_simpson(y: np.ndarray, x: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    `scipy.integrate.simpson(y[r, :n], x=x[r, :n])` for every row r with its own length n:
+    Simpson pairs over the first intervals and, for an even n, Cartwright's
+    correction of the last interval.
+    """
+    n_runs = y.shape[0]
+    runs = np.arange(n_runs)
+    h = np.diff(x, axis=1)
+    n_pairs = (y.shape[1] - 1) // 2
+    h0 = h[:, 0:2 * n_pairs:2].astype(float, copy=False)
+    h1 = h[:, 1:2 * n_pairs:2].astype(float, copy=False)
+    hsum = h0 + h1
+    hprod = h0 * h1
+    h0divh1 = np.true_divide(h0, h1, out=np.zeros_like(h0), where=h1 != 0)
+    tmp = hsum / 6.0 * (y[:, 0:2 * n_pairs:2] * (2.0 - np.true_divide(1.0, h0divh1, out=np.zeros_like(h0divh1), where=h0divh1 != 0)) +
+                        y[:, 1:2 * n_pairs:2] * (hsum * np.true_divide(hsum, hprod, out=np.zeros_like(hsum), where=hprod != 0)) +
+                        y[:, 2:2 * n_pairs + 1:2] * (2.0 - h0divh1))
+    # Pair k spans points 2k..2k+2, which must all lie within the run
+    in_run = 2 * np.arange(n_pairs)[None, :] + 2 <= lengths[:, None] - 1
+    result = np.where(in_run, tmp, 0.0).sum(axis=1)
+
+    even = (lengths % 2 == 0) & (lengths >= 4)
+    i1, i2, i3 = [np.clip(lengths - k, 0, None) for k in (1, 2, 3)]
+    h_0 = np.float64(x[runs, i2] - x[runs, i3])
+    h_1 = np.float64(x[runs, i1] - x[runs, i2])
+    den = 6 * (h_1 + h_0)
+    alpha = np.true_divide(2 * h_1 ** 2 + 3 * h_0 * h_1, den, out=np.zeros_like(den), where=den != 0)
+    den = 6 * h_0
+    beta = np.true_divide(h_1 ** 2 + 3.0 * h_0 * h_1, den, out=np.zeros_like(den), where=den != 0)
+    den = 6 * h_0 * (h_0 + h_1)
+    eta = np.true_divide(1 * h_1 ** 3, den, out=np.zeros_like(den), where=den != 0)
+    correction = alpha * y[runs, i1] + beta * y[runs, i2] - eta * y[runs, i3]
+    result = np.where(even, result + correction, result)
+
+    two = lengths == 2
+    if two.any():
+        result = np.where(two, 0.5 * (x[runs, 1] - x[runs, 0]) * (y[runs, 1] + y[runs, 0]), result)
+    return np.where(lengths > 0, result, 0.0)
+
+
+def stack_trajectories(results_dfs: List[pd.DataFrame],
+                       columns: Optional[List[str]] = None) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Stacks executor results DataFrames into (runs x max_len) arrays for
+    `MetricsEngine.calculate_batch`. Shorter runs are padded with NaN; each column
+    keeps its dtype (integer columns become float64).
 
-        return metrics
+    Returns:
+        The column arrays and the length of each run.
+    """
+    columns = columns or BATCH_COLUMNS
+    lengths = np.array([len(df) for df in results_dfs], dtype=np.int64)
+    max_len = int(lengths.max()) if len(lengths) else 0
+    stacked: Dict[str, np.ndarray] = {}
+    for name in columns:
+        present = [df[name].values for df in results_dfs if name in df.columns]
+        if not present:
+            continue
+        dtype = np.result_type(*[values.dtype for values in present])
+        if dtype.kind != 'f':
+            dtype = np.dtype(np.float64)
+        array = np.full((len(results_dfs), max_len), np.nan, dtype=dtype)
+        for row, df in enumerate(results_dfs):
+            if name in df.columns:
+                array[row, :len(df)] = df[name].values
+        stacked[name] = array
+    return stacked, lengths
@@ -0,0 +1,327 @@
+# analysis/multi_seed.py
+
+"""
+================================================================================
+          Multi-Seed Controller Comparison with Common Random Numbers
+================================================================================
+A single run per (scenario, controller) cell ranks controllers on one sample of
+the scenario's randomness (domain-randomized grid inertia and damping, seeded
+env resets). This module runs R seed replicates per cell and compares the
+controllers statistically.
+
+Common random numbers: replicate r of a scenario resets the env with the same
+seed for every controller (ScenarioExecutor._scenario_seed(name, r)), so all
+controllers face identical disturbance realizations in that replicate and
+their per-seed differences are paired. Paired differences have a far smaller
+variance than independent samples, so fewer seeds settle a ranking.
+
+Statistics, per scenario (SeedComparison):
+  - the CRS is computed per seed from that seed's metrics, then treated like
+    any other metric;
+  - mean and percentile-bootstrap confidence interval of every metric per
+    controller, resampling seeds;
+  - for every controller pair, the mean paired difference, its bootstrap CI
+    and a two-sided bootstrap p-value. The same seed resamples are used for
+    all controllers, which keeps the pairing.
+
+Execution (run_multi_seed): seeds are run in batches, every (scenario,
+controller) cell of a batch at once -- in the worker pool of
+parallel_executor.py when `max_workers` > 1. After each batch, a scenario
+whose ranking on the primary metric is settled stops receiving seeds.
+Replicate 0 is the scenario's usual seed, so it reproduces the single-run
+analysis.
+
+Stopping rule: the ranking is settled when every pair of adjacent
+controllers differs at level (1 - confidence) / (looks x adjacent pairs),
+a Bonferroni correction over all the tests the procedure may run, where
+looks = 1 + ceil((max_seeds - min_seeds) / batch_size). Because the ranking
+is re-tested after every batch, the nominal level would be exceeded
+(optional stopping). The test is a paired sign-flip randomization test of the
+mean difference (exact up to 16 seeds, Monte Carlo beyond). Its smallest
+p-value is 2^(1 - n) for n seeds, so a few unanimous seeds cannot settle a
+ranking the way a percentile bootstrap p-value of 0 would.
+
+Seed-independent scenarios: the env's only randomness is the domain-
+randomization draw at reset, so most scenarios give bit-identical replicates.
+No test can separate controllers on those (or a tie, p = 1), and extra seeds
+add nothing, so a scenario whose primary metric is identical across all
+replicates for every controller is settled once it has `min_seeds` seeds.
+"""
+
+import logging
+import warnings
+from typing import Dict, Any, List, Optional, Tuple, Callable, Set
+
+import numpy as np
+import pandas as pd
+
+from analysis.report_generator import composite_robustness_score
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MULTI_SEED_SETTINGS = {
+    'min_seeds': 5, 'max_seeds': 30, 'batch_size': 5, 'n_bootstrap': 2000, 'confidence': 0.95,
+    'primary_metric': 'composite_robustness_score', 'bootstrap_seed': 0,
+}
+CRS_METRIC = 'composite_robustness_score'
+
+# (scenario name, controller identifier, seed replicate)
+Cell = Tuple[str, str, int]
+
+
+def replicate_scenario(scenario_config: Dict[str, Any], replicate: int) -> Dict[str, Any]:
+    """Returns the scenario config of seed replicate `replicate` (0 is the scenario itself)."""
+    return {**scenario_config, 'seed_replicate': int(replicate)} if replicate else scenario_config
+
+
+def sign_flip_p_value(differences: np.ndarray, n_resamples: int = 2000, seed: int = 0) -> float:
+    """
+    Two-sided p-value of a paired sign-flip randomization test of mean(differences) = 0,
+    ignoring NaN: exact over all 2^n sign patterns up to 16 pairs, Monte Carlo beyond.
+    """
+    values = differences[np.isfinite(differences)]
+    n = values.size
+    if n == 0:
+        return np.nan
+    observed = abs(values.mean()) * (1.0 - 1e-12)
+    if n <= 16:
+        signs = 1.0 - 2.0 * ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1)
+        return float(np.mean(np.abs(signs @ values) / n >= observed))
+    signs = np.random.default_rng(seed).choice([-1.0, 1.0], size=(n_resamples, n))
+    return float((1 + np.sum(np.abs(signs @ values) / n >= observed)) / (n_resamples + 1))
+
+
+def stopping_looks(settings: Dict[str, Any]) -> int:
+    """The number of times run_multi_seed may test a ranking: after the first batch and every further one."""
+    max_seeds = max(int(settings['max_seeds']), 1)
+    min_seeds = min(max(int(settings['min_seeds']), 2), max_seeds)
+    return 1 + int(np.ceil((max_seeds - min_seeds) / max(int(settings['batch_size']), 1)))
+
+
+def bootstrap_means(samples: np.ndarray, resamples: np.ndarray) -> np.ndarray:
+    """
+    Means of `samples` (..., n_seeds) over each row of seed indices `resamples`
+    (n_bootstrap, n_seeds), ignoring NaN. Returns (..., n_bootstrap).
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return np.nanmean(samples[..., resamples], axis=-1)
+
+
+class SeedComparison:
+    """
+    Per-seed metrics of the controllers on one scenario, and their bootstrap statistics.
+
+    Args:
+        scenario_name (str): The scenario compared.
+        crs_metrics_config (Dict): The reporting 'crs_metrics' weights, for the per-seed CRS.
+        n_bootstrap (int): Bootstrap resamples.
+        confidence (float): Confidence level of the intervals; differences are significant at 1 - confidence.
+        bootstrap_seed (int): Seed of the resampling, so statistics are reproducible.
+    """
+
+    def __init__(self, scenario_name: str, crs_metrics_config: Dict[str, Dict[str, float]],
+                 n_bootstrap: int = 2000, confidence: float = 0.95, bootstrap_seed: int = 0):
+        self.scenario_name = scenario_name
+        self.crs_metrics_config = crs_metrics_config or {}
+        self.n_bootstrap = int(n_bootstrap)
+        self.confidence = float(confidence)
+        self.bootstrap_seed = bootstrap_seed
+        self.controllers: List[str] = []
+        # {replicate: {controller: metrics}}
+        self.samples: Dict[int, Dict[str, Dict[str, float]]] = {}
+        self._matrix: Optional[Dict[str, np.ndarray]] = None
+
+    @property
+    def higher_is_better(self) -> Set[str]:
+        return set(self.crs_metrics_config.get('higher_is_better', {})) | {CRS_METRIC}
+
+    @property
+    def n_seeds(self) -> int:
+        return len(self.samples)
+
+    def add(self, replicate: int, controller: str, metrics: Dict[str, float]):
+        """Records the metrics of one run; an empty dict marks a failed run (NaN metrics)."""
+        if controller not in self.controllers:
+            self.controllers.append(controller)
+        self.samples.setdefault(int(replicate), {})[controller] = metrics or {}
+        self._matrix = None
+
+    def _matrices(self) -> Dict[str, np.ndarray]:
+        """{metric: (n_controllers, n_seeds) array}, with the per-seed CRS."""
+        if self._matrix is None:
+            replicates = sorted(self.samples)
+            frames = []
+            for replicate in replicates:
+                seed_df = pd.DataFrame.from_dict(self.samples[replicate], orient='index').reindex(self.controllers)
+                seed_df = seed_df.apply(pd.to_numeric, errors='coerce')
+                crs = composite_robustness_score(seed_df, self.crs_metrics_config)
+                if crs is not None:
+                    seed_df[CRS_METRIC] = crs
+                frames.append(seed_df)
+            metrics = sorted({col for frame in frames for col in frame.columns})
+            self._matrix = {metric: np.column_stack([frame[metric].to_numpy(dtype=np.float64) if metric in frame.columns
+                                                     else np.full(len(self.controllers), np.nan) for frame in frames])
+                            for metric in metrics}
+        return self._matrix
+
+    def _resamples(self) -> np.ndarray:
+        rng = np.random.default_rng(self.bootstrap_seed)
+        return rng.integers(0, self.n_seeds, size=(self.n_bootstrap, self.n_seeds))
+
+    def summary(self, metrics: Optional[List[str]] = None) -> pd.DataFrame:
+        """Tidy table of (metric, controller) -> mean, ci_low, ci_high, n_seeds."""
+        matrices = self._matrices()
+        resamples = self._resamples()
+        tail = (1.0 - self.confidence) / 2.0
+        rows = []
+        for metric in metrics or list(matrices):
+            if metric not in matrices:
+                continue
+            values = matrices[metric]
+            boot = bootstrap_means(values, resamples)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                means = np.nanmean(values, axis=1)
+                low, high = np.nanquantile(boot, tail, axis=1), np.nanquantile(boot, 1.0 - tail, axis=1)
+            for i, controller in enumerate(self.controllers):
+                rows.append({'metric': metric, 'controller': controller, 'mean': means[i], 'ci_low': low[i],
+                             'ci_high': high[i], 'n_seeds': int(np.isfinite(values[i]).sum())})
+        return pd.DataFrame(rows, columns=['metric', 'controller', 'mean', 'ci_low', 'ci_high', 'n_seeds'])
+
+    def pairwise(self, metrics: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Paired differences (controller_a - controller_b) per metric: mean, bootstrap CI,
+        two-sided bootstrap p-value and whether the difference is significant.
+        """
+        matrices = self._matrices()
+        resamples = self._resamples()
+        tail = (1.0 - self.confidence) / 2.0
+        pairs = [(a, b) for a in range(len(self.controllers)) for b in range(a + 1, len(self.controllers))]
+        rows = []
+        for metric in metrics or list(matrices):
+            if metric not in matrices or not pairs:
+                continue
+            values = matrices[metric]
+            diffs = np.stack([values[a] - values[b] for a, b in pairs])
+            boot = bootstrap_means(diffs, resamples)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                means = np.nanmean(diffs, axis=1)
+                low, high = np.nanquantile(boot, tail, axis=1), np.nanquantile(boot, 1.0 - tail, axis=1)
+                finite = np.isfinite(boot)
+                n_finite = np.maximum(finite.sum(axis=1), 1)
+                below = ((boot <= 0) & finite).sum(axis=1) / n_finite
+                above = ((boot >= 0) & finite).sum(axis=1) / n_finite
+            p_values = np.minimum(1.0, 2.0 * np.minimum(below, above))
+            for k, (a, b) in enumerate(pairs):
+                rows.append({'metric': metric, 'controller_a': self.controllers[a], 'controller_b': self.controllers[b],
+                             'mean_diff': means[k], 'ci_low': low[k], 'ci_high': high[k], 'p_value': p_values[k],
+                             'significant': bool(np.isfinite(means[k]) and p_values[k] < 1.0 - self.confidence),
+                             'n_pairs': int(np.isfinite(diffs[k]).sum())})
+        return pd.DataFrame(rows, columns=['metric', 'controller_a', 'controller_b', 'mean_diff', 'ci_low', 'ci_high',
+                                           'p_value', 'significant', 'n_pairs'])
+
+    def ranking(self, metric: str) -> List[str]:
+        """Controllers ordered best first by their mean `metric` (NaN last)."""
+        values = self._matrices().get(metric)
+        if values is None:
+            return list(self.controllers)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            means = pd.Series(np.nanmean(values, axis=1), index=self.controllers)
+        return list(means.sort_values(ascending=metric not in self.higher_is_better, na_position='last').index)
+
+    def is_settled(self, metric: str, looks: int = 1) -> bool:
+        """
+        True if every pair of adjacent controllers in the `metric` ranking differs in a sign-flip
+        test at level (1 - confidence) / (looks x adjacent pairs) (see the module docstring).
+        """
+        if len(self.controllers) < 2:
+            return True
+        values = self._matrices().get(metric)
+        if values is None:
+            return False
+        ranking = self.ranking(metric)
+        alpha = (1.0 - self.confidence) / (max(int(looks), 1) * (len(ranking) - 1))
+        index = {controller: i for i, controller in enumerate(self.controllers)}
+        for a, b in zip(ranking, ranking[1:]):
+            p_value = sign_flip_p_value(values[index[a]] - values[index[b]], self.n_bootstrap, self.bootstrap_seed)
+            if not p_value < alpha:
+                return False
+        return True
+
+    def is_seed_independent(self, metric: str) -> bool:
+        """True if every controller's `metric` is identical (NaN included) across all replicates."""
+        values = self._matrices().get(metric)
+        if values is None or values.shape[1] < 2:
+            return False
+        return all(np.array_equal(row, np.full_like(row, row[0]), equal_nan=True) for row in values)
+
+    def mean_metrics(self) -> Dict[str, Dict[str, float]]:
+        """{controller: {metric: mean over seeds}}, the shape of a single-run analysis cell."""
+        matrices = self._matrices()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            means = {metric: np.nanmean(values, axis=1) for metric, values in matrices.items() if metric != CRS_METRIC}
+        return {controller: {metric: float(values[i]) for metric, values in means.items()}
+                for i, controller in enumerate(self.controllers)}
+
+
+def run_multi_seed(scenario_names: List[str],
+                   controller_identifiers: List[str],
+                   run_batch: Callable[[List[Cell]], List[Tuple[str, str, int, Optional[Dict[str, float]]]]],
+                   settings: Dict[str, Any],
+                   crs_metrics_config: Dict[str, Dict[str, float]]) -> Dict[str, SeedComparison]:
+    """
+    Runs seed replicates of every (scenario, controller) cell in batches until each
+    scenario's ranking is settled or `max_seeds` is reached.
+
+    Args:
+        scenario_names (List[str]): Scenarios to compare on.
+        controller_identifiers (List[str]): Controllers, as `run_batch` identifies them.
+        run_batch (Callable): Runs a list of (scenario, controller identifier, replicate) cells and
+            returns (scenario, controller report name, replicate, metrics or None) per cell.
+        settings (Dict): CORE_PARAMETERS['simulation']['multi_seed'] style block.
+        crs_metrics_config (Dict): The reporting 'crs_metrics' weights.
+
+    Returns:
+        A SeedComparison per scenario.
+    """
+    settings = {**DEFAULT_MULTI_SEED_SETTINGS, **(settings or {})}
+    max_seeds = max(int(settings['max_seeds']), 1)
+    min_seeds = min(max(int(settings['min_seeds']), 2), max_seeds)
+    batch_size = max(int(settings['batch_size']), 1)
+    primary_metric = settings['primary_metric']
+    looks = stopping_looks(settings)
+
+    comparisons = {s_name: SeedComparison(s_name, crs_metrics_config, settings['n_bootstrap'], settings['confidence'],
+                                          settings['bootstrap_seed'])
+                   for s_name in scenario_names}
+    active = list(scenario_names)
+    next_replicate = 0
+    while active and next_replicate < max_seeds:
+        stop = min(next_replicate + (min_seeds if next_replicate == 0 else batch_size), max_seeds)
+        cells = [(s_name, identifier, replicate) for s_name in active
+                 for replicate in range(next_replicate, stop) for identifier in controller_identifiers]
+        logger.info(f"Multi-seed: running seeds {next_replicate}..{stop - 1} of {len(active)} scenarios ({len(cells)} runs).")
+        for scenario_name, report_name, replicate, metrics in run_batch(cells):
+            if metrics is not None:
+                comparisons[scenario_name].add(replicate, report_name, metrics)
+        next_replicate = stop
+
+        seed_independent = [s_name for s_name in active if comparisons[s_name].n_seeds >= min_seeds
+                            and comparisons[s_name].is_seed_independent(primary_metric)]
+        for s_name in seed_independent:
+            logger.info(f"Multi-seed: '{s_name}' is seed-independent ({primary_metric} identical over "
+                        f"{comparisons[s_name].n_seeds} seeds); no further seeds.")
+        settled = [s_name for s_name in active if s_name not in seed_independent
+                   and comparisons[s_name].is_settled(primary_metric, looks)]
+        for s_name in settled:
+            logger.info(f"Multi-seed: ranking of '{s_name}' on {primary_metric} settled after {next_replicate} seeds: "
+                        f"{comparisons[s_name].ranking(primary_metric)}")
+        active = [s_name for s_name in active if s_name not in settled and s_name not in seed_independent]
+
+    for s_name in active:
+        logger.info(f"Multi-seed: ranking of '{s_name}' on {primary_metric} not settled after {max_seeds} seeds.")
+    return comparisons
@@ -0,0 +1,186 @@
+# analysis/parallel_executor.py
+
+"""
+================================================================================
+          Process-Pool Execution of the Scenario x Controller Matrix
+================================================================================
+Runs every (scenario, controller) cell of an analysis in a pool of worker
+processes instead of one serial loop.
+
+Each worker loads the configuration, the scenario definitions and all
+controllers once, in the pool initializer, and keeps them for every cell it
+runs. Tasks and results cross the process boundary as small picklable values:
+a task is (scenario name, controller identifier), and a result is the metrics
+dictionary plus, optionally, the zlib-compressed trajectory DataFrame.
+Scenario definitions are compiled in each worker from the same specs (see
+scenario_specs.py), so only their names cross the process boundary.
+
+`open_worker_pool` and `run_cells` keep such a pool open across several
+batches of (scenario, controller, seed replicate) cells, as the multi-seed
+comparison does (see multi_seed.py).
+
+A cell is computed exactly like the serial loop computes it (controller
+reset, ScenarioExecutor.execute, MetricsEngine.calculate, or a hit in the
+shared on-disk result cache), and the env is
+reset with a seed derived from the scenario name, so control-quality metrics
+are bit-identical to a serial run. Wall-clock metrics (latency_*, rt_*) and
+controllers whose output depends on timing (the MPC solve-time budget
+fallback) are the exception.
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
+
+import pandas as pd
+
+from analysis.parameter_manager import ParameterManager
+from analysis.scenario_definitions import get_scenarios
+from analysis.scenario_executor import ScenarioExecutor
+from analysis.metrics_engine import MetricsEngine
+from analysis.result_cache import SimulationResultCache, run_cached
+
+logger = logging.getLogger(__name__)
+
+# Per-process state populated by _init_worker
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def compress_trajectory(results_df: pd.DataFrame) -> bytes:
+    """Serializes a results DataFrame (including its attrs) into a compressed blob."""
+    return zlib.compress(pickle.dumps(results_df, protocol=pickle.HIGHEST_PROTOCOL), level=6)
+
+
+def decompress_trajectory(blob: bytes) -> pd.DataFrame:
+    """Restores a DataFrame produced by `compress_trajectory`."""
+    return pickle.loads(zlib.decompress(blob))
+
+
+def _init_worker(config_path: str, controller_identifiers: List[str], executor_kwargs: Dict[str, Any],
+                 use_cache: Optional[bool] = None):
+    """Loads config, scenarios and controllers once per worker process."""
+    # Imported here so that the controllers package (torch, SB3) is only loaded where it is used
+    from controllers import load_controller
+
+    full_config = ParameterManager(config_filepath=config_path).get_all_parameters()
+    core_config = full_config['CORE_PARAMETERS']
+    dt_sim = core_config.get('simulation', {}).get('dt', 0.02)
+
+    controllers = {}
+    for identifier in controller_identifiers:
+        instance, report_name = load_controller(identifier, full_config, dt_sim)
+        controllers[identifier] = (instance, report_name)
+
+    _WORKER_STATE.update({
+        'scenarios': get_scenarios(core_config),
+        'executor': ScenarioExecutor(full_config, **executor_kwargs),
+        'metrics_engine': MetricsEngine(core_config),
+        'controllers': controllers,
+        'result_cache': SimulationResultCache.from_config(core_config, enabled=use_cache),
+    })
+
+
+def _run_cell(task: Tuple[str, str, bool, int, bool, Optional[Dict[str, Any]], Optional[List[str]]]
+              ) -> Tuple[str, str, int, Optional[Dict[str, float]], Optional[bytes]]:
+    """
+    Runs one (scenario, controller, seed replicate) cell inside a worker. The scenario is
+    the worker's compiled one unless the task carries its config (e.g. a sweep point).
+    """
+    scenario_name, identifier, return_trajectory, replicate, metrics_only, scenario_conf, metrics = task
+    instance, report_name = _WORKER_STATE['controllers'][identifier]
+    if instance is None:
+        return scenario_name, report_name, replicate, None, None
+
+    if scenario_conf is None:
+        scenario_conf = _WORKER_STATE['scenarios'][scenario_name]
+    if replicate:
+        scenario_conf = {**scenario_conf, 'seed_replicate': replicate}
+    artifact_path = identifier if os.path.isfile(identifier) else None
+    metrics, results_df = run_cached(_WORKER_STATE['result_cache'], _WORKER_STATE['executor'], _WORKER_STATE['metrics_engine'],
+                                     scenario_name, scenario_conf, report_name, instance, artifact_path=artifact_path,
+                                     metrics_only=metrics_only, metrics=metrics)
+    trajectory = compress_trajectory(results_df) if return_trajectory else None
+    return scenario_name, report_name, replicate, metrics, trajectory
+
+
+def open_worker_pool(config_path: str,
+                     controller_identifiers: List[str],
+                     max_workers: int,
+                     executor_kwargs: Optional[Dict[str, Any]] = None,
+                     start_method: Optional[str] = None,
+                     use_cache: Optional[bool] = None) -> ProcessPoolExecutor:
+    """Starts a pool whose workers have loaded the configuration, scenarios and controllers."""
+    mp_context = multiprocessing.get_context(start_method) if start_method else None
+    return ProcessPoolExecutor(max_workers=max(1, int(max_workers)), mp_context=mp_context, initializer=_init_worker,
+                               initargs=(config_path, list(controller_identifiers), executor_kwargs or {}, use_cache))
+
+
+def run_cells(pool: ProcessPoolExecutor,
+              cells: List[Tuple],
+              metrics_only: bool = True,
+              metrics: Optional[List[str]] = None,
+              chunksize: int = 1) -> List[Tuple[str, str, int, Optional[Dict[str, float]]]]:
+    """
+    Runs (scenario name, controller identifier, seed replicate[, scenario config]) cells on
+    a pool from `open_worker_pool`; a cell without a config runs the worker's scenario of
+    that name. `metrics` restricts the calculated metrics. Returns (scenario, controller
+    report name, replicate, metrics) in cell order; metrics is None for a controller that
+    failed to load.
+    """
+    tasks = [(cell[0], cell[1], False, cell[2], metrics_only, cell[3] if len(cell) > 3 else None, metrics) for cell in cells]
+    return [result[:4] for result in pool.map(_run_cell, tasks, chunksize=max(int(chunksize), 1))]
+
+
+def run_scenario_matrix(
+    config_path: str,
+    scenario_names: List[str],
+    controller_identifiers: List[str],
+    max_workers: int,
+    executor_kwargs: Optional[Dict[str, Any]] = None,
+    return_trajectories: bool = False,
+    start_method: Optional[str] = None,
+    use_cache: Optional[bool] = None
+) -> Tuple[Dict[str, Dict[str, Dict[str, float]]], Dict[Tuple[str, str], bytes]]:
+    """
+    Runs every scenario against every controller in a process pool.
+
+    Args:
+        config_path (str): Configuration file; each worker loads it itself.
+        scenario_names (List[str]): Scenarios to run, in report order.
+        controller_identifiers (List[str]): Names or model paths for `load_controller`.
+        max_workers (int): Number of worker processes.
+        executor_kwargs (Optional[Dict]): Extra ScenarioExecutor arguments (e.g. 'realtime').
+        return_trajectories (bool): Also return each cell's compressed results DataFrame.
+        start_method (Optional[str]): multiprocessing start method; platform default if None.
+        use_cache (Optional[bool]): Overrides CORE_PARAMETERS['simulation']['result_cache']['enabled'].
+
+    Returns:
+        The {scenario: {controller: metrics}} structure of the serial loop, and the
+        compressed trajectories keyed by (scenario, controller report name).
+        Controllers that fail to load are left out, as in the serial loop.
+    """
+    tasks = [(s_name, identifier, return_trajectories, 0, False, None, None) for s_name in scenario_names for identifier in controller_identifiers]
+    n_workers = max(1, min(int(max_workers), len(tasks)))
+    logger.info(f"Running {len(tasks)} scenario/controller cells on {n_workers} worker processes.")
+
+    all_scenario_metrics: Dict[str, Dict[str, Dict[str, float]]] = {s_name: {} for s_name in scenario_names}
+    trajectories: Dict[Tuple[str, str], bytes] = {}
+    failed_controllers = set()
+
+    with open_worker_pool(config_path, controller_identifiers, n_workers, executor_kwargs, start_method, use_cache) as pool:
+        # map() yields in task order, so the merged dictionaries keep the serial ordering
+        for scenario_name, report_name, _, metrics, trajectory in pool.map(_run_cell, tasks):
+            if metrics is None:
+                if report_name not in failed_controllers:
+                    logger.error(f"Could not load controller: {report_name}")
+                    failed_controllers.add(report_name)
+                continue
+            all_scenario_metrics[scenario_name][report_name] = metrics
+            if trajectory is not None:
+                trajectories[(scenario_name, report_name)] = trajectory
+
+    return all_scenario_metrics, trajectories
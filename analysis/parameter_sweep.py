@@ -0,0 +1,198 @@
+# analysis/parameter_sweep.py
+
+"""
+================================================================================
+          Batched Parameter Sweeps over Scenario Families
+================================================================================
+Runs every point of a scenario family sweep (scenario_families.py) against a
+set of controllers and collects the metrics into one tidy table, indexed by
+the sweep parameters and the controller.
+
+A thousand-point sweep is not a thousand calls of ScenarioExecutor.execute:
+  - points are compiled lazily, `chunk_size` at a time, and each chunk is
+    dispatched as one batch to the worker pool of parallel_executor.py (the
+    workers load the configuration and controllers once, for the whole sweep);
+  - cells are mapped to the workers in chunks, so inter-process overhead is
+    paid per chunk rather than per run;
+  - runs go through the metrics-only path (no trajectory is recorded), and
+    `metrics` restricts the calculation to the metrics of interest;
+  - every run is answered from the simulation result cache when it was
+    simulated before, so extending or refining a sweep only runs new points.
+With `max_workers` = 1 the same runs execute serially in-process.
+`evaluate_scenarios` is the underlying batch runner for any stream of
+scenario configs (sensitivity analysis uses it too); `open_evaluator` keeps
+the pool open for callers that choose each batch from the last results
+(rare-event estimation).
+
+`sweep_heatmap` pivots the table into a (y parameter x x parameter) grid of a
+metric, ready for a heat map.
+"""
+
+import contextlib
+import logging
+import os
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple, Callable
+
+import numpy as np
+import pandas as pd
+
+from analysis.parameter_manager import ParameterManager
+from analysis.scenario_families import ScenarioFamily
+from analysis.scenario_executor import ScenarioExecutor
+from analysis.metrics_engine import MetricsEngine
+from analysis.result_cache import SimulationResultCache, run_cached
+from analysis.parallel_executor import open_worker_pool, run_cells
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(iterable: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    chunk: List[Any] = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@contextlib.contextmanager
+def open_evaluator(config_path: str,
+                   controllers: List[str],
+                   max_workers: Optional[int] = None,
+                   metrics: Optional[List[str]] = None,
+                   use_cache: Optional[bool] = None) -> Iterator[Callable[[List[Tuple[str, Dict[str, Any]]]], List[Tuple[int, str, Dict[str, float]]]]]:
+    """
+    Context manager yielding `evaluate(batch)`, which runs a list of (scenario name, scenario
+    config) pairs against every controller and returns (batch position, controller report
+    name, metrics) in order; metrics is {} for a failed run. The worker pool (`max_workers`
+    > 1) or the serially loaded controllers are kept for all batches, so callers whose next
+    batch depends on the last one (adaptive designs) pay the setup once. Scenarios may share
+    a name (the name seeds the env, so such runs see the same random numbers). Controllers
+    that fail to load are skipped.
+    """
+    full_config = ParameterManager(config_filepath=config_path).get_all_parameters()
+    core_config = full_config['CORE_PARAMETERS']
+    max_workers = max_workers or core_config.get('simulation', {}).get('max_workers', 1)
+
+    if max_workers > 1:
+        with open_worker_pool(config_path, controllers, max_workers, use_cache=use_cache) as pool:
+            def evaluate_parallel(batch: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[int, str, Dict[str, float]]]:
+                cells = [(name, identifier, 0, scenario) for name, scenario in batch for identifier in controllers]
+                results = run_cells(pool, cells, metrics=metrics, chunksize=max(len(cells) // (4 * max_workers), 1))
+                return [(position, report_name, run_metrics)
+                        for position, start in enumerate(range(0, len(results), len(controllers)))
+                        for _, report_name, _, run_metrics in results[start:start + len(controllers)]
+                        if run_metrics is not None]
+            yield evaluate_parallel
+        return
+
+    # Imported here so that the controllers package (torch, SB3) is only loaded where it is used
+    from controllers import load_controller
+
+    dt_sim = core_config.get('simulation', {}).get('dt', 0.02)
+    loaded = {}
+    for identifier in controllers:
+        instance, report_name = load_controller(identifier, full_config, dt_sim)
+        if instance is None:
+            logger.error(f"Could not load controller: {identifier}")
+            continue
+        loaded[report_name] = (instance, identifier if os.path.isfile(identifier) else None)
+    executor = ScenarioExecutor(full_config)
+    metrics_engine = MetricsEngine(core_config)
+    result_cache = SimulationResultCache.from_config(core_config, enabled=use_cache)
+
+    def evaluate_serial(batch: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[int, str, Dict[str, float]]]:
+        results = []
+        for position, (name, scenario) in enumerate(batch):
+            for report_name, (instance, artifact_path) in loaded.items():
+                run_metrics, _ = run_cached(result_cache, executor, metrics_engine, name, scenario, report_name, instance,
+                                            artifact_path=artifact_path, metrics_only=True, metrics=metrics)
+                results.append((position, report_name, run_metrics))
+        return results
+    yield evaluate_serial
+
+
+def evaluate_scenarios(config_path: str,
+                       scenarios: Iterable[Tuple[str, Dict[str, Any]]],
+                       controllers: List[str],
+                       max_workers: Optional[int] = None,
+                       metrics: Optional[List[str]] = None,
+                       use_cache: Optional[bool] = None,
+                       chunk_size: int = 256) -> Iterator[Tuple[int, str, Dict[str, float]]]:
+    """
+    Runs (scenario name, scenario config) pairs against every controller, `chunk_size`
+    scenarios per batch (see open_evaluator). Scenarios are consumed lazily. Yields
+    (scenario position, controller report name, metrics) in order.
+    """
+    with open_evaluator(config_path, controllers, max_workers, metrics, use_cache) as evaluate:
+        for chunk in _chunks(enumerate(scenarios), max(int(chunk_size), 1)):
+            for offset, report_name, run_metrics in evaluate([scenario for _, scenario in chunk]):
+                yield chunk[offset][0], report_name, run_metrics
+
+
+def run_sweep(config_path: str,
+              family: ScenarioFamily,
+              points: Iterable[Dict[str, Any]],
+              controllers: List[str],
+              max_workers: Optional[int] = None,
+              metrics: Optional[List[str]] = None,
+              use_cache: Optional[bool] = None,
+              chunk_size: int = 256) -> pd.DataFrame:
+    """
+    Runs a scenario family sweep and returns its tidy results table.
+
+    Args:
+        config_path (str): Configuration file (workers load it themselves).
+        family (ScenarioFamily): The scenario family.
+        points (Iterable[Dict]): Sweep points, e.g. `family.grid(...)` or `family.latin_hypercube(...)`.
+        controllers (List[str]): Controller names or model paths for `load_controller`.
+        max_workers (Optional[int]): Worker processes; default CORE_PARAMETERS['simulation']['max_workers'].
+        metrics (Optional[List[str]]): Metrics to calculate (all by default).
+        use_cache (Optional[bool]): Overrides CORE_PARAMETERS['simulation']['result_cache']['enabled'].
+        chunk_size (int): Points compiled and dispatched per batch.
+
+    Returns:
+        One row per (point, controller), indexed by the swept parameters and 'controller', with
+        the 'scenario' name, a 'failed' flag (no metrics, e.g. the env could not be set up) and
+        one column per metric.
+    """
+    core_config = ParameterManager(config_filepath=config_path).get_all_parameters()['CORE_PARAMETERS']
+    # Points and names in consumption order, recorded as the scenarios are compiled
+    consumed: List[Tuple[str, Dict[str, Any]]] = []
+
+    def compiled() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for name, point, scenario in family.scenarios(points, core_config):
+            consumed.append((name, point))
+            yield name, scenario
+
+    rows: List[Dict[str, Any]] = []
+    for position, report_name, run_metrics in evaluate_scenarios(config_path, compiled(), controllers, max_workers,
+                                                                 metrics, use_cache, chunk_size):
+        name, point = consumed[position]
+        rows.append({**point, 'controller': report_name, 'scenario': name, 'failed': not run_metrics, **run_metrics})
+        if len(rows) % 100 == 0:
+            logger.info(f"Sweep '{family.name}': {len(rows)} runs done.")
+
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    parameters = list(dict.fromkeys(key for _, point in consumed for key in point))
+    return table.set_index(parameters + ['controller'])
+
+
+def sweep_heatmap(table: pd.DataFrame, metric: str, x: str, y: str, controller: Optional[str] = None,
+                  aggfunc: str = 'mean') -> pd.DataFrame:
+    """
+    Pivots a sweep table into a (y values x x values) grid of `metric`, for one controller
+    (required if the table holds several). Other swept parameters are aggregated with
+    `aggfunc`; Latin-hypercube samples should be binned first (e.g. with pd.cut).
+    """
+    flat = table.reset_index()
+    if controller is not None:
+        flat = flat[flat['controller'] == controller]
+    elif flat['controller'].nunique() > 1:
+        raise ValueError("The sweep table holds several controllers; pass `controller`.")
+    values = pd.to_numeric(flat[metric], errors='coerce').replace([np.inf, -np.inf], np.nan)
+    return flat.assign(**{metric: values}).pivot_table(index=y, columns=x, values=metric, aggfunc=aggfunc).sort_index(ascending=False)
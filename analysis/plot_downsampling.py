@@ -0,0 +1,106 @@
+# analysis/plot_downsampling.py
+
+"""
+================================================================================
+          Shape-Preserving Downsampling of Series for Plotting
+================================================================================
+A 30-minute run at dt = 0.02 s has 90,000 samples per channel, far more than
+the pixel columns of a figure. Drawing all of them costs rendering time and
+makes every SVG line a 90,000-vertex path. Before drawing, a series is
+reduced to a few thousand points that look the same:
+
+  - 'minmax': the x range is split into `max_points / 2` columns and the
+    first, minimum and maximum sample of each column is kept (in x order),
+    plus the last sample. Every peak and the full vertical extent of each
+    column survive, so the reduced line covers exactly the pixels of the
+    original one. Vectorized; the default.
+  - 'lttb': Largest-Triangle-Three-Buckets (Steinarsson, 2013) keeps one
+    sample per bucket, the one forming the largest triangle with its
+    neighbours. Smoother visual shape at lower point counts.
+
+Both return sample indices, so a series keeps its original values.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLING_METHODS = ('minmax', 'lttb')
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Returns the sorted indices of the first, min and max sample per x column, plus the last sample."""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(y) & np.isfinite(x))
+    if len(finite) == 0:
+        return np.array([0, n - 1])
+    n_columns = max(max_points // 2, 1)
+    x_finite = x[finite]
+    span = x_finite[-1] - x_finite[0]
+    if span > 0:
+        columns = np.minimum(((x_finite - x_finite[0]) / span * n_columns).astype(np.int64), n_columns - 1)
+    else:
+        columns = np.zeros(len(finite), dtype=np.int64)
+    # Sorted by column, then value: a column's first entry is its minimum, its last the maximum
+    order = np.lexsort((y[finite], columns))
+    starts = np.flatnonzero(np.r_[True, np.diff(columns[order]) != 0])
+    ends = np.r_[starts[1:], len(order)] - 1
+    firsts = np.flatnonzero(np.r_[True, np.diff(columns) != 0])
+    keep = np.concatenate([finite[order[starts]], finite[order[ends]], finite[firsts], [0, n - 1]])
+    return np.unique(keep)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Returns the indices selected by Largest-Triangle-Three-Buckets, first and last included."""
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n) if n <= max_points else np.array([0, n - 1])
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Twice the triangle area of (previous point, candidate, mean of the next bucket)
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int, method: str = 'minmax') -> np.ndarray:
+    """Returns the indices of `y` to draw, using 'minmax' or 'lttb'."""
+    if method == 'lttb':
+        return lttb_indices(x, y, max_points)
+    if method != 'minmax':
+        raise ValueError(f"Unknown downsampling method '{method}'; use one of {DOWNSAMPLING_METHODS}.")
+    return minmax_indices(x, y, max_points)
+
+
+def downsample_frame(results_df: pd.DataFrame, columns: List[str], max_points: int, method: str = 'minmax',
+                     x_column: str = 'time_s') -> pd.DataFrame:
+    """
+    Reduces a results DataFrame to the rows needed to draw `columns` against `x_column`:
+    the union of each column's downsampled indices. Columns that are missing are skipped.
+    """
+    columns = [col for col in columns if col in results_df.columns and col != x_column]
+    if len(results_df) <= max_points or x_column not in results_df.columns:
+        return results_df[[c for c in [x_column] + columns if c in results_df.columns]]
+    x = results_df[x_column].to_numpy()
+    keep: Optional[np.ndarray] = None
+    for col in columns:
+        indices = downsample_indices(x, results_df[col].to_numpy(), max_points, method)
+        keep = indices if keep is None else np.union1d(keep, indices)
+    if keep is None:
+        keep = np.array([0, len(results_df) - 1])
+    return results_df[[x_column] + columns].iloc[keep]
@@ -0,0 +1,165 @@
+# analysis/realtime_pacer.py
+
+"""
+================================================================================
+          Real-Time Pacer for Wall-Clock Paced Execution
+================================================================================
+Paces the ScenarioExecutor loop to wall-clock time so a controller runs against
+the same 20 ms control cycle it would have on the target hardware.
+
+Every control cycle k is released at a deadline on a fixed grid of the
+monotonic clock, `t0 + k * period` with `period = dt * time_scale`
+(time_scale 1.0 is real time, 2.0 half speed, 0.5 double speed). The pacer
+sleeps until shortly before the release and spins for the remainder, then
+measures:
+  - release jitter: how late the cycle actually started versus its grid point;
+  - controller compute time, and whether the action was ready before the
+    cycle's deadline (the next grid point) -- otherwise a deadline miss.
+
+On a miss the configured policy applies:
+  - 'hold': the late action is discarded and the plant steps with the last
+            action that was delivered on time (the actuator keeps its command);
+  - 'skip': the late action is applied, and the grid points that passed while
+            computing are skipped instead of being made up back-to-back.
+With either policy the schedule never tries to catch up: the next release is
+the first grid point still in the future, and the skipped ones are counted.
+
+Jitter and compute time use the streaming LatencyHistogram, so nothing is
+stored per step.
+"""
+
+import time
+from typing import Dict, Any, Optional
+
+import pandas as pd
+
+from analysis.latency_profiler import LatencyHistogram
+
+MISS_POLICIES = ('hold', 'skip')
+REALTIME_METRIC_KEYS = ['rt_deadline_miss_rate', 'rt_skipped_cycles', 'rt_compute_p99_us', 'rt_jitter_p99_us', 'rt_utilization']
+
+
+class RealTimePacer:
+    """
+    Schedules control cycles on a monotonic-clock deadline grid.
+
+    Args:
+        dt (float): Simulated time step (s), i.e. the control cycle.
+        time_scale (float): Wall-clock seconds per simulated second.
+        miss_policy (str): 'hold' or 'skip' (see module docstring).
+        budget_ms (Optional[float]): Controller compute budget; defaults to the full period.
+        spin_us (float): Final part of each wait that is busy-waited instead of slept,
+                         to avoid the OS sleep granularity.
+    """
+
+    def __init__(self, dt: float, time_scale: float = 1.0, miss_policy: str = 'hold',
+                 budget_ms: Optional[float] = None, spin_us: float = 200.0):
+        if time_scale <= 0:
+            raise ValueError(f"time_scale must be positive, got {time_scale}.")
+        if miss_policy not in MISS_POLICIES:
+            raise ValueError(f"Unknown miss_policy '{miss_policy}'. Choose from {MISS_POLICIES}.")
+        self.dt = dt
+        self.time_scale = time_scale
+        self.miss_policy = miss_policy
+        self.period_ns = int(round(dt * time_scale * 1e9))
+        self.budget_ns = int(round(budget_ms * 1e6)) if budget_ms is not None else self.period_ns
+        self.spin_ns = int(spin_us * 1e3)
+        self.reset()
+
+    @classmethod
+    def from_config(cls, realtime_config: Dict[str, Any], dt: float) -> 'RealTimePacer':
+        """Builds a pacer from a CORE_PARAMETERS['simulation']['realtime'] style block."""
+        return cls(dt=dt,
+                   time_scale=realtime_config.get('time_scale', 1.0),
+                   miss_policy=realtime_config.get('miss_policy', 'hold'),
+                   budget_ms=realtime_config.get('budget_ms'),
+                   spin_us=realtime_config.get('spin_us', 200.0))
+
+    def reset(self):
+        """Clears the statistics; the deadline grid is anchored by the next `start()`."""
+        self.compute = LatencyHistogram()
+        self.jitter = LatencyHistogram()
+        self.cycles = 0
+        self.deadline_misses = 0
+        self.budget_overruns = 0
+        self.skipped_cycles = 0
+        self._t0_ns: Optional[int] = None
+        self._cycle_index = 0
+        self._release_ns = 0
+
+    def start(self):
+        """Anchors the deadline grid at the current time; the first cycle is released immediately."""
+        self._t0_ns = time.perf_counter_ns()
+        self._cycle_index = 0
+
+    def wait_for_release(self):
+        """Blocks until the current cycle's grid point and records the release jitter."""
+        if self._t0_ns is None:
+            self.start()
+        target_ns = self._t0_ns + self._cycle_index * self.period_ns
+        remaining_ns = target_ns - time.perf_counter_ns()
+        if remaining_ns > self.spin_ns:
+            time.sleep((remaining_ns - self.spin_ns) / 1e9)
+        while time.perf_counter_ns() < target_ns:
+            pass
+        self._release_ns = time.perf_counter_ns()
+        self.jitter.record(self._release_ns - target_ns)
+
+    def complete_compute(self) -> bool:
+        """
+        Marks the controller's action as ready. Returns True if it met the cycle's
+        deadline, False on a deadline miss. Either way the pacer moves to the next
+        grid point that is still in the future.
+        """
+        now_ns = time.perf_counter_ns()
+        compute_ns = now_ns - self._release_ns
+        deadline_ns = self._t0_ns + (self._cycle_index + 1) * self.period_ns
+        self.compute.record(compute_ns)
+        self.cycles += 1
+        if compute_ns > self.budget_ns:
+            self.budget_overruns += 1
+
+        on_time = now_ns <= deadline_ns
+        next_index = self._cycle_index + 1
+        if not on_time:
+            self.deadline_misses += 1
+            # Grid points that already passed are skipped rather than run back-to-back
+            next_index = (now_ns - self._t0_ns) // self.period_ns + 1
+            self.skipped_cycles += next_index - self._cycle_index - 1
+        self._cycle_index = next_index
+        return on_time
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns deadline-miss counts, compute-time and jitter statistics (microseconds)."""
+        compute = self.compute.summary()
+        return {
+            'period_ms': self.period_ns / 1e6,
+            'budget_ms': self.budget_ns / 1e6,
+            'time_scale': self.time_scale,
+            'miss_policy': self.miss_policy,
+            'cycles': self.cycles,
+            'deadline_misses': self.deadline_misses,
+            'deadline_miss_rate': self.deadline_misses / self.cycles if self.cycles else float('nan'),
+            'budget_overruns': self.budget_overruns,
+            'skipped_cycles': self.skipped_cycles,
+            'utilization': compute['mean_us'] * 1e3 / self.period_ns if self.cycles else float('nan'),
+            'compute': compute,
+            'jitter': self.jitter.summary(),
+        }
+
+
+def realtime_metrics(results_df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Flattens the pacing summary attached to an executor results DataFrame into
+    `rt_*` metrics. Returns an empty dict for runs that were not paced.
+    """
+    summary = results_df.attrs.get('realtime') if results_df is not None else None
+    if not summary:
+        return {}
+    return {
+        'rt_deadline_miss_rate': summary['deadline_miss_rate'],
+        'rt_skipped_cycles': summary['skipped_cycles'],
+        'rt_compute_p99_us': summary['compute']['p99_us'],
+        'rt_jitter_p99_us': summary['jitter']['p99_us'],
+        'rt_utilization': summary['utilization'],
+    }
@@ -15,8 +15,47 @@ import os
 import datetime
 from typing import Dict, Any, Optional, List
 
+from analysis.latency_profiler import LATENCY_METRIC_KEYS
+from analysis.realtime_pacer import REALTIME_METRIC_KEYS
+
 logger = logging.getLogger(__name__)
 
+
+def composite_robustness_score(metrics_df: pd.DataFrame, crs_metrics_config: Dict[str, Dict[str, float]]) -> Optional[pd.Series]:
+    """
+    Calculates the CRS based on weighted, ranked performance across key metrics.
+    A score of 1.0 is best, 0.0 is worst among the competitors (rows of `metrics_df`).
+    """
+    if metrics_df.empty or not crs_metrics_config:
+        return None
+
+    weighted_ranks = {}
+    # Rank for metrics where a higher value is better
+    for metric, weight in crs_metrics_config.get('higher_is_better', {}).items():
+        if metric in metrics_df.columns and metrics_df[metric].notna().any():
+            ranks = metrics_df[metric].rank(method='min', ascending=False, na_option='bottom')
+            weighted_ranks[metric] = ranks * weight
+    
+    # Rank for metrics where a lower value is better
+    for metric, weight in crs_metrics_config.get('lower_is_better', {}).items():
+        if metric in metrics_df.columns and metrics_df[metric].notna().any():
+            ranks = metrics_df[metric].rank(method='min', ascending=True, na_option='bottom')
+            weighted_ranks[metric] = ranks * weight
+    
+    if not weighted_ranks: return None
+    
+    # Sum the weighted ranks for a total score
+    total_weighted_rank = pd.DataFrame(weighted_ranks).sum(axis=1)
+    
+    # Normalize the score to be between 0 and 1
+    min_rank, max_rank = total_weighted_rank.min(), total_weighted_rank.max()
+    if max_rank == min_rank: # Avoid division by zero if all scores are identical
+        return pd.Series(1.0, index=total_weighted_rank.index)
+    
+    # Lower rank is better, so we subtract from 1 to make higher score better
+    return 1 - ((total_weighted_rank - min_rank) / (max_rank - min_rank))
+
+
 class ReportGenerator:
     """Generates analysis reports using Jinja2 templates. v3.3"""
 
@@ -53,34 +92,7 @@ class ReportGenerator:
         Calculates the CRS based on weighted, ranked performance across key metrics.
         A score of 1.0 is best, 0.0 is worst among the competitors.
         """
-        if metrics_df.empty or not self.crs_metrics_config:
-            return None
-
-        weighted_ranks = {}
-        # Rank for metrics where a higher value is better
-        for metric, weight in self.crs_metrics_config.get('higher_is_better', {}).items():
-            if metric in metrics_df.columns and metrics_df[metric].notna().any():
-                ranks = metrics_df[metric].rank(method='min', ascending=False, na_option='bottom')
-                weighted_ranks[metric] = ranks * weight
-        
-        # Rank for metrics where a lower value is better
-        for metric, weight in self.crs_metrics_config.get('lower_is_better', {}).items():
-            if metric in metrics_df.columns and metrics_df[metric].notna().any():
-                ranks = metrics_df[metric].rank(method='min', ascending=True, na_option='bottom')
-                weighted_ranks[metric] = ranks * weight
-        
-        if not weighted_ranks: return None
-        
-        # Sum the weighted ranks for a total score
-        total_weighted_rank = pd.DataFrame(weighted_ranks).sum(axis=1)
-        
-        # Normalize the score to be between 0 and 1
-        min_rank, max_rank = total_weighted_rank.min(), total_weighted_rank.max()
-        if max_rank == min_rank: # Avoid division by zero if all scores are identical
-            return pd.Series(1.0, index=total_weighted_rank.index)
-        
-        # Lower rank is better, so we subtract from 1 to make higher score better
-        return 1 - ((total_weighted_rank - min_rank) / (max_rank - min_rank))
+        return composite_robustness_score(metrics_df, self.crs_metrics_config)
 
     def _perform_comparative_analysis(self, metrics_df: pd.DataFrame) -> Dict[str, Any]:
         """Determines the 'winner' for each metric and makes a final recommendation."""
@@ -108,8 +120,12 @@ class ReportGenerator:
         
         return analysis
 
-    def generate_report(self, all_scenario_metrics: Dict[str, Dict[str, Dict[str, float]]], scenarios_config: Dict[str, Dict[str, Any]], controller_details: Optional[Dict[str, Any]] = None, report_filename: Optional[str] = None) -> Optional[str]:
-        """Renders the final Markdown report from a Jinja2 template."""
+    def generate_report(self, all_scenario_metrics: Dict[str, Dict[str, Dict[str, float]]], scenarios_config: Dict[str, Dict[str, Any]], controller_details: Optional[Dict[str, Any]] = None, report_filename: Optional[str] = None, seed_statistics: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Renders the final Markdown report from a Jinja2 template. `seed_statistics` maps
+        scenarios to the SeedComparison of a multi-seed analysis (see multi_seed.py): the
+        CRS becomes the mean per-seed CRS and confidence-interval tables are added.
+        """
         if not self.jinja_env:
             logger.error("Cannot generate report: Jinja2 environment not initialized.")
             return None
@@ -131,24 +147,32 @@ class ReportGenerator:
             crs_scores = self._calculate_composite_robustness_score(metrics_df)
             if crs_scores is not None:
                 metrics_df['composite_robustness_score'] = crs_scores
+            seed_comparison = (seed_statistics or {}).get(scenario_name)
+            seed_tables = self._build_seed_tables(seed_comparison) if seed_comparison is not None else {}
+            if seed_tables.get('mean_crs') is not None:
+                metrics_df['composite_robustness_score'] = seed_tables['mean_crs']
 
             analysis_summary = self._perform_comparative_analysis(metrics_df)
             plot_paths = self._find_plots_for_scenario(scenario_name)
 
-            # Define column order, putting CRS first
+            # Define column order, putting CRS first. Step-latency metrics get their own table.
             cols = sorted([col for col in metrics_df.columns if metrics_df[col].notna().any()])
+            latency_cols = [col for col in LATENCY_METRIC_KEYS + REALTIME_METRIC_KEYS if col in cols]
+            cols = [col for col in cols if col not in latency_cols]
             if 'composite_robustness_score' in cols:
                 cols.insert(0, cols.pop(cols.index('composite_robustness_score')))
             
-            # Create the table for the report
-            metrics_table = [["Controller"] + cols]
-            for controller, row in metrics_df.reindex(columns=cols).iterrows():
-                formatted_row = [controller] + [self._format_metric(row.get(col)) for col in cols]
-                metrics_table.append(formatted_row)
+            # Create the tables for the report
+            metrics_table = self._build_table(metrics_df, cols)
+            latency_table = self._build_table(metrics_df, latency_cols) if latency_cols else []
 
             processed_scenarios[scenario_name] = {
                 'config': scenarios_config.get(scenario_name, {}),
                 'metrics_table': metrics_table,
+                'latency_table': latency_table,
+                'seed_table': seed_tables.get('summary', []),
+                'seed_pairwise_table': seed_tables.get('pairwise', []),
+                'n_seeds': seed_comparison.n_seeds if seed_comparison is not None else None,
                 'analysis': analysis_summary,
                 'plots': plot_paths,
                 'controller_names': list(metrics_by_controller.keys())
@@ -170,6 +194,40 @@ class ReportGenerator:
              logger.error(f"Failed to render or write report: {e}", exc_info=True)
              return None
 
+    def _build_table(self, metrics_df: pd.DataFrame, cols: List[str]) -> List[List[str]]:
+        """Builds a header row plus one formatted row per controller."""
+        table = [["Controller"] + cols]
+        for controller, row in metrics_df.reindex(columns=cols).iterrows():
+            table.append([controller] + [self._format_metric(row.get(col)) for col in cols])
+        return table
+
+    def _build_seed_tables(self, seed_comparison: Any) -> Dict[str, Any]:
+        """Builds the mean [CI] table and the paired-difference table of a SeedComparison."""
+        primary_metric = self.comparison_criteria.get('primary_metric', 'composite_robustness_score')
+        metrics = list(dict.fromkeys(['composite_robustness_score', primary_metric]
+                                     + list(self.crs_metrics_config.get('higher_is_better', {}))
+                                     + list(self.crs_metrics_config.get('lower_is_better', {}))))
+        summary = seed_comparison.summary(metrics)
+        if summary.empty:
+            return {}
+        metrics = [m for m in metrics if m in set(summary['metric'])]
+        summary_table = [["Controller"] + metrics]
+        for controller in seed_comparison.controllers:
+            rows = summary[summary['controller'] == controller].set_index('metric')
+            summary_table.append([controller] + [f"{self._format_metric(rows.at[m, 'mean'])} [{self._format_metric(rows.at[m, 'ci_low'])}, "
+                                                 f"{self._format_metric(rows.at[m, 'ci_high'])}]" for m in metrics])
+
+        pairwise = seed_comparison.pairwise(list(dict.fromkeys(['composite_robustness_score', primary_metric])))
+        pairwise_table = [["Metric", "Controller A", "Controller B", "Mean A - B", "CI", "p-value", "Significant"]]
+        for row in pairwise.itertuples():
+            pairwise_table.append([row.metric, row.controller_a, row.controller_b, self._format_metric(row.mean_diff),
+                                   f"[{self._format_metric(row.ci_low)}, {self._format_metric(row.ci_high)}]",
+                                   self._format_metric(row.p_value), "yes" if row.significant else "no"])
+
+        crs_rows = summary[summary['metric'] == 'composite_robustness_score']
+        return {'summary': summary_table, 'pairwise': pairwise_table,
+                'mean_crs': crs_rows.set_index('controller')['mean'] if not crs_rows.empty else None}
+
     def _find_plots_for_scenario(self, scenario_name: str) -> Dict[str, List[Dict[str, str]]]:
         """Finds saved plot files corresponding to a given scenario."""
         plots = {'time_series': [], 'metric_comparison': []}
@@ -0,0 +1,288 @@
+# analysis/result_cache.py
+
+"""
+================================================================================
+          Content-Addressed Simulation Result Cache
+================================================================================
+Stores the metrics and trajectory of each simulated (controller, scenario)
+run on disk, so that identical runs -- auto-validation right after an
+optimizer, a re-run of the analysis after a report-only change -- are
+answered from disk instead of being simulated again.
+
+An entry is addressed by a stable hash of everything that determines the run:
+  - the controller: its class, dt, construction config and live parameters
+    (`get_parameters()`, so gains changed by update_parameters count), plus the SHA-256
+    of its artifact file (RL .zip / distilled .npz) when one is given, or of
+    its in-memory policy/model weights otherwise;
+  - the scenario name (it seeds the env) and its definition, including the
+    load-profile function;
+  - the full CORE_PARAMETERS dictionary;
+  - the executor's recording settings;
+  - the simulation code version: a hash of the environment, physics model,
+    controller and executor/metrics sources (`code_version()`).
+Changing any of these gives a different key; stale entries are never
+invalidated explicitly, they simply stop being hit and age out.
+
+Entries are zlib-compressed pickles written atomically (temporary file and
+rename), so several processes can share one cache directory. The directory
+is bounded to `max_size_mb`: after each write, least recently used entries
+(by file mtime, refreshed on every hit) are deleted. Wall-clock paced runs
+are not cached, since their outcome depends on timing. Wall-clock measurements
+of a run -- the `latency_*` and `rt_*` metrics and the matching results_df
+attrs -- are never stored: a hit carries no timings rather than another
+run's.
+"""
+
+import glob
+import logging
+import os
+import pickle
+import time
+import zlib
+from typing import Dict, Any, Optional, Tuple, List
+
+import pandas as pd
+
+from analysis.hashing import stable_hash, file_digest
+
+logger = logging.getLogger(__name__)
+
+# Wall-clock measurements, which describe one execution and not the simulated run
+TIMING_METRIC_PREFIXES = ('latency_', 'rt_')
+TIMING_ATTRS = ('latency', 'realtime')
+
+
+def _without_timings(metrics: Dict[str, float], results_df: pd.DataFrame) -> Tuple[Dict[str, float], pd.DataFrame]:
+    """Drops the wall-clock metrics and results_df attrs of a run."""
+    metrics = {name: value for name, value in metrics.items() if not name.startswith(TIMING_METRIC_PREFIXES)}
+    if any(name in results_df.attrs for name in TIMING_ATTRS):
+        results_df = results_df.copy(deep=False)
+        results_df.attrs = {name: value for name, value in results_df.attrs.items() if name not in TIMING_ATTRS}
+    return metrics, results_df
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Sources whose changes can change a simulation result or its metrics
+SIMULATION_SOURCES = [
+    'environment/*.py', 'models/*.py', 'controllers/*.py',
+    'analysis/scenario_definitions.py', 'analysis/scenario_specs.py', 'analysis/scenario_executor.py', 'analysis/metrics_engine.py', 'analysis/metric_registry.py',
+    'analysis/streaming_metrics.py', 'analysis/trajectory_recorder.py', 'analysis/trajectory_decimator.py',
+    'analysis/latency_profiler.py', 'analysis/realtime_pacer.py',
+]
+ENTRY_SUFFIX = '.pkl.z'
+
+_CODE_VERSION: Optional[str] = None
+
+
+def code_version() -> str:
+    """Returns a hash of the simulation sources, computed once per process."""
+    global _CODE_VERSION
+    if _CODE_VERSION is None:
+        files = sorted({path for pattern in SIMULATION_SOURCES for path in glob.glob(os.path.join(PROJECT_ROOT, pattern))})
+        _CODE_VERSION = stable_hash([[os.path.relpath(path, PROJECT_ROOT).replace(os.sep, '/'), file_digest(path)] for path in files])
+    return _CODE_VERSION
+
+
+# get_parameters() entries that are run statistics rather than parameters (MPC solve timing)
+VOLATILE_PARAMETER_KEYS = ('timing',)
+# Gains a gain schedule derives from the last observation; the schedule itself determines them
+SCHEDULED_GAIN_KEYS = ('kp', 'ki', 'kd')
+
+
+def _live_parameters(controller: Any) -> Optional[Dict[str, Any]]:
+    """The controller's current parameters, which update_parameters may have changed since construction."""
+    if not hasattr(controller, 'get_parameters'):
+        return None
+    params = dict(controller.get_parameters() or {})
+    volatile = VOLATILE_PARAMETER_KEYS + (SCHEDULED_GAIN_KEYS if 'gain_schedule' in params else ())
+    return {key: value for key, value in params.items() if key not in volatile}
+
+
+def controller_fingerprint(controller: Any, artifact_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Describes what determines a controller's behaviour: class, dt, construction config and
+    live parameters, and the artifact file content or the weights of its policy/model.
+    """
+    fingerprint: Dict[str, Any] = {
+        'class': f"{type(controller).__module__}.{type(controller).__qualname__}",
+        'dt': getattr(controller, 'dt', None),
+        'config': getattr(controller, 'config', None),
+        'parameters': _live_parameters(controller),
+    }
+    if artifact_path and os.path.isfile(artifact_path):
+        fingerprint['artifact_sha256'] = file_digest(artifact_path)
+    elif getattr(controller, 'policy', None) is not None:
+        fingerprint['policy'] = stable_hash(vars(controller.policy))
+    elif getattr(getattr(controller, 'model', None), 'policy', None) is not None:
+        state = controller.model.policy.state_dict()
+        fingerprint['model'] = stable_hash({name: tensor.detach().cpu().numpy() for name, tensor in state.items()})
+    return fingerprint
+
+
+class SimulationResultCache:
+    """
+    A size-bounded, persistent cache of (metrics, results DataFrame) per simulated run.
+
+    Args:
+        cache_dir (str): Directory of the cache entries.
+        max_size_mb (float): Total size above which least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = 'results/sim_cache', max_size_mb: float = 512.0):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, core_config: Dict[str, Any], enabled: Optional[bool] = None) -> Optional['SimulationResultCache']:
+        """
+        Builds the cache from CORE_PARAMETERS['simulation']['result_cache'], or returns None
+        if it is disabled. `enabled` overrides the configured switch.
+        """
+        settings = core_config.get('simulation', {}).get('result_cache', {})
+        if not (settings.get('enabled', False) if enabled is None else enabled):
+            return None
+        cache_dir = settings.get('cache_dir', 'results/sim_cache')
+        if not os.path.isabs(cache_dir):
+            cache_dir = os.path.join(PROJECT_ROOT, cache_dir)
+        return cls(cache_dir=cache_dir, max_size_mb=settings.get('max_size_mb', 512.0))
+
+    def key(self,
+            core_config: Dict[str, Any],
+            scenario_name: str,
+            scenario_config: Dict[str, Any],
+            controller: Any,
+            artifact_path: Optional[str] = None,
+            executor_settings: Optional[Dict[str, Any]] = None) -> str:
+        """Returns the content address of a run."""
+        return stable_hash({
+            'controller': controller_fingerprint(controller, artifact_path),
+            'scenario': [scenario_name, scenario_config],
+            'core': core_config,
+            'executor': executor_settings or {},
+            'code': code_version(),
+        })
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, float], pd.DataFrame]]:
+        """Returns the stored (metrics, results DataFrame), or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.loads(zlib.decompress(f.read()))
+            os.utime(path)  # marks the entry as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _without_timings(entry['metrics'], entry['results_df'])
+
+    def put(self, key: str, metrics: Dict[str, float], results_df: pd.DataFrame):
+        """Stores a run and evicts least recently used entries beyond the size bound."""
+        path = self._path(key)
+        metrics, results_df = _without_timings(metrics, results_df)
+        blob = zlib.compress(pickle.dumps({'metrics': metrics, 'results_df': results_df, 'created': time.time()},
+                                          protocol=pickle.HIGHEST_PROTOCOL), level=6)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def _entries(self) -> List[os.DirEntry]:
+        return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(ENTRY_SUFFIX)]
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits `max_size_mb`."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # removed by another process
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """Deletes every entry."""
+        for entry in self._entries():
+            self._remove(entry.path)
+        logger.info(f"Simulation result cache cleared: {self.cache_dir}")
+
+    def info(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, the number of entries and their total size."""
+        entries = self._entries()
+        return {'entries': len(entries), 'size_mb': sum(entry.stat().st_size for entry in entries) / (1024 * 1024),
+                'hits': self.hits, 'misses': self.misses}
+
+
+def run_cached(cache: Optional[SimulationResultCache],
+               executor: Any,
+               metrics_engine: Any,
+               scenario_name: str,
+               scenario_config: Dict[str, Any],
+               controller_name: str,
+               controller_instance: Any,
+               artifact_path: Optional[str] = None,
+               metrics_only: bool = False,
+               metrics: Optional[List[str]] = None) -> Tuple[Dict[str, float], pd.DataFrame]:
+    """
+    Executes a scenario and calculates its metrics, answering from `cache` when the
+    same run was simulated before. Without a cache this is ScenarioExecutor.execute
+    followed by MetricsEngine.calculate.
+
+    With `metrics_only`, the run goes through ScenarioExecutor.execute_metrics instead:
+    the metrics are accumulated while it executes and the returned DataFrame is empty.
+    `metrics` restricts the calculation to the named metrics (see metric_registry.py).
+    """
+    key = None
+    if cache is not None and not executor.realtime_config.get('enabled', False):
+        executor_settings = {'recording': executor.recording_config, 'profile_latency': executor.profile_latency}
+        if metrics_only:
+            executor_settings['metrics_only'] = True
+        if metrics is not None:
+            executor_settings['metrics'] = sorted(metrics)
+        key = cache.key(executor.core_params, scenario_name, scenario_config, controller_instance,
+                        artifact_path=artifact_path, executor_settings=executor_settings)
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(f"Result cache hit for {scenario_name}/{controller_name} ({key[:12]}).")
+            return cached
+
+    if hasattr(controller_instance, 'reset'):
+        controller_instance.reset()
+    if metrics_only:
+        results = executor.execute_metrics(scenario_name, scenario_config, controller_name, controller_instance, metrics=metrics)
+        if key is not None and results:
+            cache.put(key, results, pd.DataFrame())
+        return results, pd.DataFrame()
+    results_df = executor.execute(scenario_name, scenario_config, controller_name, controller_instance)
+    results = metrics_engine.calculate(results_df, scenario_config, metrics=metrics)
+    if key is not None and not results_df.empty:
+        cache.put(key, results, results_df)
+    return results, results_df
@@ -21,15 +21,23 @@ Key Upgrades:
 - **Enhanced Scenario Parameters**: Existing scenarios like 'deceptive_sensor_noise'
   have been made more challenging to ensure the agent is hardened against a
   wider range of off-normal conditions.
+- **Declarative Specs**: The library is defined as plain-data specs that are
+  compiled into picklable tabulated load profiles, and can be extended with
+  YAML files without code changes (see scenario_specs.py).
 ================================================================================
 """
 
+import os
 import numpy as np
 import logging
 from typing import Dict, Any, Callable
 
+from analysis.scenario_specs import compile_scenario, load_scenario_specs
+
 logger = logging.getLogger(__name__)
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
 # =============================================================================
 # Load Profile & Event Helper Functions
 # =============================================================================
@@ -72,98 +80,111 @@ def multi_step_load_profile(steps: list) -> Callable[[float, int], float]:
 # Main Scenario Definition Function (DTAF v6.0)
 # =============================================================================
 
-def get_scenarios(core_config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+def get_scenario_specs(core_config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
     """
-    Defines the complete, expert-curated library of all test and training scenarios.
+    Defines the complete, expert-curated library of all test and training scenarios
+    as declarative specs (see scenario_specs.py). Loads are per-unit of the nominal
+    electrical load.
     """
-    scenarios: Dict[str, Dict[str, Any]] = {}
-    try:
-        sim_dt = core_config['simulation']['dt']
-        initial_load_base = core_config.get('initial_conditions', {}).get('electrical_load_mw', 3008.5)
-        eta_base = core_config.get('coupling', {}).get('eta_transfer', 0.98)
-    except KeyError as e:
-        logger.error(f"Failed to get required value from core_config: {e}", exc_info=True)
-        return {}
+    specs: Dict[str, Dict[str, Any]] = {}
+    eta_base = core_config.get('coupling', {}).get('eta_transfer', 0.98)
 
     # === STANDARD VALIDATION SCENARIOS (The Basics) ===
-    scenarios['baseline_steady_state'] = {
+    specs['baseline_steady_state'] = {
         'description': 'Baseline steady-state operation at 90% power.',
-        'load_profile_func': constant_load(initial_load_base),
-        'max_steps': int(500 / sim_dt),
+        'load_profile': {'type': 'constant', 'units': 'pu', 'load': 1.0},
+        'duration_s': 500,
         'reset_options': {'initial_power_level': 0.9}
     }
-    scenarios['gradual_load_increase_10pct'] = {
+    specs['gradual_load_increase_10pct'] = {
         'description': 'Gradual load ramp from 90% to 100%.',
-        'load_profile_func': gradual_load_change(initial_load_base * 0.9, initial_load_base, 20.0, 300.0),
-        'max_steps': int(400 / sim_dt),
+        'load_profile': {'type': 'ramp', 'units': 'pu', 'initial': 0.9, 'final': 1.0, 'start_t': 20.0, 'duration': 300.0},
+        'duration_s': 400,
         'reset_options': {'initial_power_level': 0.9}
     }
-    scenarios['sudden_load_increase_5pct'] = {
+    specs['sudden_load_increase_5pct'] = {
         'description': 'Sudden +5% load increase from nominal.',
-        'load_profile_func': step_load_change(initial_load_base, initial_load_base * 1.05, 20.0),
-        'max_steps': int(300 / sim_dt)
+        'load_profile': {'type': 'step', 'units': 'pu', 'initial': 1.0, 'final': 1.05, 'step_t': 20.0},
+        'duration_s': 300
     }
 
     # === EFFICIENCY & ACTUATOR PRESERVATION PROBES (Targeted Drills) ===
-    scenarios['steady_state_efficiency_probe'] = {
+    specs['steady_state_efficiency_probe'] = {
         'description': 'RL Drill: A long, quiet hold to enforce control efficiency.',
-        'load_profile_func': constant_load(initial_load_base),
-        'max_steps': int(1800 / sim_dt), # Very long duration
-        'is_efficiency_probe': True # Custom flag for the reward function
+        'load_profile': {'type': 'constant', 'units': 'pu', 'load': 1.0},
+        'duration_s': 1800, # Very long duration
+        'flags': {'is_efficiency_probe': True} # Custom flag for the reward function
     }
 
     # === ROBUSTNESS & ADVERSARIAL DRILLS (The Hardening Process) ===
-    scenarios['deceptive_sensor_noise'] = {
+    specs['deceptive_sensor_noise'] = {
         'description': 'Adversarial Test: High, dynamic sensor noise during a load ramp.',
-        'load_profile_func': gradual_load_change(initial_load_base * 0.9, initial_load_base, 20.0, 300.0),
-        'max_steps': int(400 / sim_dt),
+        'load_profile': {'type': 'ramp', 'units': 'pu', 'initial': 0.9, 'final': 1.0, 'start_t': 20.0, 'duration': 300.0},
+        'duration_s': 400,
         'reset_options': {'initial_power_level': 0.9},
         'adversarial_noise': {'active': True, 'initial_magnitude': 0.05, 'final_magnitude': 0.15, 'bias_magnitude': 8.0},
-        'is_adversarial_drill': True # Flag for robustness reward
+        'flags': {'is_adversarial_drill': True} # Flag for robustness reward
     }
-    scenarios['parameter_randomization_drills'] = {
+    specs['parameter_randomization_drills'] = {
         'description': 'RL Drill: Train against randomized physics for generalization.',
-        'load_profile_func': constant_load(initial_load_base),
-        'max_steps': int(400 / sim_dt),
-        'is_domain_randomization_drill': True,
-        'is_adversarial_drill': True # Flag for robustness reward
+        'load_profile': {'type': 'constant', 'units': 'pu', 'load': 1.0},
+        'duration_s': 400,
+        'flags': {'is_domain_randomization_drill': True,
+                  'is_adversarial_drill': True} # Flag for robustness reward
     }
     
     # NEW ADVERSARIAL DRILL to directly target robustness deficiency
-    scenarios['cascading_grid_fault_and_recovery'] = {
+    specs['cascading_grid_fault_and_recovery'] = {
         'description': 'Adversarial Drill: A cascading grid fault followed by recovery demand.',
-        'load_profile_func': multi_step_load_profile([
-            (initial_load_base, 0.0),          # Start at nominal
-            (initial_load_base * 0.8, 20.0),   # Sudden 20% load rejection (e.g., major line trip)
-            (initial_load_base * 0.85, 120.0), # Grid stabilizes at a lower load
-            (initial_load_base * 1.05, 150.0)  # Sudden demand to ramp up for recovery
-        ]),
-        'max_steps': int(500 / sim_dt),
+        'load_profile': {'type': 'multi_step', 'units': 'pu', 'steps': [
+            [1.0, 0.0],    # Start at nominal
+            [0.8, 20.0],   # Sudden 20% load rejection (e.g., major line trip)
+            [0.85, 120.0], # Grid stabilizes at a lower load
+            [1.05, 150.0]  # Sudden demand to ramp up for recovery
+        ]},
+        'duration_s': 500,
         'env_modifications': [
             {'type': 'grid_power_imbalance', 'imbalance_mw': 50.0,
              'start_time': 20.0, 'end_time': 25.0} # Simulate instability during the fault
         ],
-        'is_adversarial_drill': True # Flag for robustness reward
+        'flags': {'is_adversarial_drill': True} # Flag for robustness reward
     }
     
     # === FINAL EXAM SCENARIO: The Ultimate Validation Test ===
-    scenarios['combined_challenge_final_exam'] = {
+    specs['combined_challenge_final_exam'] = {
         'description': 'Final Exam: Compound failure with grid fault, component degradation, and noise.',
-        'load_profile_func': step_load_change(initial_load_base, initial_load_base * 1.1, 20.0),
-        'max_steps': int(400 / sim_dt),
+        'load_profile': {'type': 'step', 'units': 'pu', 'initial': 1.0, 'final': 1.1, 'step_t': 20.0},
+        'duration_s': 400,
         'env_modifications': [
             {'type': 'parameter_ramp', 'parameter_path': ['coupling', 'eta_transfer'],
              'start_value': eta_base, 'end_value': eta_base * 0.90,
              'start_time': 50.0, 'duration': 150.0}
         ],
         'adversarial_noise': {'active': True, 'initial_magnitude': 0.02, 'final_magnitude': 0.05, 'bias_magnitude': 2.0},
-        'is_adversarial_drill': True
+        'flags': {'is_adversarial_drill': True}
     }
-    
-    # Final check to ensure all scenarios have a reset_options dictionary
-    for name, config_dict in scenarios.items():
-        if 'reset_options' not in config_dict:
-            config_dict['reset_options'] = {}
+    return specs
+
+
+def get_scenarios(core_config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Compiles the scenario library, plus the YAML specs found under
+    CORE_PARAMETERS['simulation']['scenario_spec_paths'], into scenario dictionaries.
+    Every scenario has a picklable TabulatedLoadProfile and a reset_options dictionary.
+    """
+    scenarios: Dict[str, Dict[str, Any]] = {}
+    try:
+        core_config['simulation']['dt']
+    except KeyError as e:
+        logger.error(f"Failed to get required value from core_config: {e}", exc_info=True)
+        return {}
+
+    specs = get_scenario_specs(core_config)
+    spec_paths = core_config.get('simulation', {}).get('scenario_spec_paths', [])
+    if spec_paths:
+        specs.update(load_scenario_specs([path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path) for path in spec_paths]))
+    for name, spec in specs.items():
+        scenarios[name] = compile_scenario(name, spec, core_config)
 
     logger.info(f"Defined {len(scenarios)} total scenarios, including new adversarial drills and efficiency probes.")
     return scenarios
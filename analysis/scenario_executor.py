@@ -10,26 +10,52 @@ environment updates and advanced metrics suite.
 """
 
 import logging
+import os
+import re
+import datetime
 import pandas as pd
 import numpy as np
 import time
-from typing import Optional, Dict, Any, Generator
+import zlib
+from typing import Optional, Dict, Any, Generator, Tuple, List
 
 from environment.pwr_gym_env import PWRGymEnvUnified
 from analysis.scenario_definitions import get_scenarios
+from analysis.latency_profiler import StepLatencyProfiler, latency_metrics
+from analysis.realtime_pacer import RealTimePacer, realtime_metrics
+from analysis.trajectory_recorder import TrajectoryRecorder
+from analysis.trajectory_decimator import EnvelopeDecimator
+from analysis.streaming_metrics import StreamingMetrics
+from analysis.hashing import stable_hash
 
 logger = logging.getLogger(__name__)
 
 class ScenarioExecutor:
     """Executes a single simulation scenario using PWRGymEnvUnified v3.0."""
 
-    def __init__(self, base_env_config_full: Dict[str, Any]):
+    def __init__(self, base_env_config_full: Dict[str, Any], profile_latency: Optional[bool] = None,
+                 realtime: Optional[Dict[str, Any]] = None,
+                 trajectory_store: Optional[Dict[str, Any]] = None,
+                 recording: Optional[Dict[str, Any]] = None):
         """
         Initializes the ScenarioExecutor.
 
         Args:
             base_env_config_full (Dict[str, Any]): The full configuration dictionary,
                                                   which MUST contain the 'CORE_PARAMETERS' key.
+            profile_latency (Optional[bool]): Times controller.step() and env.step() into
+                                              streaming histograms. Defaults to
+                                              CORE_PARAMETERS['simulation']['profile_latency'].
+            realtime (Optional[Dict[str, Any]]): Wall-clock pacing settings ('enabled', 'time_scale',
+                                                 'miss_policy', 'budget_ms', 'spin_us'). Defaults to
+                                                 CORE_PARAMETERS['simulation']['realtime'].
+            trajectory_store (Optional[Dict[str, Any]]): Streams every run to a Parquet/Arrow file
+                                                         ('enabled', 'output_dir', 'format', 'chunk_size').
+                                                         Defaults to CORE_PARAMETERS['simulation']['trajectory_store'].
+            recording (Optional[Dict[str, Any]]): Recording policy: 'mode' 'full' records every step,
+                                                  'decimated' one envelope sample per 'decimation_factor'
+                                                  steps (see trajectory_decimator.py). Defaults to
+                                                  CORE_PARAMETERS['simulation']['recording'].
         """
         if 'CORE_PARAMETERS' not in base_env_config_full:
             raise ValueError("Invalid config for ScenarioExecutor: must contain 'CORE_PARAMETERS'.")
@@ -37,100 +63,392 @@ class ScenarioExecutor:
         self.full_config = base_env_config_full
         self.core_params = self.full_config['CORE_PARAMETERS']
         self.all_scenario_definitions = get_scenarios(self.core_params)
+        if profile_latency is None:
+            profile_latency = self.core_params.get('simulation', {}).get('profile_latency', False)
+        self.profile_latency = bool(profile_latency)
+        # Profilers of the runs executed so far, keyed by (scenario_name, controller_name)
+        self.latency_profiles: Dict[Tuple[str, str], StepLatencyProfiler] = {}
+        if realtime is None:
+            realtime = self.core_params.get('simulation', {}).get('realtime', {})
+        self.realtime_config = realtime
+        # Pacers of the paced runs executed so far, keyed by (scenario_name, controller_name)
+        self.realtime_pacers: Dict[Tuple[str, str], RealTimePacer] = {}
+        if trajectory_store is None:
+            trajectory_store = self.core_params.get('simulation', {}).get('trajectory_store', {})
+        self.trajectory_store_config = trajectory_store
+        # Files of the stored runs so far, keyed by (scenario_name, controller_name)
+        self.trajectory_paths: Dict[Tuple[str, str], str] = {}
+        if recording is None:
+            recording = self.core_params.get('simulation', {}).get('recording', {})
+        self.recording_config = recording
+        # Decimation summaries and streamed metrics of the decimated runs, keyed by (scenario_name, controller_name)
+        self.decimated_runs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Environments of the runs in progress, keyed by (scenario_name, controller_name), so that the
+        # consumer of execute_and_yield can snapshot their state (see failure_minimization.py)
+        self.running_envs: Dict[Tuple[str, str], PWRGymEnvUnified] = {}
         logger.info("Scenario Executor v3.2 (Final Constructor) initialized.")
 
+    def _scenario_seed(self, scenario_name: str, replicate: int = 0) -> Optional[int]:
+        """
+        Derives the env reset seed from CORE_PARAMETERS['simulation']['seed'] and the
+        scenario name, so a run is reproducible regardless of execution order or process.
+        Replicate r > 0 of a scenario (its 'seed_replicate' key, see multi_seed.py) gets
+        its own seed; every controller sees the same seed for the same replicate.
+        """
+        base_seed = self.core_params.get('simulation', {}).get('seed')
+        if base_seed is None:
+            return None
+        seed_name = f"{scenario_name}#{replicate}" if replicate else scenario_name
+        return (int(base_seed) + zlib.crc32(seed_name.encode('utf-8'))) % (2 ** 32)
+
+    def _open_trajectory_writer(self,
+                                scenario_name: str,
+                                scenario_config: Dict[str, Any],
+                                controller_name: str,
+                                path: Optional[str] = None,
+                                force: bool = False) -> Optional[Any]:
+        """
+        Returns a TrajectoryWriter for one run if the trajectory store is enabled (or
+        `force` is set). The file name carries the scenario, controller and a hash of
+        the core and scenario configuration, which is stored in the run metadata.
+        """
+        store = self.trajectory_store_config
+        if not (force or store.get('enabled', False)):
+            return None
+        # pyarrow is only needed when trajectories are stored
+        from analysis.trajectory_store import TrajectoryWriter, FILE_FORMATS
+
+        config_hash = stable_hash({'core': self.core_params, 'scenario': scenario_config})
+        if path is None:
+            safe = lambda name: re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+            extension = FILE_FORMATS.get(store.get('format', 'parquet'), '.parquet')
+            path = os.path.join(store.get('output_dir', 'results/trajectories'),
+                                f"{safe(scenario_name)}__{safe(controller_name)}__{config_hash[:12]}{extension}")
+        run_metadata = {
+            'scenario': scenario_name,
+            'controller': controller_name,
+            'config_hash': config_hash,
+            'seed': self._scenario_seed(scenario_name, scenario_config.get('seed_replicate', 0)),
+            'dt': self.core_params.get('simulation', {}).get('dt', 0.02),
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        if self._decimates():
+            run_metadata['recording'] = {'mode': 'decimated', 'decimation_factor': self.recording_config.get('decimation_factor', 25)}
+        return TrajectoryWriter(path, run_metadata, chunk_size=store.get('chunk_size', 4096),
+                                compression=store.get('compression', 'zstd'))
+
+    def _decimates(self) -> bool:
+        return self.recording_config.get('mode', 'full') == 'decimated'
+
+    def _max_steps(self, scenario_config: Dict[str, Any]) -> int:
+        """Maximum number of steps of a run: the scenario's 'max_steps' or the simulation default."""
+        return scenario_config.get('max_steps') or self.core_params.get('simulation', {}).get('max_steps', 5000)
+
     def execute(self,
                 scenario_name: str,
                 scenario_config_from_caller: Dict[str, Any],
                 controller_name: str,
-                controller_instance: Any) -> pd.DataFrame:
+                controller_instance: Any,
+                sink: Optional[Any] = None) -> pd.DataFrame:
         """
         Executes a simulation scenario and returns the results as a DataFrame.
-        This is a batch-style execution method.
+        This is a batch-style execution method. With latency profiling enabled, the
+        step-latency summary is attached as `results_df.attrs['latency']`; for paced
+        runs, the deadline-miss and jitter summary as `results_df.attrs['realtime']`.
+
+        Steps are written into a columnar TrajectoryRecorder preallocated for the
+        longest possible run, so no per-step row dictionaries are built. If the run is
+        also streamed to a file (`sink`, or the configured trajectory store), its path
+        is attached as `results_df.attrs['trajectory_path']`.
+
+        With the 'decimated' recording policy only envelope samples are kept (see
+        trajectory_decimator.py); the quality metrics are then accumulated over every
+        step while the run executes and attached as `results_df.attrs['streaming_metrics']`,
+        which MetricsEngine.calculate uses instead of the decimated rows.
         """
-        results_data = []
+        # The env truncates at the simulation 'max_steps'; +1 row for the initial state
+        env_max_steps = self.core_params.get('simulation', {}).get('max_steps', 5000)
+        capacity = min(self._max_steps(scenario_config_from_caller), env_max_steps) + 1
+        if self._decimates():
+            capacity = capacity // max(int(self.recording_config.get('decimation_factor', 25)), 1) + 1
+        recorder = TrajectoryRecorder(capacity=capacity)
+        self.decimated_runs.pop((scenario_name, controller_name), None)
         try:
-            # The yield-based executor handles the detailed step-by-step logic
-            for log_entry in self.execute_and_yield(scenario_name, scenario_config_from_caller, controller_name, controller_instance):
+            # The step generator handles the detailed step-by-step logic
+            for step, info in self._run_steps(scenario_name, scenario_config_from_caller, controller_name, controller_instance, sink, recorder):
                 # Check for an error flag from the generator
-                if log_entry is None or 'error' in log_entry:
+                if step is None:
                     logger.warning(f"Execution yielded an error or None for {scenario_name}/{controller_name}. Terminating collection.")
                     break
-                results_data.append(log_entry)
         except Exception as e:
              logger.error(f"Unhandled exception during batch execution for {scenario_name}/{controller_name}: {e}", exc_info=True)
         
-        if not results_data:
+        if not len(recorder):
             logger.warning(f"No data was generated for {scenario_name}/{controller_name}.")
             return pd.DataFrame()
             
-        return pd.DataFrame(results_data)
+        results_df = recorder.to_dataframe()
+        self._attach_run_summaries(results_df, scenario_name, controller_name)
+        if (scenario_name, controller_name) in self.trajectory_paths:
+            results_df.attrs['trajectory_path'] = self.trajectory_paths[(scenario_name, controller_name)]
+        decimated = self.decimated_runs.get((scenario_name, controller_name))
+        if decimated is not None:
+            results_df.attrs['decimation'] = {key: decimated[key] for key in ('factor', 'steps', 'rows')}
+            results_df.attrs['streaming_metrics'] = decimated['metrics']
+        return results_df
+
+    def _attach_run_summaries(self, results_df: pd.DataFrame, scenario_name: str, controller_name: str):
+        """Attaches the step-latency and real-time pacing summaries of a run to `results_df.attrs`."""
+        profiler = self.latency_profiles.get((scenario_name, controller_name))
+        if self.profile_latency and profiler is not None:
+            results_df.attrs['latency'] = profiler.summary()
+        pacer = self.realtime_pacers.get((scenario_name, controller_name))
+        if self.realtime_config.get('enabled', False) and pacer is not None:
+            results_df.attrs['realtime'] = pacer.summary()
+
+    def execute_metrics(self,
+                        scenario_name: str,
+                        scenario_config_from_caller: Dict[str, Any],
+                        controller_name: str,
+                        controller_instance: Any,
+                        metrics: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Executes a scenario and returns its metrics, as MetricsEngine.calculate would
+        return them for `execute`'s DataFrame, without recording the trajectory.
+        `metrics` selects the metrics to accumulate (all METRIC_KEYS by default).
+
+        Every step is folded into StreamingMetrics accumulators inside the loop, so
+        memory does not grow with the run length (apart from the reactor power kept
+        for the oscillation index). Intended for optimizer evaluations, which only
+        need the numbers. Returns an empty dict if no data was generated.
+        """
+        streaming_metrics = StreamingMetrics(self.core_params, scenario_config_from_caller, metrics=metrics)
+        try:
+            for step, _ in self._run_steps(scenario_name, scenario_config_from_caller, controller_name, controller_instance,
+                                           streaming_metrics=streaming_metrics):
+                if step is None:
+                    logger.warning(f"Execution yielded an error or None for {scenario_name}/{controller_name}. Terminating collection.")
+                    break
+        except Exception as e:
+            logger.error(f"Unhandled exception during metrics-only execution for {scenario_name}/{controller_name}: {e}", exc_info=True)
+
+        results = streaming_metrics.finalize()
+        if not streaming_metrics.n_rows:
+            logger.warning(f"No data was generated for {scenario_name}/{controller_name}.")
+            return {}
+        # The latency/pacing summaries are flattened exactly as for a results DataFrame
+        summaries = pd.DataFrame()
+        self._attach_run_summaries(summaries, scenario_name, controller_name)
+        return {**results, **latency_metrics(summaries), **realtime_metrics(summaries)}
+
+    def execute_to_file(self,
+                        scenario_name: str,
+                        scenario_config_from_caller: Dict[str, Any],
+                        controller_name: str,
+                        controller_instance: Any,
+                        path: Optional[str] = None) -> Optional[str]:
+        """
+        Executes a scenario while streaming it to a Parquet/Arrow file, without keeping
+        the trajectory in memory. Returns the file path, or None if nothing was recorded.
+        Reload it with analysis.trajectory_store.load_trajectory.
+        """
+        sink = self._open_trajectory_writer(scenario_name, scenario_config_from_caller, controller_name, path=path, force=True)
+        self.trajectory_paths.pop((scenario_name, controller_name), None)
+        for step, _ in self._run_steps(scenario_name, scenario_config_from_caller, controller_name, controller_instance, sink):
+            if step is None:
+                break
+        return self.trajectory_paths.get((scenario_name, controller_name))
 
     def execute_and_yield(self,
                           scenario_name: str,
                           scenario_config_from_caller: Dict[str, Any],
                           controller_name: str,
-                          controller_instance: Any
+                          controller_instance: Any,
+                          sink: Optional[Any] = None
                           ) -> Generator[Optional[Dict[str, Any]], None, None]:
         """
         Executes a scenario step-by-step, yielding the info dictionary at each step.
-        This is the core execution loop.
+        With latency profiling enabled, the run's StepLatencyProfiler is available in
+        `self.latency_profiles` while it runs.
+
+        With real-time pacing enabled, each step is released on a wall-clock deadline
+        (see realtime_pacer.py) and yields a 'deadline_missed' flag. Time spent by the
+        consumer of this generator counts against the cycle, like any other load.
+
+        Every step is also written to `sink` (e.g. a TrajectoryWriter), or to the
+        configured trajectory store; the file is finalized when the run ends.
+        """
+        for step, info in self._run_steps(scenario_name, scenario_config_from_caller, controller_name, controller_instance, sink):
+            yield info if step is None else {'step': step, **info}
+
+    def _run_steps(self,
+                   scenario_name: str,
+                   scenario_config_from_caller: Dict[str, Any],
+                   controller_name: str,
+                   controller_instance: Any,
+                   sink: Optional[Any] = None,
+                   recorder: Optional[TrajectoryRecorder] = None,
+                   streaming_metrics: Optional[StreamingMetrics] = None
+                   ) -> Generator[Tuple[Optional[int], Dict[str, Any]], None, None]:
+        """
+        Runs `_iterate_steps`, recording each step into `recorder` and streaming it into
+        `sink` or the configured trajectory store, subject to the recording policy.
+        Every step also updates `streaming_metrics`, if given.
+        """
+        if sink is None:
+            sink = self._open_trajectory_writer(scenario_name, scenario_config_from_caller, controller_name)
+        outputs = [output for output in (recorder, sink) if output is not None]
+        if not outputs and streaming_metrics is None:
+            yield from self._iterate_steps(scenario_name, scenario_config_from_caller, controller_name, controller_instance)
+            return
+        decimator: Optional[EnvelopeDecimator] = None
+        if self._decimates() and outputs:
+            decimator = EnvelopeDecimator.from_config(self.recording_config)
+            if streaming_metrics is None:
+                streaming_metrics = StreamingMetrics(self.core_params, scenario_config_from_caller)
+        try:
+            for step, info in self._iterate_steps(scenario_name, scenario_config_from_caller, controller_name, controller_instance):
+                if step is not None:
+                    if streaming_metrics is not None:
+                        streaming_metrics.update(info)
+                    if decimator is None:
+                        for output in outputs:
+                            output.record(info, step)
+                    else:
+                        for kept_step, row in decimator.push(step, info):
+                            for output in outputs:
+                                output.record(row, kept_step)
+                yield step, info
+        finally:
+            # Also reached when the consumer stops early, so partial runs are kept
+            if decimator is not None:
+                for kept_step, row in decimator.finish():
+                    for output in outputs:
+                        output.record(row, kept_step)
+                self.decimated_runs[(scenario_name, controller_name)] = {
+                    'factor': decimator.factor, 'steps': decimator.n_seen, 'rows': decimator.n_recorded,
+                    'metrics': streaming_metrics.finalize(),
+                }
+                logger.info(f"Decimated recording: {decimator.n_seen} steps stored as {decimator.n_recorded} rows.")
+            if sink is not None:
+                path = sink.close()
+                if path:
+                    self.trajectory_paths[(scenario_name, controller_name)] = path
+
+    def _iterate_steps(self,
+                       scenario_name: str,
+                       scenario_config_from_caller: Dict[str, Any],
+                       controller_name: str,
+                       controller_instance: Any
+                       ) -> Generator[Tuple[Optional[int], Dict[str, Any]], None, None]:
+        """
+        The core execution loop. Yields (step, info) pairs, starting with step -1 for
+        the initial state, or (None, {'error': ...}) if the environment cannot be set up.
         """
         logger.info(f"--- Starting Validation Execution: '{scenario_name}' / '{controller_name}' ---")
         env: Optional[PWRGymEnvUnified] = None
 
         try:
-            # CRITICAL FIX: Collect all required parameters from the core configuration
-            # and pass them as keyword arguments to the environment constructor. This
-            # resolves the initialization error.
-            env_params = {
-                'reactor_params': self.core_params.get('reactor', {}),
-                'turbine_params': self.core_params.get('turbine', {}),
-                'grid_params': self.core_params.get('grid', {}),
-                'coupling_params': self.core_params.get('coupling', {}),
-                'sim_params': self.core_params.get('simulation', {}),
-                'safety_limits': self.core_params.get('safety_limits', {}),
-                'rl_normalization_factors': self.core_params.get('rl_normalization_factors', {}),
-                'all_scenarios_definitions': self.all_scenario_definitions,
-                'initial_scenario_name': scenario_name,
-                'is_training_env': False, # This is a validation/analysis run, not training
-                'rl_training_config': self.core_params.get('rl_training_adv', {})
-            }
-            env = PWRGymEnvUnified(**env_params)
+            try:
+                # The caller's scenario config is registered under its name so that scenarios
+                # built outside get_scenarios (e.g. by optimizers) drive the environment too.
+                scenario_definitions = self.all_scenario_definitions
+                if scenario_config_from_caller.get('load_profile_func') is not None:
+                    scenario_definitions = {**scenario_definitions, scenario_name: scenario_config_from_caller}
+
+                # A scenario's 'physics_overrides' (e.g. {'grid': {'H': 3.0}} of a parametric
+                # family, see scenario_families.py) replace individual model parameters
+                overrides = scenario_config_from_caller.get('physics_overrides') or {}
+                physics = lambda section: {**self.core_params.get(section, {}), **overrides.get(section, {})}
+
+                # CRITICAL FIX: Collect all required parameters from the core configuration
+                # and pass them as keyword arguments to the environment constructor. This
+                # resolves the initialization error.
+                env_params = {
+                    'reactor_params': physics('reactor'),
+                    'turbine_params': physics('turbine'),
+                    'grid_params': physics('grid'),
+                    'coupling_params': physics('coupling'),
+                    'sim_params': self.core_params.get('simulation', {}),
+                    'safety_limits': self.core_params.get('safety_limits', {}),
+                    'rl_normalization_factors': self.core_params.get('rl_normalization_factors', {}),
+                    'all_scenarios_definitions': scenario_definitions,
+                    'initial_scenario_name': scenario_name,
+                    'is_training_env': False, # This is a validation/analysis run, not training
+                    'rl_training_config': self.core_params.get('rl_training_adv', {})
+                }
+                env = PWRGymEnvUnified(**env_params)
+                self.running_envs[(scenario_name, controller_name)] = env
             
-            reset_options = scenario_config_from_caller.get('reset_options', {})
-            normalized_obs, info = env.reset(options=reset_options)
+                reset_options = scenario_config_from_caller.get('reset_options', {})
+                seed = self._scenario_seed(scenario_name, scenario_config_from_caller.get('seed_replicate', 0))
+                normalized_obs, info = env.reset(seed=seed, options=reset_options)
             
-            # Yield the initial state before the first step
-            yield {'step': -1, **info}
+                # Yield the initial state before the first step
+                yield -1, info
 
-        except Exception as e:
-            logger.error(f"Failed to initialize/reset environment for '{scenario_name}': {e}", exc_info=True)
-            yield {'error': f'Env Init/Reset Failed: {e}'}
-            return
+            except Exception as e:
+                logger.error(f"Failed to initialize/reset environment for '{scenario_name}': {e}", exc_info=True)
+                yield None, {'error': f'Env Init/Reset Failed: {e}'}
+                return
 
-        terminated, truncated = False, False
-        step_count = 0
+            terminated, truncated = False, False
+            step_count = 0
+            profiler: Optional[StepLatencyProfiler] = None
+            if self.profile_latency:
+                profiler = StepLatencyProfiler()
+                self.latency_profiles[(scenario_name, controller_name)] = profiler
+            pacer: Optional[RealTimePacer] = None
+            if self.realtime_config.get('enabled', False):
+                pacer = RealTimePacer.from_config(self.realtime_config, dt=self.core_params.get('simulation', {}).get('dt', 0.02))
+                self.realtime_pacers[(scenario_name, controller_name)] = pacer
+                logger.info(f"Real-time pacing: period {pacer.period_ns / 1e6:.2f} ms, miss policy '{pacer.miss_policy}'.")
+                pacer.start()
+            last_action: Optional[np.ndarray] = None
         
-        # Determine the maximum number of steps for this specific scenario
-        max_steps_from_scenario = scenario_config_from_caller.get('max_steps')
-        max_steps = max_steps_from_scenario or self.core_params.get('simulation', {}).get('max_steps', 5000)
+            # Determine the maximum number of steps for this specific scenario
+            max_steps = self._max_steps(scenario_config_from_caller)
 
-        while not terminated and not truncated and step_count < max_steps:
-            try:
-                # Get action from the controller (PID, FLC, RL, etc.)
-                action_value = controller_instance.step(normalized_obs)
-                action = np.array([action_value]).flatten()
-            except Exception as e:
-                 logger.error(f"Error getting action from controller {controller_name} at step {step_count}: {e}", exc_info=True)
-                 action = np.array([0.5]) # Default to a neutral action on controller error
+            while not terminated and not truncated and step_count < max_steps:
+                if pacer is not None:
+                    pacer.wait_for_release()
+                try:
+                    # Get action from the controller (PID, FLC, RL, etc.)
+                    t_start = time.perf_counter_ns()
+                    action_value = controller_instance.step(normalized_obs)
+                    if profiler is not None:
+                        profiler.record('controller', time.perf_counter_ns() - t_start)
+                    action = np.array([action_value]).flatten()
+                except Exception as e:
+                     logger.error(f"Error getting action from controller {controller_name} at step {step_count}: {e}", exc_info=True)
+                     action = np.array([0.5]) # Default to a neutral action on controller error
+
+                deadline_missed = False
+                if pacer is not None:
+                    deadline_missed = not pacer.complete_compute()
+                    # 'hold': the late action never reaches the actuator, which keeps its last command
+                    if deadline_missed and pacer.miss_policy == 'hold' and last_action is not None:
+                        action = last_action
+                last_action = action
 
-            # Take a step in the environment
-            normalized_obs, reward, terminated, truncated, info = env.step(action)
+                # Take a step in the environment
+                t_start = time.perf_counter_ns()
+                normalized_obs, reward, terminated, truncated, info = env.step(action)
+                if profiler is not None:
+                    profiler.record('env', time.perf_counter_ns() - t_start)
             
-            # Yield the results of the step
-            yield {'step': step_count, **info}
-            step_count += 1
-        
-        # Ensure the environment is properly closed
-        env.close()
+                # Yield the results of the step
+                if pacer is not None:
+                    info['deadline_missed'] = deadline_missed
+                # A controller_restart fault ended: the controller comes back from reset
+                if info.get('controller_restart'):
+                    logger.info(f"Controller {controller_name} restarted at step {step_count}.")
+                    controller_instance.reset()
+                yield step_count, info
+                step_count += 1
+
+        finally:
+            # Ensure the environment is properly closed, also when the consumer stops early or an error occurs
+            if env is not None:
+                env.close()
+                self.running_envs.pop((scenario_name, controller_name), None)
@@ -0,0 +1,224 @@
+# analysis/scenario_families.py
+
+"""
+================================================================================
+          Parametric Scenario Families
+================================================================================
+The scenario library holds single points (a +5% step at 20 s, a 90 -> 100%
+ramp over 300 s, ...). A ScenarioFamily is a scenario template with named,
+ranged parameters, e.g.
+
+    step_load(magnitude_pct in [-20, +20], event_time_s, initial_power, grid_H)
+
+so that controller performance can be mapped over disturbance magnitude, ramp
+rate, grid inertia H and initial power. 'load_schedule' superposes two steps
+and a ramp with free timings, the search space of falsification.py.
+'fault_campaign' holds the load constant and draws `n_faults` random timed
+faults (environment/fault_injection.py) per `campaign_seed`, so sweeping the
+seed runs a randomized fault campaign.
+
+Points are expanded lazily, as generators of parameter dictionaries:
+  - `grid(levels)`: the full factorial grid, `levels` giving per parameter a
+    number of evenly spaced values over its range or an explicit value list;
+  - `latin_hypercube(n, parameters)`: n Latin-hypercube samples over the
+    ranges of the chosen parameters.
+Parameters that are not swept keep the family defaults. `scenarios(points)`
+compiles each point into a scenario dictionary (scenario_specs.py) only when
+it is consumed. Grid inertia and other model parameters are carried as the
+scenario's 'physics_overrides'. See parameter_sweep.py for running a sweep.
+"""
+
+import itertools
+from typing import Dict, Any, List, Optional, Tuple, Iterator, Iterable, Callable, Sequence, Union
+
+import numpy as np
+
+from analysis.scenario_specs import compile_scenario
+from environment.fault_injection import random_fault_campaign
+
+
+def _rated_electrical_mw(core_config: Dict[str, Any]) -> float:
+    return core_config.get('reactor', {}).get('P0', 3411.0) * core_config.get('coupling', {}).get('eta_transfer', 0.98)
+
+
+def _base_spec(description: str, initial_power: float, grid_H: Optional[float], duration_s: float) -> Dict[str, Any]:
+    spec: Dict[str, Any] = {
+        'description': description,
+        'duration_s': float(duration_s),
+        'reset_options': {'initial_power_level': float(initial_power)},
+    }
+    if grid_H is not None:
+        spec['physics_overrides'] = {'grid': {'H': float(grid_H)}}
+    return spec
+
+
+def step_load_spec(core_config: Dict[str, Any], magnitude_pct: float, event_time_s: float, initial_power: float,
+                   grid_H: Optional[float], duration_s: float) -> Dict[str, Any]:
+    """A load step of `magnitude_pct` percent from the load matching `initial_power`."""
+    initial_load = float(initial_power) * _rated_electrical_mw(core_config)
+    spec = _base_spec(f"Load step of {magnitude_pct:+.1f}% at {event_time_s:.0f}s from {initial_power:.0%} power.",
+                      initial_power, grid_H, duration_s)
+    spec['load_profile'] = {'type': 'step', 'units': 'mw', 'initial': initial_load,
+                            'final': initial_load * (1.0 + magnitude_pct / 100.0), 'step_t': float(event_time_s)}
+    return spec
+
+
+def ramp_load_spec(core_config: Dict[str, Any], magnitude_pct: float, ramp_rate_pct_per_min: float, event_time_s: float,
+                   initial_power: float, grid_H: Optional[float], duration_s: float) -> Dict[str, Any]:
+    """A load ramp of `magnitude_pct` percent at `ramp_rate_pct_per_min` from the load matching `initial_power`."""
+    initial_load = float(initial_power) * _rated_electrical_mw(core_config)
+    ramp_duration = abs(magnitude_pct) / max(float(ramp_rate_pct_per_min), 1e-6) * 60.0
+    spec = _base_spec(f"Load ramp of {magnitude_pct:+.1f}% at {ramp_rate_pct_per_min:.1f}%/min from {initial_power:.0%} power.",
+                      initial_power, grid_H, duration_s)
+    spec['load_profile'] = {'type': 'ramp', 'units': 'mw', 'initial': initial_load,
+                            'final': initial_load * (1.0 + magnitude_pct / 100.0),
+                            'start_t': float(event_time_s), 'duration': ramp_duration}
+    return spec
+
+
+def load_schedule_spec(core_config: Dict[str, Any], step1_pct: float, step1_time_s: float, ramp_pct: float,
+                       ramp_start_s: float, ramp_rate_pct_per_min: float, step2_pct: float, step2_time_s: float,
+                       initial_power: float, grid_H: Optional[float], duration_s: float) -> Dict[str, Any]:
+    """
+    A disturbance schedule superposing two load steps and a ramp (percent of the load matching
+    `initial_power`), tabulated at its breakpoints. A step applies from its time on, as in a
+    'step' profile.
+    """
+    initial_load = float(initial_power) * _rated_electrical_mw(core_config)
+    ramp_duration = abs(ramp_pct) / max(float(ramp_rate_pct_per_min), 1e-6) * 60.0
+
+    def relative_pct(t: np.ndarray) -> np.ndarray:
+        return (step1_pct * (t >= step1_time_s) + step2_pct * (t >= step2_time_s)
+                + ramp_pct * np.clip((t - ramp_start_s) / max(ramp_duration, 1e-6), 0.0, 1.0))
+
+    # Each step is tabulated just before and at its time, so linear interpolation keeps it sharp
+    breakpoints = [0.0, step1_time_s - 1e-6, step1_time_s, step2_time_s - 1e-6, step2_time_s,
+                   ramp_start_s, ramp_start_s + ramp_duration, duration_s]
+    times = np.unique(np.clip(np.asarray(breakpoints, dtype=float), 0.0, float(duration_s)))
+    loads = initial_load * (1.0 + relative_pct(times) / 100.0)
+    spec = _base_spec(f"Load schedule: {step1_pct:+.1f}% step at {step1_time_s:.0f}s, {ramp_pct:+.1f}% ramp at "
+                      f"{ramp_rate_pct_per_min:.1f}%/min from {ramp_start_s:.0f}s, {step2_pct:+.1f}% step at "
+                      f"{step2_time_s:.0f}s, from {initial_power:.0%} power.", initial_power, grid_H, duration_s)
+    spec['load_profile'] = {'type': 'tabulated', 'units': 'mw', 'times': [float(t) for t in times],
+                            'loads': [float(load) for load in loads]}
+    return spec
+
+
+def fault_campaign_spec(core_config: Dict[str, Any], n_faults: float, campaign_seed: float, initial_power: float,
+                        grid_H: Optional[float], duration_s: float) -> Dict[str, Any]:
+    """Constant load with `n_faults` random timed faults, drawn reproducibly from `campaign_seed`."""
+    n_faults, campaign_seed = int(round(n_faults)), int(round(campaign_seed))
+    spec = _base_spec(f"Fault campaign {campaign_seed}: {n_faults} random faults from {initial_power:.0%} power.",
+                      initial_power, grid_H, duration_s)
+    spec['load_profile'] = {'type': 'constant', 'units': 'mw', 'load': float(initial_power) * _rated_electrical_mw(core_config)}
+    spec['fault_events'] = random_fault_campaign(float(duration_s), n_faults, seed=campaign_seed)
+    return spec
+
+
+class ScenarioFamily:
+    """
+    A scenario template with named parameters, expanded lazily into sweep points.
+
+    Args:
+        name (str): Family name, the prefix of its point names.
+        builder (Callable): (core_config, **parameters) -> scenario spec.
+        ranges (Dict[str, Tuple[float, float]]): Default sweep range per parameter.
+        defaults (Dict[str, Any]): Value of each parameter when it is not swept. A None
+            default (e.g. grid_H) means "as configured in CORE_PARAMETERS".
+    """
+
+    def __init__(self, name: str, builder: Callable[..., Dict[str, Any]], ranges: Dict[str, Tuple[float, float]],
+                 defaults: Dict[str, Any]):
+        self.name = name
+        self.builder = builder
+        self.ranges = dict(ranges)
+        self.defaults = dict(defaults)
+
+    @property
+    def parameters(self) -> List[str]:
+        return list(self.defaults)
+
+    def _check(self, names: Iterable[str]):
+        unknown = [name for name in names if name not in self.defaults]
+        if unknown:
+            raise KeyError(f"Unknown parameters {unknown} for scenario family '{self.name}'; available: {self.parameters}")
+
+    def point_name(self, point: Dict[str, Any]) -> str:
+        """Scenario name of a point; it also derives the env seed of the point's runs."""
+        return f"{self.name}[" + ",".join(f"{key}={value:.6g}" for key, value in sorted(point.items())) + "]"
+
+    def spec(self, core_config: Dict[str, Any], **point: Any) -> Dict[str, Any]:
+        """The scenario spec of a point; parameters not given keep their defaults."""
+        self._check(point)
+        return self.builder(core_config, **{**self.defaults, **point})
+
+    def grid(self, levels: Dict[str, Union[int, Sequence[float]]],
+             ranges: Optional[Dict[str, Tuple[float, float]]] = None) -> Iterator[Dict[str, float]]:
+        """
+        Yields the full factorial grid. `levels` maps each swept parameter to a number of
+        evenly spaced values over its range (`ranges` overrides the default ones) or to
+        an explicit list of values.
+        """
+        self._check(levels)
+        ranges = {**self.ranges, **(ranges or {})}
+        axes = [[float(v) for v in (np.linspace(*ranges[name], int(level)) if np.isscalar(level) else level)]
+                for name, level in levels.items()]
+        for values in itertools.product(*axes):
+            yield dict(zip(levels, values))
+
+    def latin_hypercube(self, n: int, parameters: List[str], ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                        seed: int = 0) -> Iterator[Dict[str, float]]:
+        """Yields `n` Latin-hypercube samples over the ranges of `parameters`."""
+        self._check(parameters)
+        ranges = {**self.ranges, **(ranges or {})}
+        rng = np.random.default_rng(seed)
+        # One stratum per sample and parameter, visited in an independent random order per parameter
+        unit = (np.stack([rng.permutation(n) for _ in parameters], axis=1) + rng.random((n, len(parameters)))) / n
+        lows = np.array([ranges[name][0] for name in parameters], dtype=float)
+        highs = np.array([ranges[name][1] for name in parameters], dtype=float)
+        for row in lows + unit * (highs - lows):
+            yield dict(zip(parameters, (float(v) for v in row)))
+
+    def scenarios(self, points: Iterable[Dict[str, Any]], core_config: Dict[str, Any]
+                  ) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """Yields (scenario name, point, compiled scenario config), compiling each point when consumed."""
+        for point in points:
+            name = self.point_name(point)
+            yield name, point, compile_scenario(name, self.spec(core_config, **point), core_config)
+
+
+SCENARIO_FAMILIES: Dict[str, ScenarioFamily] = {
+    'step_load': ScenarioFamily(
+        'step_load', step_load_spec,
+        ranges={'magnitude_pct': (-20.0, 20.0), 'event_time_s': (10.0, 60.0), 'initial_power': (0.6, 1.0),
+                'grid_H': (2.0, 8.0), 'duration_s': (120.0, 600.0)},
+        defaults={'magnitude_pct': 5.0, 'event_time_s': 20.0, 'initial_power': 0.9, 'grid_H': None, 'duration_s': 300.0}),
+    'ramp_load': ScenarioFamily(
+        'ramp_load', ramp_load_spec,
+        ranges={'magnitude_pct': (-20.0, 20.0), 'ramp_rate_pct_per_min': (1.0, 10.0), 'event_time_s': (10.0, 60.0),
+                'initial_power': (0.6, 1.0), 'grid_H': (2.0, 8.0), 'duration_s': (300.0, 1800.0)},
+        defaults={'magnitude_pct': 10.0, 'ramp_rate_pct_per_min': 2.0, 'event_time_s': 20.0, 'initial_power': 0.9,
+                  'grid_H': None, 'duration_s': 400.0}),
+    'load_schedule': ScenarioFamily(
+        'load_schedule', load_schedule_spec,
+        ranges={'step1_pct': (-10.0, 10.0), 'step1_time_s': (10.0, 150.0), 'ramp_pct': (-20.0, 20.0),
+                'ramp_start_s': (10.0, 150.0), 'ramp_rate_pct_per_min': (1.0, 10.0), 'step2_pct': (-10.0, 10.0),
+                'step2_time_s': (10.0, 250.0), 'initial_power': (0.6, 1.0), 'grid_H': (2.0, 8.0),
+                'duration_s': (120.0, 600.0)},
+        defaults={'step1_pct': 5.0, 'step1_time_s': 20.0, 'ramp_pct': 0.0, 'ramp_start_s': 60.0,
+                  'ramp_rate_pct_per_min': 5.0, 'step2_pct': 0.0, 'step2_time_s': 120.0, 'initial_power': 0.9,
+                  'grid_H': None, 'duration_s': 300.0}),
+    'fault_campaign': ScenarioFamily(
+        'fault_campaign', fault_campaign_spec,
+        ranges={'n_faults': (1, 50), 'campaign_seed': (0, 9999), 'initial_power': (0.6, 1.0), 'grid_H': (2.0, 8.0),
+                'duration_s': (120.0, 600.0)},
+        defaults={'n_faults': 5, 'campaign_seed': 0, 'initial_power': 0.9, 'grid_H': None, 'duration_s': 300.0}),
+}
+
+
+def get_family(name: str) -> ScenarioFamily:
+    """Returns a registered scenario family by name."""
+    try:
+        return SCENARIO_FAMILIES[name]
+    except KeyError:
+        raise KeyError(f"Unknown scenario family '{name}'; available: {sorted(SCENARIO_FAMILIES)}") from None
@@ -0,0 +1,258 @@
+# analysis/scenario_specs.py
+
+"""
+================================================================================
+          Declarative Scenario Specifications (YAML / Python)
+================================================================================
+A scenario spec is plain data -- no functions -- so it can be written in YAML,
+pickled to worker processes and hashed for the result cache:
+
+    sudden_load_increase_5pct:
+      description: Sudden +5% load increase from nominal.
+      duration_s: 300                # or max_steps
+      load_profile:
+        type: step                   # constant | ramp | step | multi_step | tabulated
+        units: pu                    # 'pu' of the nominal electrical load, or 'mw'
+        initial: 1.0
+        final: 1.05
+        step_t: 20.0
+      reset_options: {initial_power_level: 0.9}
+      env_modifications: []          # passed to the environment unchanged
+      adversarial_noise: {}          # idem
+      fault_events:                  # timed faults, see environment/fault_injection.py
+        - {type: valve_stick, start_time: 30.0, duration: 10.0}
+      physics_overrides: {grid: {H: 3.0}}  # model parameters replacing CORE_PARAMETERS ones
+      flags: {is_adversarial_drill: true}
+
+Load profile parameters per type:
+  constant:   load
+  ramp:       initial, final, start_t, duration
+  step:       initial, final, step_t
+  multi_step: steps, a list of [load, start_t] pairs in time order
+  tabulated:  times, loads (linear interpolation, held constant outside)
+
+`compile_scenario` turns a spec into the scenario dictionary the executor and
+environment use. Its 'load_profile_func' is a TabulatedLoadProfile: the load
+of every step, evaluated once into a NumPy array (cached per profile) and
+looked up by step number. Only the spec is pickled, and the table is rebuilt
+on first use in the receiving process.
+"""
+
+import glob
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Union
+
+import numpy as np
+import yaml
+
+from analysis.hashing import stable_hash
+from environment.fault_injection import validate_fault_events
+
+logger = logging.getLogger(__name__)
+
+LOAD_PROFILE_PARAMETERS = {
+    'constant': ['load'],
+    'ramp': ['initial', 'final', 'start_t', 'duration'],
+    'step': ['initial', 'final', 'step_t'],
+    'multi_step': ['steps'],
+    'tabulated': ['times', 'loads'],
+}
+SCENARIO_KEYS = {'description', 'load_profile', 'duration_s', 'max_steps', 'reset_options',
+                 'env_modifications', 'adversarial_noise', 'physics_overrides', 'fault_events', 'flags'}
+PHYSICS_SECTIONS = ('reactor', 'turbine', 'grid', 'coupling')
+LOAD_TABLE_CACHE_SIZE = 64
+
+_LOAD_TABLES: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+
+
+def validate_scenario_spec(name: str, spec: Dict[str, Any]):
+    """Raises ValueError if `spec` does not follow the scenario schema."""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Scenario '{name}': spec must be a mapping, got {type(spec).__name__}.")
+    unknown = set(spec) - SCENARIO_KEYS
+    if unknown:
+        raise ValueError(f"Scenario '{name}': unknown keys {sorted(unknown)}; allowed are {sorted(SCENARIO_KEYS)}.")
+    if 'duration_s' not in spec and 'max_steps' not in spec:
+        raise ValueError(f"Scenario '{name}': one of 'duration_s' or 'max_steps' is required.")
+    profile = spec.get('load_profile')
+    if not isinstance(profile, dict) or profile.get('type') not in LOAD_PROFILE_PARAMETERS:
+        raise ValueError(f"Scenario '{name}': 'load_profile' needs a 'type' among {sorted(LOAD_PROFILE_PARAMETERS)}.")
+    missing = [key for key in LOAD_PROFILE_PARAMETERS[profile['type']] if key not in profile]
+    if missing:
+        raise ValueError(f"Scenario '{name}': {profile['type']} load profile is missing {missing}.")
+    if profile.get('units', 'mw') not in ('mw', 'pu'):
+        raise ValueError(f"Scenario '{name}': load profile units must be 'mw' or 'pu'.")
+    if profile['type'] == 'multi_step' and (not profile['steps'] or any(len(step) != 2 for step in profile['steps'])):
+        raise ValueError(f"Scenario '{name}': multi_step 'steps' must be a non-empty list of [load, start_t] pairs.")
+    if profile['type'] == 'tabulated' and (len(profile['times']) != len(profile['loads']) or not profile['times']):
+        raise ValueError(f"Scenario '{name}': tabulated 'times' and 'loads' must be non-empty and of equal length.")
+    unknown_sections = set(spec.get('physics_overrides') or {}) - set(PHYSICS_SECTIONS)
+    if unknown_sections:
+        raise ValueError(f"Scenario '{name}': physics_overrides sections must be among {list(PHYSICS_SECTIONS)}, got {sorted(unknown_sections)}.")
+    if 'fault_events' in spec:
+        try:
+            validate_fault_events(spec['fault_events'])
+        except ValueError as e:
+            raise ValueError(f"Scenario '{name}': {e}") from e
+
+
+def _evaluate_profile(profile: Dict[str, Any], time_s: np.ndarray) -> np.ndarray:
+    """Evaluates a load profile (in MW) at `time_s`, as the scenario_definitions helpers do."""
+    kind = profile['type']
+    if kind == 'constant':
+        return np.full(len(time_s), float(profile['load']))
+    if kind == 'ramp':
+        initial, final, start_t = float(profile['initial']), float(profile['final']), profile['start_t']
+        duration = max(profile['duration'], 1e-6)
+        fraction = (time_s - start_t) / duration
+        ramp = initial + (final - initial) * fraction
+        return np.where(time_s < start_t, initial, np.where(time_s < start_t + duration, ramp, final))
+    if kind == 'step':
+        return np.where(time_s >= float(profile['step_t']), float(profile['final']), float(profile['initial']))
+    if kind == 'multi_step':
+        steps = profile['steps']
+        loads = np.full(len(time_s), float(steps[0][0]))
+        # Sequential steps: a later step only applies once all earlier ones have started
+        active = np.ones(len(time_s), dtype=bool)
+        for load, start_t in steps:
+            active &= time_s >= start_t
+            loads[active] = float(load)
+        return loads
+    return np.interp(time_s, np.asarray(profile['times'], dtype=float), np.asarray(profile['loads'], dtype=float))
+
+
+def _load_table(profile: Dict[str, Any], dt: float, n_steps: int) -> np.ndarray:
+    """Returns the cached per-step load array of a profile, compiling it on first use."""
+    key = stable_hash([profile, dt, n_steps])
+    table = _LOAD_TABLES.get(key)
+    if table is None:
+        steps = np.arange(n_steps + 1)
+        # The environment calls the profile with time_s = step * dt
+        table = _evaluate_profile(profile, steps * dt)
+        table.setflags(write=False)
+        _LOAD_TABLES[key] = table
+        if len(_LOAD_TABLES) > LOAD_TABLE_CACHE_SIZE:
+            _LOAD_TABLES.popitem(last=False)
+    else:
+        _LOAD_TABLES.move_to_end(key)
+    return table
+
+
+class TabulatedLoadProfile:
+    """
+    A picklable load profile `(time_s, step) -> MW` backed by a per-step load array.
+
+    Args:
+        profile (Dict[str, Any]): The load profile spec, with loads in MW.
+        dt (float): Simulation time step.
+        n_steps (int): Last tabulated step; later steps hold the final load.
+    """
+
+    def __init__(self, profile: Dict[str, Any], dt: float, n_steps: int):
+        self.profile = profile
+        self.dt = dt
+        self.n_steps = int(n_steps)
+        self._loads: Optional[np.ndarray] = None
+
+    @property
+    def loads(self) -> np.ndarray:
+        """The load of steps 0..n_steps, in MW."""
+        if self._loads is None:
+            self._loads = _load_table(self.profile, self.dt, self.n_steps)
+        return self._loads
+
+    def __call__(self, time_s: float, step: int) -> float:
+        loads = self._loads if self._loads is not None else self.loads
+        return float(loads[min(max(int(step), 0), self.n_steps)])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The table is rebuilt from the spec where it is needed
+        return {'profile': self.profile, 'dt': self.dt, 'n_steps': self.n_steps}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(**state)
+
+    def __repr__(self) -> str:
+        return f"TabulatedLoadProfile({self.profile!r}, dt={self.dt}, n_steps={self.n_steps})"
+
+
+def _to_mw(profile: Dict[str, Any], nominal_load_mw: float) -> Dict[str, Any]:
+    """Returns the profile with every load expressed in MW."""
+    if profile.get('units', 'mw') == 'mw':
+        return {**profile, 'units': 'mw'}
+    scale = lambda value: float(value) * nominal_load_mw
+    converted = {**profile, 'units': 'mw'}
+    kind = profile['type']
+    if kind == 'constant':
+        converted['load'] = scale(profile['load'])
+    elif kind in ('ramp', 'step'):
+        converted['initial'], converted['final'] = scale(profile['initial']), scale(profile['final'])
+    elif kind == 'multi_step':
+        converted['steps'] = [[scale(load), start_t] for load, start_t in profile['steps']]
+    else:
+        converted['loads'] = [scale(load) for load in profile['loads']]
+    return converted
+
+
+def compile_scenario(name: str, spec: Dict[str, Any], core_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Turns a scenario spec into the scenario dictionary used by the executor and environment."""
+    validate_scenario_spec(name, spec)
+    sim_config = core_config.get('simulation', {})
+    sim_dt = sim_config.get('dt', 0.02)
+    nominal_load_mw = core_config.get('initial_conditions', {}).get('electrical_load_mw', 3008.5)
+    max_steps = int(spec['max_steps']) if 'max_steps' in spec else int(spec['duration_s'] / sim_dt)
+    # Tabulated up to whichever limit ends the run: the scenario's or the environment's
+    n_steps = max(max_steps, sim_config.get('max_steps', 5000))
+    scenario = {
+        'description': spec.get('description', ''),
+        'load_profile_func': TabulatedLoadProfile(_to_mw(spec['load_profile'], nominal_load_mw), sim_dt, n_steps),
+        'max_steps': max_steps,
+        'reset_options': dict(spec.get('reset_options') or {}),
+    }
+    for key in ('env_modifications', 'adversarial_noise', 'physics_overrides', 'fault_events'):
+        if key in spec:
+            scenario[key] = spec[key]
+    scenario.update(spec.get('flags') or {})
+    return scenario
+
+
+def load_scenario_specs(paths: Union[str, List[str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads scenario specs from YAML files, or from every *.yaml / *.yml file of a directory.
+    A file maps scenario names to specs, optionally under a top-level 'scenarios' key.
+    """
+    files: List[str] = []
+    for path in [paths] if isinstance(paths, str) else paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.yaml')) + glob.glob(os.path.join(path, '*.yml'))))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            logger.warning(f"Scenario spec path not found: {path}")
+
+    specs: Dict[str, Dict[str, Any]] = {}
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = yaml.safe_load(f) or {}
+        content = content.get('scenarios', content)
+        for name, spec in content.items():
+            validate_scenario_spec(name, spec)
+            if name in specs:
+                logger.warning(f"Scenario '{name}' from {file_path} overrides an earlier definition.")
+            specs[name] = spec
+    logger.info(f"Loaded {len(specs)} scenario specs from {len(files)} file(s).")
+    return specs
+
+
+def save_scenario_specs(specs: Dict[str, Dict[str, Any]], path: str, header: Optional[str] = None):
+    """Writes scenario specs as a YAML file readable by load_scenario_specs, under a 'scenarios' key."""
+    for name, spec in specs.items():
+        validate_scenario_spec(name, spec)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        if header:
+            f.write(''.join(f"# {line}".rstrip() + '\n' for line in header.splitlines()) + '\n')
+        yaml.safe_dump({'scenarios': specs}, f, sort_keys=False, default_flow_style=None, width=120)
+    logger.info(f"Wrote {len(specs)} scenario specs to {path}")
@@ -0,0 +1,237 @@
+# analysis/sensitivity.py
+
+"""
+================================================================================
+          Global Sensitivity Analysis (Sobol Indices) of Metrics to Plant Parameters
+================================================================================
+Answers "which plant parameters drive this metric for this controller?" with
+variance-based (Sobol) indices:
+  - first-order S1_i: the share of the metric's variance explained by
+    parameter i alone;
+  - total ST_i: the share involving parameter i, interactions included.
+    ST_i ~ 0 means the parameter can be fixed at its nominal value.
+
+Design (Saltelli, 2010): two independent N x d sample matrices A and B are
+drawn from a scrambled Sobol sequence over the parameter ranges, plus the d
+matrices AB_i (A with column i taken from B) -- N * (d + 2) runs. Indices use
+the Saltelli (2010) first-order and Jansen total-effect estimators; their
+confidence intervals come from bootstrapping the N sample rows.
+
+Each sample row is a scenario whose 'physics_overrides' set the parameters
+(see ScenarioExecutor). All rows keep the scenario's name and hence its env
+seed, so the indices measure the parameters, not seed noise. Rows are run as
+batches on the worker pool through parameter_sweep.evaluate_scenarios
+(metrics-only, restricted to the analysed metrics, per-run result cache).
+The complete analysis is also cached on disk, per (controller, scenario,
+ranges, N, seed, configuration, code version).
+"""
+
+import logging
+import os
+import pickle
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from analysis.hashing import stable_hash, file_digest
+from analysis.parameter_manager import ParameterManager
+from analysis.parameter_sweep import evaluate_scenarios
+from analysis.result_cache import code_version, PROJECT_ROOT
+
+logger = logging.getLogger(__name__)
+
+# Parameter name -> (CORE_PARAMETERS section, key)
+SENSITIVITY_PARAMETERS = {
+    'alpha_f': ('reactor', 'alpha_f'),
+    'alpha_c': ('reactor', 'alpha_c'),
+    'Omega': ('reactor', 'Omega'),
+    'tau_t': ('turbine', 'tau_t'),
+    'tau_v': ('turbine', 'tau_v'),
+    'grid_H': ('grid', 'H'),
+    'grid_D': ('grid', 'D'),
+    'eta_transfer': ('coupling', 'eta_transfer'),
+}
+DEFAULT_METRICS = ['transient_severity_score', 'total_time_unsafe_s']
+
+
+def default_ranges(core_config: Dict[str, Any], parameters: Optional[List[str]] = None,
+                   relative_span: float = 0.1) -> Dict[str, Tuple[float, float]]:
+    """
+    Nominal value +/- `relative_span` (as a fraction) for each parameter. Wider spans can
+    start the plant outside its safety limits (e.g. Omega -20% puts the initial fuel
+    temperature over its limit); such runs end at once, have no metrics and are dropped.
+    """
+    ranges = {}
+    for name in parameters or list(SENSITIVITY_PARAMETERS):
+        section, key = SENSITIVITY_PARAMETERS[name]
+        nominal = float(core_config.get(section, {})[key])
+        low, high = sorted((nominal * (1.0 - relative_span), nominal * (1.0 + relative_span)))
+        ranges[name] = (low, high)
+    if 'eta_transfer' in ranges:
+        ranges['eta_transfer'] = (ranges['eta_transfer'][0], min(ranges['eta_transfer'][1], 1.0))
+    return ranges
+
+
+def saltelli_sample(ranges: Dict[str, Tuple[float, float]], n: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the Saltelli matrices A (n x d), B (n x d) and AB (d x n x d), AB[i] being A
+    with column i from B, scaled to `ranges`. `n` is rounded up to a power of two, as
+    the Sobol sequence is balanced only for those.
+    """
+    d = len(ranges)
+    n = 1 << max(int(np.ceil(np.log2(max(n, 2)))), 1)
+    unit = qmc.Sobol(d=2 * d, scramble=True, seed=seed).random(n)
+    lows = np.array([low for low, _ in ranges.values()])
+    highs = np.array([high for _, high in ranges.values()])
+    A = qmc.scale(unit[:, :d], lows, highs)
+    B = qmc.scale(unit[:, d:], lows, highs)
+    AB = np.repeat(A[np.newaxis], d, axis=0)
+    for i in range(d):
+        AB[i, :, i] = B[:, i]
+    return A, B, AB
+
+
+def sobol_indices(f_A: np.ndarray, f_B: np.ndarray, f_AB: np.ndarray, n_bootstrap: int = 1000,
+                  confidence: float = 0.95, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    First-order (Saltelli 2010) and total (Jansen) indices from the model outputs on A (n),
+    B (n) and AB (d x n), with percentile-bootstrap CIs over the n rows. Rows with a NaN
+    output anywhere are dropped. With small n the estimates can leave [0, 1]; the CI width
+    shows whether n suffices.
+    """
+    valid = np.isfinite(f_A) & np.isfinite(f_B) & np.all(np.isfinite(f_AB), axis=0)
+    # Centred outputs: the estimators are unbiased either way, but an offset inflates their variance
+    offset = np.mean(np.concatenate([f_A[valid], f_B[valid]])) if valid.any() else 0.0
+    f_A, f_B, f_AB = f_A[valid] - offset, f_B[valid] - offset, f_AB[:, valid] - offset
+    n = len(f_A)
+    if n < 2:
+        nan = np.full(f_AB.shape[0], np.nan)
+        return {'S1': nan, 'S1_low': nan, 'S1_high': nan, 'ST': nan, 'ST_low': nan, 'ST_high': nan, 'n_valid': n}
+
+    def estimate(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # rows: (..., n) resampled row indices
+        a, b, ab = f_A[rows], f_B[rows], f_AB[:, rows]
+        variance = np.var(np.concatenate([a, b], axis=-1), axis=-1)
+        # A constant output depends on no parameter: indices 0
+        variance = np.where(variance > 0.0, variance, np.inf)
+        s1 = np.mean(b * (ab - a), axis=-1) / variance
+        st = 0.5 * np.mean((a - ab) ** 2, axis=-1) / variance
+        return s1, st
+
+    s1, st = estimate(np.arange(n))
+    resamples = np.random.default_rng(seed).integers(0, n, size=(n_bootstrap, n))
+    boot_s1, boot_st = estimate(resamples)  # (d, n_bootstrap)
+    tail = (1.0 - confidence) / 2.0
+    quantiles = lambda boot: (np.nanquantile(boot, tail, axis=-1), np.nanquantile(boot, 1.0 - tail, axis=-1))
+    (s1_low, s1_high), (st_low, st_high) = quantiles(boot_s1), quantiles(boot_st)
+    return {'S1': s1, 'S1_low': s1_low, 'S1_high': s1_high, 'ST': st, 'ST_low': st_low, 'ST_high': st_high, 'n_valid': n}
+
+
+def _controller_identity(identifier: str) -> Dict[str, Any]:
+    identity: Dict[str, Any] = {'identifier': identifier}
+    if os.path.isfile(identifier):
+        identity['artifact_sha256'] = file_digest(identifier)
+    return identity
+
+
+def run_sobol_analysis(config_path: str,
+                       scenario_name: str,
+                       controller: str,
+                       ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                       n: int = 256,
+                       metrics: Optional[List[str]] = None,
+                       seed: int = 0,
+                       n_bootstrap: int = 1000,
+                       confidence: float = 0.95,
+                       max_workers: Optional[int] = None,
+                       use_cache: Optional[bool] = None,
+                       cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Computes the Sobol indices of `metrics` to the plant parameters of `ranges` for one
+    controller on one scenario of the library.
+
+    Args:
+        config_path (str): Configuration file.
+        scenario_name (str): A scenario of get_scenarios().
+        controller (str): Controller name or model path for `load_controller`.
+        ranges (Optional[Dict]): {parameter: (low, high)} over SENSITIVITY_PARAMETERS; nominal +/- 10% of all by default.
+        n (int): Base sample size N (rounded up to a power of two); N * (d + 2) runs.
+        metrics (Optional[List[str]]): Analysed metrics; transient_severity_score and total_time_unsafe_s by default.
+        seed (int): Seed of the Sobol scrambling and of the bootstrap.
+        n_bootstrap (int): Bootstrap resamples for the confidence intervals.
+        confidence (float): Confidence level of the intervals.
+        max_workers (Optional[int]): Worker processes; default CORE_PARAMETERS['simulation']['max_workers'].
+        use_cache (Optional[bool]): Overrides CORE_PARAMETERS['simulation']['result_cache']['enabled'],
+            for the per-run cache and the analysis cache alike.
+        cache_dir (Optional[str]): Directory of the analysis cache; results/sensitivity_cache by default.
+
+    Returns:
+        One row per (metric, parameter) with S1, ST, their CI bounds and the number of valid rows.
+    """
+    from analysis.scenario_definitions import get_scenarios
+
+    core_config = ParameterManager(config_filepath=config_path).get_all_parameters()['CORE_PARAMETERS']
+    metrics = list(metrics or DEFAULT_METRICS)
+    ranges = dict(ranges or default_ranges(core_config))
+    unknown = [name for name in ranges if name not in SENSITIVITY_PARAMETERS]
+    if unknown:
+        raise KeyError(f"Unknown sensitivity parameters {unknown}; available: {list(SENSITIVITY_PARAMETERS)}")
+    scenario = get_scenarios(core_config)[scenario_name]
+
+    cache_enabled = core_config.get('simulation', {}).get('result_cache', {}).get('enabled', False) if use_cache is None else use_cache
+    cache_path = None
+    if cache_enabled:
+        key = stable_hash({'controller': _controller_identity(controller), 'scenario': [scenario_name, scenario],
+                           'ranges': ranges, 'n': n, 'seed': seed, 'metrics': metrics, 'n_bootstrap': n_bootstrap,
+                           'confidence': confidence, 'core': core_config, 'code': code_version()})
+        cache_dir = cache_dir or os.path.join(PROJECT_ROOT, 'results', 'sensitivity_cache')
+        cache_path = os.path.join(cache_dir, f"sobol_{key}.pkl")
+        if os.path.isfile(cache_path):
+            logger.info(f"Sobol analysis of {controller} on '{scenario_name}' loaded from {cache_path}")
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+
+    A, B, AB = saltelli_sample(ranges, n, seed)
+    names = list(ranges)
+    d, n_rows = len(names), len(A)
+    samples = np.concatenate([A, B, AB.reshape(d * n_rows, d)])
+    logger.info(f"Sobol analysis of {controller} on '{scenario_name}': {d} parameters, N={n_rows}, {len(samples)} runs.")
+
+    base_overrides = scenario.get('physics_overrides') or {}
+
+    def sample_scenarios():
+        for row in samples:
+            overrides = {section: dict(values) for section, values in base_overrides.items()}
+            for name, value in zip(names, row):
+                section, key = SENSITIVITY_PARAMETERS[name]
+                overrides.setdefault(section, {})[key] = float(value)
+            # Same scenario name for every row: identical env seed, only the parameters vary
+            yield scenario_name, {**scenario, 'physics_overrides': overrides}
+
+    outputs = {metric: np.full(len(samples), np.nan) for metric in metrics}
+    for position, _, run_metrics in evaluate_scenarios(config_path, sample_scenarios(), [controller], max_workers,
+                                                       metrics, use_cache):
+        for metric in metrics:
+            value = run_metrics.get(metric, np.nan)
+            outputs[metric][position] = value if value is not None else np.nan
+
+    rows = []
+    for metric in metrics:
+        y = outputs[metric]
+        indices = sobol_indices(y[:n_rows], y[n_rows:2 * n_rows], y[2 * n_rows:].reshape(d, n_rows),
+                                n_bootstrap=n_bootstrap, confidence=confidence, seed=seed)
+        for i, name in enumerate(names):
+            rows.append({'metric': metric, 'parameter': name, 'low': ranges[name][0], 'high': ranges[name][1],
+                         **{key: indices[key][i] for key in ('S1', 'S1_low', 'S1_high', 'ST', 'ST_low', 'ST_high')},
+                         'n_valid': indices['n_valid']})
+    table = pd.DataFrame(rows)
+
+    if cache_path is not None:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    return table
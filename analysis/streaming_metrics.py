@@ -0,0 +1,401 @@
+# analysis/streaming_metrics.py
+
+"""
+================================================================================
+          Streaming Accumulators for the Performance Metrics
+================================================================================
+Computes the MetricsEngine quality metrics (METRIC_KEYS) while a run is
+executing, from each step's info dictionary, without keeping the trajectory.
+
+Steps are buffered in a small columnar chunk (`chunk_size` rows). Each full
+chunk is reduced with the same vectorized NumPy/pandas operations that
+MetricsEngine.calculate applies to the whole DataFrame, and only the
+running statistics and the last row are carried over:
+  - extrema, counts, the final speed and the agility step response are exact;
+  - sums and means equal the batch values up to floating-point summation order
+    (the float32 valve-effort sums are accumulated in float64, so they agree
+    with pandas' float32 sums to float32 precision);
+  - the Simpson integrals (thermal margin, transient burden, IAE, ISE) are
+    accumulated over complete interval pairs, with scipy's correction for the
+    last interval applied at the end, so they also match up to summation order;
+  - the valve-position histogram is accumulated in bin counts for the entropy.
+The one exception to constant memory is core_power_oscillation_index, the
+standard deviation over the second half of the run: it keeps a float32 buffer
+of reactor power from the earliest row that can still be in the second half.
+
+When only some metrics are requested, only their accumulators (and those of
+the metrics they depend on, see metric_registry.py) are updated, and only the
+columns they read are buffered.
+"""
+
+import logging
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+import pandas as pd
+from scipy.stats import entropy
+
+from analysis.metrics_engine import MetricsEngine
+from analysis.metric_registry import resolve_metrics, required_columns
+from analysis.trajectory_recorder import TrajectoryRecorder
+
+logger = logging.getLogger(__name__)
+
+ENTROPY_BINS = 20
+
+
+def _simpson_pairs(x: np.ndarray, y: np.ndarray) -> float:
+    """Simpson's rule for irregular spacing over consecutive interval pairs, as in scipy."""
+    h = np.diff(x)
+    h0 = h[0::2].astype(float, copy=False)
+    h1 = h[1::2].astype(float, copy=False)
+    hsum = h0 + h1
+    hprod = h0 * h1
+    h0divh1 = np.true_divide(h0, h1, out=np.zeros_like(h0), where=h1 != 0)
+    tmp = hsum / 6.0 * (y[0:-1:2] * (2.0 - np.true_divide(1.0, h0divh1, out=np.zeros_like(h0divh1), where=h0divh1 != 0)) +
+                        y[1::2] * (hsum * np.true_divide(hsum, hprod, out=np.zeros_like(hsum), where=hprod != 0)) +
+                        y[2::2] * (2.0 - h0divh1))
+    return np.sum(tmp)
+
+
+def _safe_divide(num: float, den: float) -> float:
+    return np.true_divide(num, den, out=np.zeros_like(den), where=den != 0)
+
+
+class SimpsonAccumulator:
+    """
+    Streams `scipy.integrate.simpson(y, x=x)`. Points are added in chunks; complete
+    interval pairs are integrated as they arrive, and for an even number of points
+    the last interval is corrected at the end exactly as scipy does.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.n_points = 0
+        self._carry_x: Optional[np.ndarray] = None
+        self._carry_y: Optional[np.ndarray] = None
+        self._tail_x: Optional[np.ndarray] = None
+        self._tail_y: Optional[np.ndarray] = None
+
+    def add(self, x: np.ndarray, y: np.ndarray):
+        """Appends the points (x, y), in order."""
+        if not len(x):
+            return
+        self.n_points += len(x)
+        if self._tail_x is None:
+            self._tail_x, self._tail_y = x[-3:], y[-3:]
+        else:
+            self._tail_x = np.concatenate((self._tail_x, x))[-3:]
+            self._tail_y = np.concatenate((self._tail_y, y))[-3:]
+        if self._carry_x is not None:
+            x = np.concatenate((self._carry_x, x))
+            y = np.concatenate((self._carry_y, y))
+        n_pairs = (len(x) - 1) // 2
+        if n_pairs:
+            self.total += _simpson_pairs(x[:2 * n_pairs + 1], y[:2 * n_pairs + 1])
+        # The next pair starts at the last point of this one
+        self._carry_x, self._carry_y = x[2 * n_pairs:], y[2 * n_pairs:]
+
+    def result(self) -> float:
+        """Returns the integral over all points added so far."""
+        n = self.n_points
+        if n == 0:
+            return 0.0
+        x, y = self._tail_x, self._tail_y
+        if n == 2:
+            return 0.0 + 0.5 * (x[-1] - x[-2]) * (y[-1] + y[-2])
+        if n % 2:
+            return self.total
+        # Cartwright's correction for the last interval, as in scipy.integrate.simpson
+        h0, h1 = np.float64(x[-2] - x[-3]), np.float64(x[-1] - x[-2])
+        alpha = _safe_divide(2 * h1 ** 2 + 3 * h0 * h1, 6 * (h1 + h0))
+        beta = _safe_divide(h1 ** 2 + 3.0 * h0 * h1, 6 * h0)
+        eta = _safe_divide(1 * h1 ** 3, 6 * h0 * (h0 + h1))
+        return self.total + (alpha * y[-1] + beta * y[-2] - eta * y[-3])
+
+
+class StreamingMetrics:
+    """
+    Accumulates the MetricsEngine quality metrics step by step.
+
+    Args:
+        core_config (Dict[str, Any]): The 'CORE_PARAMETERS' dictionary.
+        scenario_config (Dict[str, Any]): The scenario definition (its description
+                                          decides whether agility is measured).
+        chunk_size (int): Rows buffered before they are reduced.
+        metrics (Optional[List[str]]): Metrics to compute; all METRIC_KEYS if None.
+    """
+
+    def __init__(self, core_config: Dict[str, Any], scenario_config: Dict[str, Any], chunk_size: int = 1024,
+                 metrics: Optional[List[str]] = None):
+        self.config = core_config
+        self.safety_limits = core_config.get('safety_limits', {})
+        self.f_nominal = core_config.get('grid', {}).get('f_nominal', 60.0)
+        self.target_speed_rpm = core_config.get('turbine', {}).get('omega_nominal_rpm', 1800.0)
+        self.t_warn = self.safety_limits.get('max_fuel_temp_c', 2800.0) * self.safety_limits.get('fuel_temp_warning_fraction', 0.95)
+        self.requested = list(metrics) if metrics is not None else list(MetricsEngine.METRIC_KEYS)
+        self.needed = set(resolve_metrics(self.requested))
+        # Info keys buffered per step; None records every key
+        self._columns = required_columns(self.requested) if metrics is not None else None
+        self.track_agility = 'sudden' in scenario_config.get('description', '').lower() and 'agility_response_time_index' in self.needed
+        self.chunk_size = max(int(chunk_size), 2)
+        self.n_rows = 0
+        self.failed = False
+        self._chunk = TrajectoryRecorder(self.chunk_size, index_column=None)
+
+        self._time0: Optional[float] = None
+        self.dt: Optional[float] = None
+        # Values of the last consumed row, for the differences across chunk boundaries
+        self._last: Dict[str, np.ndarray] = {}
+        self._last_valve_sign: Optional[np.ndarray] = None
+
+        self._sq_power_error_sum = 0.0
+        self._power_error_count = 0
+        self._max_load_step: Optional[float] = None
+        self._agility: Optional[Dict[str, float]] = None
+        self._thermal_excursion = SimpsonAccumulator()
+        self._moderator_rate = SimpsonAccumulator()
+        self._moderator_seen = False
+        self._abs_freq_error = SimpsonAccumulator()
+        self._sq_freq_error = SimpsonAccumulator()
+        # Reactor power from the earliest row that can still fall in the second half
+        self._power_chunks: List[np.ndarray] = []
+        self._power_start = 0
+        self._extrema: Dict[str, Any] = {}
+        self._negative_damping = 0
+        self._valve_counts = np.zeros(ENTROPY_BINS, dtype=np.int64)
+        self._valve_edges: Optional[np.ndarray] = None
+        self._valve_samples = 0
+        # Accumulated in float64 and returned in the column's dtype, like pandas' sum
+        self._valve_abs_sum = 0.0
+        self._valve_sq_sum = 0.0
+        self._valve_dtype = np.dtype(np.float64)
+        self._valve_reversals = 0
+        self._over_fuel_temp = 0
+        self._over_speed = 0
+        self._outside_freq = 0
+        self._final_speed = np.nan
+
+    def update(self, info: Dict[str, Any]):
+        """Adds one step's info dictionary."""
+        if self._columns is not None:
+            info = {key: info[key] for key in self._columns if key in info}
+        self._chunk.record(info)
+        if len(self._chunk) >= self.chunk_size:
+            self._consume()
+
+    def _consume(self):
+        if not len(self._chunk):
+            return
+        chunk = self._chunk.to_dataframe()
+        self._chunk = TrajectoryRecorder(self.chunk_size, index_column=None)
+        if self.failed:
+            return
+        try:
+            self._reduce(chunk)
+        except Exception as e:
+            logger.error(f"Streaming metric update failed: {e}", exc_info=True)
+            self.failed = True
+        self.n_rows += len(chunk)
+
+    def _with_last(self, key: str, values: np.ndarray) -> np.ndarray:
+        """Prepends the previous chunk's last value of `key`, if there is one."""
+        last = self._last.get(key)
+        return values if last is None else np.concatenate((last, values))
+
+    def _extremum(self, key: str, value: Any, largest: bool):
+        if pd.isna(value):
+            return
+        current = self._extrema.get(key)
+        if current is None or (value > current if largest else value < current):
+            self._extrema[key] = value
+
+    def _reduce(self, chunk: pd.DataFrame):
+        offset = self.n_rows
+        needed = self.needed
+        time = chunk['time_s'].values
+        if self._time0 is None:
+            self._time0 = time[0]
+        if self.dt is None and offset + len(time) > 1:
+            self.dt = (time[1] if offset == 0 else time[0]) - self._time0
+        dt = self.dt if self.dt is not None else 0.02
+
+        if 'grid_load_following_index' in needed:
+            power_error = chunk['load_demand_mw'].values - chunk['mechanical_power_mw'].values
+            valid = ~np.isnan(power_error)
+            self._sq_power_error_sum += np.square(power_error[valid]).sum(dtype=np.float64)
+            self._power_error_count += int(valid.sum())
+
+        if self.track_agility:
+            load = chunk['load_demand_mw'].values
+            mech = chunk['mechanical_power_mw'].values
+            self._update_agility(offset, time, load, mech)
+            self._last['load_demand_mw'] = load[-1:]
+            self._last['mechanical_power_mw'] = mech[-1:]
+
+        if 'integrated_thermal_margin_violation_c_s' in needed:
+            thermal_excursion = (chunk['T_fuel'] - self.t_warn).clip(lower=0)
+            self._thermal_excursion.add(time, thermal_excursion.values)
+
+        if 'thermal_transient_burden' in needed and 'T_moderator' in chunk.columns:
+            moderator = chunk['T_moderator'].values
+            self._moderator_seen |= bool(chunk['T_moderator'].notna().any())
+            rate = np.abs(np.diff(self._with_last('T_moderator', moderator)) / dt)
+            self._moderator_rate.add(time[1:] if offset == 0 else time, rate)
+            self._last['T_moderator'] = moderator[-1:]
+
+        if 'core_power_oscillation_index' in needed:
+            power = chunk['reactor_power_mw'].values
+            self._power_chunks.append(power)
+            # Rows before half of the rows seen so far can never be in the final second half
+            while len(self._power_chunks) > 1 and self._power_start + len(self._power_chunks[0]) <= (offset + len(power)) // 2:
+                self._power_start += len(self._power_chunks.pop(0))
+
+        if 'max_rotor_angle_deviation_rad' in needed and 'rotor_angle_rad' in chunk.columns:
+            self._extremum('rotor_angle_max', chunk['rotor_angle_rad'].max(), largest=True)
+            self._extremum('rotor_angle_min', chunk['rotor_angle_rad'].min(), largest=False)
+
+        frequency = chunk['grid_frequency_hz'] if 'grid_frequency_hz' in chunk.columns else None
+        if 'negative_damping_events' in needed:
+            omega_pu = frequency / self.f_nominal
+            power_mismatch = chunk['mechanical_power_mw'] - chunk['load_demand_mw']
+            self._negative_damping += ((power_mismatch > 1) & (omega_pu > 1.0001)).sum() + ((power_mismatch < -1) & (omega_pu < 0.9999)).sum()
+
+        if 'control_policy_entropy' in needed:
+            valve_pos = chunk['v_pos_actual'].dropna()
+            counts, edges = np.histogram(valve_pos, bins=ENTROPY_BINS, range=(0, 1))
+            self._valve_counts += counts
+            if self._valve_edges is None:
+                self._valve_edges = edges
+            self._valve_samples += len(valve_pos)
+
+        if frequency is not None:
+            freq_error = frequency - self.f_nominal
+            if 'max_freq_deviation_hz' in needed:
+                self._extremum('max_freq_deviation_hz', freq_error.abs().max(), largest=True)
+            if 'min_freq_nadir_hz' in needed:
+                self._extremum('min_freq_nadir_hz', frequency.min(), largest=False)
+            if 'iae_freq_hz_s' in needed:
+                self._abs_freq_error.add(time, freq_error.abs().values)
+            if 'ise_freq_hz_s' in needed:
+                self._sq_freq_error.add(time, np.square(freq_error).values)
+        if 'max_speed_rpm' in needed:
+            self._extremum('max_speed_rpm', chunk['speed_rpm'].max(), largest=True)
+        if 'max_undershoot_speed_pct' in needed:
+            self._extremum('min_speed_rpm', chunk['speed_rpm'].min(), largest=False)
+        if needed & {'max_overshoot_speed_pct', 'max_undershoot_speed_pct'}:
+            self._final_speed = chunk['speed_rpm'].iloc[-1]
+        if 'max_fuel_temp_c' in needed:
+            self._extremum('max_fuel_temp_c', chunk['T_fuel'].max(), largest=True)
+
+        if needed & {'control_effort_valve_abs_sum', 'control_effort_valve_sq_sum', 'valve_reversals'}:
+            valve_values = chunk['v_pos_actual'].values
+            self._valve_dtype = valve_values.dtype
+            valve_diff = np.diff(self._with_last('v_pos_actual', valve_values))
+            self._last['v_pos_actual'] = valve_values[-1:]
+            valve_diff = valve_diff[~np.isnan(valve_diff)]
+            self._valve_abs_sum += np.abs(valve_diff).sum(dtype=np.float64)
+            self._valve_sq_sum += np.square(valve_diff).sum(dtype=np.float64)
+            signs = np.sign(valve_diff)
+            if len(signs):
+                if self._last_valve_sign is not None:
+                    signs = np.concatenate((self._last_valve_sign, signs))
+                self._valve_reversals += int((np.diff(signs) != 0).sum())
+                self._last_valve_sign = signs[-1:]
+
+        if 'time_over_fuel_temp_limit_s' in needed:
+            self._over_fuel_temp += (chunk['T_fuel'] > self.safety_limits.get('max_fuel_temp_c', 9999)).sum()
+        if 'time_over_speed_limit_s' in needed:
+            self._over_speed += (chunk['speed_rpm'] > self.safety_limits.get('max_speed_rpm', 9999)).sum()
+        if 'time_outside_freq_limit_s' in needed:
+            self._outside_freq += ((frequency < self.safety_limits.get('min_frequency_hz', 0)) | (frequency > self.safety_limits.get('max_frequency_hz', 99))).sum()
+
+    def _update_agility(self, offset: int, time: np.ndarray, load: np.ndarray, mech: np.ndarray):
+        """Tracks the largest load step (first occurrence) and the response time after it."""
+        load_diff = np.abs(np.diff(self._with_last('load_demand_mw', load)))
+        mech_ext = self._with_last('mechanical_power_mw', mech)
+        # Position 0 of `load_diff` is the chunk's first row if a previous row exists, else its second
+        shift = 0 if 'load_demand_mw' in self._last else 1
+        search_from = 0 if self._agility is not None else None
+        if len(load_diff) and not np.isnan(load_diff).all():
+            j = int(np.nanargmax(load_diff))
+            if self._max_load_step is None or load_diff[j] > self._max_load_step:
+                self._max_load_step = load_diff[j]
+                row = j + shift
+                p_initial = mech_ext[j]
+                p_change_req = load[row] - p_initial
+                response_threshold = self.safety_limits.get('arti_response_threshold', 0.9)
+                self._agility = {
+                    't_step': time[row],
+                    'target': p_initial + (p_change_req * response_threshold),
+                    'sign': np.sign(p_change_req),
+                    'response_time': np.nan,
+                }
+                search_from = row
+        if self._agility is None or search_from is None or not np.isnan(self._agility['response_time']):
+            return
+        sign = self._agility['sign']
+        reached = np.flatnonzero(mech[search_from:] * sign >= self._agility['target'] * sign)
+        if len(reached):
+            self._agility['response_time'] = time[search_from + reached[0]] - self._agility['t_step']
+
+    def finalize(self) -> Dict[str, float]:
+        """Reduces the remaining rows and returns the metrics, as MetricsEngine.calculate would."""
+        self._consume()
+        metrics: Dict[str, float] = {key: np.nan for key in MetricsEngine.METRIC_KEYS}
+        if self.n_rows < 20:
+            logger.warning("Metrics calculation skipped: run is empty or too short.")
+            return {key: metrics[key] for key in self.requested}
+        if self.failed:
+            return {key: metrics[key] for key in self.requested}
+
+        dt = self.dt if self.dt is not None else 0.02
+        target_speed_rpm = self.target_speed_rpm
+        extrema = self._extrema
+
+        metrics['grid_load_following_index'] = 1000 / (1 + self._sq_power_error_sum / self._power_error_count) if self._power_error_count else np.nan
+        if self._agility is not None:
+            metrics['agility_response_time_index'] = self._agility['response_time']
+        metrics['integrated_thermal_margin_violation_c_s'] = self._thermal_excursion.result()
+        if self._moderator_seen:
+            metrics['thermal_transient_burden'] = self._moderator_rate.result()
+
+        if self._power_chunks:
+            power = pd.Series(np.concatenate(self._power_chunks))
+            metrics['core_power_oscillation_index'] = power.iloc[int(self.n_rows * 0.5) - self._power_start:].std()
+
+        if 'rotor_angle_max' in extrema:
+            metrics['max_rotor_angle_deviation_rad'] = extrema['rotor_angle_max'] - extrema['rotor_angle_min']
+        metrics['negative_damping_events'] = self._negative_damping
+        if self._valve_samples > 1:
+            bin_widths = np.array(np.diff(self._valve_edges), float)
+            hist = self._valve_counts / bin_widths / self._valve_counts.sum()
+            metrics['control_policy_entropy'] = entropy(hist + 1e-9, base=2)
+
+        for key in ('max_freq_deviation_hz', 'min_freq_nadir_hz', 'max_speed_rpm', 'max_fuel_temp_c'):
+            metrics[key] = extrema.get(key, np.nan)
+        final_speed = self._final_speed
+        peak_speed = metrics['max_speed_rpm']
+        nadir_speed = extrema.get('min_speed_rpm', np.nan)
+        metrics['max_overshoot_speed_pct'] = max(0.0, (peak_speed - final_speed) / target_speed_rpm * 100.0) if target_speed_rpm > 1e-6 else 0.0
+        metrics['max_undershoot_speed_pct'] = max(0.0, (final_speed - nadir_speed) / target_speed_rpm * 100.0) if target_speed_rpm > 1e-6 else 0.0
+        metrics['iae_freq_hz_s'] = self._abs_freq_error.result()
+        metrics['ise_freq_hz_s'] = self._sq_freq_error.result()
+        metrics['control_effort_valve_abs_sum'] = self._valve_dtype.type(self._valve_abs_sum)
+        metrics['control_effort_valve_sq_sum'] = self._valve_dtype.type(self._valve_sq_sum)
+        metrics['valve_reversals'] = self._valve_reversals
+
+        weights = self.safety_limits.get('transient_severity_weights', {})
+        freq_dev_limit = self.safety_limits.get('freq_deviation_limit_hz', 1.0)
+        speed_dev_limit = self.safety_limits.get('max_speed_rpm', 2250.0) - target_speed_rpm
+        max_speed_dev = metrics['max_speed_rpm'] - target_speed_rpm
+        freq_severity = (metrics['max_freq_deviation_hz'] / freq_dev_limit) if freq_dev_limit > 1e-6 else 0
+        speed_severity = max(0, max_speed_dev / speed_dev_limit if speed_dev_limit > 1e-6 else 0)
+        metrics['transient_severity_score'] = (weights.get('w_freq_severity', 0.6) * freq_severity) + (weights.get('w_speed_severity', 0.4) * speed_severity)
+
+        metrics['time_over_fuel_temp_limit_s'] = self._over_fuel_temp * dt
+        metrics['time_over_speed_limit_s'] = self._over_speed * dt
+        metrics['time_outside_freq_limit_s'] = self._outside_freq * dt
+        metrics['total_time_unsafe_s'] = metrics['time_over_fuel_temp_limit_s'] + metrics['time_over_speed_limit_s'] + metrics['time_outside_freq_limit_s']
+        # Accumulators of metrics that were not needed were never updated
+        return {key: metrics[key] for key in self.requested}
@@ -0,0 +1,169 @@
+# analysis/trajectory_decimator.py
+
+"""
+================================================================================
+          Decimated Trajectory Recording with Min/Max Envelopes
+================================================================================
+Reduces the number of recorded rows of a run while keeping what matters for
+plots and post-analysis.
+
+The run is split into windows of `factor` consecutive steps. Only the last
+step of each window is recorded, and it carries the envelope of its window
+for the configured channels: `<channel>_min`, `<channel>_max` and
+`<channel>_mean` (NaN values are ignored), plus `envelope_samples`, the number
+of steps the envelope covers. Peaks between the recorded samples therefore
+remain visible.
+
+Some steps are always recorded in full:
+  - the initial state (the first step);
+  - `context_samples` steps on either side of each load breakpoint, i.e. a
+    step where the slope of the breakpoint channel (load demand) changes by
+    more than `breakpoint_tol` -- the start of a load step or ramp;
+  - the last `context_samples` steps of the run, up to termination.
+These extra rows have no envelope columns (NaN). The final window, which
+may be shorter than `factor`, is attached to the last recorded step.
+
+The quality metrics cannot be computed exactly from the decimated rows; the
+ScenarioExecutor therefore accumulates them over every step with
+StreamingMetrics while the run executes.
+"""
+
+from collections import deque
+from typing import Dict, Any, List, Tuple, Optional
+
+import numpy as np
+
+DEFAULT_ENVELOPE_CHANNELS = ['grid_frequency_hz', 'speed_rpm', 'T_fuel', 'reactor_power_mw', 'mechanical_power_mw', 'v_pos_actual']
+
+
+class EnvelopeDecimator:
+    """
+    Decides which (step, info) rows of a run are recorded and adds window envelopes.
+
+    Args:
+        factor (int): Steps per window; one sample is recorded per window.
+        envelope_channels (Optional[List[str]]): Info keys whose min/max/mean are kept.
+        context_samples (int): Steps kept in full around breakpoints and before termination.
+        breakpoint_channel (str): Info key whose slope changes mark breakpoints.
+        breakpoint_tol (float): Minimum change in the per-step slope that counts as a breakpoint.
+    """
+
+    def __init__(self, factor: int, envelope_channels: Optional[List[str]] = None, context_samples: int = 5,
+                 breakpoint_channel: str = 'load_demand_mw', breakpoint_tol: float = 1e-3):
+        if int(factor) < 1:
+            raise ValueError(f"Decimation factor must be at least 1, got {factor}.")
+        self.factor = int(factor)
+        self.envelope_channels = list(envelope_channels if envelope_channels is not None else DEFAULT_ENVELOPE_CHANNELS)
+        self.context_samples = max(int(context_samples), 0)
+        self.breakpoint_channel = breakpoint_channel
+        self.breakpoint_tol = breakpoint_tol
+        self.n_seen = 0
+        self.n_recorded = 0
+        # Steps not yet released, so that a breakpoint can still keep the ones before it
+        self._pending: deque = deque()
+        self._keep_next = 0
+        self._last_value: Optional[float] = None
+        self._last_slope: Optional[float] = None
+        self._reset_window()
+
+    @classmethod
+    def from_config(cls, recording_config: Dict[str, Any]) -> 'EnvelopeDecimator':
+        """Builds a decimator from a CORE_PARAMETERS['simulation']['recording'] style block."""
+        return cls(factor=recording_config.get('decimation_factor', 25),
+                   envelope_channels=recording_config.get('envelope_channels'),
+                   context_samples=recording_config.get('context_samples', 5),
+                   breakpoint_channel=recording_config.get('breakpoint_channel', 'load_demand_mw'),
+                   breakpoint_tol=recording_config.get('breakpoint_tol', 1e-3))
+
+    def _reset_window(self):
+        self._window_size = 0
+        self._stats: Dict[str, list] = {}
+
+    def _observe(self, info: Dict[str, Any]):
+        self._window_size += 1
+        stats = self._stats
+        for channel in self.envelope_channels:
+            value = info.get(channel)
+            if value is None or value != value:
+                continue
+            entry = stats.get(channel)
+            if entry is None:
+                stats[channel] = [value, value, float(value), 1]
+                continue
+            if value < entry[0]:
+                entry[0] = value
+            elif value > entry[1]:
+                entry[1] = value
+            entry[2] += float(value)
+            entry[3] += 1
+
+    def _close_window(self) -> Dict[str, Any]:
+        envelope: Dict[str, Any] = {}
+        for channel in self.envelope_channels:
+            entry = self._stats.get(channel)
+            if entry is None:
+                envelope.update({f"{channel}_min": np.nan, f"{channel}_max": np.nan, f"{channel}_mean": np.nan})
+            else:
+                envelope.update({f"{channel}_min": entry[0], f"{channel}_max": entry[1], f"{channel}_mean": entry[2] / entry[3]})
+        envelope['envelope_samples'] = self._window_size
+        self._reset_window()
+        return envelope
+
+    def _is_breakpoint(self, info: Dict[str, Any]) -> bool:
+        value = info.get(self.breakpoint_channel)
+        if value is None:
+            return False
+        value = float(value)
+        is_breakpoint = False
+        if self._last_value is not None:
+            slope = value - self._last_value
+            if self._last_slope is not None:
+                is_breakpoint = abs(slope - self._last_slope) > self.breakpoint_tol
+            self._last_slope = slope
+        self._last_value = value
+        return is_breakpoint
+
+    def _release(self, entry: list) -> List[Tuple[int, Dict[str, Any]]]:
+        step, info, keep, envelope = entry
+        if not keep:
+            return []
+        self.n_recorded += 1
+        return [(step, {**info, **envelope} if envelope else info)]
+
+    def push(self, step: int, info: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Adds one step. Returns the (step, row) pairs to record now, in step order."""
+        index = self.n_seen
+        self.n_seen += 1
+        self._observe(info)
+        envelope = self._close_window() if self._window_size == self.factor else None
+        keep = index == 0 or envelope is not None
+
+        if self._is_breakpoint(info):
+            for entry in self._pending:
+                entry[2] = True
+            self._keep_next = self.context_samples + 1
+        if self._keep_next:
+            keep = True
+            self._keep_next -= 1
+
+        self._pending.append([step, info, keep, envelope])
+        # At least the current step stays pending, so the run's last step is known at finish()
+        if len(self._pending) <= max(self.context_samples, 1):
+            return []
+        return self._release(self._pending.popleft())
+
+    def finish(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """Ends the run: releases the last steps, with the final partial window's envelope."""
+        if self._window_size and self._pending:
+            self._pending[-1][3] = self._close_window()
+        rows: List[Tuple[int, Dict[str, Any]]] = []
+        while self._pending:
+            entry = self._pending.popleft()
+            entry[2] = True
+            rows.extend(self._release(entry))
+        return rows
+
+    @property
+    def reduction(self) -> float:
+        """Steps seen per recorded row."""
+        return self.n_seen / self.n_recorded if self.n_recorded else float('nan')
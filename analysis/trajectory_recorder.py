@@ -0,0 +1,177 @@
+# analysis/trajectory_recorder.py
+
+"""
+================================================================================
+          Columnar Preallocated Trajectory Recorder
+================================================================================
+Collects the per-step info of a simulation run directly into NumPy column
+arrays instead of a list of row dictionaries.
+
+Columns are allocated on first sight with capacity for the whole run (the
+scenario's `max_steps`), and each step writes its values in place. The dtype
+of a column is taken from its first value (np.float32 observations stay
+float32, Python floats become float64, ints int64, bools bool), so for the
+executor's info dictionaries the DataFrame equals `pd.DataFrame(list_of_dicts)`.
+Irregular rows are widened: cells missing from a row are NaN (int columns
+become float64, bool columns object), and a value that does not fit its
+column's dtype promotes the column to float64 or object.
+
+`to_dataframe()` trims the arrays to the recorded length and hands pandas the
+column dictionary without copying. When a run terminated early and filled less
+than half of the preallocated capacity, the trimmed columns are copied so the
+unused capacity is released.
+"""
+
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _dtype_for(value: Any) -> np.dtype:
+    """Returns the column dtype pandas would infer for a column starting with `value`."""
+    if isinstance(value, (bool, np.bool_)):
+        return np.dtype(bool)
+    if isinstance(value, (int, np.integer)):
+        return np.dtype(np.int64)
+    if isinstance(value, np.floating):
+        return value.dtype
+    if isinstance(value, float):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def _widened_dtype(dtype: np.dtype, value: Any) -> np.dtype:
+    """Returns the dtype a column must take to also hold `value`."""
+    if dtype.kind in 'iu' and _dtype_for(value).kind == 'f':
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def _empty_column(dtype: np.dtype, capacity: int) -> np.ndarray:
+    # Float columns are prefilled with NaN so missing cells need no bookkeeping
+    if dtype.kind == 'f':
+        return np.full(capacity, np.nan, dtype=dtype)
+    if dtype.kind == 'O':
+        return np.full(capacity, np.nan, dtype=object)
+    return np.empty(capacity, dtype=dtype)
+
+
+class TrajectoryRecorder:
+    """
+    Records step dictionaries into preallocated column arrays.
+
+    Args:
+        capacity (int): Expected number of rows; the arrays grow by doubling if exceeded.
+        index_column (Optional[str]): Name of the leading column filled from the
+                                      `index` argument of `record` (e.g. 'step').
+    """
+
+    def __init__(self, capacity: int, index_column: Optional[str] = 'step'):
+        self.capacity = max(int(capacity), 1)
+        self.index_column = index_column
+        self.n_rows = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        # Non-float columns with at least one missing cell, with their fill masks
+        self._filled: Dict[str, np.ndarray] = {}
+        # Integer and bool columns, whose assignments are checked for truncation
+        self._exact_keys = set()
+        if index_column is not None:
+            self._columns[index_column] = np.empty(self.capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def record(self, values: Dict[str, Any], index: Optional[int] = None):
+        """Appends one row. `index` fills the index column, if the recorder has one."""
+        n = self.n_rows
+        if n == self.capacity:
+            self._grow()
+        columns = self._columns
+        if self.index_column is not None:
+            columns[self.index_column][n] = index
+
+        for key, value in values.items():
+            column = columns.get(key)
+            if column is None:
+                column = self._add_column(key, value, n)
+            try:
+                column[n] = value
+                # Integer and bool columns must not silently truncate other values
+                exact = key not in self._exact_keys or column[n] == value
+            except (TypeError, ValueError):
+                exact = False
+            if not exact:
+                column = self._promote(key, _widened_dtype(column.dtype, value))
+                column[n] = value
+            if self._filled and key in self._filled:
+                self._filled[key][n] = True
+
+        n_expected = len(columns) - (self.index_column is not None)
+        if len(values) != n_expected:
+            self._mark_missing(values, n)
+        self.n_rows = n + 1
+
+    def _add_column(self, key: str, value: Any, n: int) -> np.ndarray:
+        column = _empty_column(_dtype_for(value), self.capacity)
+        self._columns[key] = column
+        if column.dtype.kind in 'biu':
+            self._exact_keys.add(key)
+        if n > 0 and column.dtype.kind not in 'fO':
+            # Rows before this column appeared are missing
+            self._filled[key] = np.zeros(self.capacity, dtype=bool)
+        return column
+
+    def _mark_missing(self, values: Dict[str, Any], n: int):
+        for key, column in self._columns.items():
+            if key == self.index_column or key in values:
+                continue
+            if column.dtype.kind in 'fO':
+                continue  # prefilled with NaN
+            if key not in self._filled:
+                filled = np.ones(self.capacity, dtype=bool)
+                filled[n:] = False
+                self._filled[key] = filled
+            else:
+                self._filled[key][n] = False
+
+    def _promote(self, key: str, dtype: np.dtype) -> np.ndarray:
+        old = self._columns[key]
+        column = _empty_column(dtype, self.capacity)
+        column[:self.n_rows] = old[:self.n_rows]
+        self._columns[key] = column
+        self._exact_keys.discard(key)
+        if key in self._filled and dtype.kind in 'fO':
+            column[:self.n_rows][~self._filled.pop(key)[:self.n_rows]] = np.nan
+        return column
+
+    def _grow(self):
+        new_capacity = self.capacity * 2
+        for key, column in self._columns.items():
+            grown = _empty_column(column.dtype, new_capacity)
+            grown[:self.capacity] = column
+            self._columns[key] = grown
+        for key, filled in self._filled.items():
+            grown = np.zeros(new_capacity, dtype=bool)
+            grown[:self.capacity] = filled
+            self._filled[key] = grown
+        self.capacity = new_capacity
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns the recorded rows as a DataFrame built from the column arrays."""
+        n = self.n_rows
+        if n == 0:
+            return pd.DataFrame()
+        compact = 2 * n < self.capacity
+        data = {}
+        for key, column in self._columns.items():
+            trimmed = column[:n]
+            if key in self._filled:
+                # Missing cells widen int to float64 and bool to object, as in pandas
+                filled = self._filled[key][:n]
+                trimmed = trimmed.astype(np.float64 if trimmed.dtype.kind in 'iu' else object)
+                trimmed[~filled] = np.nan
+            elif compact:
+                trimmed = trimmed.copy()
+            data[key] = trimmed
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,158 @@
+# analysis/trajectory_store.py
+
+"""
+================================================================================
+          Streaming Trajectory Store (Parquet / Arrow IPC)
+================================================================================
+Persists simulation trajectories while they are produced, so long scenarios
+and RL evaluations can be re-analysed later without re-simulating and without
+holding the whole run in memory.
+
+`TrajectoryWriter` buffers steps in a columnar TrajectoryRecorder of
+`chunk_size` rows; each full chunk is converted to an Arrow table and
+appended to the file as one Parquet row group (or Arrow IPC record batch),
+so memory is bounded by the chunk size regardless of scenario length. The
+file is written under a temporary name and moved into place on close.
+
+The Arrow schema is fixed by the first chunk. Later chunks are aligned to it
+(absent columns are written as nulls; columns that first appear later are
+dropped with a warning). Run metadata -- scenario, controller, config hash,
+seed -- is stored as JSON in the schema metadata under 'dtaf_run'.
+
+`load_trajectory` reads a run back, optionally only some columns, and
+`read_run_metadata` returns the metadata without reading any data.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Any, Optional, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analysis.trajectory_recorder import TrajectoryRecorder
+
+logger = logging.getLogger(__name__)
+
+RUN_METADATA_KEY = b'dtaf_run'
+FILE_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def _format_for_path(path: str) -> str:
+    return 'arrow' if os.path.splitext(path)[1].lower() in ('.arrow', '.feather', '.ipc') else 'parquet'
+
+
+class TrajectoryWriter:
+    """
+    Streams (step, info) rows into a Parquet or Arrow IPC file in fixed-size chunks.
+
+    Args:
+        path (str): Output file; the format follows the extension ('.parquet' or '.arrow').
+        run_metadata (Dict[str, Any]): JSON-serializable description of the run.
+        chunk_size (int): Rows per written chunk (Parquet row group / IPC record batch).
+        compression (str): Parquet compression codec.
+    """
+
+    def __init__(self, path: str, run_metadata: Dict[str, Any], chunk_size: int = 4096, compression: str = 'zstd'):
+        self.path = path
+        self.file_format = _format_for_path(path)
+        self.run_metadata = run_metadata
+        self.chunk_size = max(int(chunk_size), 1)
+        self.compression = compression
+        self.n_rows = 0
+        self._tmp_path = f"{path}.partial"
+        self._buffer = TrajectoryRecorder(self.chunk_size)
+        self._schema: Optional[pa.Schema] = None
+        self._writer = None
+        self._dropped_columns: set = set()
+        self.closed = False
+
+    def __enter__(self) -> 'TrajectoryWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def record(self, info: Dict[str, Any], step: int):
+        """Buffers one step and writes the chunk once it is full."""
+        self._buffer.record(info, index=step)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as one chunk."""
+        if not len(self._buffer):
+            return
+        table = pa.Table.from_pandas(self._buffer.to_dataframe(), preserve_index=False)
+        self._buffer = TrajectoryRecorder(self.chunk_size)
+        if self._writer is None:
+            self._open(table.schema)
+        else:
+            table = self._align(table)
+        if self.file_format == 'parquet':
+            self._writer.write_table(table, row_group_size=table.num_rows)
+        else:
+            self._writer.write_table(table)
+        self.n_rows += table.num_rows
+
+    def _open(self, schema: pa.Schema):
+        metadata = dict(schema.metadata or {})
+        metadata[RUN_METADATA_KEY] = json.dumps(self.run_metadata, default=str).encode('utf-8')
+        self._schema = schema.with_metadata(metadata)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self.file_format == 'parquet':
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema, compression=self.compression)
+        else:
+            self._writer = pa.ipc.new_file(self._tmp_path, self._schema)
+
+    def _align(self, table: pa.Table) -> pa.Table:
+        """Conforms a chunk to the schema fixed by the first chunk."""
+        extra = set(table.column_names) - set(self._schema.names) - self._dropped_columns
+        if extra:
+            logger.warning(f"Columns {sorted(extra)} first appeared after the first chunk of {self.path} and are not stored.")
+            self._dropped_columns |= extra
+        columns = [table.column(field.name).cast(field.type) if field.name in table.column_names
+                   else pa.nulls(table.num_rows, type=field.type) for field in self._schema]
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def close(self) -> Optional[str]:
+        """Writes the remaining rows and moves the finished file into place. Returns its path."""
+        if self.closed:
+            return self.path if self._writer is not None else None
+        self.closed = True
+        self.flush()
+        if self._writer is None:
+            logger.warning(f"No trajectory rows were recorded; {self.path} was not written.")
+            return None
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+        logger.info(f"Trajectory with {self.n_rows} rows saved to {self.path}")
+        return self.path
+
+
+def read_run_metadata(path: str) -> Dict[str, Any]:
+    """Returns the run metadata of a stored trajectory without reading its data."""
+    if _format_for_path(path) == 'parquet':
+        schema = pq.read_schema(path)
+    else:
+        with pa.memory_map(path) as source:
+            schema = pa.ipc.open_file(source).schema
+    raw = (schema.metadata or {}).get(RUN_METADATA_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def load_trajectory(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Loads a stored trajectory, reading only `columns` if given. The run metadata
+    is attached as `df.attrs['run_metadata']`.
+    """
+    if _format_for_path(path) == 'parquet':
+        df = pq.read_table(path, columns=columns).to_pandas()
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            df = (table.select(columns) if columns is not None else table).to_pandas()
+    df.attrs['run_metadata'] = read_run_metadata(path)
+    return df
@@ -29,7 +29,38 @@ import numpy as np
 CORE_PARAMETERS = {
     # Simulation, Reactor, Coupling, Turbine, Grid, Safety, and Reporting sections remain largely unchanged
     # They are included for completeness of this "single source of truth" file.
-    'simulation': { 'dt': 0.02, 'max_steps': 5000 },
+    # 'profile_latency' (off by default) times controller.step()/env.step() into streaming histograms (see analysis/latency_profiler.py)
+    # 'realtime' paces runs to wall-clock deadlines (time_scale x dt per step) with a 'hold'/'skip' miss policy (see analysis/realtime_pacer.py)
+    # 'seed' makes env resets reproducible per scenario; 'max_workers' > 1 runs analyses in a process pool
+    'simulation': {
+        'dt': 0.02, 'max_steps': 5000, 'profile_latency': False, 'seed': 42, 'max_workers': 1,
+        'realtime': {'enabled': False, 'time_scale': 1.0, 'miss_policy': 'hold', 'budget_ms': None, 'spin_us': 200.0},
+        # 'trajectory_store' streams every executed run to a Parquet/Arrow file (see analysis/trajectory_store.py)
+        'trajectory_store': {'enabled': False, 'output_dir': 'results/trajectories', 'format': 'parquet', 'chunk_size': 4096},
+        # 'recording' mode 'decimated' keeps one min/max/mean envelope sample per 'decimation_factor' steps (see analysis/trajectory_decimator.py)
+        'recording': {'mode': 'full', 'decimation_factor': 25, 'context_samples': 5, 'breakpoint_tol': 1e-3},
+        # 'result_cache' reuses metrics/trajectories of identical runs across analyses (see analysis/result_cache.py);
+        # off by default so runs leave no pickles in the tree; enable it for iterative work ('--no-cache' overrides it)
+        'result_cache': {'enabled': False, 'cache_dir': 'results/sim_cache', 'max_size_mb': 512},
+        # 'scenario_spec_paths' lists YAML scenario files/directories added to the built-in library (see analysis/scenario_specs.py),
+        # e.g. ['config/scenarios']
+        'scenario_spec_paths': [],
+        # 'multi_seed' (main_analysis --seeds N): seed replicates per cell with common random numbers, bootstrap CIs
+        # and paired tests; seeds are added 'batch_size' at a time until the ranking is settled (see analysis/multi_seed.py)
+        'multi_seed': {'min_seeds': 5, 'batch_size': 5, 'n_bootstrap': 2000, 'confidence': 0.95,
+                       'primary_metric': 'composite_robustness_score', 'bootstrap_seed': 0},
+        # 'rare_event' (run_rare_event.py): subset simulation of the safety-limit exceedance probability under
+        # log-normal plant-parameter uncertainty ('relative_std'), N = 'samples_per_level' runs per level (see analysis/rare_event.py)
+        'rare_event': {'samples_per_level': 500, 'level_probability': 0.1, 'max_levels': 8, 'chain_correlation': 0.8,
+                       'relative_std': 0.05, 'performance': 'limit_margin', 'seed': 0},
+        # 'falsification' (run_falsification.py): differential-evolution search of a scenario family for the disturbances
+        # minimizing a controller's safety margin, 'popsize' x parameters runs per generation (see analysis/falsification.py)
+        'falsification': {'popsize': 5, 'max_generations': 30, 'stop_on_violation': True, 'n_worst': 3,
+                          'performance': 'limit_margin', 'seed': 0},
+        # 'failure_minimization' (run_minimize_failure.py): shrinks a failing run to the shortest reproducing window, bisecting
+        # over plant-state snapshots taken every 'snapshot_interval_s' (see analysis/failure_minimization.py)
+        'failure_minimization': {'snapshot_interval_s': 0.2, 'tail_s': 1.0, 'tolerance_iterations': 8},
+    },
     
     'reactor': {
         'beta_i': np.array([0.000215, 0.001424, 0.001274, 0.002568, 0.000748, 0.000273]),
@@ -54,6 +85,9 @@ CORE_PARAMETERS = {
         'report_output_dir': 'results/reports',
         'plot_output_dir': 'results/plots',
         'template_name': 'report_template_v2.md',
+        # Plots: each series is downsampled to 'plot_max_points' ('minmax' or 'lttb', see analysis/plot_downsampling.py)
+        # before drawing; scenarios are rendered concurrently on 'plot_workers' processes
+        'plot_max_points': 2000, 'plot_downsampling': 'minmax', 'plot_workers': 4,
         'comparison_criteria': {
             'primary_metric': 'composite_robustness_score',
             'crs_metrics': {
@@ -69,8 +103,16 @@ CORE_PARAMETERS = {
     
     'controllers': {
         'PID': { 'kp': 0.05, 'ki': 0.01, 'kd': 0.005, 'setpoint': 1800.0, 'output_limits': (0.0, 1.0) },
+        # Gain-scheduled PID: gain tables over reactor power (fraction of rated); omitted tables use the flat gains
+        'PID_GS': { 'kp': 0.05, 'ki': 0.01, 'kd': 0.005, 'setpoint': 1800.0, 'output_limits': (0.0, 1.0),
+                    'gain_schedule': { 'breakpoints': { 'reactor_power': [0.8, 0.9, 1.0, 1.1] } } },
         'FLC': { 'setpoint': 1800.0, 'error_scaling': 1.0, 'derror_scaling': 1.0, 'output_scaling': 1.0 },
-        'RL_AGENT': {}
+        # MPC governor: the QP is solved within solve_time_budget_ms per step, else the last action is held
+        'MPC': { 'model_dt': 0.1, 'prediction_horizon': 20, 'control_horizon': 5,
+                 'q_power': 1.0, 'q_freq': 10.0, 'r_dvalve': 1.0, 'max_valve_rate': 1.0,
+                 'output_limits': (0.0, 1.0), 'solve_time_budget_ms': 2.0 },
+        # fast_inference: run the exported NumPy actor instead of SB3 predict() (parity-checked at load)
+        'RL_AGENT': { 'fast_inference': True, 'parity_atol': 1e-4 }
     },
     
     'rl_training_adv': {
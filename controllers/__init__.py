@@ -16,17 +16,71 @@ from typing import Dict, Any, Optional, Tuple
 
 from .base_controller import BaseController
 from .pid_controller import PIDController
+from .pid_bank import PIDBank
+from .gain_scheduled_pid import GainSchedule, GainScheduledPIDController, GainScheduledPIDBank
 from .flc_controller import FLCController
+from .mpc_controller import MPCController
 from .rl_interface import RLAgentWrapper, load_rl_agent_from_file
+from .rl_fast_inference import NumpyMLPPolicy, FastRLAgentWrapper, export_sac_actor, verify_policy_parity
+from .distilled_policy import LookupTablePolicy, load_policy_file
+from .artifact_cache import ControllerArtifactCache, get_artifact_cache, clear_controller_cache
 
 __all__ = [
-    'BaseController', 'PIDController', 'FLCController',
+    'BaseController', 'PIDController', 'PIDBank', 'FLCController',
+    'GainSchedule', 'GainScheduledPIDController', 'GainScheduledPIDBank', 'MPCController',
     'RLAgentWrapper', 'load_rl_agent_from_file', 
+    'NumpyMLPPolicy', 'FastRLAgentWrapper', 'export_sac_actor', 'verify_policy_parity',
+    'LookupTablePolicy', 'load_policy_file',
+    'ControllerArtifactCache', 'get_artifact_cache', 'clear_controller_cache',
     'load_controller', 'create_controller_with_custom_config'
 ]
 
 logger = logging.getLogger(__name__)
 
+def _export_fast_policy(model: Any, rl_settings: Dict[str, Any]) -> Any:
+    """
+    Exports the actor to NumPy and returns it if it passes the parity check against
+    `model.predict`; returns False when the fast path is unavailable.
+    """
+    try:
+        policy = export_sac_actor(model)
+        parity = verify_policy_parity(model, policy, atol=rl_settings.get('parity_atol', 1e-4))
+        if parity['passed']:
+            return policy
+        logger.warning("Exported RL policy failed the parity check. Falling back to SB3 predict().")
+    except Exception as e:
+        logger.warning(f"Fast RL inference unavailable for {model.__class__.__name__} ({e}). Falling back to SB3 predict().")
+    return False
+
+def _load_rl_controller(model_path: str, core_params: Dict[str, Any], dt: float, use_cache: bool) -> Optional[BaseController]:
+    """
+    Loads an SB3 model and wraps it as a controller. When 'fast_inference' is enabled
+    for RL_AGENT, the parity-checked NumPy export is used; otherwise RLAgentWrapper.
+    With `use_cache`, the model and its export are shared across calls, and only the
+    (cheap, stateless) wrapper is created anew.
+    """
+    rl_settings = core_params.get('controllers', {}).get('RL_AGENT', {})
+    cache = get_artifact_cache()
+    load_model = lambda path: load_rl_agent_from_file(path, algorithm='SAC')
+    model = cache.get('sb3_model', model_path, load_model) if use_cache else load_model(model_path)
+    if model is None:
+        return None
+
+    fast_policy = False
+    if rl_settings.get('fast_inference', True):
+        if use_cache:
+            fast_policy = cache.get('fast_policy', model_path, lambda _: _export_fast_policy(model, rl_settings),
+                                    extra_key=rl_settings.get('parity_atol', 1e-4))
+        else:
+            fast_policy = _export_fast_policy(model, rl_settings)
+    if fast_policy is not False:
+        return FastRLAgentWrapper(policy=fast_policy, config=core_params, dt=dt, source_model_class=model.__class__.__name__)
+    return RLAgentWrapper(model=model, config=core_params, dt=dt)
+
+def _read_yaml(path: str) -> Any:
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
+
 def create_controller_with_custom_config(
     controller_type: str,
     custom_params: Dict[str, Any],
@@ -38,7 +92,7 @@ def create_controller_with_custom_config(
     Used by optimizers after finding the best parameters.
     """
     core_params = base_config.get('CORE_PARAMETERS', {})
-    base_name = controller_type.split('_')[0].upper()
+    base_name = 'PID_GS' if controller_type.upper().startswith('PID_GS') else controller_type.split('_')[0].upper()
     
     # Start with the default config and update it with the custom one
     final_config = copy.deepcopy(core_params.get('controllers', {}).get(base_name, {}))
@@ -48,7 +102,9 @@ def create_controller_with_custom_config(
 
     try:
         if base_name == 'PID': return PIDController(config=final_config, dt=dt)
+        elif base_name == 'PID_GS': return GainScheduledPIDController(config=final_config, dt=dt)
         elif base_name == 'FLC': return FLCController(config=final_config, dt=dt)
+        elif base_name == 'MPC': return MPCController(config=final_config, dt=dt, core_params=core_params)
         else:
             logger.error(f"Cannot create controller of type '{base_name}' with custom config.")
             return None
@@ -60,20 +116,33 @@ def create_controller_with_custom_config(
 def load_controller(
     controller_name_or_path: str,
     base_config: Dict[str, Any],
-    dt: float
+    dt: float,
+    use_cache: bool = True
 ) -> Tuple[Optional[BaseController], str]:
     """
     Robustly loads a controller by its name or a direct file path to a model.
+
+    With `use_cache`, parsed YAML files, SB3 models and exported policies are taken
+    from the process-wide artifact cache (see artifact_cache.py). Every call still
+    returns a new controller instance with fresh internal state.
     """
     core_params = base_config.get('CORE_PARAMETERS', {})
+    cache = get_artifact_cache()
     
+    if os.path.exists(controller_name_or_path) and controller_name_or_path.endswith('.npz'):
+        logger.info(f"Loading distilled policy from direct path: '{controller_name_or_path}'...")
+        model_name = os.path.splitext(os.path.basename(controller_name_or_path))[0]
+        try:
+            policy = cache.get('policy', controller_name_or_path, load_policy_file) if use_cache else load_policy_file(controller_name_or_path)
+            return FastRLAgentWrapper(policy=policy, config=core_params, dt=dt, source_model_class='Distilled'), model_name
+        except Exception as e:
+            logger.error(f"Failed to load distilled policy from {controller_name_or_path}: {e}", exc_info=True)
+            return None, model_name
+
     if os.path.exists(controller_name_or_path) and controller_name_or_path.endswith('.zip'):
         logger.info(f"Loading controller from direct path: '{controller_name_or_path}'...")
         model_name = os.path.splitext(os.path.basename(controller_name_or_path))[0]
-        loaded_model = load_rl_agent_from_file(controller_name_or_path, algorithm='SAC')
-        if loaded_model:
-            return RLAgentWrapper(model=loaded_model, config=core_params, dt=dt), model_name
-        return None, model_name
+        return _load_rl_controller(controller_name_or_path, core_params, dt, use_cache), model_name
 
     logger.info(f"Loading controller by name: '{controller_name_or_path}'...")
     controller_name = controller_name_or_path
@@ -83,11 +152,11 @@ def load_controller(
 
     final_config = copy.deepcopy(core_params.get('controllers', {}).get(base_name, {}))
 
-    if '_optimized' in controller_name.lower() and base_name in ['PID', 'FLC']:
+    if '_optimized' in controller_name.lower() and base_name in ['PID', 'PID_GS', 'FLC']:
         opt_path = os.path.join(optimized_config_dir, f"{controller_name}.yaml")
         if os.path.exists(opt_path):
             try:
-                with open(opt_path, 'r') as f: loaded_opt = yaml.safe_load(f)
+                loaded_opt = copy.deepcopy(cache.get('yaml', opt_path, _read_yaml)) if use_cache else _read_yaml(opt_path)
                 yaml_key = next((k for k in loaded_opt if k.lower() == controller_name.lower()), None)
                 if yaml_key: final_config.update(loaded_opt[yaml_key])
             except Exception as e:
@@ -97,13 +166,13 @@ def load_controller(
     
     try:
         if base_name == 'PID': return PIDController(config=final_config, dt=dt), controller_name
+        elif base_name == 'PID_GS': return GainScheduledPIDController(config=final_config, dt=dt), controller_name
         elif base_name == 'FLC': return FLCController(config=final_config, dt=dt), controller_name
+        elif base_name == 'MPC': return MPCController(config=final_config, dt=dt, core_params=core_params), controller_name
         elif base_name.startswith('RL_AGENT'):
             model_path_abs = os.path.join(optimized_config_dir, f"{controller_name}.zip")
             if not os.path.exists(model_path_abs): return None, controller_name
-            loaded_model = load_rl_agent_from_file(model_path_abs, algorithm='SAC')
-            if loaded_model: return RLAgentWrapper(model=loaded_model, config=core_params, dt=dt), controller_name
-            return None, controller_name
+            return _load_rl_controller(model_path_abs, core_params, dt, use_cache), controller_name
         return None, controller_name
     except Exception as e:
         logger.error(f"Failed to instantiate controller '{controller_name}': {e}", exc_info=True)
@@ -0,0 +1,128 @@
+# controllers/artifact_cache.py
+
+"""
+================================================================================
+          Process-Wide Controller Artifact Cache
+================================================================================
+`load_controller` is called for the same artifacts many times per workflow
+(main analysis, auto-validation, UI actions). Parsing optimized YAML files is
+cheap, but deserializing an SB3 zip (torch weights included) and exporting and
+parity-checking its actor take seconds.
+
+This module caches the expensive, read-only part of each artifact -- parsed
+YAML dictionaries, SB3 models, exported NumPy policies -- keyed by the
+resolved file path. An entry stays valid while the file's (mtime, size)
+signature is unchanged; when the signature changes, the SHA-256 of the content
+is compared with the cached one, so a merely touched file is not reloaded.
+Callers build fresh controller instances around the shared artifacts, so each
+instance has its own internal state.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ControllerArtifactCache:
+    """
+    A thread-safe cache of artifacts loaded from files.
+
+    Entries are keyed by (kind, resolved path, extra key). Concurrent requests
+    for the same entry wait for a single load instead of loading twice.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Dict[str, Any]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, path: str, loader: Callable[[str], Any], extra_key: Hashable = None) -> Any:
+        """
+        Returns the cached artifact for `path`, calling `loader(resolved_path)` on a miss.
+
+        Args:
+            kind (str): Artifact family, e.g. 'yaml' or 'sb3_model'.
+            path (str): Path to the source file.
+            loader (Callable): Loads the artifact from the resolved path.
+            extra_key (Hashable): Distinguishes artifacts derived from the same file
+                                  with different settings.
+        """
+        resolved = os.path.realpath(path)
+        key = (kind, resolved, extra_key)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            signature = _file_signature(resolved)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry['signature'] == signature:
+                    self._count(hit=True)
+                    return entry['value']
+                digest = _file_digest(resolved)
+                if digest == entry['digest']:
+                    entry['signature'] = signature
+                    self._count(hit=True)
+                    return entry['value']
+                logger.info(f"Controller artifact changed on disk, reloading: {resolved}")
+
+            digest = _file_digest(resolved)
+            value = loader(resolved)
+            # Loaders signal failure with None; failures are not cached so a later call retries
+            if value is not None:
+                self._entries[key] = {'signature': signature, 'digest': digest, 'value': value}
+            self._count(hit=False)
+            return value
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        """Drops every cached artifact."""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+            self.hits = self.misses = 0
+        logger.info("Controller artifact cache cleared.")
+
+    def info(self) -> Dict[str, int]:
+        """Returns hit/miss counters and the number of cached entries."""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# The process-wide cache used by `load_controller`
+_ARTIFACT_CACHE = ControllerArtifactCache()
+
+
+def get_artifact_cache() -> ControllerArtifactCache:
+    """Returns the process-wide controller artifact cache."""
+    return _ARTIFACT_CACHE
+
+
+def clear_controller_cache():
+    """Clears the process-wide controller artifact cache."""
+    _ARTIFACT_CACHE.clear()
@@ -0,0 +1,132 @@
+# controllers/distilled_policy.py
+
+"""
+================================================================================
+          Compact Student Policies for Distilled RL Controllers
+================================================================================
+This file contains the lightweight policy representations produced by the RL
+distillation pipeline (optimization_suite/rl_distiller.py):
+
+- `NumpyMLPPolicy` (from rl_fast_inference): a tiny MLP fitted to the teacher.
+- `LookupTablePolicy`: a gridded lookup over the normalized observation, where
+  each cell holds the mean teacher action; evaluation is pure index arithmetic.
+
+`load_policy_file` restores either kind from its .npz file so that distilled
+students can be loaded by `load_controller` and wrapped as a BaseController.
+"""
+
+import os
+import logging
+import numpy as np
+from typing import Optional, Sequence, Union
+
+from .rl_fast_inference import NumpyMLPPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class LookupTablePolicy:
+    """
+    A piecewise-constant policy over a uniform grid of the normalized observation.
+
+    Only the observation indices listed in `obs_indices` span the grid, so the
+    table size is `bins_per_dim ** len(obs_indices)`. Observations are expected
+    in [-1, 1] (the environment's normalized range) and are clipped to it.
+    """
+
+    def __init__(self,
+                 table: np.ndarray,
+                 obs_indices: Sequence[int],
+                 obs_low: float = -1.0,
+                 obs_high: float = 1.0,
+                 action_low: float = 0.0,
+                 action_high: float = 1.0):
+        self.table = np.asarray(table, dtype=np.float64)
+        self.obs_indices = np.asarray(obs_indices, dtype=np.intp)
+        if self.table.ndim != len(self.obs_indices):
+            raise ValueError(f"Lookup table has {self.table.ndim} dims but {len(self.obs_indices)} observation indices were given.")
+        self.bins = np.asarray(self.table.shape, dtype=np.intp)
+        self.obs_low, self.obs_high = float(obs_low), float(obs_high)
+        self.action_low, self.action_high = float(action_low), float(action_high)
+        self._flat_table = self.table.reshape(-1)
+        # Row-major strides of the flattened table, in cells
+        self._strides = np.cumprod(np.concatenate(([1], self.bins[::-1][:-1])))[::-1].astype(np.intp)
+        self._scale = self.bins / (self.obs_high - self.obs_low)
+
+    @classmethod
+    def fit(cls,
+            observations: np.ndarray,
+            actions: np.ndarray,
+            obs_indices: Optional[Sequence[int]] = None,
+            bins_per_dim: Union[int, Sequence[int]] = 6,
+            action_low: float = 0.0,
+            action_high: float = 1.0) -> 'LookupTablePolicy':
+        """
+        Builds a table from teacher samples: each cell gets the mean action of the
+        samples that fall into it, and empty cells copy their nearest filled cell.
+        """
+        from scipy.spatial import cKDTree
+
+        observations = np.asarray(observations, dtype=np.float64)
+        actions = np.asarray(actions, dtype=np.float64).reshape(-1)
+        obs_indices = list(range(observations.shape[1])) if obs_indices is None else list(obs_indices)
+        bins = np.broadcast_to(np.asarray(bins_per_dim, dtype=np.intp), (len(obs_indices),))
+
+        policy = cls(np.zeros(tuple(bins)), obs_indices, action_low=action_low, action_high=action_high)
+        flat_idx = policy._cell_indices(observations)
+        n_cells = policy._flat_table.size
+        sums = np.bincount(flat_idx, weights=actions, minlength=n_cells)
+        counts = np.bincount(flat_idx, minlength=n_cells)
+        filled = counts > 0
+        if not filled.any():
+            raise ValueError("Cannot fit a lookup policy without samples.")
+
+        table = np.empty(n_cells)
+        table[filled] = sums[filled] / counts[filled]
+        if not filled.all():
+            centers = np.stack(np.unravel_index(np.arange(n_cells), tuple(bins)), axis=1).astype(np.float64)
+            _, nearest = cKDTree(centers[filled]).query(centers[~filled])
+            table[~filled] = table[filled][nearest]
+        logger.info(f"Lookup policy fitted: {n_cells} cells over obs indices {obs_indices}, {int(filled.sum())} populated by samples.")
+        return cls(table.reshape(tuple(bins)), obs_indices, action_low=action_low, action_high=action_high)
+
+    def _cell_indices(self, x: np.ndarray) -> np.ndarray:
+        """Maps (N, obs_dim) observations to flat cell indices."""
+        coords = ((x[:, self.obs_indices] - self.obs_low) * self._scale).astype(np.intp)
+        coords = np.clip(coords, 0, self.bins - 1)
+        return coords @ self._strides
+
+    def predict(self, observation: np.ndarray) -> np.ndarray:
+        """Returns actions of shape (1,) for a (obs_dim,) input or (N, 1) for an (N, obs_dim) batch."""
+        x = np.asarray(observation, dtype=np.float64)
+        single = x.ndim == 1
+        if single:
+            x = x.reshape(1, -1)
+        actions = np.clip(self._flat_table[self._cell_indices(x)], self.action_low, self.action_high)[:, None]
+        return actions[0] if single else actions
+
+    def save(self, path: str):
+        """Saves the table to a compressed .npz file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, policy_type='lookup', table=self.table, obs_indices=self.obs_indices,
+                            obs_range=np.array([self.obs_low, self.obs_high]),
+                            action_range=np.array([self.action_low, self.action_high]))
+        logger.info(f"Lookup policy saved to: {path}")
+
+    @classmethod
+    def load(cls, path: str) -> 'LookupTablePolicy':
+        """Loads a table previously written by `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            obs_range, action_range = data['obs_range'], data['action_range']
+            return cls(data['table'], data['obs_indices'], obs_range[0], obs_range[1], action_range[0], action_range[1])
+
+
+def load_policy_file(path: str) -> Union[NumpyMLPPolicy, LookupTablePolicy]:
+    """Loads a student policy .npz, dispatching on its stored 'policy_type'."""
+    with np.load(path, allow_pickle=False) as data:
+        policy_type = str(data['policy_type']) if 'policy_type' in data.files else 'mlp'
+    if policy_type == 'lookup':
+        return LookupTablePolicy.load(path)
+    if policy_type == 'mlp':
+        return NumpyMLPPolicy.load(path)
+    raise ValueError(f"Unknown policy type '{policy_type}' in {path}.")
@@ -0,0 +1,261 @@
+# controllers/gain_scheduled_pid.py
+
+"""
+================================================================================
+          Gain-Scheduled PID Controller (Operating-Point Lookup Tables)
+================================================================================
+This file contains a PID controller whose gains are read from precomputed
+tables over the plant operating point instead of being fixed. Supported
+scheduling variables, both expressed as fractions of rated power:
+
+- 'reactor_power': thermal power, recovered from observation index 0.
+- 'load_demand':   electrical load, estimated as the electrical output
+                   implied by the thermal power minus the power error
+                   (observation index 5).
+
+The tables are interpolated (piecewise-)linearly each step: linear with one
+scheduling variable, a bilinear blend of the four surrounding cells with two.
+The scalar controller uses a pure-Python bisect lookup (no NumPy dispatch on
+tiny arrays); the PIDBank variant uses the equivalent vectorized lookup.
+"""
+
+import bisect
+import itertools
+import logging
+import numpy as np
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+from .pid_controller import PIDController
+from .pid_bank import PIDBank
+
+logger = logging.getLogger(__name__)
+
+
+class GainSchedule:
+    """
+    Tables of kp/ki/kd over a rectilinear grid of operating points.
+
+    Tables have shape `tuple(len(breakpoints[v]) for v in variables)`. Gains
+    outside the grid are held at the nearest edge value.
+    """
+    SCHEDULING_VARIABLES = ('reactor_power', 'load_demand')
+    GAIN_KEYS = ('kp', 'ki', 'kd')
+
+    def __init__(self,
+                 breakpoints: Dict[str, Sequence[float]],
+                 tables: Dict[str, Any],
+                 reactor_power_mw: float = 3411.0,
+                 eta_transfer: float = 0.98,
+                 power_error_norm_mw: float = 500.0):
+        """
+        Args:
+            breakpoints (dict): Ordered mapping of scheduling variable -> increasing
+                                breakpoints (at least two per variable).
+            tables (dict): 'kp', 'ki' and 'kd' tables matching the breakpoint grid.
+            reactor_power_mw (float): Power normalization used for observation index 0.
+            eta_transfer (float): Thermal-to-mechanical efficiency used for the load estimate.
+            power_error_norm_mw (float): Normalization used for observation index 5.
+        """
+        self.variables = list(breakpoints)
+        if not self.variables or len(self.variables) > 2:
+            raise ValueError(f"GainSchedule supports one or two scheduling variables, got {self.variables}.")
+        unknown = [v for v in self.variables if v not in self.SCHEDULING_VARIABLES]
+        if unknown:
+            raise ValueError(f"Unknown scheduling variables {unknown}. Supported: {list(self.SCHEDULING_VARIABLES)}")
+
+        self.breakpoints = [np.asarray(breakpoints[v], dtype=np.float64) for v in self.variables]
+        for name, bp in zip(self.variables, self.breakpoints):
+            if bp.ndim != 1 or bp.size < 2 or np.any(np.diff(bp) <= 0):
+                raise ValueError(f"Breakpoints for '{name}' must be a strictly increasing sequence of at least two values.")
+        grid_shape = tuple(bp.size for bp in self.breakpoints)
+
+        missing = [k for k in self.GAIN_KEYS if k not in tables]
+        if missing:
+            raise ValueError(f"GainSchedule is missing tables for {missing}.")
+        self.tables = {k: np.asarray(tables[k], dtype=np.float64).reshape(grid_shape) for k in self.GAIN_KEYS}
+        # (n_cells, 3) so one gather returns all three gains for a cell
+        self._flat_gains = np.stack([self.tables[k].reshape(-1) for k in self.GAIN_KEYS], axis=1)
+        self._strides = np.array([int(np.prod(grid_shape[i + 1:])) for i in range(len(grid_shape))], dtype=np.intp)
+        self._corners = list(itertools.product((0, 1), repeat=len(grid_shape)))
+
+        self.reactor_power_mw = float(reactor_power_mw)
+        self.eta_transfer = float(eta_transfer)
+        self.power_error_norm_mw = float(power_error_norm_mw)
+        self._var_columns = [self.SCHEDULING_VARIABLES.index(v) for v in self.variables]
+        # Plain-Python copies for the per-step scalar lookup
+        self._bp_lists = [bp.tolist() for bp in self.breakpoints]
+        self._gain_rows = self._flat_gains.tolist()
+        self._stride_list = self._strides.tolist()
+
+    @classmethod
+    def from_config(cls, schedule_config: Dict[str, Any], default_gains: Optional[Dict[str, float]] = None) -> 'GainSchedule':
+        """
+        Builds a schedule from a config block such as:
+            {'breakpoints': {'reactor_power': [0.8, 0.9, 1.0, 1.1]},
+             'kp': [...], 'ki': [...], 'kd': [...]}
+        Gain tables that are omitted are filled with the flat `default_gains`.
+        """
+        breakpoints = schedule_config.get('breakpoints')
+        if not breakpoints:
+            raise ValueError("gain_schedule config requires a non-empty 'breakpoints' mapping.")
+        grid_shape = tuple(len(bp) for bp in breakpoints.values())
+        default_gains = default_gains or {}
+        tables = {}
+        for key in cls.GAIN_KEYS:
+            if key in schedule_config:
+                tables[key] = schedule_config[key]
+            elif key in default_gains:
+                tables[key] = np.full(grid_shape, float(default_gains[key]))
+        return cls(breakpoints, tables,
+                   reactor_power_mw=schedule_config.get('reactor_power_mw', 3411.0),
+                   eta_transfer=schedule_config.get('eta_transfer', 0.98),
+                   power_error_norm_mw=schedule_config.get('power_error_norm_mw', 500.0))
+
+    def to_config(self) -> Dict[str, Any]:
+        """Returns the schedule as a plain (YAML-serializable) config block."""
+        config: Dict[str, Any] = {'breakpoints': {v: bp.tolist() for v, bp in zip(self.variables, self.breakpoints)}}
+        config.update({k: self.tables[k].tolist() for k in self.GAIN_KEYS})
+        config.update({'reactor_power_mw': self.reactor_power_mw, 'eta_transfer': self.eta_transfer,
+                       'power_error_norm_mw': self.power_error_norm_mw})
+        return config
+
+    def operating_points(self, observations: np.ndarray) -> np.ndarray:
+        """
+        Maps normalized observations of shape (N, 6) to scheduling coordinates (N, n_vars).
+        """
+        power_fraction = 0.9 + 0.5 * observations[:, 0]
+        if self._var_columns == [0]:
+            return power_fraction[:, None]
+        # power_error = mechanical power - load, with mechanical power ~ eta * thermal power
+        load_fraction = power_fraction - (observations[:, 5] * self.power_error_norm_mw) / (self.eta_transfer * self.reactor_power_mw)
+        return np.stack((power_fraction, load_fraction), axis=1)[:, self._var_columns]
+
+    def lookup(self, operating_points: np.ndarray) -> np.ndarray:
+        """
+        Interpolates the gains at (N, n_vars) operating points.
+
+        Returns:
+            np.ndarray: Shape (N, 3) with columns kp, ki, kd.
+        """
+        if len(self.breakpoints) == 1:
+            x, bp = operating_points[:, 0], self.breakpoints[0]
+            return np.stack([np.interp(x, bp, self._flat_gains[:, j]) for j in range(3)], axis=1)
+
+        lower_idx, upper_w = [], []
+        for d, bp in enumerate(self.breakpoints):
+            x = np.clip(operating_points[:, d], bp[0], bp[-1])
+            i = np.clip(np.searchsorted(bp, x, side='right') - 1, 0, bp.size - 2)
+            lower_idx.append(i)
+            upper_w.append((x - bp[i]) / (bp[i + 1] - bp[i]))
+
+        gains = np.zeros((operating_points.shape[0], 3))
+        for corner in self._corners:
+            flat = sum((lower_idx[d] + c) * self._strides[d] for d, c in enumerate(corner))
+            weight = np.prod([upper_w[d] if c else 1.0 - upper_w[d] for d, c in enumerate(corner)], axis=0)
+            gains += weight[:, None] * self._flat_gains[flat]
+        return gains
+
+    def gains_for_observation(self, observation: Sequence[float]) -> Tuple[float, float, float]:
+        """Scalar equivalent of `gains_for` for a single (6,) observation."""
+        power_fraction = 0.9 + 0.5 * float(observation[0])
+        load_fraction = power_fraction - (float(observation[5]) * self.power_error_norm_mw) / (self.eta_transfer * self.reactor_power_mw) \
+            if 1 in self._var_columns else power_fraction
+        point = (power_fraction, load_fraction)
+
+        cells = [(0, 1.0)]
+        for d, bp in enumerate(self._bp_lists):
+            x = min(max(point[self._var_columns[d]], bp[0]), bp[-1])
+            i = min(max(bisect.bisect_right(bp, x) - 1, 0), len(bp) - 2)
+            w = (x - bp[i]) / (bp[i + 1] - bp[i])
+            stride = self._stride_list[d]
+            cells = [(idx + (i + c) * stride, weight * (w if c else 1.0 - w)) for idx, weight in cells for c in (0, 1)]
+
+        kp = ki = kd = 0.0
+        for idx, weight in cells:
+            row = self._gain_rows[idx]
+            kp += weight * row[0]
+            ki += weight * row[1]
+            kd += weight * row[2]
+        return kp, ki, kd
+
+    def gains_for(self, observations: np.ndarray) -> np.ndarray:
+        """Looks up gains directly from normalized observations of shape (N, 6)."""
+        return self.lookup(self.operating_points(observations))
+
+
+class GainScheduledPIDController(PIDController):
+    """
+    PID controller whose kp/ki/kd follow a GainSchedule. v1.0
+
+    The control law (anti-windup, derivative filtering) is inherited unchanged
+    from PIDController; only the gains are refreshed before every step.
+    """
+
+    def __init__(self, config: Dict[str, Any], dt: float):
+        """
+        Args:
+            config (dict): PID parameters plus a 'gain_schedule' block (see
+                           GainSchedule.from_config). The flat 'kp'/'ki'/'kd' fill
+                           any table that the schedule omits.
+            dt (float): Simulation time step (seconds).
+        """
+        super().__init__(config, dt)
+        try:
+            self.schedule = GainSchedule.from_config(config.get('gain_schedule', {}),
+                                                     default_gains={'kp': self.kp, 'ki': self.ki, 'kd': self.kd})
+            logger.info(f"Gain-scheduled PID ready over {self.schedule.variables} "
+                        f"({self.schedule._flat_gains.shape[0]} table cells).")
+        except (ValueError, TypeError) as e:
+            logger.error(f"Failed to initialize GainScheduledPIDController due to invalid schedule: {e}", exc_info=True)
+            raise
+
+    def step(self, observation: np.ndarray) -> float:
+        """Refreshes the gains for the current operating point, then runs the PID law."""
+        try:
+            self.kp, self.ki, self.kd = self.schedule.gains_for_observation(observation)
+        except IndexError:
+            logger.error(f"Observation vector length {len(observation)} is too short for gain scheduling. Keeping previous gains.")
+        return super().step(observation)
+
+    def update_parameters(self, new_params: Dict[str, Any]):
+        """Replaces the schedule when a 'gain_schedule' block is given."""
+        if 'gain_schedule' in new_params:
+            self.schedule = GainSchedule.from_config(new_params['gain_schedule'],
+                                                     default_gains={'kp': self.kp, 'ki': self.ki, 'kd': self.kd})
+            logger.info("Gain schedule updated live.")
+        else:
+            super().update_parameters(new_params)
+
+    def get_parameters(self) -> Dict[str, Any]:
+        """Returns the current (scheduled) gains, setpoint and the full schedule."""
+        params = super().get_parameters()
+        params['gain_schedule'] = self.schedule.to_config()
+        return params
+
+
+class GainScheduledPIDBank(PIDBank):
+    """
+    A PIDBank whose lanes share one GainSchedule. v1.0
+
+    Each lane is scheduled on its own operating point when driven with an
+    (N, 6) observation matrix; a shared (6,) observation schedules all lanes
+    identically.
+    """
+
+    def __init__(self, config: Dict[str, Any], dt: float, n_lanes: Optional[int] = None):
+        super().__init__(config, dt, n_lanes=n_lanes)
+        self.schedule = GainSchedule.from_config(config.get('gain_schedule', {}),
+                                                 default_gains={'kp': float(self.kp[0]), 'ki': float(self.ki[0]), 'kd': float(self.kd[0])})
+
+    def step(self, observation: np.ndarray) -> np.ndarray:
+        """Refreshes the per-lane gains for their operating points, then steps every lane."""
+        obs = np.asarray(observation, dtype=np.float64)
+        gains = self.schedule.gains_for(obs.reshape(1, -1) if obs.ndim == 1 else obs)
+        self.kp, self.ki, self.kd = (np.broadcast_to(gains[:, j], (self.n_lanes,)).copy() for j in range(3))
+        return super().step(observation)
+
+    def get_parameters(self) -> Dict[str, Any]:
+        """Returns the current per-lane gains and the shared schedule."""
+        params = super().get_parameters()
+        params['gain_schedule'] = self.schedule.to_config()
+        return params
@@ -0,0 +1,377 @@
+# controllers/mpc_controller.py
+
+"""
+================================================================================
+          Real-Time Model-Predictive Governor (Warm-Started Condensed QP)
+================================================================================
+This file contains an MPC governor for the turbine valve. It predicts with a
+linearized turbine-grid model (valve actuator lag, turbine power lag and the
+swing equation), with the load demand treated as a measured disturbance:
+
+    dv/dt   = (u - v) / tau_v
+    dPm/dt  = (eta * P_th * v - Pm) / tau_t
+    dw/dt   = (Pm - P_load) / (2 H S_base) - D / (2 H) * w        (w = speed deviation, p.u.)
+
+Every step a small QP over `control_horizon` valve moves is solved, subject
+to the valve limits [0, 1] and the valve rate limit. The QP is condensed
+(states eliminated), and everything that does not depend on the current state
+-- prediction matrices, Hessian and its inverse -- is precomputed at
+construction for a grid of thermal-power operating points, since the valve
+gain eta * P_th is the only operating-point-dependent term.
+
+The condensed Hessian is badly conditioned (the frequency weight dominates),
+so the QP is solved with a dense primal active-set method rather than a
+first-order method. It is warm-started from the previous solution and its
+active set, which usually makes it converge in one or two iterations, and it
+runs under a wall-clock budget: if the budget is exceeded, or `qp_max_iter`
+iterations pass without convergence, the last applied (feasible) action is
+held and the overrun or unconverged solve is counted in the timing statistics.
+Solve times go into a fixed-memory LatencyHistogram, so long runs do not grow
+the controller.
+"""
+
+import time
+import logging
+import numpy as np
+from scipy.linalg import expm
+from typing import Dict, Any, Optional
+
+from analysis.latency_profiler import LatencyHistogram
+from .base_controller import BaseController
+
+logger = logging.getLogger(__name__)
+
+
+class MPCController(BaseController):
+    """
+    Linear MPC valve governor with a latency-budgeted active-set QP solver. v1.0
+    """
+    DEFAULTS = {
+        'model_dt': 0.1,                 # Prediction interval (s)
+        'prediction_horizon': 20,        # Prediction intervals
+        'control_horizon': 5,            # Free valve moves (held constant afterwards)
+        'q_power': 1.0,                  # Weight on (Pm - P_load) / power_scale_mw
+        'q_freq': 10.0,                  # Weight on frequency deviation / freq_scale_hz
+        'r_dvalve': 1.0,                 # Weight on valve moves (per unit valve)
+        'power_scale_mw': 100.0,
+        'freq_scale_hz': 0.1,
+        'max_valve_rate': 1.0,           # Valve rate limit (1/s)
+        'output_limits': (0.0, 1.0),
+        'operating_point_grid': [0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2],  # Thermal power fractions
+        'qp_max_iter': 25,
+        'solve_time_budget_ms': 2.0,
+    }
+
+    def __init__(self, config: Dict[str, Any], dt: float, core_params: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            config (dict): MPC settings (see DEFAULTS).
+            dt (float): Simulation time step (seconds).
+            core_params (dict, optional): CORE_PARAMETERS, used for the plant model
+                                          (turbine, grid, coupling, reactor P0 and
+                                          observation normalization). Defaults are
+                                          used when omitted.
+        """
+        super().__init__(config, dt)
+        try:
+            settings = {**self.DEFAULTS, **config}
+            core_params = core_params or {}
+            turbine = core_params.get('turbine', {})
+            grid = core_params.get('grid', {})
+            norm = core_params.get('rl_normalization_factors', {})
+
+            # --- Plant model parameters ---
+            self.tau_v = float(turbine.get('tau_v', 0.1))
+            self.tau_t = float(turbine.get('tau_t', 0.3))
+            self.omega_nominal_rpm = float(turbine.get('omega_nominal_rpm', 1800.0))
+            self.eta = float(core_params.get('coupling', {}).get('eta_transfer', 0.98))
+            self.H = float(grid.get('H', 5.0))
+            self.D = float(grid.get('D', 1.0))
+            self.S_base = float(grid.get('S_base', 1000.0))
+            self.f_nominal = float(grid.get('f_nominal', 60.0))
+            self.P0 = float(core_params.get('reactor', {}).get('P0', 3411.0))
+            self.power_norm_mw = float(norm.get('reactor_power_mw', 3411.0))
+            self.power_error_norm_mw = float(norm.get('power_error', 500.0))
+            self.speed_norm_rpm = float(norm.get('speed_rpm', 1800.0))
+
+            # --- MPC settings ---
+            self.model_dt = float(settings['model_dt'])
+            self.n_pred = int(settings['prediction_horizon'])
+            self.n_ctrl = int(settings['control_horizon'])
+            if not (1 <= self.n_ctrl <= self.n_pred):
+                raise ValueError(f"MPC requires 1 <= control_horizon ({self.n_ctrl}) <= prediction_horizon ({self.n_pred}).")
+            self.output_min, self.output_max = (float(x) for x in settings['output_limits'])
+            if self.output_min >= self.output_max:
+                raise ValueError(f"MPC output_min ({self.output_min}) must be less than output_max ({self.output_max}).")
+            self.max_valve_rate = float(settings['max_valve_rate'])
+            self.max_iter = int(settings['qp_max_iter'])
+            self.budget_s = float(settings['solve_time_budget_ms']) / 1000.0
+            self.operating_points = np.asarray(settings['operating_point_grid'], dtype=np.float64)
+            self.settings = settings
+
+            self._build_constraints()
+            self._precompute_qp_matrices()
+
+            # --- Internal state ---
+            self.reset_state()
+            logger.info(f"MPC Controller ready: horizon {self.n_pred}x{self.model_dt}s, {self.n_ctrl} moves, "
+                        f"{len(self.operating_points)} precomputed operating points, budget {self.budget_s * 1e3:.2f} ms.")
+
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error(f"Failed to initialize MPCController due to invalid config: {e}", exc_info=True)
+            raise
+
+    # ------------------------------------------------------------------
+    # Construction-time precomputation
+    # ------------------------------------------------------------------
+    def _discretize(self, steam_gain: float):
+        """Zero-order-hold discretization of the linear model for a given valve gain eta * P_th."""
+        a_c = np.array([[-1.0 / self.tau_v, 0.0, 0.0],
+                        [steam_gain / self.tau_t, -1.0 / self.tau_t, 0.0],
+                        [0.0, 1.0 / (2.0 * self.H * self.S_base), -self.D / (2.0 * self.H)]])
+        # Input columns: valve command u, load disturbance P_load
+        b_c = np.array([[1.0 / self.tau_v, 0.0],
+                        [0.0, 0.0],
+                        [0.0, -1.0 / (2.0 * self.H * self.S_base)]])
+        augmented = np.zeros((5, 5))
+        augmented[:3, :3], augmented[:3, 3:] = a_c, b_c
+        phi = expm(augmented * self.model_dt)
+        return phi[:3, :3], phi[:3, 3:4], phi[:3, 4:5]
+
+    def _build_constraints(self):
+        """Builds the constant constraint matrix G (G U <= h) of the condensed QP."""
+        n = self.n_ctrl
+        delta = np.eye(n) - np.eye(n, k=-1)  # first row is u_0 (minus u_prev via the bounds)
+        self._C = np.vstack([np.eye(n), delta])
+        # Upper bounds on C U, then lower bounds as -C U <= -lower
+        self._G = np.vstack([self._C, -self._C])
+        # Each constraint row couples two "nodes" (moves, or -1 for a constant bound):
+        # box row i is (-1, i), rate row j is (j - 1, j). A set of rows is linearly
+        # independent exactly when its edges form a forest, which is cheap to check.
+        edges = [(-1, i) for i in range(n)] + [(j - 1, j) for j in range(n)]
+        self._row_edges = edges + edges
+        self._rate_first = self.max_valve_rate * self.dt          # first move is applied for one sim step
+        self._rate_next = self.max_valve_rate * self.model_dt
+
+    def _precompute_qp_matrices(self):
+        """Precomputes prediction and cost matrices for every operating point."""
+        n, n_pred = self.n_ctrl, self.n_pred
+        w_power = np.sqrt(self.settings['q_power']) / self.settings['power_scale_mw']
+        w_freq = np.sqrt(self.settings['q_freq']) * self.f_nominal / self.settings['freq_scale_hz']
+        r_du = float(self.settings['r_dvalve'])
+
+        # Move blocking: u_k = U[min(k, n - 1)]
+        blocking = np.zeros((n_pred, n))
+        blocking[np.arange(n_pred), np.minimum(np.arange(n_pred), n - 1)] = 1.0
+        delta = self._C[n:]
+
+        self._qp = []
+        for fraction in self.operating_points:
+            a_d, b_d, e_d = self._discretize(self.eta * self.P0 * fraction)
+            # Stacked weighted outputs y_k = [w_p * (Pm_k - P_load), w_f * w_k], k = 1..n_pred
+            out = np.array([[0.0, w_power, 0.0], [0.0, 0.0, w_freq]])
+            s_x = np.zeros((2 * n_pred, 3))
+            s_u = np.zeros((2 * n_pred, n_pred))
+            s_l = np.zeros((2 * n_pred, 1))
+            a_pow = np.eye(3)
+            e_acc = np.zeros((3, 1))
+            impulse = []  # a_d^j b_d for j = 0..n_pred-1
+            for k in range(n_pred):
+                impulse.append(a_pow @ b_d)
+                e_acc = a_d @ e_acc + e_d
+                a_pow = a_d @ a_pow
+                rows = slice(2 * k, 2 * k + 2)
+                s_x[rows] = out @ a_pow
+                s_l[rows] = out @ e_acc - np.array([[w_power], [0.0]])
+                for j in range(k + 1):
+                    s_u[rows, j] = (out @ impulse[k - j]).ravel()
+            s_u = s_u @ blocking
+
+            hessian = 2.0 * (s_u.T @ s_u + r_du * delta.T @ delta)
+            self._qp.append({
+                'hessian': hessian,
+                'hessian_inv': np.linalg.inv(hessian),
+                'f_x': 2.0 * s_u.T @ s_x,
+                'f_l': 2.0 * (s_u.T @ s_l).ravel(),
+                'f_uprev': -2.0 * r_du * delta[0],  # from the first move u_0 - u_prev
+            })
+
+    # ------------------------------------------------------------------
+    # Online
+    # ------------------------------------------------------------------
+    def reset_state(self):
+        """Clears the estimator, warm start and timing statistics."""
+        self._last_action: Optional[float] = None
+        self._pm_estimate: Optional[float] = None
+        self._x = np.full(self.n_ctrl, 0.5 * (self.output_min + self.output_max))
+        self._active_set = []
+        self._solve_times = LatencyHistogram()
+        self._total_iterations = 0
+        self._overruns = 0
+        self._unconverged = 0
+
+    def _decode(self, observation: np.ndarray):
+        """Recovers physical quantities from the normalized observation."""
+        thermal_power = self.power_norm_mw * (0.9 + 0.5 * float(observation[0]))
+        valve = 0.5 + 0.5 * float(observation[2])
+        speed_rpm = self.speed_norm_rpm + 0.25 * self.speed_norm_rpm * float(observation[4])
+        power_error = float(observation[5]) * self.power_error_norm_mw
+        return thermal_power, valve, speed_rpm / self.omega_nominal_rpm - 1.0, power_error
+
+    def _feasible_start(self, u_prev: float) -> np.ndarray:
+        """Projects the previous solution onto the current constraints, move by move."""
+        x = np.empty(self.n_ctrl)
+        previous, rate = u_prev, self._rate_first
+        for k, value in enumerate(self._x):
+            previous = min(max(float(value), self.output_min, previous - rate), self.output_max, previous + rate)
+            x[k] = previous
+            rate = self._rate_next
+        return x
+
+    def _solve(self, qp: Dict[str, np.ndarray], f: np.ndarray, h: np.ndarray, x: np.ndarray, deadline: float):
+        """
+        Primal active-set solve of min 0.5 U'HU + f'U s.t. G U <= h from a feasible `x`,
+        warm-started with the previous active set. Every iterate stays feasible.
+
+        Returns:
+            (solution, active_set, iterations, status), status being 'converged', 'overrun'
+            (wall-clock budget exceeded) or 'max_iter' (no convergence within qp_max_iter)
+        """
+        G, H, h_inv = self._G, qp['hessian'], qp['hessian_inv']
+        slack = h - G @ x
+        working, parent = [], {}
+
+        def root(node):
+            while parent.get(node, node) != node:
+                node = parent[node]
+            return node
+
+        for i in self._active_set:
+            a, b = (root(node) for node in self._row_edges[i])
+            if slack[i] <= 1e-9 and a != b:
+                parent[a] = b
+                working.append(i)
+
+        for iteration in range(1, self.max_iter + 1):
+            gradient = H @ x + f
+            newton = h_inv @ gradient
+            if working:
+                # Equality-constrained step via the Schur complement A H^-1 A'
+                A = G[working]
+                a_h_inv = A @ h_inv
+                multipliers = np.linalg.solve(a_h_inv @ A.T, -(A @ newton))
+                p = -(newton + a_h_inv.T @ multipliers)
+            else:
+                p, multipliers = -newton, np.zeros(0)
+
+            if np.max(np.abs(p)) < 1e-8:
+                if multipliers.size == 0 or multipliers.min() >= -1e-10:
+                    return x, working, iteration, 'converged'
+                working.pop(int(np.argmin(multipliers)))
+            else:
+                g_p = G @ p
+                slack = np.maximum(h - G @ x, 0.0)
+                blocking, alpha = None, 1.0
+                for i in np.flatnonzero(g_p > 1e-12):
+                    if i not in working and slack[i] / g_p[i] < alpha:
+                        blocking, alpha = int(i), slack[i] / g_p[i]
+                x = x + alpha * p
+                if blocking is not None:
+                    working.append(blocking)
+
+            if time.perf_counter() > deadline:
+                return x, working, iteration, 'overrun'
+        return x, working, self.max_iter, 'max_iter'
+
+    def step(self, observation: np.ndarray) -> float:
+        """Solves the MPC problem for the current observation and returns the first valve move."""
+        start = time.perf_counter()
+        try:
+            thermal_power, valve, speed_dev, power_error = self._decode(observation)
+        except IndexError:
+            logger.error(f"Observation vector length {len(observation)} is too short for MPC. Holding last action.")
+            return self._last_action if self._last_action is not None else 0.5 * (self.output_min + self.output_max)
+
+        # Open-loop mechanical power estimator driven by the measured valve and thermal power
+        if self._pm_estimate is None:
+            self._pm_estimate = self.eta * thermal_power
+        else:
+            self._pm_estimate += (self.dt / self.tau_t) * (self.eta * thermal_power * valve - self._pm_estimate)
+        load_estimate = self._pm_estimate - power_error
+        u_prev = self._last_action if self._last_action is not None else valve
+
+        bin_idx = int(np.argmin(np.abs(self.operating_points - thermal_power / self.P0)))
+        qp = self._qp[bin_idx]
+        state = np.array([valve, self._pm_estimate, speed_dev])
+        f = qp['f_x'] @ state + qp['f_l'] * load_estimate + qp['f_uprev'] * u_prev
+
+        n = self.n_ctrl
+        lower = np.concatenate([np.full(n, self.output_min), np.full(n, -self._rate_next)])
+        upper = np.concatenate([np.full(n, self.output_max), np.full(n, self._rate_next)])
+        lower[n] = u_prev - self._rate_first
+        upper[n] = u_prev + self._rate_first
+
+        x, active_set, iterations, status = self._solve(
+            qp, f, np.concatenate([upper, -lower]), self._feasible_start(u_prev), start + self.budget_s)
+        if status == 'converged':
+            self._x, self._active_set = x, active_set
+            # Guard against round-off: the first move stays inside its (always non-empty) feasible interval
+            action = min(max(float(x[0]), self.output_min, u_prev - self._rate_first), self.output_max, u_prev + self._rate_first)
+        else:
+            if status == 'overrun':
+                self._overruns += 1
+            else:
+                self._unconverged += 1
+            action = u_prev
+
+        self._last_action = action
+        self._solve_times.record(int((time.perf_counter() - start) * 1e9))
+        self._total_iterations += iterations
+        return action
+
+    def get_timing_stats(self) -> Dict[str, float]:
+        """Per-step solve time statistics against the configured budget."""
+        n_solves = self._solve_times.count
+        if n_solves == 0:
+            return {'n_solves': 0, 'budget_ms': self.budget_s * 1e3, 'n_overruns': 0, 'n_unconverged': 0}
+        summary = self._solve_times.summary()
+        return {
+            'n_solves': n_solves,
+            'budget_ms': self.budget_s * 1e3,
+            'mean_solve_ms': summary['mean_us'] / 1e3,
+            'p99_solve_ms': summary['p99_us'] / 1e3,
+            'max_solve_ms': summary['max_us'] / 1e3,
+            'mean_iterations': self._total_iterations / n_solves,
+            'n_overruns': int(self._overruns),
+            'n_unconverged': int(self._unconverged),
+            'overrun_fraction': (self._overruns + self._unconverged) / n_solves,
+        }
+
+    def reset(self):
+        """Logs the timing summary of the finished run and resets the internal state."""
+        super().reset()
+        if self._solve_times.count:
+            stats = self.get_timing_stats()
+            logger.info(f"MPC timing: mean {stats['mean_solve_ms']:.3f} ms, p99 {stats['p99_solve_ms']:.3f} ms, "
+                        f"max {stats['max_solve_ms']:.3f} ms, {stats['n_overruns']} overruns and "
+                        f"{stats['n_unconverged']} unconverged of {stats['n_solves']} solves.")
+        self.reset_state()
+
+    def update_parameters(self, new_params: Dict[str, Any]):
+        """Updates cost weights or the time budget live, recomputing the QP matrices if needed."""
+        super().update_parameters(new_params)
+        if 'solve_time_budget_ms' in new_params:
+            self.budget_s = float(new_params['solve_time_budget_ms']) / 1000.0
+        weight_keys = {'q_power', 'q_freq', 'r_dvalve', 'power_scale_mw', 'freq_scale_hz'}
+        if weight_keys & set(new_params):
+            self.settings.update({k: float(new_params[k]) for k in weight_keys & set(new_params)})
+            self._precompute_qp_matrices()
+        logger.info(f"MPC Parameters Updated Live: {new_params}")
+
+    def get_parameters(self) -> Dict[str, Any]:
+        """Returns the MPC weights, horizons and timing statistics."""
+        super().get_parameters()
+        params = {k: self.settings[k] for k in ('q_power', 'q_freq', 'r_dvalve', 'prediction_horizon', 'control_horizon', 'model_dt')}
+        params['solve_time_budget_ms'] = self.budget_s * 1e3
+        params['timing'] = self.get_timing_stats()
+        return params
@@ -0,0 +1,183 @@
+# controllers/pid_bank.py
+
+"""
+================================================================================
+          Vectorized PID Controller Bank (N Gain Sets in Lockstep)
+================================================================================
+This file contains the PIDBank, which advances N independent PID "lanes" in a
+single call. Every lane follows exactly the same control law as PIDController
+(conditional anti-windup and optional first-order derivative filtering), but
+the per-lane branches are expressed as NumPy masks instead of Python `if`
+statements. A full PID candidate population or a multi-seed study can thus be
+stepped in lockstep instead of through N separate Python controllers.
+"""
+
+import numpy as np
+import logging
+from .base_controller import BaseController
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PIDBank(BaseController):
+    """
+    A bank of N PID controllers with array-valued gains and limits. v1.0
+
+    Scalars in the config are broadcast across all lanes; sequences must have
+    one entry per lane. `step` returns an array of N valve commands.
+    """
+    MEASUREMENT_OBS_INDEX = 4
+    LANE_PARAMETER_DEFAULTS = {'kp': 0.20, 'ki': 0.04, 'kd': 0.05, 'setpoint': 1800.0, 'deriv_filter_tau': 0.05}
+
+    def __init__(self, config: Dict[str, Any], dt: float, n_lanes: Optional[int] = None):
+        """
+        Initializes the PIDBank with rigorous validation.
+
+        Args:
+            config (dict): PID parameters. Each of 'kp', 'ki', 'kd', 'setpoint' and
+                           'deriv_filter_tau' may be a scalar or a length-N sequence.
+                           'output_limits' may be a (min, max) pair or an (N, 2) array.
+            dt (float): Simulation time step (seconds).
+            n_lanes (int, optional): Number of lanes. Inferred from the longest
+                                     array-valued parameter when omitted.
+        """
+        super().__init__(config, dt)
+        try:
+            raw_values = {key: np.atleast_1d(np.asarray(config.get(key, default), dtype=np.float64))
+                          for key, default in self.LANE_PARAMETER_DEFAULTS.items()}
+            output_limits = np.asarray(config.get('output_limits', (0.0, 1.0)), dtype=np.float64)
+            if output_limits.ndim == 1:
+                output_limits = output_limits.reshape(1, 2)
+            if output_limits.ndim != 2 or output_limits.shape[1] != 2:
+                raise ValueError(f"PIDBank output_limits must be a (min, max) pair or an (N, 2) array, got shape {output_limits.shape}.")
+
+            lane_counts = {len(v) for v in raw_values.values()} | {output_limits.shape[0]}
+            self.n_lanes = int(n_lanes) if n_lanes is not None else max(lane_counts)
+            if self.n_lanes <= 0:
+                raise ValueError(f"PIDBank requires at least one lane, got {self.n_lanes}.")
+
+            self.kp = self._broadcast('kp', raw_values['kp'])
+            self.ki = self._broadcast('ki', raw_values['ki'])
+            self.kd = self._broadcast('kd', raw_values['kd'])
+            self.setpoint = self._broadcast('setpoint', raw_values['setpoint'])
+            self.deriv_filter_tau = self._broadcast('deriv_filter_tau', raw_values['deriv_filter_tau'])
+            self.output_min = self._broadcast('output_limits[min]', output_limits[:, 0])
+            self.output_max = self._broadcast('output_limits[max]', output_limits[:, 1])
+
+            if np.any(self.output_min >= self.output_max):
+                bad_lanes = np.flatnonzero(self.output_min >= self.output_max).tolist()
+                raise ValueError(f"PIDBank output_min must be less than output_max on every lane (violations on lanes {bad_lanes}).")
+
+            # Same rule as PIDController: filter only when tau is meaningfully larger than dt
+            # (BaseController has already rejected dt <= 0)
+            self.use_filter = self.deriv_filter_tau > (self.dt * 1.5)
+            # Unfiltered lanes get a dummy tau so the masked filter update never divides by zero
+            self._filter_tau = np.where(self.use_filter, self.deriv_filter_tau, 1.0)
+
+            # --- Internal PID State Arrays ---
+            self._integral = np.zeros(self.n_lanes)
+            self._previous_error = np.zeros(self.n_lanes)
+            self._derivative_state = np.zeros(self.n_lanes)
+
+            logger.info(f"PID Bank ready with {self.n_lanes} lanes ({int(self.use_filter.sum())} with derivative filtering).")
+
+        except (ValueError, TypeError) as e:
+            logger.error(f"Failed to initialize PIDBank due to invalid config: {e}", exc_info=True)
+            raise
+
+    @classmethod
+    def from_parameter_sets(cls, parameter_sets: List[Dict[str, Any]], base_config: Dict[str, Any], dt: float) -> 'PIDBank':
+        """
+        Builds a bank with one lane per parameter set, each merged over `base_config`
+        (e.g. the default 'PID' block of CORE_PARAMETERS['controllers']).
+        """
+        if not parameter_sets:
+            raise ValueError("PIDBank.from_parameter_sets requires at least one parameter set.")
+        merged = [{**base_config, **params} for params in parameter_sets]
+        bank_config: Dict[str, Any] = {key: [float(m.get(key, default)) for m in merged]
+                                       for key, default in cls.LANE_PARAMETER_DEFAULTS.items()}
+        bank_config['output_limits'] = [tuple(m.get('output_limits', (0.0, 1.0))) for m in merged]
+        return cls(config=bank_config, dt=dt, n_lanes=len(merged))
+
+    def _broadcast(self, name: str, values: np.ndarray) -> np.ndarray:
+        """Broadcasts a scalar or per-lane parameter to shape (n_lanes,)."""
+        if values.size == 1:
+            return np.full(self.n_lanes, float(values[0]))
+        if values.size != self.n_lanes:
+            raise ValueError(f"PIDBank parameter '{name}' has {values.size} entries but the bank has {self.n_lanes} lanes.")
+        return values.astype(np.float64, copy=True)
+
+    def _measurements(self, observation: np.ndarray) -> np.ndarray:
+        """Extracts one measurement per lane from a shared (6,) or per-lane (N, 6) observation."""
+        obs = np.asarray(observation)
+        if obs.ndim == 1:
+            if obs.shape[0] <= self.MEASUREMENT_OBS_INDEX:
+                logger.error(f"Observation vector length {obs.shape[0]} is too short. Using setpoint as measurement.")
+                return self.setpoint.copy()
+            return np.full(self.n_lanes, obs[self.MEASUREMENT_OBS_INDEX])
+        if obs.ndim == 2 and obs.shape[0] == self.n_lanes:
+            if obs.shape[1] <= self.MEASUREMENT_OBS_INDEX:
+                logger.error(f"Observation matrix width {obs.shape[1]} is too short. Using setpoint as measurement.")
+                return self.setpoint.copy()
+            return obs[:, self.MEASUREMENT_OBS_INDEX]
+        raise ValueError(f"PIDBank expects an observation of shape (6,) or ({self.n_lanes}, 6), got {obs.shape}.")
+
+    def step(self, observation: np.ndarray) -> np.ndarray:
+        """
+        Calculates the PID control output for every lane.
+
+        Returns:
+            np.ndarray: Array of shape (n_lanes,) with one valve command per lane.
+                        Unlike the scalar controllers this returns an array, so a
+                        bank must be driven by a lane-aware caller.
+        """
+        # Same guard as PIDController: without a time step every lane outputs the middle of its range
+        if self.dt <= 0:
+            return 0.5 * (self.output_max + self.output_min)
+
+        measurement = self._measurements(observation)
+
+        error = self.setpoint - measurement
+        p_term = self.kp * error
+        raw_derivative = (error - self._previous_error) / self.dt
+
+        # Filtered lanes integrate the first-order filter; the others use the raw derivative
+        filtered_state = self._derivative_state + ((raw_derivative - self._derivative_state) / self._filter_tau) * self.dt
+        self._derivative_state = np.where(self.use_filter, filtered_state, self._derivative_state)
+        effective_derivative = np.where(self.use_filter, self._derivative_state, raw_derivative)
+
+        d_term = self.kd * effective_derivative
+        output_before_i = p_term + d_term
+
+        is_at_max_and_saturating = (output_before_i >= self.output_max) & (error > 0)
+        is_at_min_and_saturating = (output_before_i <= self.output_min) & (error < 0)
+        integrate = ~(is_at_max_and_saturating | is_at_min_and_saturating)
+        self._integral = np.where(integrate, self._integral + error * self.dt, self._integral)
+
+        i_term = self.ki * self._integral
+        output_unclamped = p_term + i_term + d_term
+        output_final = np.clip(output_unclamped, self.output_min, self.output_max)
+        self._previous_error = error
+
+        return output_final
+
+    def reset(self):
+        """Resets the internal states of every lane to zero."""
+        super().reset()
+        self._integral = np.zeros(self.n_lanes)
+        self._previous_error = np.zeros(self.n_lanes)
+        self._derivative_state = np.zeros(self.n_lanes)
+        logger.info(f"PID Bank internal states reset ({self.n_lanes} lanes).")
+
+    def update_parameters(self, new_params: Dict[str, Any]):
+        """Updates lane gains (kp, ki, kd) live. Scalars apply to all lanes."""
+        super().update_parameters(new_params)
+        for key in ('kp', 'ki', 'kd'):
+            if key in new_params:
+                setattr(self, key, self._broadcast(key, np.atleast_1d(np.asarray(new_params[key], dtype=np.float64))))
+        logger.info(f"PID Bank Parameters Updated Live for {self.n_lanes} lanes.")
+
+    def get_parameters(self) -> Dict[str, Any]:
+        """Returns the current per-lane PID gains and setpoints as lists."""
+        super().get_parameters()
+        return {'kp': self.kp.tolist(), 'ki': self.ki.tolist(), 'kd': self.kd.tolist(), 'setpoint': self.setpoint.tolist()}
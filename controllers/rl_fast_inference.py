@@ -0,0 +1,273 @@
+# controllers/rl_fast_inference.py
+
+"""
+================================================================================
+          Low-Latency RL Policy Inference (NumPy Actor Export)
+================================================================================
+`RLAgentWrapper.step` routes every single observation through SB3's `predict`,
+which pays for preprocessing, tensor conversion and torch dispatch on each
+call. This module extracts the deterministic mean network of a trained SAC
+actor (the `net_arch` MLP, the `mu` head and the tanh squashing) into plain
+NumPy arrays, so inference becomes a handful of small matrix products.
+
+The exported `NumpyMLPPolicy` accepts a single (6,) observation or a batch of
+shape (N, 6), and `verify_policy_parity` checks it against `model.predict`
+before it is trusted in validation runs.
+"""
+
+import os
+import logging
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+from .base_controller import BaseController
+
+logger = logging.getLogger(__name__)
+
+# Activation functions supported by the exporter, keyed by torch module class name
+_ACTIVATIONS = {
+    'ReLU': lambda x: np.maximum(x, 0.0),
+    'Tanh': np.tanh,
+    'ELU': lambda x: np.where(x > 0.0, x, np.expm1(np.minimum(x, 0.0))),
+    'LeakyReLU': lambda x: np.where(x > 0.0, x, 0.01 * x),
+    'Identity': lambda x: x,
+}
+
+
+class NumpyMLPPolicy:
+    """
+    A deterministic MLP policy evaluated with plain NumPy.
+
+    The network is `hidden layers (activation) -> output layer`, followed by
+    an optional clip of the pre-squash mean and one of two output transforms:
+      - 'tanh_scale': tanh squashing, then rescaling to [action_low, action_high]
+                      (the SB3 SAC convention).
+      - 'clip':       the raw output is clipped to [action_low, action_high].
+    """
+
+    def __init__(self,
+                 weights: List[np.ndarray],
+                 biases: List[np.ndarray],
+                 activation: str = 'ReLU',
+                 action_low: Optional[np.ndarray] = None,
+                 action_high: Optional[np.ndarray] = None,
+                 output_transform: str = 'tanh_scale',
+                 mean_clip: Optional[float] = None,
+                 dtype: Any = np.float32):
+        if len(weights) != len(biases) or not weights:
+            raise ValueError("NumpyMLPPolicy needs one bias vector per weight matrix and at least one layer.")
+        if activation not in _ACTIVATIONS:
+            raise ValueError(f"Unsupported activation '{activation}'. Supported: {sorted(_ACTIVATIONS)}")
+        if output_transform not in ('tanh_scale', 'clip'):
+            raise ValueError(f"Unsupported output transform '{output_transform}'.")
+
+        self.dtype = np.dtype(dtype)
+        # Weights are stored transposed (in_dim, out_dim) so a batch is a plain `x @ W`
+        self.weights = [np.ascontiguousarray(np.asarray(w, dtype=self.dtype).T) for w in weights]
+        self.biases = [np.asarray(b, dtype=self.dtype).reshape(-1) for b in biases]
+        self.activation = activation
+        self._activation_fn = _ACTIVATIONS[activation]
+        self.output_transform = output_transform
+        self.mean_clip = mean_clip
+
+        action_dim = self.biases[-1].shape[0]
+        self.action_low = np.asarray(action_low if action_low is not None else np.zeros(action_dim), dtype=self.dtype)
+        self.action_high = np.asarray(action_high if action_high is not None else np.ones(action_dim), dtype=self.dtype)
+        self.obs_dim = self.weights[0].shape[0]
+        self.action_dim = action_dim
+
+    def predict(self, observation: np.ndarray) -> np.ndarray:
+        """
+        Computes deterministic actions.
+
+        Args:
+            observation (np.ndarray): Shape (obs_dim,) or (N, obs_dim).
+
+        Returns:
+            np.ndarray: Shape (action_dim,) or (N, action_dim), matching the input rank.
+        """
+        x = np.asarray(observation, dtype=self.dtype)
+        single = x.ndim == 1
+        if single:
+            x = x.reshape(1, -1)
+        if x.shape[1] != self.obs_dim:
+            raise ValueError(f"Expected observations with {self.obs_dim} features, got shape {np.shape(observation)}.")
+
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            x = self._activation_fn(x @ w + b)
+        x = x @ self.weights[-1] + self.biases[-1]
+
+        if self.mean_clip is not None:
+            x = np.clip(x, -self.mean_clip, self.mean_clip)
+        if self.output_transform == 'tanh_scale':
+            x = self.action_low + (0.5 * (np.tanh(x) + 1.0) * (self.action_high - self.action_low))
+        else:
+            x = np.clip(x, self.action_low, self.action_high)
+
+        return x[0] if single else x
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns a serializable description (weights in torch (out, in) layout)."""
+        return {
+            'weights': [w.T for w in self.weights], 'biases': list(self.biases),
+            'activation': self.activation, 'output_transform': self.output_transform,
+            'mean_clip': self.mean_clip, 'action_low': self.action_low, 'action_high': self.action_high,
+        }
+
+    def save(self, path: str):
+        """Saves the policy to a compressed .npz file."""
+        spec = self.to_dict()
+        arrays = {f'w{i}': w for i, w in enumerate(spec['weights'])}
+        arrays.update({f'b{i}': b for i, b in enumerate(spec['biases'])})
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(
+            path, policy_type='mlp', n_layers=len(spec['weights']), activation=spec['activation'],
+            output_transform=spec['output_transform'],
+            mean_clip=np.nan if spec['mean_clip'] is None else spec['mean_clip'],
+            action_low=spec['action_low'], action_high=spec['action_high'], **arrays
+        )
+        logger.info(f"NumPy policy saved to: {path}")
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyMLPPolicy':
+        """Loads a policy previously written by `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            n_layers = int(data['n_layers'])
+            mean_clip = float(data['mean_clip'])
+            return cls(
+                weights=[data[f'w{i}'] for i in range(n_layers)],
+                biases=[data[f'b{i}'] for i in range(n_layers)],
+                activation=str(data['activation']),
+                action_low=data['action_low'], action_high=data['action_high'],
+                output_transform=str(data['output_transform']),
+                mean_clip=None if np.isnan(mean_clip) else mean_clip,
+            )
+
+
+def export_sac_actor(model: Any) -> NumpyMLPPolicy:
+    """
+    Extracts the deterministic mean network of a Stable-Baselines3 SAC actor.
+
+    Supports the default `FlattenExtractor`, any `net_arch`, the activations in
+    `_ACTIVATIONS`, and gSDE actors whose mean is wrapped in a Hardtanh clip.
+
+    Raises:
+        ValueError: If the actor layout is not supported.
+    """
+    from torch import nn
+
+    actor = getattr(getattr(model, 'policy', None), 'actor', None)
+    if actor is None:
+        raise ValueError(f"Model of type {model.__class__.__name__} has no SAC-style actor to export.")
+    if actor.features_extractor.__class__.__name__ != 'FlattenExtractor':
+        raise ValueError(f"Unsupported features extractor '{actor.features_extractor.__class__.__name__}'.")
+
+    weights, biases, activations = [], [], set()
+    for module in actor.latent_pi:
+        if isinstance(module, nn.Linear):
+            weights.append(module.weight.detach().cpu().numpy())
+            biases.append(module.bias.detach().cpu().numpy())
+        elif module.__class__.__name__ in _ACTIVATIONS:
+            activations.add(module.__class__.__name__)
+        else:
+            raise ValueError(f"Unsupported layer '{module.__class__.__name__}' in actor.latent_pi.")
+    if len(activations) > 1:
+        raise ValueError(f"Mixed activations are not supported: {sorted(activations)}")
+
+    mu, mean_clip = actor.mu, None
+    if isinstance(mu, nn.Sequential):
+        linear_layers = [m for m in mu if isinstance(m, nn.Linear)]
+        clips = [m for m in mu if isinstance(m, nn.Hardtanh)]
+        if len(linear_layers) != 1 or len(clips) + 1 != len(mu):
+            raise ValueError("Unsupported structure of the actor's mean head.")
+        if clips:
+            mean_clip = float(clips[0].max_val)
+        mu = linear_layers[0]
+    weights.append(mu.weight.detach().cpu().numpy())
+    biases.append(mu.bias.detach().cpu().numpy())
+
+    action_space = model.policy.action_space
+    policy = NumpyMLPPolicy(
+        weights=weights, biases=biases,
+        activation=activations.pop() if activations else 'Identity',
+        action_low=action_space.low, action_high=action_space.high,
+        output_transform='tanh_scale', mean_clip=mean_clip,
+    )
+    logger.info(f"Exported SAC actor to NumPy: layers={[w.shape[1] for w in policy.weights]}, activation={policy.activation}")
+    return policy
+
+
+def verify_policy_parity(model: Any,
+                         policy: NumpyMLPPolicy,
+                         observations: Optional[np.ndarray] = None,
+                         n_samples: int = 512,
+                         atol: float = 1e-4,
+                         seed: int = 0) -> Dict[str, Any]:
+    """
+    Compares `policy.predict` against `model.predict(..., deterministic=True)`.
+
+    Args:
+        observations (np.ndarray, optional): (N, obs_dim) test inputs. Defaults to
+            `n_samples` uniform draws from the model's observation space.
+        atol (float): Maximum tolerated absolute action difference.
+
+    Returns:
+        Dict[str, Any]: {'passed', 'max_abs_error', 'n_samples'}.
+    """
+    if observations is None:
+        obs_space = model.observation_space
+        rng = np.random.default_rng(seed)
+        observations = rng.uniform(obs_space.low, obs_space.high, size=(n_samples, *obs_space.shape)).astype(np.float32)
+
+    reference, _ = model.predict(observations, deterministic=True)
+    fast = policy.predict(observations)
+    max_abs_error = float(np.max(np.abs(np.asarray(reference, dtype=np.float64) - fast))) if len(observations) else 0.0
+    result = {'passed': max_abs_error <= atol, 'max_abs_error': max_abs_error, 'n_samples': int(len(observations))}
+    log_fn = logger.info if result['passed'] else logger.warning
+    log_fn(f"Policy parity check: max |error| = {max_abs_error:.3e} over {result['n_samples']} samples (atol={atol}).")
+    return result
+
+
+class FastRLAgentWrapper(BaseController):
+    """
+    A BaseController that runs an exported NumPy policy instead of SB3 `predict`.
+    Supports single-step control via `step` and batched inference via `step_batch`.
+    Any policy object with a NumPy `predict` (e.g. a distilled student) can be wrapped.
+    """
+    def __init__(self, policy: Any, config: Dict[str, Any], dt: float, source_model_class: str = 'SAC'):
+        """
+        Args:
+            policy (Any): The deterministic policy, e.g. a NumpyMLPPolicy.
+            config (dict): The full 'CORE_PARAMETERS' dictionary.
+            dt (float): Simulation time step.
+            source_model_class (str): Name of the algorithm the policy came from.
+        """
+        super().__init__(config, dt)
+        self.policy = policy
+        self.source_model_class = source_model_class
+        logger.info(f"FastRLAgentWrapper initialized with exported {source_model_class} policy.")
+
+    def step(self, observation: np.ndarray) -> float:
+        """Predicts a deterministic action for a single normalized observation."""
+        return float(self.policy.predict(observation)[0])
+
+    def step_batch(self, observations: np.ndarray) -> np.ndarray:
+        """Predicts deterministic actions for an (N, 6) batch, returning shape (N,)."""
+        return self.policy.predict(observations)[:, 0]
+
+    def reset(self):
+        """The exported policy is stateless; this only logs for traceability."""
+        super().reset()
+
+    def update_parameters(self, new_params: Dict[str, Any]):
+        """Live updates are not applicable to pre-trained RL agents."""
+        super().update_parameters(new_params)
+        logger.warning("update_parameters called on FastRLAgentWrapper, but this is not supported.")
+
+    def get_parameters(self) -> Dict[str, Any]:
+        """Returns information about the exported policy."""
+        super().get_parameters()
+        params = {"model_class": self.source_model_class, "policy": self.policy.__class__.__name__}
+        if isinstance(self.policy, NumpyMLPPolicy):
+            params.update({"layers": [w.shape[1] for w in self.policy.weights], "activation": self.policy.activation})
+        return params
@@ -11,8 +11,11 @@ The __all__ variable explicitly defines the public API of this package.
 """
 
 from .pwr_gym_env import PWRGymEnvUnified
+from .fault_injection import FaultScheduler, random_fault_campaign
 
 # Explicitly declare the public API of the 'environment' package
 __all__ = [
-    'PWRGymEnvUnified'
+    'PWRGymEnvUnified',
+    'FaultScheduler',
+    'random_fault_campaign'
 ]
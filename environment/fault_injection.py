@@ -0,0 +1,258 @@
+# environment/fault_injection.py
+
+"""
+================================================================================
+          Event-Queue Fault Injection for Timed Disturbances
+================================================================================
+A scenario's 'fault_events' schedule equipment faults at given times:
+
+    fault_events:
+      - {type: valve_stick, start_time: 30.0, duration: 10.0}
+      - {type: sensor_dropout, start_time: 50.0, duration: 2.0, channels: [grid_frequency_hz]}
+      - {type: turbine_trip, start_time: 80.0, duration: 20.0, fraction: 0.3}
+      - {type: grid_island, start_time: 120.0, duration: 15.0, load_fraction: 0.9, inertia_fraction: 0.3}
+      - {type: controller_restart, start_time: 200.0, duration: 0.5}
+
+Fault types and their parameters (defaults in FAULT_TYPES):
+  valve_stick:        the governor valve freezes at `position` (its position
+                      at the start by default), whatever the command.
+  sensor_dropout:     the controller's observation of `channels` (info keys
+                      of the observation) freezes at its last value ('hold')
+                      or reads 0 ('zero'); the plant and the metrics see the
+                      true values.
+  turbine_trip:       a partial trip: `fraction` of the turbine output is
+                      lost at once and the steam-to-power efficiency is
+                      reduced by the same fraction until the end.
+  grid_island:        the plant islands onto `load_fraction` of its load,
+                      with `inertia_fraction` of the grid inertia, and
+                      reconnects at the end.
+  controller_restart: the controller is offline (the actuator holds its last
+                      command) for the duration, then restarts from reset;
+                      the executor resets it when the step's info has
+                      'controller_restart' set.
+Without 'duration' a fault lasts to the end of the run (a restart is
+immediate). Overlapping faults combine: fractions multiply, channels add up.
+A fault with 'ongoing: true' was already in effect before the run (e.g. a
+run started from a get_state snapshot, see failure_minimization.py): its
+sustained effect is applied, but not its one-shot start effect (the trip's
+loss of output), which the plant state already reflects.
+
+The environment builds a FaultScheduler per episode. Starts and ends of all
+faults are kept in one heap, ordered by the step at which they happen; every
+step only compares the head of the heap with the step number, and the fault
+effects are recomputed at transitions only. The per-step cost does not
+depend on the number of scheduled faults, so randomized campaigns of
+thousands of faults (see `random_fault_campaign`) run as fast as a single one.
+"""
+
+import heapq
+import logging
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Observation channels, in the order of the observation vector (info keys of PWRGymEnvUnified)
+OBSERVATION_CHANNELS = ['reactor_power_mw', 'T_fuel', 'v_pos_actual', 'grid_frequency_hz', 'speed_rpm', 'power_error']
+
+# Fault type -> default parameters
+FAULT_TYPES = {
+    'valve_stick': {'position': None},
+    'sensor_dropout': {'channels': ['grid_frequency_hz'], 'mode': 'hold'},
+    'turbine_trip': {'fraction': 0.25},
+    'grid_island': {'load_fraction': 0.9, 'inertia_fraction': 0.3},
+    'controller_restart': {},
+}
+
+# Ranges of the parameters drawn by random_fault_campaign: (low, high) for numbers, a list of choices otherwise
+CAMPAIGN_RANGES = {
+    'duration': (0.5, 20.0),
+    'valve_stick': {},
+    'sensor_dropout': {'channels': [[channel] for channel in OBSERVATION_CHANNELS], 'mode': ['hold', 'zero']},
+    'turbine_trip': {'fraction': (0.05, 0.4)},
+    'grid_island': {'load_fraction': (0.8, 1.0), 'inertia_fraction': (0.2, 0.6)},
+    'controller_restart': {},
+}
+
+
+def validate_fault_events(events: List[Dict[str, Any]]):
+    """Raises ValueError if `events` is not a list of valid fault events."""
+    if not isinstance(events, list):
+        raise ValueError(f"'fault_events' must be a list, got {type(events).__name__}.")
+    for index, event in enumerate(events):
+        if not isinstance(event, dict) or event.get('type') not in FAULT_TYPES:
+            raise ValueError(f"Fault event {index}: 'type' must be among {sorted(FAULT_TYPES)}.")
+        unknown = set(event) - {'type', 'start_time', 'duration', 'ongoing'} - set(FAULT_TYPES[event['type']])
+        if unknown:
+            raise ValueError(f"Fault event {index} ({event['type']}): unknown parameters {sorted(unknown)}.")
+        if 'start_time' not in event or float(event['start_time']) < 0.0:
+            raise ValueError(f"Fault event {index} ({event['type']}): a non-negative 'start_time' is required.")
+        if event.get('duration') is not None and float(event['duration']) < 0.0:
+            raise ValueError(f"Fault event {index} ({event['type']}): 'duration' must be non-negative.")
+        if event['type'] == 'sensor_dropout':
+            channels = event.get('channels', FAULT_TYPES['sensor_dropout']['channels'])
+            if not channels or set(channels) - set(OBSERVATION_CHANNELS):
+                raise ValueError(f"Fault event {index}: sensor_dropout 'channels' must be among {OBSERVATION_CHANNELS}.")
+            if event.get('mode', 'hold') not in ('hold', 'zero'):
+                raise ValueError(f"Fault event {index}: sensor_dropout 'mode' must be 'hold' or 'zero'.")
+
+
+def random_fault_campaign(duration_s: float,
+                          n_events: int,
+                          seed: Optional[int] = None,
+                          fault_types: Optional[List[str]] = None,
+                          ranges: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Draws `n_events` faults with uniform start times over the run, durations and parameters
+    within CAMPAIGN_RANGES (updated by `ranges`), for a scenario's 'fault_events'. Restarts
+    are immediate. Events are plain data, sorted by start time.
+    """
+    rng = np.random.default_rng(seed)
+    ranges = {**CAMPAIGN_RANGES, **(ranges or {})}
+    fault_types = list(fault_types or FAULT_TYPES)
+    events = []
+    for start_time in np.sort(rng.uniform(0.0, duration_s, n_events)):
+        kind = fault_types[int(rng.integers(len(fault_types)))]
+        event: Dict[str, Any] = {'type': kind, 'start_time': round(float(start_time), 3)}
+        if kind != 'controller_restart':
+            event['duration'] = round(float(rng.uniform(*ranges['duration'])), 3)
+        for name, choices in ranges.get(kind, {}).items():
+            if isinstance(choices, tuple):
+                event[name] = round(float(rng.uniform(*choices)), 4)
+            else:
+                event[name] = choices[int(rng.integers(len(choices)))]
+        events.append(event)
+    return events
+
+
+class _ScaledLoad:
+    """The load profile of an islanded grid: the connected profile scaled by the islanded fraction."""
+
+    def __init__(self, load_func, scale: float):
+        self.load_func = load_func
+        self.scale = scale
+
+    def __call__(self, time_s: float, step: int) -> float:
+        return self.load_func(time_s, step) * self.scale
+
+
+class FaultScheduler:
+    """
+    The fault events of one episode, as a heap of (step, sequence, is_start, event index)
+    transitions. `attach` binds it to the reset environment; the environment then calls
+    `advance` at the start of every step, `actuate` on the valve command and `observe` on the
+    observation passed to the controller.
+    """
+
+    def __init__(self, events: List[Dict[str, Any]], dt: float):
+        validate_fault_events(events)
+        self.events = [{**FAULT_TYPES[event['type']], **event} for event in events]
+        self._queue: List[Tuple[int, int, bool, int]] = []
+        for index, event in enumerate(self.events):
+            # An event at time t happens in the first step ending at or after t
+            start = max(int(math.ceil(float(event['start_time']) / dt - 1e-9)), 1)
+            self._queue.append((start, 2 * index, True, index))
+            if event.get('duration') is not None:
+                end = max(int(math.ceil((float(event['start_time']) + float(event['duration'])) / dt - 1e-9)), start)
+                self._queue.append((end, 2 * index + 1, False, index))
+        heapq.heapify(self._queue)
+
+        self.active: Dict[int, Dict[str, Any]] = {}
+        self.restart = False
+        self.valve_stuck_at: Optional[float] = None
+        self.controller_offline = False
+        self.dropped: Dict[int, float] = {}
+        self._last_command: Optional[float] = None
+        self._last_observed: Optional[np.ndarray] = None
+        self._env = None
+
+    def attach(self, env, raw_obs: np.ndarray):
+        """Binds the scheduler to a reset environment and records the unfaulted plant parameters."""
+        self._env = env
+        self._eta_transfer = env.turbine.eta_transfer
+        self._grid_H = env.grid.H
+        self._load_func = env.grid.load_profile_func
+        self._last_observed = np.array(raw_obs, copy=True)
+
+    def advance(self, step: int):
+        """Starts and ends the faults due at `step`; the head of the queue is all that is checked."""
+        self.restart = False
+        if not self._queue or self._queue[0][0] > step:
+            return
+        while self._queue and self._queue[0][0] <= step:
+            _, _, is_start, index = heapq.heappop(self._queue)
+            event = self.events[index]
+            if is_start:
+                self._start(index, event)
+            else:
+                self.active.pop(index, None)
+                if event['type'] == 'controller_restart':
+                    self.restart = True
+            logger.debug(f"Fault {event['type']} {'started' if is_start else 'ended'} at step {step}.")
+        self._apply()
+
+    def _start(self, index: int, event: Dict[str, Any]):
+        env = self._env
+        state = {'event': event}
+        kind = event['type']
+        if kind == 'valve_stick':
+            state['position'] = float(env.turbine.valve_position if event['position'] is None else event['position'])
+        elif kind == 'sensor_dropout':
+            columns = [OBSERVATION_CHANNELS.index(channel) for channel in event['channels']]
+            state['values'] = {column: 0.0 if event['mode'] == 'zero' else float(self._last_observed[column]) for column in columns}
+        elif kind == 'turbine_trip' and not event.get('ongoing'):
+            env.turbine.mechanical_power *= 1.0 - float(event['fraction'])
+        elif kind == 'controller_restart' and event.get('duration') is None:
+            self.restart = True
+            return
+        self.active[index] = state
+
+    def _apply(self):
+        """Recomputes the combined effect of the active faults."""
+        env = self._env
+        eta_scale, load_scale, inertia_scale = 1.0, 1.0, 1.0
+        self.valve_stuck_at = None
+        self.controller_offline = False
+        self.dropped = {}
+        for state in self.active.values():  # in start order
+            event = state['event']
+            kind = event['type']
+            if kind == 'valve_stick':
+                self.valve_stuck_at = state['position']
+            elif kind == 'sensor_dropout':
+                self.dropped.update(state['values'])
+            elif kind == 'turbine_trip':
+                eta_scale *= 1.0 - float(event['fraction'])
+            elif kind == 'grid_island':
+                load_scale *= float(event['load_fraction'])
+                inertia_scale *= float(event['inertia_fraction'])
+            elif kind == 'controller_restart':
+                self.controller_offline = True
+        env.turbine.eta_transfer = self._eta_transfer * eta_scale
+        env.grid.H = self._grid_H * inertia_scale
+        env.grid.load_profile_func = self._load_func if load_scale == 1.0 else _ScaledLoad(self._load_func, load_scale)
+
+    def actuate(self, valve_command: float) -> float:
+        """Returns the valve command that reaches the actuator, holding a stuck valve in place."""
+        if self.controller_offline:
+            valve_command = float(self._env.turbine.valve_position) if self._last_command is None else self._last_command
+        self._last_command = valve_command
+        if self.valve_stuck_at is not None:
+            self._env.turbine.valve_position = self.valve_stuck_at
+            return self.valve_stuck_at
+        return valve_command
+
+    def observe(self, raw_obs: np.ndarray) -> np.ndarray:
+        """Returns the observation the controller receives, with the dropped-out channels replaced."""
+        if self.dropped:
+            raw_obs = raw_obs.copy()
+            for column, value in self.dropped.items():
+                raw_obs[column] = value
+        self._last_observed = raw_obs
+        return raw_obs
+
+    def info(self) -> Dict[str, Any]:
+        """Fault state for the step's info."""
+        return {'active_faults': len(self.active), 'controller_restart': self.restart}
@@ -28,7 +28,6 @@ from gymnasium import spaces
 import numpy as np
 import logging
 from typing import Dict, Any, Optional, List
-import random
 import copy
 
 # Core simulation model imports
@@ -38,6 +37,7 @@ from models.grid_model import GridModel
 
 # Import the internal reactor controller
 from .reactor_controller import ReactorController
+from .fault_injection import FaultScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +49,15 @@ class PWRGymEnvUnified(gym.Env):
     """
     metadata = {'render_modes': ['human']}
 
+    # Dynamic state of the plant, captured by get_state() and restored by set_state()
+    STATE_VARIABLES = {
+        'reactor': ['power_level', 'T_fuel', 'T_moderator', 'precursor_concentrations'],
+        'turbine': ['mechanical_power', 'valve_position', 'speed_rpm'],
+        'grid': ['frequency', 'omega_pu', 'delta', 'current_demand'],
+        'reactor_controller': ['_integral', 'setpoint'],
+        'env': ['last_valve_pos', 'last_action', 'last_freq_error'],
+    }
+
     def __init__(self,
                  reactor_params: Dict[str, Any],
                  turbine_params: Dict[str, Any],
@@ -200,6 +209,9 @@ class PWRGymEnvUnified(gym.Env):
         """Advances the simulation by one time step."""
         self.current_step += 1
         valve_command = float(action[0])
+        if self.faults is not None:
+            self.faults.advance(self.current_step)
+            valve_command = self.faults.actuate(valve_command)
 
         rod_reactivity = self.reactor_controller.step(current_moderator_temp=self.reactor.T_moderator)
         thermal_power = self.reactor.step(self.dt, rod_reactivity)
@@ -212,6 +224,10 @@ class PWRGymEnvUnified(gym.Env):
 
         terminated = self._check_termination_conditions(raw_obs)
         truncated = self.current_step >= self.max_steps
+        if self.faults is not None:
+            # Sensor faults only affect what the controller sees
+            info.update(self.faults.info())
+            raw_obs = self.faults.observe(raw_obs)
         normalized_obs = self._normalize_obs(raw_obs)
         reward = self._calculate_reward(info, terminated) if self.is_training_env else 0.0
         
@@ -222,13 +238,14 @@ class PWRGymEnvUnified(gym.Env):
         super().reset(seed=seed)
         self._initialize_internal_state()
 
-        scenario_name = random.choice(self.active_scenario_names)
+        # All randomness comes from the Gymnasium-seeded self.np_random, so a seeded reset is reproducible
+        scenario_name = self.active_scenario_names[int(self.np_random.integers(len(self.active_scenario_names)))]
         self.current_scenario_config = self.all_scenarios.get(scenario_name, {})
 
         temp_grid_params = copy.deepcopy(self.grid_base_params)
         if self.current_scenario_config.get('is_domain_randomization_drill', False):
-            temp_grid_params['H'] *= np.random.uniform(0.85, 1.15)
-            temp_grid_params['D'] *= np.random.uniform(0.85, 1.15)
+            temp_grid_params['H'] *= self.np_random.uniform(0.85, 1.15)
+            temp_grid_params['D'] *= self.np_random.uniform(0.85, 1.15)
 
         self.reactor = ReactorModel(self.reactor_base_params)
         self.turbine = TurbineModel(self.turbine_base_params, self.coupling_base_params)
@@ -250,12 +267,45 @@ class PWRGymEnvUnified(gym.Env):
         if 'load_profile_func' in self.current_scenario_config:
             self.grid.set_load_profile(self.current_scenario_config['load_profile_func'])
 
+        # A state snapshot of another run (see get_state) replaces the equilibrium
+        if reset_opts.get('initial_state'):
+            self.set_state(reset_opts['initial_state'])
+
         raw_obs, info = self._get_raw_obs_and_info()
         info['rod_reactivity'] = 0.0
 
+        # Timed faults of the scenario (see fault_injection.py), on the plant as reset
+        self.faults = None
+        if self.current_scenario_config.get('fault_events'):
+            self.faults = FaultScheduler(self.current_scenario_config['fault_events'], self.dt)
+            self.faults.attach(self, raw_obs)
+            info.update(self.faults.info())
+
         logger.debug(f"Environment reset to stable equilibrium for scenario: '{scenario_name}'")
         return self._normalize_obs(raw_obs), info
 
+    def get_state(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns a snapshot of the dynamic plant state as plain data (floats and lists), which
+        can be restored with set_state or given to a scenario as the 'initial_state' reset
+        option. The simulation time and the load profile are not part of it.
+        """
+        state = {}
+        for component, names in self.STATE_VARIABLES.items():
+            owner = self if component == 'env' else getattr(self, component)
+            state[component] = {name: np.asarray(getattr(owner, name), dtype=float).tolist() for name in names}
+        return state
+
+    def set_state(self, state: Dict[str, Dict[str, Any]]):
+        """Restores a get_state snapshot; variables missing from it keep their values."""
+        for component, values in state.items():
+            unknown = set(values) - set(self.STATE_VARIABLES.get(component, []))
+            if unknown:
+                raise KeyError(f"Unknown state variables for '{component}': {sorted(unknown)}")
+            owner = self if component == 'env' else getattr(self, component)
+            for name, value in values.items():
+                setattr(owner, name, np.array(value, dtype=float) if isinstance(value, (list, tuple)) else float(value))
+
     def _check_termination_conditions(self, raw_obs: np.ndarray) -> bool:
         """Checks if any safety limits have been violated."""
         if not np.all(np.isfinite(raw_obs)):
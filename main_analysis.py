@@ -32,6 +32,10 @@ from analysis.scenario_definitions import get_scenarios
 from analysis.scenario_executor import ScenarioExecutor
 from analysis.metrics_engine import MetricsEngine
 from analysis.report_generator import ReportGenerator
+from analysis.visualization_engine import VisualizationEngine
+from analysis.parallel_executor import run_scenario_matrix, decompress_trajectory, open_worker_pool, run_cells
+from analysis.multi_seed import run_multi_seed, replicate_scenario
+from analysis.result_cache import SimulationResultCache, run_cached
 from controllers import load_controller
 
 # Configure logging
@@ -41,12 +45,31 @@ logger = logging.getLogger(__name__)
 def run_full_analysis(
     config_path: str,
     controllers_to_run: List[str],
-    generate_report: bool = True
+    generate_report: bool = True,
+    realtime: Optional[Dict[str, Any]] = None,
+    max_workers: Optional[int] = None,
+    use_cache: Optional[bool] = None,
+    n_seeds: Optional[int] = None,
+    profile_latency: Optional[bool] = None
 ) -> Optional[Dict[str, Dict[str, Dict[str, float]]]]:
     """
     Orchestrates the full comparative analysis workflow. It loads configurations,
     runs all specified controllers against all scenarios, calculates metrics,
-    and optionally generates a final report.
+    and optionally generates a final report. `realtime` overrides the
+    CORE_PARAMETERS['simulation']['realtime'] pacing settings. With `max_workers`
+    (default CORE_PARAMETERS['simulation']['max_workers']) above 1, the scenario x
+    controller cells run in a process pool with results identical to the serial loop.
+    Runs that were simulated before with identical controller, scenario, configuration
+    and code are taken from the result cache; `use_cache` overrides
+    CORE_PARAMETERS['simulation']['result_cache']['enabled']. With `generate_report`,
+    the report's plots are rendered from downsampled trajectories in a process pool.
+    `profile_latency` overrides CORE_PARAMETERS['simulation']['profile_latency'] and adds
+    the per-step latency metrics to the results and the report.
+
+    With `n_seeds` above 1, every cell runs up to `n_seeds` seed replicates with common
+    random numbers across controllers (see analysis/multi_seed.py); the returned metrics
+    are the means over seeds and the report adds bootstrap confidence intervals and
+    paired significance tests. Scenarios stop receiving seeds once their ranking is settled.
 
     Returns:
         The nested dictionary of all calculated metrics, or None on critical failure.
@@ -65,47 +88,106 @@ def run_full_analysis(
         return None
 
     # Instantiate the core engines
-    executor = ScenarioExecutor(full_config)
+    realtime_config = {**core_config.get('simulation', {}).get('realtime', {}), **(realtime or {})}
+    executor_kwargs = {'realtime': realtime_config, 'profile_latency': profile_latency}
+    executor = ScenarioExecutor(full_config, **executor_kwargs)
     metrics_engine = MetricsEngine(core_config)
+    viz = VisualizationEngine(core_config.get('reporting', {}), core_config) if generate_report else None
+    # {scenario_name: {controller_name: {'results_df': downsampled trajectory}}} for the plots
+    plot_results: Dict[str, Dict[str, Dict[str, Any]]] = {s_name: {} for s_name in scenarios}
     
     logger.info(f"Controllers to be tested: {controllers_to_run}")
     
-    # Load all specified controllers
-    controllers_to_test = {}
-    dt_sim = core_config.get('simulation', {}).get('dt', 0.02)
-    for name_or_path in controllers_to_run:
-        instance, report_name = load_controller(name_or_path, full_config, dt_sim)
-        if instance:
-            controllers_to_test[report_name] = instance
-        else:
-            logger.error(f"Could not load controller: {name_or_path}")
+    max_workers = max_workers or core_config.get('simulation', {}).get('max_workers', 1)
+    multi_seed_settings = {**core_config.get('simulation', {}).get('multi_seed', {}), 'max_seeds': n_seeds or 1}
+    crs_metrics_config = core_config.get('reporting', {}).get('comparison_criteria', {}).get('crs_metrics', {})
+    seed_comparisons = None
+    if max_workers > 1 and n_seeds and n_seeds > 1:
+        # Multi-seed, parallel: every batch of seed replicates runs on one pool of workers
+        with open_worker_pool(config_path, controllers_to_run, max_workers,
+                              executor_kwargs=executor_kwargs, use_cache=use_cache) as pool:
+            seed_comparisons = run_multi_seed(list(scenarios), controllers_to_run, lambda cells: run_cells(pool, cells),
+                                              multi_seed_settings, crs_metrics_config)
+        all_scenario_metrics = {s_name: comparison.mean_metrics() for s_name, comparison in seed_comparisons.items()}
+        if not any(all_scenario_metrics.values()):
+            logger.critical("No valid controllers could be loaded for analysis. Exiting.")
+            return None
+    elif max_workers > 1:
+        # Parallel execution: each worker process loads the controllers itself
+        all_scenario_metrics, trajectories = run_scenario_matrix(
+            config_path, list(scenarios), controllers_to_run, max_workers,
+            executor_kwargs=executor_kwargs, return_trajectories=generate_report, use_cache=use_cache
+        )
+        if not any(all_scenario_metrics.values()):
+            logger.critical("No valid controllers could be loaded for analysis. Exiting.")
+            return None
+        for (scenario_name, ctrl_name), blob in trajectories.items():
+            results_df = decompress_trajectory(blob)
+            if not results_df.empty:
+                plot_results[scenario_name][ctrl_name] = {'results_df': viz.reduce_for_plotting(results_df)}
+    else:
+        # Load all specified controllers
+        controllers_to_test = {}
+        artifact_paths = {}
+        dt_sim = core_config.get('simulation', {}).get('dt', 0.02)
+        for name_or_path in controllers_to_run:
+            instance, report_name = load_controller(name_or_path, full_config, dt_sim)
+            if instance:
+                controllers_to_test[report_name] = instance
+                artifact_paths[report_name] = name_or_path if os.path.isfile(name_or_path) else None
+            else:
+                logger.error(f"Could not load controller: {name_or_path}")
 
-    if not controllers_to_test:
-        logger.critical("No valid controllers could be loaded for analysis. Exiting.")
-        return None
+        if not controllers_to_test:
+            logger.critical("No valid controllers could be loaded for analysis. Exiting.")
+            return None
 
-    # This will hold all results: {scenario_name: {controller_name: {metric: value}}}
-    all_scenario_metrics: Dict[str, Dict[str, Dict[str, float]]] = {
-        s_name: {} for s_name in scenarios
-    }
-    
-    # Main execution loop
-    for scenario_name, scenario_conf in scenarios.items():
-        logger.info(f"\n===== Starting Scenario: {scenario_name} =====")
-        for ctrl_name, ctrl_instance in controllers_to_test.items():
-            logger.info(f"  --- Running Controller: {ctrl_name} ---")
-            ctrl_instance.reset()
-            # Execute the simulation and get the raw results DataFrame
-            results_df = executor.execute(scenario_name, scenario_conf, ctrl_name, ctrl_instance)
-            # Calculate all metrics from the results
-            metrics = metrics_engine.calculate(results_df, scenario_conf)
-            all_scenario_metrics[scenario_name][ctrl_name] = metrics
+        # This will hold all results: {scenario_name: {controller_name: {metric: value}}}
+        all_scenario_metrics: Dict[str, Dict[str, Dict[str, float]]] = {
+            s_name: {} for s_name in scenarios
+        }
+        result_cache = SimulationResultCache.from_config(core_config, enabled=use_cache)
+
+        def run_seed_batch(cells):
+            # (scenario, controller report name, replicate) cells, one after the other
+            results = []
+            for scenario_name, ctrl_name, replicate in cells:
+                metrics, _ = run_cached(result_cache, executor, metrics_engine, scenario_name,
+                                        replicate_scenario(scenarios[scenario_name], replicate), ctrl_name,
+                                        controllers_to_test[ctrl_name], artifact_path=artifact_paths[ctrl_name], metrics_only=True)
+                results.append((scenario_name, ctrl_name, replicate, metrics))
+            return results
+
+        if n_seeds and n_seeds > 1:
+            # Multi-seed, serial
+            seed_comparisons = run_multi_seed(list(scenarios), list(controllers_to_test), run_seed_batch,
+                                              multi_seed_settings, crs_metrics_config)
+            all_scenario_metrics = {s_name: comparison.mean_metrics() for s_name, comparison in seed_comparisons.items()}
+        else:
+            # Main execution loop (serial)
+            for scenario_name, scenario_conf in scenarios.items():
+                logger.info(f"\n===== Starting Scenario: {scenario_name} =====")
+                for ctrl_name, ctrl_instance in controllers_to_test.items():
+                    logger.info(f"  --- Running Controller: {ctrl_name} ---")
+                    # Execute the simulation and calculate all metrics, unless the result is cached
+                    metrics, results_df = run_cached(result_cache, executor, metrics_engine, scenario_name, scenario_conf,
+                                                     ctrl_name, ctrl_instance, artifact_path=artifact_paths[ctrl_name])
+                    all_scenario_metrics[scenario_name][ctrl_name] = metrics
+                    if viz is not None and not results_df.empty:
+                        # Only the downsampled plot channels are kept in memory
+                        plot_results[scenario_name][ctrl_name] = {'results_df': viz.reduce_for_plotting(results_df)}
+        if result_cache is not None:
+            logger.info(f"Result cache: {result_cache.hits} hits, {result_cache.misses} misses.")
     
     # Generate the final report if requested
     if generate_report:
         logger.info("\nGenerating full report and visualizations...")
+        for scenario_name, metrics_by_controller in all_scenario_metrics.items():
+            for ctrl_name, metrics in metrics_by_controller.items():
+                plot_results[scenario_name].setdefault(ctrl_name, {})['metrics'] = metrics
+        viz.render_all(plot_results)
         reporter = ReportGenerator(core_config.get('reporting', {}), core_config)
-        reporter.generate_report(all_scenario_metrics, scenarios)
+        reporter.generate_report(all_scenario_metrics, scenarios, seed_statistics=seed_comparisons)
     
     logger.info("=" * 60 + f"\n DTAF Comparative Analysis Finished ".center(60) + "\n" + "=" * 60)
     return all_scenario_metrics
@@ -114,6 +196,13 @@ def run_full_analysis(
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run DTAF Comparative Analysis")
     parser.add_argument("--controllers", nargs='*', help="Specify controller names or direct paths to .zip models.")
+    parser.add_argument("--realtime", action='store_true', help="Pace every step to wall-clock time and record deadline misses.")
+    parser.add_argument("--time-scale", type=float, default=None, help="Wall-clock seconds per simulated second in real-time mode.")
+    parser.add_argument("--miss-policy", choices=['hold', 'skip'], default=None, help="Action on a deadline miss in real-time mode.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the scenario x controller matrix (1 = serial).")
+    parser.add_argument("--profile-latency", action='store_true', help="Time every controller and env step and report latency percentiles.")
+    parser.add_argument("--no-cache", action='store_true', help="Simulate every run instead of reusing cached results.")
+    parser.add_argument("--seeds", type=int, default=None, help="Maximum seed replicates per cell for a multi-seed statistical comparison.")
     args = parser.parse_args()
     
     controllers = args.controllers
@@ -150,4 +239,9 @@ if __name__ == "__main__":
             controllers.append(latest_agent_path)
 
     config_file = os.path.join(project_root, 'config', 'parameters.py')
-    run_full_analysis(config_path=config_file, controllers_to_run=controllers)
+    realtime_overrides = {'enabled': True} if args.realtime else {}
+    if args.time_scale is not None: realtime_overrides['time_scale'] = args.time_scale
+    if args.miss_policy is not None: realtime_overrides['miss_policy'] = args.miss_policy
+    run_full_analysis(config_path=config_file, controllers_to_run=controllers, realtime=realtime_overrides, max_workers=args.workers,
+                      use_cache=False if args.no_cache else None, n_seeds=args.seeds,
+                      profile_latency=True if args.profile_latency else None)
@@ -21,6 +21,8 @@ from analysis.scenario_definitions import get_scenarios
 from analysis.scenario_executor import ScenarioExecutor
 from analysis.metrics_engine import MetricsEngine
 from analysis.report_generator import ReportGenerator
+from analysis.parallel_executor import run_scenario_matrix
+from analysis.result_cache import SimulationResultCache, run_cached
 # Use the main, universal controller loader
 from controllers import load_controller
 
@@ -29,10 +31,13 @@ logger = logging.getLogger(__name__)
 def auto_validate_and_report(
     controller_identifier: str, # Universal identifier: can be a name ('PID') or a path ('.../model.zip')
     config_path: str,
-    save_tag: Optional[str] = None
+    save_tag: Optional[str] = None,
+    max_workers: Optional[int] = None
 ) -> Optional[str]:
     """
     Runs a full-suite validation and generates a report for a given controller.
+    With `max_workers` (default CORE_PARAMETERS['simulation']['max_workers']) above 1,
+    the scenarios run in a process pool.
     """
     timestamp = save_tag or time.strftime("%Y%m%d_%H%M%S")
     # Derive a clean name for the report from the identifier
@@ -52,30 +57,38 @@ def auto_validate_and_report(
         executor = ScenarioExecutor(full_config)
         metrics_engine = MetricsEngine(core_config)
         reporter = ReportGenerator(core_config.get('reporting', {}), core_config)
-        
-        dt_sim = core_config.get('simulation', {}).get('dt', 0.02)
-        
-        # --- DEFINITIVE FIX ---
-        # Use the robust, universal loader instead of a specialized creation function.
-        # This function can handle names like 'PID' and direct file paths to RL models.
-        controller_instance, loaded_name = load_controller(
-            controller_name_or_path=controller_identifier,
-            base_config=full_config,
-            dt=dt_sim
-        )
-        
-        if not controller_instance:
-            logger.error(f"Failed to load controller for auto-validation using identifier: {controller_identifier}")
-            return None
 
-        all_scenario_metrics: Dict[str, Dict[str, Dict[str, float]]] = {s_name: {} for s_name in scenarios}
-        for scenario_name, scenario_conf in scenarios.items():
-            logger.info(f"--- Validating '{loaded_name}' on Scenario: {scenario_name} ---")
-            controller_instance.reset()
-            results_df = executor.execute(scenario_name, scenario_conf, loaded_name, controller_instance)
-            # Pass the full core_config to the metrics engine
-            metrics = metrics_engine.calculate(results_df, core_config)
-            all_scenario_metrics[scenario_name][loaded_name] = metrics
+        max_workers = max_workers or core_config.get('simulation', {}).get('max_workers', 1)
+        if max_workers > 1:
+            all_scenario_metrics, _ = run_scenario_matrix(config_path, list(scenarios), [controller_identifier], max_workers)
+            if not any(all_scenario_metrics.values()):
+                logger.error(f"Failed to load controller for auto-validation using identifier: {controller_identifier}")
+                return None
+        else:
+            dt_sim = core_config.get('simulation', {}).get('dt', 0.02)
+
+            # --- DEFINITIVE FIX ---
+            # Use the robust, universal loader instead of a specialized creation function.
+            # This function can handle names like 'PID' and direct file paths to RL models.
+            controller_instance, loaded_name = load_controller(
+                controller_name_or_path=controller_identifier,
+                base_config=full_config,
+                dt=dt_sim
+            )
+
+            if not controller_instance:
+                logger.error(f"Failed to load controller for auto-validation using identifier: {controller_identifier}")
+                return None
+
+            # Identical runs, e.g. repeated later by main_analysis, are answered from the result cache
+            result_cache = SimulationResultCache.from_config(core_config)
+            artifact_path = controller_identifier if os.path.isfile(controller_identifier) else None
+            all_scenario_metrics: Dict[str, Dict[str, Dict[str, float]]] = {s_name: {} for s_name in scenarios}
+            for scenario_name, scenario_conf in scenarios.items():
+                logger.info(f"--- Validating '{loaded_name}' on Scenario: {scenario_name} ---")
+                metrics, _ = run_cached(result_cache, executor, metrics_engine, scenario_name, scenario_conf,
+                                        loaded_name, controller_instance, artifact_path=artifact_path)
+                all_scenario_metrics[scenario_name][loaded_name] = metrics
 
         report_filename = f"validation_report_{report_controller_name}_{timestamp}.md"
         final_report_path = reporter.generate_report(all_scenario_metrics, scenarios, report_filename=report_filename)
@@ -19,7 +19,7 @@ from typing import Dict, Any, Optional
 import datetime
 
 from optimization_suite.auto_validator import auto_validate_and_report
-from optimization_suite.optimization_utils import run_single_sim_and_extract_detailed_metrics
+from optimization_suite.optimization_utils import run_single_sim_and_extract_detailed_metrics, OBJECTIVE_METRICS
 from controllers import FLCController
 
 logger = logging.getLogger(__name__)
@@ -57,7 +57,8 @@ def _flc_objective_function(
                 scenario_name=scenario_name,
                 scenario_config=scenario_config,
                 controller_name=f"FLC_opt_{scenario_name}",
-                controller_instance=controller_instance
+                controller_instance=controller_instance,
+                metrics=OBJECTIVE_METRICS
             )
 
             if not sim_results['completed_successfully'] or not sim_results['metrics']:
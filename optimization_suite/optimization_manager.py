@@ -62,6 +62,15 @@ class OptimizationManager:
                     **kwargs
                 )
             
+            elif controller_type.upper() == 'PID_GS':
+                schedule_tuner_module = importlib.import_module("optimization_suite.pid_schedule_tuner")
+                logger.info("Dynamically loaded PID gain-schedule tuner.")
+                return schedule_tuner_module.tune_pid_schedule_de(
+                    base_config=self.full_config,
+                    config_file_path_for_validation=self.config_path,
+                    **kwargs
+                ) is not None
+
             elif controller_type.upper() == 'FLC':
                 flc_optimizer_module = importlib.import_module("optimization_suite.flc_optimizer")
                 logger.info("Dynamically loaded FLC optimizer.")
@@ -16,38 +16,52 @@ process from crashing.
 import logging
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 
 # Import project-specific modules
 from analysis.scenario_executor import ScenarioExecutor
 from analysis.metrics_engine import MetricsEngine
+from analysis.result_cache import SimulationResultCache, run_cached
 
 logger = logging.getLogger(__name__)
 
+# Metrics read by the PID/FLC objective functions, plus the unsafe time that decides success
+OBJECTIVE_METRICS = ['transient_severity_score', 'thermal_transient_burden', 'control_effort_valve_sq_sum',
+                     'grid_load_following_index', 'total_time_unsafe_s']
+
 def run_single_sim_and_extract_detailed_metrics(
     base_core_config: Dict[str, Any],
     scenario_config: Dict[str, Any],
     controller_name: str,
-    controller_instance: Any
+    controller_instance: Any,
+    scenario_name: Optional[str] = None,
+    metrics: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Runs a single simulation for a given controller and scenario, calculates
     detailed metrics, and returns a structured dictionary with the results.
 
     This function is designed to be robust and will not crash on simulation
-    failure. Instead, it will report the failure status.
+    failure. Instead, it will report the failure status. Candidates that were
+    simulated before are answered from the result cache (see result_cache.py).
+    The metrics are accumulated while the simulation runs (ScenarioExecutor.execute_metrics),
+    so no trajectory is kept in memory.
 
     Args:
         base_core_config (dict): The CORE_PARAMETERS dictionary.
         scenario_config (dict): The configuration for the specific scenario to run.
         controller_name (str): The name of the controller being tested.
         controller_instance (Any): The instantiated controller object.
+        scenario_name (str, optional): Name of the scenario. Defaults to scenario_config['name'].
+        metrics (List[str], optional): Metrics to compute, e.g. OBJECTIVE_METRICS. Defaults to all.
+                                       'total_time_unsafe_s' is always added, as it decides success.
 
     Returns:
         Dict[str, Any]: A dictionary containing the success status, metrics,
-                        raw results DataFrame, and any error messages.
+                        an empty raw results DataFrame (kept for compatibility),
+                        and any error messages.
     """
-    scenario_display_name = scenario_config.get('name', 'UnnamedScenario')
+    scenario_display_name = scenario_name or scenario_config.get('name', 'UnnamedScenario')
     logger.info(f"--- Running Sim for Metrics: {scenario_display_name} / {controller_name} ---")
 
     # Initialize the structured output dictionary
@@ -64,34 +78,32 @@ def run_single_sim_and_extract_detailed_metrics(
         # The executor needs the full config structure containing CORE_PARAMETERS
         full_config_for_executor = {'CORE_PARAMETERS': base_core_config}
         executor = ScenarioExecutor(base_env_config_full=full_config_for_executor)
-        metrics_engine = MetricsEngine(base_core_config.get('metrics_config', {}))
-
-        # Reset the controller's internal state before the run
-        if hasattr(controller_instance, 'reset'):
-            controller_instance.reset()
+        metrics_engine = MetricsEngine(base_core_config)
+        result_cache = SimulationResultCache.from_config(base_core_config)
 
-        # 2. Execute the simulation
-        results_df = executor.execute(
+        # 2. Execute the simulation (resetting the controller), accumulating its metrics step by step
+        metrics_dict, results_df = run_cached(
+            result_cache, executor, metrics_engine,
             scenario_name=scenario_display_name,
-            scenario_config_from_caller=scenario_config,
+            scenario_config=scenario_config,
             controller_name=controller_name,
-            controller_instance=controller_instance
+            controller_instance=controller_instance,
+            metrics_only=True,
+            metrics=None if metrics is None else list(dict.fromkeys([*metrics, 'total_time_unsafe_s']))
         )
         output_results['raw_results_df'] = results_df
 
         # 3. Process the results
-        if results_df.empty or len(results_df) < 2:
+        if not metrics_dict:
             logger.warning(f"Sim for '{scenario_display_name}/{controller_name}' returned empty/insufficient data.")
             output_results['error_message'] = "Simulation returned no valid data."
             # Attempt to get a more specific reason if possible (e.g., from environment attributes if they exist)
             output_results['termination_reason'] = "Insufficient Data / Early Failure"
             return output_results
 
-        logger.debug(f"Sim for '{scenario_display_name}/{controller_name}' successful. Results length: {len(results_df)}")
+        logger.debug(f"Sim for '{scenario_display_name}/{controller_name}' successful.")
         
-        # 4. Calculate metrics from the successful run
-        safety_limits = base_core_config.get('safety_limits', {})
-        metrics_dict = metrics_engine.calculate(results_df, safety_limits, scenario_config)
+        # 4. Keep the metrics of the successful run
         output_results['metrics'] = metrics_dict
 
         # 5. Determine the final status
@@ -18,7 +18,7 @@ from scipy.optimize import differential_evolution
 from typing import Dict, Any, Optional
 
 from optimization_suite.auto_validator import auto_validate_and_report
-from optimization_suite.optimization_utils import run_single_sim_and_extract_detailed_metrics
+from optimization_suite.optimization_utils import run_single_sim_and_extract_detailed_metrics, OBJECTIVE_METRICS
 from controllers import PIDController
 
 logger = logging.getLogger(__name__)
@@ -56,7 +56,8 @@ def _pid_objective_function(
                 scenario_name=scenario_name,
                 scenario_config=scenario_config,
                 controller_name=f"PID_opt_{scenario_name}",
-                controller_instance=controller_instance
+                controller_instance=controller_instance,
+                metrics=OBJECTIVE_METRICS
             )
 
             # If simulation fails or produces no metrics, apply a massive penalty
@@ -0,0 +1,156 @@
+# optimization_suite/pid_schedule_tuner.py
+
+"""
+================================================================================
+          Gain-Schedule Tuner for the Gain-Scheduled PID (PID_GS)
+================================================================================
+A single PID gain set has to compromise across the 80%-110% power range. This
+tuner instead optimizes one gain set per operating band, i.e. per cell of the
+PID_GS schedule grid, and assembles the results into the schedule tables.
+
+For every cell, short band-local scenarios are built (the plant starts at the
+cell's reactor power and the load steps up/down by `band_step_pct` around the
+cell's load demand), and Differential Evolution minimizes the existing
+`_pid_objective_function` over them. Each band is warm-started from the best
+gains of the previous band. The final schedule is saved as
+'PID_GS_optimized.yaml' and auto-validated on the full scenario suite.
+"""
+
+import logging
+import os
+import time
+import itertools
+import yaml
+import numpy as np
+from scipy.optimize import differential_evolution
+from typing import Dict, Any, List, Optional
+
+from analysis.scenario_specs import compile_scenario
+from optimization_suite.auto_validator import auto_validate_and_report
+from optimization_suite.pid_global_optimizer import _pid_objective_function
+
+logger = logging.getLogger(__name__)
+
+
+def build_band_scenarios(
+    core_params: Dict[str, Any],
+    operating_point: Dict[str, float],
+    step_pct: float = 5.0,
+    duration_s: float = 150.0,
+    step_time_s: float = 20.0
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds short scenarios that exercise the plant around one operating point.
+
+    Args:
+        operating_point (dict): Values (fractions of rated) for 'reactor_power'
+                                and/or 'load_demand'. A missing variable takes
+                                the value of the other one.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Scenario configs keyed by unique names.
+    """
+    sim_dt = core_params.get('simulation', {}).get('dt', 0.02)
+    rated_electrical_mw = core_params.get('reactor', {}).get('P0', 3411.0) * core_params.get('coupling', {}).get('eta_transfer', 0.98)
+    power_fraction = operating_point.get('reactor_power', operating_point.get('load_demand'))
+    load_fraction = operating_point.get('load_demand', power_fraction)
+    initial_load = power_fraction * rated_electrical_mw
+    target_load = load_fraction * rated_electrical_mw
+
+    tag = "_".join(f"{k}{v:.3f}" for k, v in operating_point.items())
+    scenarios = {}
+    for direction, sign in (('up', 1.0), ('down', -1.0)):
+        final_load = target_load * (1.0 + sign * step_pct / 100.0)
+        name = f"band_{tag}_step_{direction}"
+        scenarios[name] = compile_scenario(name, {
+            'description': f"Band tuning: load {initial_load:.0f} -> {final_load:.0f} MW at {step_time_s:.0f}s.",
+            'load_profile': {'type': 'step', 'units': 'mw', 'initial': initial_load, 'final': final_load, 'step_t': step_time_s},
+            'max_steps': int(duration_s / sim_dt),
+            'reset_options': {'initial_power_level': power_fraction},
+        }, core_params)
+    return scenarios
+
+
+def tune_pid_schedule_de(
+    base_config: Dict[str, Any],
+    config_file_path_for_validation: str,
+    **cli_overrides: Any
+) -> Optional[Dict[str, Any]]:
+    """
+    Tunes the PID_GS gain tables band by band with Differential Evolution.
+
+    Settings are read from CORE_PARAMETERS['optimization']['PID_GS'] (all optional):
+    'breakpoints' (defaults to the PID_GS schedule), 'param_names', 'bounds',
+    'de_params', 'band_step_pct' and 'band_duration_s'.
+
+    Returns:
+        Optional[Dict[str, Any]]: The optimized 'gain_schedule' block, or None on failure.
+    """
+    logger.info("--- Starting Gain-Schedule Tuning (Differential Evolution per band) ---")
+    start_time = time.time()
+
+    core_params = base_config.get('CORE_PARAMETERS', {})
+    gs_config = core_params.get('controllers', {}).get('PID_GS', {})
+    opt_settings = {**core_params.get('optimization', {}).get('PID_GS', {}), **cli_overrides}
+
+    breakpoints = opt_settings.get('breakpoints') or gs_config.get('gain_schedule', {}).get('breakpoints')
+    if not breakpoints:
+        logger.error("No gain-schedule breakpoints configured for PID_GS.")
+        return None
+    variables = list(breakpoints)
+    grid_shape = tuple(len(breakpoints[v]) for v in variables)
+
+    param_names = opt_settings.get('param_names', ['kp', 'ki', 'kd'])
+    bounds = [tuple(opt_settings.get('bounds', {}).get(p, (0.001, 2.0))) for p in param_names]
+    de_params = {'maxiter': 20, 'popsize': 10, 'tol': 0.01, 'workers': 1, 'disp': False, 'seed': 42,
+                 **opt_settings.get('de_params', {})}
+    logger.info(f"Schedule grid {dict(zip(variables, grid_shape))}, DE Params: {de_params}, Bounds: {bounds}")
+
+    tables = {p: np.full(grid_shape, float(gs_config.get(p, np.nan))) for p in ('kp', 'ki', 'kd')}
+    band_costs: List[float] = []
+    x0: Optional[np.ndarray] = None
+
+    try:
+        for cell in itertools.product(*(range(n) for n in grid_shape)):
+            operating_point = {v: float(breakpoints[v][i]) for v, i in zip(variables, cell)}
+            band_scenarios = build_band_scenarios(core_params, operating_point,
+                                                  step_pct=opt_settings.get('band_step_pct', 5.0),
+                                                  duration_s=opt_settings.get('band_duration_s', 150.0))
+            logger.info(f"--- Tuning band {operating_point} on {len(band_scenarios)} scenarios ---")
+
+            result = differential_evolution(_pid_objective_function, bounds,
+                                            args=(base_config, band_scenarios, param_names), x0=x0, **de_params)
+            band_costs.append(float(result.fun))
+            if np.isfinite(result.fun):
+                for name, value in zip(param_names, result.x):
+                    tables[name][cell] = float(value)
+                x0 = np.asarray(result.x)
+                logger.info(f"Band {operating_point}: cost={result.fun:.4f}, gains={dict(zip(param_names, np.round(result.x, 5)))}")
+            else:
+                logger.warning(f"Band {operating_point} did not converge to a finite cost. Keeping the flat gains.")
+
+        gain_schedule = {'breakpoints': {v: [float(b) for b in breakpoints[v]] for v in variables}}
+        gain_schedule.update({p: tables[p].tolist() for p in ('kp', 'ki', 'kd')})
+        logger.info(f"Gain-schedule tuning finished in {time.time() - start_time:.2f}s. Band costs: {np.round(band_costs, 4).tolist()}")
+
+        project_root = os.path.abspath(os.path.join(os.path.dirname(config_file_path_for_validation), '..'))
+        save_pid_schedule(gain_schedule, project_root)
+        auto_validate_and_report(controller_identifier='PID_GS_optimized', config_path=config_file_path_for_validation)
+        return gain_schedule
+
+    except Exception as e:
+        logger.error(f"Exception during gain-schedule tuning: {e}", exc_info=True)
+        return None
+
+
+def save_pid_schedule(gain_schedule: Dict[str, Any], project_root: str):
+    """Saves the optimized gain schedule to a standard YAML file."""
+    filepath = os.path.join(project_root, 'config', 'optimized_controllers', 'PID_GS_optimized.yaml')
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        data_to_save = {'PID_GS_optimized': {'gain_schedule': gain_schedule}}
+        with open(filepath, 'w') as f:
+            yaml.dump(data_to_save, f, default_flow_style=False, sort_keys=False)
+        logger.info(f"Optimized PID gain schedule saved to {filepath}")
+    except Exception as e:
+        logger.error(f"Failed to save PID gain schedule to {filepath}: {e}", exc_info=True)
@@ -0,0 +1,290 @@
+# optimization_suite/rl_distiller.py
+
+"""
+================================================================================
+          RL Policy Distillation into Compact Student Controllers
+================================================================================
+This file distills a trained RL agent (the "teacher", typically a SAC policy
+with a 512x512 MLP) into a much cheaper "student" policy:
+
+1. The teacher is rolled out on every scenario from `get_scenarios`, and each
+   normalized observation it sees is recorded together with its action.
+   Optionally, perturbed copies of those states are labelled by the teacher
+   as well, so the student also learns the neighbourhood of the trajectories.
+2. A student is fitted to the (observation, action) dataset: either a tiny
+   MLP (exported as a NumpyMLPPolicy) or a gridded LookupTablePolicy.
+3. Teacher and student are validated on all scenarios, and the per-scenario
+   metric differences and per-step inference cost are reported. The teacher
+   is usually already the NumPy fast-inference export (rl_fast_inference.py),
+   so the speedup over the teacher is reported with the teacher's wrapper
+   class, next to the speedup over SB3 `predict()` (RLAgentWrapper).
+
+The student is saved as a .npz file, which `load_controller` wraps as a
+BaseController like any other controller.
+"""
+
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional, Sequence, Tuple, Union
+
+from analysis.parameter_manager import ParameterManager
+from analysis.scenario_definitions import get_scenarios
+from analysis.scenario_executor import ScenarioExecutor
+from analysis.metrics_engine import MetricsEngine
+from controllers import (BaseController, FastRLAgentWrapper, NumpyMLPPolicy, RLAgentWrapper,
+                         LookupTablePolicy, load_controller, load_rl_agent_from_file)
+
+logger = logging.getLogger(__name__)
+
+
+class _ObservationRecorder(BaseController):
+    """Forwards `step` to the teacher and records every observation/action pair."""
+
+    def __init__(self, teacher: BaseController, config: Dict[str, Any], dt: float):
+        super().__init__(config, dt)
+        self.teacher = teacher
+        self.observations = []
+        self.actions = []
+
+    def step(self, observation: np.ndarray) -> float:
+        action = float(np.asarray(self.teacher.step(observation)).reshape(-1)[0])
+        self.observations.append(np.array(observation, dtype=np.float32, copy=True))
+        self.actions.append(action)
+        return action
+
+    def reset(self):
+        self.teacher.reset()
+
+    def update_parameters(self, new_params: Dict[str, Any]):
+        self.teacher.update_parameters(new_params)
+
+    def get_parameters(self) -> Dict[str, Any]:
+        return self.teacher.get_parameters()
+
+
+def _label_with_teacher(teacher: BaseController, observations: np.ndarray) -> np.ndarray:
+    """Returns teacher actions for a batch, using `step_batch` when the teacher has it."""
+    if hasattr(teacher, 'step_batch'):
+        return np.asarray(teacher.step_batch(observations), dtype=np.float64)
+    return np.array([float(np.asarray(teacher.step(obs)).reshape(-1)[0]) for obs in observations])
+
+
+def collect_teacher_dataset(
+    teacher: BaseController,
+    full_config: Dict[str, Any],
+    augment_copies: int = 2,
+    augment_noise_std: float = 0.05,
+    seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolls out the teacher on all scenarios and returns (observations, actions).
+
+    Args:
+        teacher (BaseController): The trained controller to imitate.
+        full_config (dict): The full configuration containing 'CORE_PARAMETERS'.
+        augment_copies (int): Number of perturbed copies of each visited state
+                              to label with the teacher (0 disables augmentation).
+        augment_noise_std (float): Std of the Gaussian noise in normalized units.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Observations (N, 6) and actions (N,).
+    """
+    core_params = full_config['CORE_PARAMETERS']
+    dt = core_params.get('simulation', {}).get('dt', 0.02)
+    executor = ScenarioExecutor(full_config)
+    recorder = _ObservationRecorder(teacher, core_params, dt)
+
+    for scenario_name, scenario_conf in get_scenarios(core_params).items():
+        recorder.reset()
+        n_before = len(recorder.actions)
+        executor.execute(scenario_name, scenario_conf, 'Teacher', recorder)
+        logger.info(f"Distillation rollout '{scenario_name}': {len(recorder.actions) - n_before} states recorded.")
+
+    if not recorder.observations:
+        raise RuntimeError("Teacher rollouts produced no observations to distill from.")
+    observations = np.stack(recorder.observations).astype(np.float64)
+    actions = np.asarray(recorder.actions, dtype=np.float64)
+
+    if augment_copies > 0:
+        rng = np.random.default_rng(seed)
+        perturbed = np.repeat(observations, augment_copies, axis=0)
+        perturbed = np.clip(perturbed + rng.normal(0.0, augment_noise_std, size=perturbed.shape), -1.0, 1.0)
+        teacher.reset()
+        perturbed_actions = _label_with_teacher(teacher, perturbed.astype(np.float32))
+        observations = np.vstack([observations, perturbed])
+        actions = np.concatenate([actions, perturbed_actions])
+
+    logger.info(f"Distillation dataset: {len(actions)} samples ({augment_copies} augmented copies per visited state).")
+    return observations, actions
+
+
+def fit_mlp_student(
+    observations: np.ndarray,
+    actions: np.ndarray,
+    hidden_layer_sizes: Sequence[int] = (32, 32),
+    max_iter: int = 500,
+    seed: int = 0
+) -> NumpyMLPPolicy:
+    """Fits a small ReLU MLP to the teacher actions and exports it as a NumpyMLPPolicy."""
+    from sklearn.neural_network import MLPRegressor
+
+    regressor = MLPRegressor(hidden_layer_sizes=tuple(hidden_layer_sizes), activation='relu',
+                             max_iter=max_iter, early_stopping=True, random_state=seed)
+    regressor.fit(observations, actions)
+    logger.info(f"MLP student fitted: layers={list(hidden_layer_sizes)}, validation R^2={regressor.best_validation_score_:.4f}")
+    # sklearn stores (in, out) matrices; NumpyMLPPolicy expects the torch (out, in) layout
+    return NumpyMLPPolicy(weights=[w.T for w in regressor.coefs_], biases=regressor.intercepts_,
+                          activation='ReLU', output_transform='clip')
+
+
+def fit_lookup_student(
+    observations: np.ndarray,
+    actions: np.ndarray,
+    obs_indices: Optional[Sequence[int]] = None,
+    bins_per_dim: Union[int, Sequence[int]] = 6
+) -> LookupTablePolicy:
+    """Fits a gridded lookup table to the teacher actions."""
+    return LookupTablePolicy.fit(observations, actions, obs_indices=obs_indices, bins_per_dim=bins_per_dim)
+
+
+def _mean_step_latency_s(controller: BaseController, observations: np.ndarray, n_calls: int = 500) -> float:
+    """Mean wall-clock time of a single `controller.step` call over sample observations."""
+    sample = observations[np.linspace(0, len(observations) - 1, min(n_calls, len(observations))).astype(int)].astype(np.float32)
+    controller.reset()
+    start = time.perf_counter()
+    for obs in sample:
+        controller.step(obs)
+    return (time.perf_counter() - start) / len(sample)
+
+
+def compare_student_to_teacher(
+    teacher: BaseController,
+    student: BaseController,
+    full_config: Dict[str, Any],
+    sample_observations: Optional[np.ndarray] = None,
+    sb3_reference: Optional[BaseController] = None
+) -> pd.DataFrame:
+    """
+    Runs teacher and student on every scenario and tabulates their metrics.
+
+    Args:
+        sb3_reference (BaseController, optional): The teacher as an SB3 RLAgentWrapper, timed as a
+            second latency baseline when the teacher itself is a fast-inference export.
+
+    Returns:
+        pd.DataFrame: One row per (scenario, metric) with 'teacher', 'student' and
+                      'delta' (student - teacher) columns. `df.attrs` carries the
+                      mean per-step latencies, the teacher's wrapper class
+                      ('teacher_implementation') and the speedup over it, and
+                      the speedup over SB3 predict() ('speedup_vs_sb3') when known.
+    """
+    core_params = full_config['CORE_PARAMETERS']
+    executor = ScenarioExecutor(full_config)
+    metrics_engine = MetricsEngine(core_params)
+
+    rows = []
+    for scenario_name, scenario_conf in get_scenarios(core_params).items():
+        scenario_metrics = {}
+        for role, controller in (('teacher', teacher), ('student', student)):
+            controller.reset()
+            results_df = executor.execute(scenario_name, scenario_conf, role, controller)
+            scenario_metrics[role] = metrics_engine.calculate(results_df, scenario_conf)
+        # Scenario-driven metrics need the scenario config; a sudden-load scenario must yield the teacher's agility
+        if ('sudden' in scenario_conf.get('description', '').lower()
+                and not np.isfinite(scenario_metrics['teacher'].get('agility_response_time_index', np.nan))):
+            logger.warning(f"Teacher has no finite agility_response_time_index on sudden-load scenario '{scenario_name}' "
+                           f"(run ended before the load step or never reached the response threshold).")
+        for metric in MetricsEngine.METRIC_KEYS:
+            t_val = scenario_metrics['teacher'].get(metric, np.nan)
+            s_val = scenario_metrics['student'].get(metric, np.nan)
+            rows.append({'scenario': scenario_name, 'metric': metric, 'teacher': t_val, 'student': s_val, 'delta': s_val - t_val})
+
+    comparison_df = pd.DataFrame(rows)
+    if sample_observations is not None and len(sample_observations):
+        teacher_latency = _mean_step_latency_s(teacher, sample_observations)
+        student_latency = _mean_step_latency_s(student, sample_observations)
+        teacher_implementation = type(teacher).__name__
+        comparison_df.attrs.update({'teacher_step_latency_s': teacher_latency, 'student_step_latency_s': student_latency,
+                                    'teacher_implementation': teacher_implementation,
+                                    'speedup': teacher_latency / max(student_latency, 1e-12)})
+        if isinstance(teacher, RLAgentWrapper):
+            sb3_reference = teacher
+        if sb3_reference is not None:
+            sb3_latency = teacher_latency if sb3_reference is teacher else _mean_step_latency_s(sb3_reference, sample_observations)
+            comparison_df.attrs.update({'sb3_step_latency_s': sb3_latency, 'speedup_vs_sb3': sb3_latency / max(student_latency, 1e-12)})
+        logger.info(f"Per-step latency: teacher ({teacher_implementation}) {teacher_latency * 1e6:.1f} us, student "
+                    f"{student_latency * 1e6:.1f} us (speedup x{comparison_df.attrs['speedup']:.1f} over the teacher"
+                    + (f", x{comparison_df.attrs['speedup_vs_sb3']:.1f} over SB3 predict())." if sb3_reference is not None else ")."))
+    return comparison_df
+
+
+def distill_rl_agent(
+    model_path: str,
+    config_path: str,
+    student_type: str = 'mlp',
+    output_path: Optional[str] = None,
+    augment_copies: int = 2,
+    seed: int = 0,
+    **student_kwargs
+) -> Optional[Dict[str, Any]]:
+    """
+    Full pipeline: roll out the teacher, fit a student, save it and compare both.
+
+    Args:
+        model_path (str): Path to the trained SB3 model (.zip).
+        config_path (str): Path to the main parameters file.
+        student_type (str): 'mlp' or 'lookup'.
+        output_path (str, optional): Where to save the student .npz. Defaults to
+                                     '<model_name>_distilled_<type>.npz' next to the model.
+        **student_kwargs: Forwarded to `fit_mlp_student` / `fit_lookup_student`.
+
+    Returns:
+        Optional[Dict[str, Any]]: {'student_path', 'comparison_path', 'comparison'},
+                                  or None if the pipeline failed.
+    """
+    if student_type not in ('mlp', 'lookup'):
+        raise ValueError(f"Unknown student type '{student_type}'. Use 'mlp' or 'lookup'.")
+
+    try:
+        full_config = ParameterManager(config_filepath=config_path).get_all_parameters()
+        core_params = full_config['CORE_PARAMETERS']
+        dt = core_params.get('simulation', {}).get('dt', 0.02)
+
+        teacher, teacher_name = load_controller(model_path, full_config, dt)
+        if teacher is None:
+            logger.error(f"Could not load teacher model from '{model_path}'.")
+            return None
+
+        observations, actions = collect_teacher_dataset(teacher, full_config, augment_copies=augment_copies, seed=seed)
+        if student_type == 'mlp':
+            policy = fit_mlp_student(observations, actions, seed=seed, **student_kwargs)
+        else:
+            policy = fit_lookup_student(observations, actions, **student_kwargs)
+
+        output_path = output_path or os.path.join(os.path.dirname(os.path.abspath(model_path)),
+                                                  f"{teacher_name}_distilled_{student_type}.npz")
+        policy.save(output_path)
+        student = FastRLAgentWrapper(policy=policy, config=core_params, dt=dt, source_model_class='Distilled')
+
+        # The usual teacher is the NumPy export; SB3 predict() on the same model is timed as well
+        sb3_reference = None
+        if isinstance(teacher, FastRLAgentWrapper) and model_path.endswith('.zip'):
+            model = load_rl_agent_from_file(model_path, algorithm='SAC')
+            if model is not None:
+                sb3_reference = RLAgentWrapper(model=model, config=core_params, dt=dt)
+        comparison = compare_student_to_teacher(teacher, student, full_config, sample_observations=observations,
+                                                sb3_reference=sb3_reference)
+        comparison_path = os.path.splitext(output_path)[0] + "_comparison.csv"
+        comparison.to_csv(comparison_path, index=False)
+
+        worst = comparison.assign(abs_delta=comparison['delta'].abs()).sort_values('abs_delta', ascending=False).head(5)
+        logger.info(f"Largest metric differences (student - teacher):\n{worst[['scenario', 'metric', 'teacher', 'student', 'delta']].to_string(index=False)}")
+        logger.info(f"--- Distillation Finished. Student at: {output_path}, comparison at: {comparison_path} ---")
+        return {'student_path': output_path, 'comparison_path': comparison_path, 'comparison': comparison}
+
+    except Exception as e:
+        logger.error(f"RL distillation failed critically: {e}", exc_info=True)
+        return None
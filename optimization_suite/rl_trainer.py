@@ -33,6 +33,7 @@ from stable_baselines3.common.evaluation import evaluate_policy
 from environment.pwr_gym_env import PWRGymEnvUnified
 from analysis.scenario_definitions import get_scenarios
 from analysis.metrics_engine import MetricsEngine
+from analysis.metric_registry import METRIC_REGISTRY
 from optimization_suite.auto_validator import auto_validate_and_report
 
 logger = logging.getLogger(__name__)
@@ -61,6 +62,9 @@ class MultiObjectiveCurriculumCallback(EvalCallback):
         """
         self.logger.info(f"Evaluation finished. Mean reward: {self.last_mean_reward:.2f}")
 
+        # Only the metrics the current phase is checked against are computed
+        current_phase = self.phases.get(self.sorted_phase_keys[self.current_phase_index], {}) if self.sorted_phase_keys else {}
+        threshold_metrics = [metric for metric in current_phase.get('thresholds', {}) if metric in METRIC_REGISTRY]
         all_metrics_data = []
         for _ in range(self.n_eval_episodes):
             obs, done, episode_data = self.eval_env.reset(), [False], []
@@ -69,7 +73,7 @@ class MultiObjectiveCurriculumCallback(EvalCallback):
                 obs, _, done, info = self.eval_env.step(action)
                 episode_data.append(info[0])
             
-            metrics = self.metrics_engine.calculate(pd.DataFrame(episode_data), self.core_config)
+            metrics = self.metrics_engine.calculate(pd.DataFrame(episode_data), self.core_config, metrics=threshold_metrics)
             all_metrics_data.append(metrics)
 
         avg_metrics = pd.DataFrame(all_metrics_data).mean().to_dict()
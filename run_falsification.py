@@ -0,0 +1,80 @@
+# run_falsification.py
+
+"""
+================================================================================
+          Falsification Search for Worst-Case Load Profiles (DTAF v3.5)
+================================================================================
+Command-line interface to analysis/falsification.py: searches a scenario
+family for the load disturbances minimizing each controller's safety margin
+and writes the worst cases found as a YAML scenario spec file, plus the
+search history as CSV.
+
+    python run_falsification.py --family load_schedule --controllers PID FLC \
+        --vary step1_pct step1_time_s ramp_pct ramp_rate_pct_per_min grid_H --workers 8
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import re
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from analysis.scenario_families import get_family, SCENARIO_FAMILIES
+from analysis.falsification import falsify, write_falsified_scenarios
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)-8s] %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _parse_ranges(items):
+    """Parses 'name=low,high' range overrides."""
+    ranges = {}
+    for item in items or []:
+        name, _, value = item.partition('=')
+        low, high = (float(v) for v in value.split(','))
+        ranges[name] = (min(low, high), max(low, high))
+    return ranges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a scenario family for the worst-case disturbances of controllers.")
+    parser.add_argument("--family", default='load_schedule', choices=sorted(SCENARIO_FAMILIES), help="Scenario family searched.")
+    parser.add_argument("--controllers", nargs='+', required=True, help="Controller names or direct paths to models.")
+    parser.add_argument("--vary", nargs='*', help="Searched parameters (all ranged ones except duration_s by default).")
+    parser.add_argument("--range", nargs='*', dest='ranges', help="Operational bounds overrides: name=low,high.")
+    parser.add_argument("--generations", type=int, default=None, help="Maximum number of generations.")
+    parser.add_argument("--popsize", type=int, default=None, help="Population size per searched parameter.")
+    parser.add_argument("--n-worst", type=int, default=None, help="Worst cases emitted as scenarios.")
+    parser.add_argument("--no-stop", action='store_true', help="Keep searching after the first violation.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the search.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (1 = serial).")
+    parser.add_argument("--no-cache", action='store_true', help="Simulate every run instead of reusing cached results.")
+    parser.add_argument("--output-dir", default=os.path.join(project_root, 'results', 'falsification'), help="Output directory.")
+    args = parser.parse_args()
+
+    settings = {key: value for key, value in {'max_generations': args.generations, 'popsize': args.popsize,
+                                              'n_worst': args.n_worst, 'seed': args.seed}.items() if value is not None}
+    if args.no_stop:
+        settings['stop_on_violation'] = False
+    family = get_family(args.family)
+    config_file = os.path.join(project_root, 'config', 'parameters.py')
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    for controller in args.controllers:
+        result = falsify(config_file, family, controller, parameters=args.vary, ranges=_parse_ranges(args.ranges),
+                         settings=settings, max_workers=args.workers, use_cache=False if args.no_cache else None)
+        label = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{family.name}_{os.path.splitext(os.path.basename(controller))[0]}")
+        result['history'].to_csv(os.path.join(args.output_dir, f"history_{label}_{timestamp}.csv"), index=False)
+        spec_path = os.path.join(args.output_dir, f"falsified_{label}_{timestamp}.yaml")
+        write_falsified_scenarios(config_file, family, controller, result, spec_path)
+        logger.info(f"{controller}: {'violation' if result['violation_found'] else 'no violation'} found, worst margin "
+                    f"{result['worst_margin']:.4g} after {result['n_runs']} runs; scenarios written to {spec_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# run_minimize_failure.py
+
+"""
+================================================================================
+          Minimization of a Failing Scenario (DTAF v3.5)
+================================================================================
+Command-line interface to analysis/failure_minimization.py: shrinks a
+(scenario, controller) pair that ends on a safety limit to the shortest
+compact scenario reproducing the failure, and writes it as a YAML scenario
+spec file. Add the file to CORE_PARAMETERS['simulation']['scenario_spec_paths']
+to iterate on the failure in seconds.
+
+    python run_minimize_failure.py --scenario combined_challenge_final_exam --controller PID
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from analysis.failure_minimization import minimize_failure, write_minimal_scenario
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)-8s] %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shrink a failing scenario to its shortest reproducing window.")
+    parser.add_argument("--scenario", required=True, help="Scenario name of the scenario library.")
+    parser.add_argument("--controller", required=True, help="Controller name or direct path to a model.")
+    parser.add_argument("--snapshot-interval", type=float, default=None, help="Seconds between plant-state snapshots.")
+    parser.add_argument("--tail", type=float, default=None, help="Seconds kept after the original failure time.")
+    parser.add_argument("--output-dir", default=os.path.join(project_root, 'results', 'minimized'), help="Output directory.")
+    args = parser.parse_args()
+
+    settings = {key: value for key, value in {'snapshot_interval_s': args.snapshot_interval,
+                                              'tail_s': args.tail}.items() if value is not None}
+    config_file = os.path.join(project_root, 'config', 'parameters.py')
+    try:
+        result = minimize_failure(config_file, args.scenario, args.controller, settings=settings)
+    except ValueError as e:
+        logger.critical(str(e))
+        sys.exit(1)
+    path = os.path.join(args.output_dir, f"{result['name']}.yaml")
+    write_minimal_scenario(result, path)
+    logger.info(f"{result['original_duration_s']:.1f} s scenario reduced to {result['duration_s']:.2f} s "
+                f"({'verified' if result['reproduced'] else 'NOT verified'}, {result['n_runs']} runs); written to {path}")
+
+
+if __name__ == "__main__":
+    main()
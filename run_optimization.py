@@ -31,7 +31,7 @@ logger = logging.getLogger(__name__)
 def main():
     """Parses arguments and runs the selected controller optimization."""
     parser = argparse.ArgumentParser(description="Run Automated Controller Optimization (PID/FLC).", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-    parser.add_argument("--controller", required=True, choices=['PID', 'FLC'], help="Controller type to optimize.")
+    parser.add_argument("--controller", required=True, choices=['PID', 'PID_GS', 'FLC'], help="Controller type to optimize.")
     parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], help="Set the logging level.")
     args = parser.parse_args()
 
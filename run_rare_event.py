@@ -0,0 +1,79 @@
+# run_rare_event.py
+
+"""
+================================================================================
+          Rare-Event Estimation of Safety-Limit Exceedance (DTAF v3.5)
+================================================================================
+Command-line interface to analysis/rare_event.py: estimates, by subset
+simulation, the probability that each controller violates a safety limit on
+a scenario under log-normal plant-parameter uncertainty, with its coefficient
+of variation. Writes a summary CSV plus the per-level table and the failure
+samples of each controller.
+
+    python run_rare_event.py --scenario sudden_load_increase_5pct --controllers PID FLC \
+        --samples-per-level 1000 --relative-std 0.08 --workers 8
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import re
+import sys
+
+import pandas as pd
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from analysis.sensitivity import SENSITIVITY_PARAMETERS
+from analysis.rare_event import PERFORMANCE_FUNCTIONS, estimate_failure_probability
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)-8s] %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate safety-limit exceedance probabilities by subset simulation.")
+    parser.add_argument("--scenario", required=True, help="Scenario name of the scenario library.")
+    parser.add_argument("--controllers", nargs='+', required=True, help="Controller names or direct paths to models.")
+    parser.add_argument("--parameters", nargs='*', choices=sorted(SENSITIVITY_PARAMETERS), default=None,
+                        help="Uncertain plant parameters (all by default).")
+    parser.add_argument("--relative-std", type=float, default=None, help="Log-normal relative standard deviation of the parameters.")
+    parser.add_argument("--performance", choices=sorted(PERFORMANCE_FUNCTIONS), default=None, help="Performance function.")
+    parser.add_argument("--samples-per-level", type=int, default=None, help="Runs per subset simulation level.")
+    parser.add_argument("--max-levels", type=int, default=None, help="Maximum number of levels.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the sampling.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (1 = serial).")
+    parser.add_argument("--no-cache", action='store_true', help="Simulate every run instead of reusing cached results.")
+    parser.add_argument("--output-dir", default=os.path.join(project_root, 'results', 'rare_event'), help="Output directory.")
+    args = parser.parse_args()
+
+    settings = {key: value for key, value in {'relative_std': args.relative_std, 'performance': args.performance,
+                                              'samples_per_level': args.samples_per_level, 'max_levels': args.max_levels,
+                                              'seed': args.seed}.items() if value is not None}
+    config_file = os.path.join(project_root, 'config', 'parameters.py')
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    summary = []
+    for controller in args.controllers:
+        result = estimate_failure_probability(config_file, args.scenario, controller, parameters=args.parameters,
+                                              settings=settings, max_workers=args.workers,
+                                              use_cache=False if args.no_cache else None)
+        label = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{os.path.splitext(os.path.basename(controller))[0]}_{args.scenario}")
+        result['levels'].to_csv(os.path.join(args.output_dir, f"levels_{label}_{timestamp}.csv"), index=False)
+        result['failure_samples'].to_csv(os.path.join(args.output_dir, f"failures_{label}_{timestamp}.csv"), index=False)
+        summary.append({'controller': controller, 'scenario': args.scenario, 'performance': result['performance'],
+                        'probability': result['probability'], 'cov': result['cov'], 'levels': len(result['levels']),
+                        'n_runs': result['n_runs'], 'converged': result['converged']})
+        logger.info(f"{controller}: P(failure) = {result['probability']:.3g} (CoV {result['cov']:.2f}) "
+                    f"from {result['n_runs']} runs.")
+
+    path = os.path.join(args.output_dir, f"rare_event_{re.sub(r'[^A-Za-z0-9_.-]+', '_', args.scenario)}_{timestamp}.csv")
+    pd.DataFrame(summary).to_csv(path, index=False)
+    logger.info(f"Summary written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# run_sensitivity.py
+
+"""
+================================================================================
+          Sobol Sensitivity of Metrics to Plant Parameters (DTAF v3.5)
+================================================================================
+Command-line interface to the global sensitivity analysis of
+analysis/sensitivity.py: first-order and total Sobol indices, with bootstrap
+confidence intervals, of metrics to the plant parameters, for each controller
+on one scenario. Writes one CSV table per controller.
+
+    python run_sensitivity.py --scenario sudden_load_increase_5pct --controllers PID FLC \
+        --n 256 --workers 8 --parameters alpha_f alpha_c tau_t grid_H
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import re
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from analysis.parameter_manager import ParameterManager
+from analysis.sensitivity import SENSITIVITY_PARAMETERS, DEFAULT_METRICS, default_ranges, run_sobol_analysis
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)-8s] %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _parse_ranges(items):
+    """Parses 'name=low,high' range overrides."""
+    ranges = {}
+    for item in items or []:
+        name, _, value = item.partition('=')
+        low, high = (float(v) for v in value.split(','))
+        ranges[name] = (min(low, high), max(low, high))
+    return ranges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sobol sensitivity analysis of metrics to plant parameters.")
+    parser.add_argument("--scenario", required=True, help="Scenario name of the scenario library.")
+    parser.add_argument("--controllers", nargs='+', required=True, help="Controller names or direct paths to models.")
+    parser.add_argument("--parameters", nargs='*', choices=sorted(SENSITIVITY_PARAMETERS), default=None,
+                        help="Parameters to analyse (all by default).")
+    parser.add_argument("--span", type=float, default=0.1, help="Default range: nominal value +/- this fraction.")
+    parser.add_argument("--range", nargs='*', dest='ranges', help="Range overrides: name=low,high.")
+    parser.add_argument("--n", type=int, default=256, help="Base sample size N (power of two); N * (d + 2) runs.")
+    parser.add_argument("--metrics", nargs='*', default=None, help=f"Analysed metrics (default: {' '.join(DEFAULT_METRICS)}).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the sample and of the bootstrap.")
+    parser.add_argument("--bootstrap", type=int, default=1000, help="Bootstrap resamples for the confidence intervals.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (1 = serial).")
+    parser.add_argument("--no-cache", action='store_true', help="Recompute instead of reusing cached results.")
+    parser.add_argument("--output-dir", default=os.path.join(project_root, 'results', 'sensitivity'), help="Output directory.")
+    args = parser.parse_args()
+
+    config_file = os.path.join(project_root, 'config', 'parameters.py')
+    core_config = ParameterManager(config_filepath=config_file).get_all_parameters()['CORE_PARAMETERS']
+    overrides = _parse_ranges(args.ranges)
+    ranges = {**default_ranges(core_config, args.parameters, args.span),
+              **{name: span for name, span in overrides.items() if not args.parameters or name in args.parameters}}
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    for controller in args.controllers:
+        table = run_sobol_analysis(config_file, args.scenario, controller, ranges=ranges, n=args.n, metrics=args.metrics,
+                                   seed=args.seed, n_bootstrap=args.bootstrap, max_workers=args.workers,
+                                   use_cache=False if args.no_cache else None)
+        label = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{os.path.splitext(os.path.basename(controller))[0]}_{args.scenario}")
+        path = os.path.join(args.output_dir, f"sobol_{label}_{timestamp}.csv")
+        table.to_csv(path, index=False)
+        logger.info(f"Sobol indices for {controller} written to {path}")
+        for metric, group in table.groupby('metric', sort=False):
+            logger.info(f"{metric}:\n" + group.sort_values('ST', ascending=False)[['parameter', 'S1', 'ST', 'ST_low', 'ST_high']]
+                        .to_string(index=False, float_format='{:.3f}'.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# run_sweep.py
+
+"""
+================================================================================
+          Parameter Sweep over a Parametric Scenario Family (DTAF v3.5)
+================================================================================
+Command-line interface to run a scenario family (analysis/scenario_families.py)
+over a grid or Latin-hypercube design against one or more controllers, and
+write the tidy results table (plus optional heat-map pivots) as CSV.
+
+    python run_sweep.py --family step_load --controllers PID FLC \
+        --grid magnitude_pct=9 grid_H=5 --workers 8 --heatmap max_freq_deviation_hz magnitude_pct grid_H
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from analysis.scenario_families import get_family, SCENARIO_FAMILIES
+from analysis.parameter_sweep import run_sweep, sweep_heatmap
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)-8s] %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _parse_levels(items):
+    """Parses 'name=N' (N evenly spaced values) or 'name=v1,v2,...' / 'name=60.0' (explicit values)."""
+    levels = {}
+    for item in items or []:
+        name, _, value = item.partition('=')
+        levels[name] = [float(v) for v in value.split(',') if v] if (',' in value or '.' in value) else int(value)
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parametric scenario family sweep.")
+    parser.add_argument("--family", required=True, choices=sorted(SCENARIO_FAMILIES), help="Scenario family to sweep.")
+    parser.add_argument("--controllers", nargs='+', required=True, help="Controller names or direct paths to models.")
+    parser.add_argument("--grid", nargs='*', help="Grid design: name=N evenly spaced levels, or name=v1,v2,... / name=60.0 values.")
+    parser.add_argument("--lhs", type=int, default=None, help="Latin-hypercube design with this many samples.")
+    parser.add_argument("--vary", nargs='*', help="Parameters varied by the Latin-hypercube design.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the Latin-hypercube design.")
+    parser.add_argument("--metrics", nargs='*', default=None, help="Metrics to calculate (all by default).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (1 = serial).")
+    parser.add_argument("--no-cache", action='store_true', help="Simulate every run instead of reusing cached results.")
+    parser.add_argument("--heatmap", nargs=3, metavar=('METRIC', 'X', 'Y'), help="Also write a METRIC heat-map pivot per controller.")
+    parser.add_argument("--output-dir", default=os.path.join(project_root, 'results', 'sweeps'), help="Output directory.")
+    args = parser.parse_args()
+
+    family = get_family(args.family)
+    if args.lhs:
+        points = family.latin_hypercube(args.lhs, args.vary or list(family.ranges), seed=args.seed)
+    elif args.grid:
+        points = family.grid(_parse_levels(args.grid))
+    else:
+        parser.error("Choose a design: --grid name=levels ... or --lhs N --vary name ...")
+
+    config_file = os.path.join(project_root, 'config', 'parameters.py')
+    table = run_sweep(config_file, family, points, args.controllers, max_workers=args.workers, metrics=args.metrics,
+                      use_cache=False if args.no_cache else None)
+    if table.empty:
+        logger.critical("The sweep produced no results.")
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.join(args.output_dir, f"{family.name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    table.to_csv(f"{stem}.csv")
+    logger.info(f"Sweep table ({len(table)} runs) written to {stem}.csv")
+    if args.heatmap:
+        metric, x, y = args.heatmap
+        for controller in table.index.get_level_values('controller').unique():
+            path = f"{stem}_{metric}_{controller}.csv"
+            sweep_heatmap(table, metric, x, y, controller=controller).to_csv(path)
+            logger.info(f"Heat map of {metric} for {controller} written to {path}")
+
+
+if __name__ == "__main__":
+    main()